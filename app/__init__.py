@@ -20,9 +20,15 @@ def create_app(config_name='default'):
 
     # Enregistrer les blueprints
     from app.routes.main import main_bp
-    from app.routes.api import api_bp
+    from app.routes.api import api_bp, managers, request_metrics
 
     app.register_blueprint(main_bp)
     app.register_blueprint(api_bp, url_prefix='/api')
 
+    # Gestionnaires construits au premier accès (ou tout de suite si PRELOAD_MANAGERS)
+    managers.init_app(app)
+
+    # Latence, tailles et statuts par route, exposés sur /api/metrics
+    request_metrics.init_app(app)
+
     return app
\ No newline at end of file
@@ -6,9 +6,16 @@ Package des modèles de données
 from .employee import Employee, EmployeeManager
 from .shift import Shift, ShiftManager
 from .planning import PlanningManager
+from .template import WeekTemplate, TemplateManager
+from .occupancy import OccupancyIndex
+from .availability import AvailabilityIndex
+from .importer import PlanningImporter
 
 __all__ = [
     'Employee', 'EmployeeManager',
     'Shift', 'ShiftManager',
-    'PlanningManager'
+    'PlanningManager',
+    'WeekTemplate', 'TemplateManager',
+    'OccupancyIndex', 'AvailabilityIndex',
+    'PlanningImporter'
 ]
\ No newline at end of file
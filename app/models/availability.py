@@ -0,0 +1,120 @@
+"""
+Disponibilités des employés : masques horaires par jour et index de recherche
+"""
+
+from datetime import date
+from typing import Dict, List, Optional, Tuple, Iterable
+from config import Config
+from app.models.occupancy import OccupancyIndex
+
+# Masque d'une journée entièrement disponible (bits 0 à 23)
+FULL_DAY_MASK = (1 << 24) - 1
+
+
+def hours_mask(start_hour: int, duration: int) -> int:
+    """Masque des heures couvertes par un intervalle (passage de minuit replié sur le jour)"""
+    return OccupancyIndex.hours_mask(start_hour, duration)
+
+
+def ranges_to_mask(ranges: Iterable) -> int:
+    """Convertit une liste de plages [début, fin) en masque horaire"""
+    mask = 0
+    for start_hour, end_hour in ranges:
+        start_hour, end_hour = int(start_hour), int(end_hour)
+        duration = end_hour - start_hour if end_hour > start_hour else end_hour + 24 - start_hour
+        mask |= hours_mask(start_hour, duration)
+    return mask
+
+
+def mask_to_ranges(mask: int) -> List[List[int]]:
+    """Convertit un masque horaire en plages [début, fin) lisibles"""
+    ranges = []
+    hour = 0
+    while hour < 24:
+        if mask & (1 << hour):
+            start_hour = hour
+            while hour < 24 and mask & (1 << hour):
+                hour += 1
+            ranges.append([start_hour, hour])
+        else:
+            hour += 1
+    return ranges
+
+
+def date_for(week: str, day: str) -> Optional[str]:
+    """Date ISO d'un jour d'une semaine YYYY-WW (None pour le planning type)"""
+    if not week or day not in Config.DAYS_OF_WEEK:
+        return None
+    year, week_number = map(int, week.split('-'))
+    return date.fromisocalendar(year, week_number, Config.DAYS_OF_WEEK.index(day) + 1).isoformat()
+
+
+class AvailabilityIndex:
+    """
+    Index inversé des disponibilités.
+
+    Chaque employé actif reçoit un rang ; pour chaque (jour, heure) on conserve
+    l'ensemble des employés disponibles sous forme d'entier (bit = rang). Trouver
+    qui est disponible sur un intervalle revient à un ET bit à bit des heures
+    concernées, puis à écarter les quelques employés ayant une absence ce jour-là.
+    """
+
+    def __init__(self, employees: Iterable = ()):
+        self._employees: List = []
+        self._by_slot: List[List[int]] = [[0] * 24 for _ in Config.DAYS_OF_WEEK]
+        self._by_poste: Dict[str, int] = {}
+        self._exceptions_by_date: Dict[str, int] = {}
+
+        for employee in employees:
+            if employee.actif:
+                self._add(employee)
+
+    def _add(self, employee):
+        bit = 1 << len(self._employees)
+        self._employees.append(employee)
+        self._by_poste[employee.poste] = self._by_poste.get(employee.poste, 0) | bit
+
+        for day_index, day_mask in enumerate(employee.disponibilites):
+            slots = self._by_slot[day_index]
+            for hour in range(24):
+                if day_mask & (1 << hour):
+                    slots[hour] |= bit
+
+        for exception_date, _, _ in employee.indisponibilites:
+            self._exceptions_by_date[exception_date] = self._exceptions_by_date.get(exception_date, 0) | bit
+
+    def available_bits(self, day: str, start_hour: int, duration: int, week: str = '',
+                       poste: str = None) -> int:
+        """Ensemble (en bits) des employés disponibles sur l'intervalle"""
+        slots = self._by_slot[Config.DAYS_OF_WEEK.index(day)]
+        bits = (1 << len(self._employees)) - 1
+        for i in range(int(duration)):
+            bits &= slots[(start_hour + i) % 24]
+            if not bits:
+                return 0
+
+        if poste:
+            bits &= self._by_poste.get(poste, 0)
+
+        # Seuls les employés ayant une absence ce jour-là demandent une vérification fine
+        exception_date = date_for(week, day)
+        to_check = bits & self._exceptions_by_date.get(exception_date, 0) if exception_date else 0
+        while to_check:
+            low_bit = to_check & -to_check
+            employee = self._employees[low_bit.bit_length() - 1]
+            if not employee.is_available(day, start_hour, duration, week):
+                bits &= ~low_bit
+            to_check ^= low_bit
+
+        return bits
+
+    def find_available(self, day: str, start_hour: int, duration: int, week: str = '',
+                       poste: str = None) -> List:
+        """Employés disponibles sur l'intervalle"""
+        bits = self.available_bits(day, start_hour, duration, week, poste)
+        employees = []
+        while bits:
+            low_bit = bits & -bits
+            employees.append(self._employees[low_bit.bit_length() - 1])
+            bits ^= low_bit
+        return employees
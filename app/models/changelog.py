@@ -0,0 +1,270 @@
+"""
+Journal des modifications : numéros de version par enregistrement et séquence globale
+"""
+
+import json
+import os
+import threading
+import uuid
+from collections import deque
+from contextlib import contextmanager
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from app.models.storage import SharedFile
+
+# Champs de suivi, attribués par le serveur (jamais repris des données client)
+TRACKING_FIELDS = ('version', 'seq')
+
+
+class ChangeLog:
+    """
+    Séquence de modifications monotone partagée par les gestionnaires.
+
+    Chaque création, modification ou suppression reçoit un numéro de séquence.
+    Les dernières modifications sont conservées en mémoire (dans la limite de
+    `retention`) : un client qui connaît son dernier curseur ne récupère que ce
+    qui a changé depuis. En deçà de `floor` (redémarrage, historique purgé),
+    l'historique est incomplet et le client doit repartir d'un état complet.
+
+    `committed` suit la dernière séquence enregistrée sur disque : les flux
+    d'événements attendent qu'elle avance (publish) pour diffuser.
+
+    En mode multi-processus (`share`), la séquence est commune à tous les
+    processus et à tous les types d'enregistrements : elle est relue puis
+    republiée dans un fichier annexe, sous un verrou unique (`writing`). Les
+    modifications sont aussi ajoutées à un journal partagé (`<fichier>.log`,
+    une ligne JSON par modification) où chaque processus reprend celles des
+    autres : l'historique reste complet, les clients ne repartent pas d'un état
+    complet à chaque écriture d'un autre worker.
+    """
+
+    # Taille du journal partagé au-delà de laquelle il est réduit à ses entrées les plus récentes
+    SHARED_LOG_MAX_BYTES = 1024 * 1024
+
+    def __init__(self, retention: int = 10000):
+        self.retention = retention
+        # La séquence démarre à 1 : le curseur 0 est réservé au client sans historique
+        self.sequence = 1
+        self.committed = 1
+        self.floor = 0
+        self._entries: deque = deque()
+        self._condition = threading.Condition()
+        # Identifiant de la séquence : les versions émises avant un redémarrage ne sont plus
+        # reconnues. En mode multi-processus, il est commun aux workers (fichier annexe).
+        self.epoch = uuid.uuid4().hex[:8]
+        # Séquence partagée entre processus (None : un seul processus)
+        self._storage: Optional[SharedFile] = None
+        self._shared_sequence = 0
+        self._writer_lock = threading.RLock()
+        self._writers = 0
+        self._log_path: Optional[str] = None
+        # (inode, position) de la dernière lecture du journal partagé
+        self._log_position: Tuple[Optional[int], int] = (None, 0)
+
+    def share(self, file_path: str):
+        """
+        Mode multi-processus : séquence commune enregistrée dans `<file_path>.gen`,
+        avec son epoch, repris par tous les workers (un ETag émis par l'un est
+        reconnu par les autres). Un fichier annexe absent démarre un nouvel epoch.
+        """
+        with self._writer_lock:
+            if self._storage is None or self._storage.file_path != file_path:
+                self._storage = SharedFile(file_path)
+                self._shared_sequence = 0
+                self._log_path = f"{file_path}.log"
+                self._log_position = (None, 0)
+                with self.writing():
+                    pass
+
+    @contextmanager
+    def writing(self):
+        """
+        Écriture journalisée. En mode multi-processus, verrou commun aux
+        employés et aux créneaux : la séquence des autres processus est prise en
+        compte avant de numéroter, et la nouvelle séquence publiée en sortie.
+        Les gestionnaires le prennent avant leurs propres verrous (pas d'inversion).
+        """
+        if self._storage is None:
+            yield
+            return
+        with self._writer_lock:
+            storage = self._storage
+            with storage.locked():
+                self._writers += 1
+                try:
+                    if self._writers == 1:
+                        sequence = storage.sync()
+                        if sequence is not None:
+                            self._shared_sequence = sequence
+                            self._catch_up(sequence)
+                        if storage.epoch:
+                            self.epoch = storage.epoch
+                    yield
+                finally:
+                    self._writers -= 1
+                    # Publiée même après une erreur : une séquence attribuée n'est jamais réutilisée
+                    if self._writers == 0 and (self.sequence > self._shared_sequence or not storage.epoch):
+                        self._append_shared_log(self._shared_sequence)
+                        storage.epoch = self.epoch
+                        storage.commit(self.sequence)
+                        self._shared_sequence = self.sequence
+
+    def _catch_up(self, sequence: int):
+        """
+        Reprend les modifications des autres processus jusqu'à `sequence` depuis le
+        journal partagé. Si le journal ne les couvre pas toutes (réduit entre-temps,
+        séquence reprise des données), l'historique repart de `sequence` (observe).
+        """
+        entries = self._read_shared_log()
+        with self._condition:
+            if sequence <= self.sequence:
+                return
+            expected = self.sequence + 1
+            missing = []
+            for entry in entries:
+                if entry[0] > sequence:
+                    break
+                if entry[0] >= expected:
+                    missing.append(entry)
+            complete = [entry[0] for entry in missing] == list(range(expected, sequence + 1))
+            if complete:
+                self._entries.extend(missing)
+                while len(self._entries) > self.retention:
+                    self.floor = self._entries.popleft()[0]
+                self.sequence = self.committed = sequence
+                self._condition.notify_all()
+                return
+        self.observe(sequence)
+
+    def _read_shared_log(self) -> List[Tuple[int, str, str, str]]:
+        """Entrées ajoutées au journal partagé depuis la dernière lecture (sous le verrou commun)"""
+        inode, position = self._log_position
+        try:
+            with open(self._log_path, 'rb') as f:
+                stat = os.fstat(f.fileno())
+                if stat.st_ino != inode or stat.st_size < position:
+                    # Journal réduit (réécrit) depuis la dernière lecture : relu en entier
+                    position = 0
+                f.seek(position)
+                data = f.read()
+        except FileNotFoundError:
+            self._log_position = (None, 0)
+            return []
+
+        # Seules les lignes complètes sont consommées
+        data = data[:data.rfind(b'\n') + 1]
+        self._log_position = (stat.st_ino, position + len(data))
+        entries = []
+        for line in data.splitlines():
+            try:
+                seq, kind, record_id, action = json.loads(line)
+                entries.append((int(seq), kind, record_id, action))
+            except (ValueError, TypeError):
+                continue
+        return entries
+
+    def _append_shared_log(self, since: int):
+        """Ajoute au journal partagé les modifications de ce processus postérieures à `since`"""
+        entries = []
+        with self._condition:
+            for entry in reversed(self._entries):
+                if entry[0] <= since:
+                    break
+                entries.append(entry)
+        entries.reverse()
+        if not entries:
+            return
+
+        self._read_shared_log()  # Position à jour : les lignes ajoutées ici ne seront pas relues
+        with open(self._log_path, 'ab') as f:
+            f.write(b''.join(json.dumps(list(entry)).encode('utf-8') + b'\n' for entry in entries))
+            size = f.tell()
+            inode = os.fstat(f.fileno()).st_ino
+
+        if size > self.SHARED_LOG_MAX_BYTES:
+            # Réduction à la moitié la plus récente, remplacée de façon atomique
+            with open(self._log_path, 'rb') as f:
+                f.seek(size // 2)
+                f.readline()
+                kept = f.read()
+            temp_path = f"{self._log_path}.tmp"
+            with open(temp_path, 'wb') as f:
+                f.write(kept)
+            os.replace(temp_path, self._log_path)
+            size, inode = len(kept), os.stat(self._log_path).st_ino
+        self._log_position = (inode, size)
+
+    def observe(self, sequence: int):
+        """
+        Prend en compte une séquence lue sur disque. Au-delà de la séquence connue,
+        l'historique intermédiaire est perdu (suppressions comprises) : les curseurs
+        antérieurs repartent d'un état complet.
+        """
+        with self._condition:
+            if sequence > self.sequence:
+                self.sequence = self.committed = sequence
+                self.floor = max(self.floor, sequence)
+                self._condition.notify_all()
+
+    def record(self, kind: str, record_id: str, action: str) -> int:
+        """Enregistre une modification et retourne son numéro de séquence"""
+        with self._condition:
+            self.sequence += 1
+            self._entries.append((self.sequence, kind, record_id, action))
+            while len(self._entries) > self.retention:
+                self.floor = self._entries.popleft()[0]
+            return self.sequence
+
+    def publish(self):
+        """Marque les modifications journalisées comme enregistrées et réveille les flux en attente"""
+        with self._condition:
+            if self.committed != self.sequence:
+                self.committed = self.sequence
+                self._condition.notify_all()
+
+    def wait_for_commit(self, cursor: int, timeout: float) -> bool:
+        """Attend qu'une modification postérieure au curseur soit enregistrée"""
+        with self._condition:
+            return self._condition.wait_for(lambda: self.committed > cursor, timeout)
+
+    def changes_since(self, cursor: int, kind: str = None) -> Optional[List[Tuple[int, str, str, str]]]:
+        """
+        Modifications postérieures au curseur (seq, type, id, action), ou None si
+        l'historique ne permet pas de répondre.
+        """
+        with self._condition:
+            if cursor < self.floor or cursor > self.sequence:
+                # Curseur purgé, ou émis avant un redémarrage du serveur
+                return None
+            changes = []
+            # Parcours depuis la fin : seules les modifications récentes sont visitées
+            for entry in reversed(self._entries):
+                if entry[0] <= cursor:
+                    break
+                if kind is None or entry[1] == kind:
+                    changes.append(entry)
+        changes.reverse()
+        return changes
+
+    def stamp(self, kind: str, records: Dict, record_ids: Iterable[str], previous: Dict) -> int:
+        """
+        Journalise les enregistrements `record_ids` d'une copie de travail pas encore
+        publiée, par rapport aux enregistrements publiés `previous` : les nouvelles
+        copies reçoivent leur version et leur séquence, les enregistrements absents de
+        `records` sont journalisés comme supprimés. Les objets déjà publiés ne sont
+        jamais modifiés. Retourne le nombre de modifications journalisées.
+        """
+        recorded = 0
+        for record_id in dict.fromkeys(record_ids):
+            record = records.get(record_id)
+            if record is None:
+                if record_id not in previous:
+                    continue
+                self.record(kind, record_id, 'delete')
+            elif record is previous.get(record_id):
+                continue
+            else:
+                record.version += 1
+                record.seq = self.record(kind, record_id, 'update' if record_id in previous else 'create')
+            recorded += 1
+        return recorded
@@ -5,9 +5,21 @@ Modèle Employee étendu avec support des photos
 import json
 import os
 import base64
-from typing import List, Dict, Optional
+import bisect
+import copy
+import hashlib
+import threading
+import uuid
+from contextlib import contextmanager, nullcontext
+from typing import Callable, List, Dict, Iterable, Optional, Tuple
 from datetime import datetime
 from config import Config
+from app.models.changelog import ChangeLog
+from app.models.persistence import save_stats
+from app.models.storage import SharedFile
+from app.models.jobs import Progress
+from app.models.availability import (AvailabilityIndex, FULL_DAY_MASK, hours_mask,
+                                     ranges_to_mask, date_for)
 
 
 class Employee:
@@ -15,7 +27,8 @@ class Employee:
 
     def __init__(self, employee_id: str = None, nom: str = "", prenom: str = "",
                  poste: str = "serveur", email: str = "", telephone: str = "",
-                 taux_horaire: float = 15.0, actif: bool = True, photo_data: str = None):
+                 taux_horaire: float = 15.0, actif: bool = True, photo_data: str = None,
+                 disponibilites: List[int] = None, indisponibilites: List = None):
         self.id = employee_id or self._generate_id()
         self.nom = nom
         self.prenom = prenom
@@ -25,11 +38,36 @@ class Employee:
         self.taux_horaire = taux_horaire
         self.actif = actif
         self.photo_data = photo_data  # Base64 encoded image data
+        # Disponibilités hebdomadaires : un masque de 24 bits par jour (bit h = disponible à h heures)
+        self.disponibilites = list(disponibilites) if disponibilites else [FULL_DAY_MASK] * len(Config.DAYS_OF_WEEK)
+        # Absences ponctuelles triées par date : (date ISO, masque des heures indisponibles, motif)
+        self.indisponibilites = sorted(indisponibilites or [])
         self.date_creation = datetime.now().isoformat()
+        self.version = 0  # Incrémentée à chaque modification enregistrée
+        self.seq = 0  # Séquence de la dernière modification (voir ChangeLog)
+
+    # Signatures des formats d'image acceptés (premiers octets -> type MIME)
+    PHOTO_SIGNATURES = (
+        (b'\xff\xd8\xff', 'image/jpeg'),
+        (b'\x89PNG\r\n\x1a\n', 'image/png'),
+        (b'GIF8', 'image/gif'),
+        (b'RIFF', 'image/webp')
+    )
+
+    # Champs modifiables par synchronisation (la photo a ses propres routes)
+    EDITABLE_FIELDS = ('nom', 'prenom', 'poste', 'email', 'telephone', 'taux_horaire', 'actif')
 
     def _generate_id(self) -> str:
-        """Génère un ID unique basé sur le timestamp"""
-        return f"emp_{int(datetime.now().timestamp() * 1000)}"
+        """Génère un ID unique : timestamp et suffixe aléatoire (aucune collision entre workers)"""
+        timestamp_ms = int(datetime.now().timestamp() * 1000)
+        return f"emp_{timestamp_ms}_{uuid.uuid4().hex[:12]}"
+
+    def copy(self) -> 'Employee':
+        """Copie modifiable de l'employé (listes de disponibilités comprises)"""
+        employee = copy.copy(self)
+        employee.disponibilites = list(self.disponibilites)
+        employee.indisponibilites = list(self.indisponibilites)
+        return employee
 
     @property
     def nom_complet(self) -> str:
@@ -91,12 +129,78 @@ class Employee:
         """Retourne l'URL data de la photo"""
         if not self.has_photo:
             return ""
-        return f"data:image/jpeg;base64,{self.photo_data}"
+        return f"data:{self.photo_mimetype};base64,{self.photo_data}"
+
+    def get_photo_bytes(self) -> bytes:
+        """Retourne les octets bruts de la photo"""
+        return base64.b64decode(self.photo_data) if self.has_photo else b""
+
+    @property
+    def photo_hash(self) -> Optional[str]:
+        """Empreinte du contenu de la photo (calculée une fois par photo)"""
+        if not self.has_photo:
+            return None
+        cached = getattr(self, '_photo_hash_cache', None)
+        if not cached or cached[0] is not self.photo_data:
+            cached = (self.photo_data, hashlib.sha1(self.photo_data.encode('ascii')).hexdigest())
+            self._photo_hash_cache = cached
+        return cached[1]
+
+    @property
+    def photo_mimetype(self) -> str:
+        """Type MIME de la photo, déduit de ses premiers octets"""
+        header = base64.b64decode(self.photo_data[:24]) if self.has_photo else b""
+        for signature, mimetype in self.PHOTO_SIGNATURES:
+            if header.startswith(signature):
+                return mimetype
+        return 'application/octet-stream'
+
+    @property
+    def photo_url(self) -> Optional[str]:
+        """URL de la photo, versionnée par son empreinte (cache navigateur longue durée)"""
+        if not self.has_photo:
+            return None
+        return f"/api/employees/{self.id}/photo?v={self.photo_hash[:12]}"
 
     def remove_photo(self):
         """Supprime la photo de l'employé"""
         self.photo_data = None
 
+    def set_availability(self, day: str, ranges: List) -> None:
+        """Définit les plages de disponibilité récurrentes d'un jour ([[8, 14], [18, 23]])"""
+        self.disponibilites[Config.DAYS_OF_WEEK.index(day)] = ranges_to_mask(ranges)
+
+    def add_unavailability(self, exception_date: str, start_hour: int = 0, end_hour: int = 24,
+                           motif: str = "") -> None:
+        """Ajoute une absence ponctuelle (congé, rendez-vous...) à une date donnée"""
+        mask = ranges_to_mask([(start_hour, end_hour)])
+        bisect.insort(self.indisponibilites, (exception_date, mask, motif))
+
+    def remove_unavailability(self, exception_date: str) -> int:
+        """Supprime les absences d'une date, retourne le nombre d'entrées retirées"""
+        start = bisect.bisect_left(self.indisponibilites, (exception_date,))
+        end = start
+        while end < len(self.indisponibilites) and self.indisponibilites[end][0] == exception_date:
+            end += 1
+        del self.indisponibilites[start:end]
+        return end - start
+
+    def availability_mask(self, day: str, week: str = "") -> int:
+        """Masque des heures disponibles pour un jour, absences de la semaine déduites"""
+        mask = self.disponibilites[Config.DAYS_OF_WEEK.index(day)]
+        exception_date = date_for(week, day)
+        if exception_date:
+            index = bisect.bisect_left(self.indisponibilites, (exception_date,))
+            while index < len(self.indisponibilites) and self.indisponibilites[index][0] == exception_date:
+                mask &= ~self.indisponibilites[index][1]
+                index += 1
+        return mask
+
+    def is_available(self, day: str, start_hour: int, duration: int, week: str = "") -> bool:
+        """Vérifie que l'employé est disponible sur tout l'intervalle"""
+        needed = hours_mask(start_hour, duration)
+        return self.availability_mask(day, week) & needed == needed
+
     def to_dict(self) -> Dict:
         """Convertit l'employé en dictionnaire"""
         return {
@@ -109,10 +213,18 @@ class Employee:
             'taux_horaire': self.taux_horaire,
             'actif': self.actif,
             'photo_data': self.photo_data,
+            'disponibilites': self.disponibilites,
+            'indisponibilites': [
+                {'date': exception_date, 'mask': mask, 'motif': motif}
+                for exception_date, mask, motif in self.indisponibilites
+            ],
             'date_creation': self.date_creation,
+            'version': self.version,
+            'seq': self.seq,
             'nom_complet': self.nom_complet,
             'type_info': self.type_info,
             'has_photo': self.has_photo,
+            'photo_url': self.photo_url,
             'initials': self.initials
         }
 
@@ -135,17 +247,43 @@ class Employee:
         employee.taux_horaire = float(data.get('taux_horaire', 15.0))
         employee.actif = bool(data.get('actif', True))
         employee.photo_data = data.get('photo_data')
+        if data.get('disponibilites'):
+            employee.disponibilites = [int(mask) for mask in data['disponibilites']]
+        employee.indisponibilites = sorted(
+            (entry['date'], int(entry.get('mask', FULL_DAY_MASK)), entry.get('motif', ''))
+            for entry in data.get('indisponibilites', [])
+        )
         employee.date_creation = data.get('date_creation', datetime.now().isoformat())
+        employee.version = int(data.get('version', 0))
+        employee.seq = int(data.get('seq', 0))
         return employee
 
 
 class EmployeeManager:
-    """Gestionnaire pour les employés avec support photo"""
+    """
+    Gestionnaire pour les employés avec support photo.
 
-    def __init__(self):
+    Comme pour les créneaux, copie sur écriture : ni le dictionnaire publié ni
+    les employés qu'il contient ne sont modifiés en place. Une écriture (sous
+    `_write_lock`) travaille sur des copies puis publie un nouveau dictionnaire.
+    En mode multi-processus, même coordination par fichier que ShiftManager.
+    """
+
+    def __init__(self, change_log: ChangeLog = None):
         self.file_path = Config.EMPLOYEES_FILE
         self.photos_dir = os.path.join(Config.DATA_FOLDER, 'photos')
+        self.change_log = change_log or ChangeLog()
+        self._write_lock = threading.RLock()
+        self._storage = SharedFile(self.file_path) if Config.MULTI_WORKER else None
+        if Config.MULTI_WORKER:
+            # Séquence commune aux employés et aux créneaux, dans le dossier de données
+            self.change_log.share(os.path.join(os.path.dirname(self.file_path), 'sequence'))
         self._employees: Dict[str, Employee] = {}
+        self.data_version = 0  # Séquence de la dernière modification des employés
+        # (instantané des employés, index construit à partir de cet instantané)
+        self._availability: Optional[Tuple[Dict[str, Employee], AvailabilityIndex]] = None
+        # Mesures de la dernière sauvegarde (/api/health)
+        self.last_save: Optional[Dict] = None
         self._ensure_photos_dir()
         self.load_employees()
 
@@ -156,14 +294,51 @@ class EmployeeManager:
 
     def load_employees(self):
         """Charge les employés depuis le fichier JSON"""
+        with self.change_log.writing(), self._write_lock, self._process_lock():
+            if self._storage:
+                self._storage.sync()
+            self._load_employees()
+
+    def _process_lock(self):
+        return self._storage.locked() if self._storage else nullcontext()
+
+    @contextmanager
+    def _writing(self):
+        """Écriture : threads sérialisés et, entre processus, verrou de fichier sur des données à jour"""
+        with self.change_log.writing(), self._write_lock, self._process_lock():
+            self._sync_storage()
+            yield
+
+    def _sync_storage(self):
+        if self._storage is None:
+            return
+        sequence = self._storage.sync()
+        if sequence is not None:
+            self.change_log.observe(sequence)
+            self._load_employees()
+            self._availability = None
+            self.data_version = self.change_log.sequence
+
+    def refresh(self) -> bool:
+        """Mode multi-processus : recharge les employés si un autre processus a enregistré depuis"""
+        if self._storage is None or not self._storage.changed():
+            return False
+        with self._writing():
+            pass
+        return True
+
+    def _load_employees(self):
         try:
             if os.path.exists(self.file_path):
                 with open(self.file_path, 'r', encoding='utf-8') as f:
                     data = json.load(f)
-                    self._employees = {
+                    employees = {
                         emp_id: Employee.from_dict(emp_data)
                         for emp_id, emp_data in data.items()
                     }
+                    self._employees = employees
+                    self.data_version = max((emp.seq for emp in employees.values()), default=0)
+                    self.change_log.observe(self.data_version)
             else:
                 # Créer des employés par défaut
                 self._create_default_employees()
@@ -192,33 +367,96 @@ class EmployeeManager:
                      email="antoine.vert@restaurant.com", telephone="06.89.01.23.45")
         ]
 
-        for employee in default_employees:
-            self._employees[employee.id] = employee
-
-        self.save_employees()
+        # Appelé au chargement, sous les verrous d'écriture
+        self._publish({employee.id: employee for employee in default_employees},
+                      [employee.id for employee in default_employees])
 
     def save_employees(self):
         """Sauvegarde les employés dans le fichier JSON"""
-        try:
-            data = {
-                emp_id: employee.to_dict()
-                for emp_id, employee in self._employees.items()
-            }
-            with open(self.file_path, 'w', encoding='utf-8') as f:
-                json.dump(data, f, indent=2, ensure_ascii=False)
-        except Exception as e:
-            print(f"Erreur lors de la sauvegarde des employés: {e}")
+        with self._writing():
+            # L'index suit son instantané ; la remise à zéro couvre les modifications faites en place
+            self._availability = None
+            try:
+                data = {emp_id: employee.to_dict() for emp_id, employee in self._employees.items()}
+                self.last_save = save_stats.write_json('employees', self.file_path, data)
+                if self._storage:
+                    self._storage.commit(self.change_log.sequence)
+            except Exception as e:
+                print(f"Erreur lors de la sauvegarde des employés: {e}")
+            finally:
+                self.change_log.publish()
+
+    def _publish(self, employees: Dict[str, Employee], employee_ids: Iterable[str]):
+        """
+        Journalise les employés `employee_ids` modifiés dans la copie de travail
+        `employees`, la publie puis l'enregistre. Appelé sous `_writing()`.
+        """
+        if self.change_log.stamp('employees', employees, employee_ids, self._employees):
+            self.data_version = self.change_log.sequence
+        self._employees = employees
+        self.save_employees()
 
     def add_employee(self, employee: Employee) -> bool:
-        """Ajoute un employé"""
+        """Ajoute un employé (refusé si son ID existe déjà)"""
         try:
-            self._employees[employee.id] = employee
-            self.save_employees()
+            with self._writing():
+                if employee.id in self._employees:
+                    return False
+                self._publish({**self._employees, employee.id: employee}, [employee.id])
             return True
         except Exception as e:
             print(f"Erreur lors de l'ajout de l'employé: {e}")
             return False
 
+    def add_employees_bulk(self, employees: List[Employee]) -> int:
+        """Ajoute plusieurs employés en une seule sauvegarde (les ID déjà existants sont écartés)"""
+        if not employees:
+            return 0
+        with self._writing():
+            added = {}
+            for employee in employees:
+                if employee.id not in self._employees and employee.id not in added:
+                    added[employee.id] = employee
+            if added:
+                self._publish({**self._employees, **added}, list(added))
+        return len(added)
+
+    def edit_employee(self, employee_id: str, edit: Callable[[Employee], Optional[bool]]) -> bool:
+        """
+        Modifie un employé sur une copie : les lectures en cours gardent l'ancienne
+        version. Si `edit` ne retourne pas False (rien à modifier), la copie est
+        publiée puis enregistrée. Retourne True si l'employé a été modifié.
+        """
+        with self._writing():
+            current = self._employees.get(employee_id)
+            if current is None:
+                return False
+            employee = current.copy()
+            if edit(employee) is False:
+                return False
+            self._publish({**self._employees, employee_id: employee}, [employee_id])
+            return True
+
+    def edit_employees(self, edits: Dict[str, Callable[[Employee], Optional[bool]]]) -> int:
+        """
+        Comme edit_employee pour plusieurs employés, publiés et enregistrés en une
+        seule fois. Retourne le nombre d'employés modifiés.
+        """
+        with self._writing():
+            employees = dict(self._employees)
+            modified = []
+            for employee_id, edit in edits.items():
+                current = employees.get(employee_id)
+                if current is None:
+                    continue
+                employee = current.copy()
+                if edit(employee) is not False:
+                    employees[employee_id] = employee
+                    modified.append(employee_id)
+            if modified:
+                self._publish(employees, modified)
+            return len(modified)
+
     def get_employee(self, employee_id: str) -> Optional[Employee]:
         """Récupère un employé par son ID"""
         return self._employees.get(employee_id)
@@ -230,6 +468,28 @@ class EmployeeManager:
             employees = [emp for emp in employees if emp.actif]
         return sorted(employees, key=lambda x: (x.nom, x.prenom))
 
+    def query_employees(self, actif_only: bool = True, poste: str = None, after: str = None,
+                        limit: int = None) -> Tuple[List[Employee], Optional[str]]:
+        """
+        Recherche paginée des employés, triés par nom, prénom puis ID (ordre stable).
+        `after` est l'ID du dernier employé de la page précédente.
+        """
+        employees = sorted(
+            (emp for emp in self._employees.values()
+             if (emp.actif or not actif_only) and (poste is None or emp.poste == poste)),
+            key=lambda x: (x.nom, x.prenom, x.id)
+        )
+
+        start = 0
+        if after and after in self._employees:
+            reference = self._employees[after]
+            keys = [(emp.nom, emp.prenom, emp.id) for emp in employees]
+            start = bisect.bisect_right(keys, (reference.nom, reference.prenom, reference.id))
+
+        page = employees[start:] if limit is None else employees[start:start + limit]
+        next_cursor = page[-1].id if limit is not None and start + limit < len(employees) else None
+        return page, next_cursor
+
     def get_all_employees_dict(self, actif_only: bool = True, include_photos: bool = True) -> List[Dict]:
         """Récupère tous les employés sous forme de dictionnaires"""
         employees = self.get_all_employees(actif_only)
@@ -239,15 +499,14 @@ class EmployeeManager:
             return [emp.to_dict_without_photo() for emp in employees]
 
     def update_employee(self, employee_id: str, data: Dict) -> bool:
-        """Met à jour un employé"""
+        """Met à jour un employé (seuls les champs modifiables sont copiés, jamais version ni seq)"""
+        def apply(employee: Employee):
+            for key in Employee.EDITABLE_FIELDS:
+                if key in data:
+                    setattr(employee, key, data[key])
+
         try:
-            if employee_id in self._employees:
-                employee = self._employees[employee_id]
-                for key, value in data.items():
-                    if hasattr(employee, key):
-                        setattr(employee, key, value)
-                self.save_employees()
-                return True
+            return self.edit_employee(employee_id, apply)
         except Exception as e:
             print(f"Erreur lors de la mise à jour de l'employé: {e}")
         return False
@@ -255,11 +514,7 @@ class EmployeeManager:
     def update_employee_photo(self, employee_id: str, photo_data: str) -> bool:
         """Met à jour la photo d'un employé"""
         try:
-            if employee_id in self._employees:
-                employee = self._employees[employee_id]
-                if employee.set_photo_from_base64(photo_data):
-                    self.save_employees()
-                    return True
+            return self.edit_employee(employee_id, lambda employee: employee.set_photo_from_base64(photo_data))
         except Exception as e:
             print(f"Erreur lors de la mise à jour de la photo: {e}")
         return False
@@ -267,26 +522,85 @@ class EmployeeManager:
     def remove_employee_photo(self, employee_id: str) -> bool:
         """Supprime la photo d'un employé"""
         try:
-            if employee_id in self._employees:
-                employee = self._employees[employee_id]
-                employee.remove_photo()
-                self.save_employees()
-                return True
+            return self.edit_employee(employee_id, Employee.remove_photo)
         except Exception as e:
             print(f"Erreur lors de la suppression de la photo: {e}")
         return False
 
     def delete_employee(self, employee_id: str) -> bool:
         """Supprime un employé (désactivation)"""
+        def deactivate(employee: Employee):
+            employee.actif = False
+
         try:
-            if employee_id in self._employees:
-                self._employees[employee_id].actif = False
-                self.save_employees()
-                return True
+            return self.edit_employee(employee_id, deactivate)
         except Exception as e:
             print(f"Erreur lors de la suppression de l'employé: {e}")
         return False
 
+    def merge_records(self, records: List[Dict], deleted_ids: List[str] = ()) -> Dict:
+        """
+        Fusionne les employés modifiés par un client depuis sa dernière synchronisation.
+        Un enregistrement dont la version de base est dépassée côté serveur est
+        refusé (conflit) ; les autres sont appliqués en une seule sauvegarde.
+        La suppression d'un employé est une désactivation.
+        """
+        with self._writing():
+            # Employés modifiés, dans l'ordre, dans la copie de travail publiée en une fois à la fin
+            applied = []
+            employees = dict(self._employees)
+            conflicts = []
+            errors = []
+
+            for data in records:
+                employee_id = data.get('id')
+                current = employees.get(employee_id)
+                if current and data.get('version') is not None and int(data['version']) < current.version:
+                    conflicts.append({'id': employee_id, 'client_version': int(data['version']),
+                                      'server_version': current.version})
+                    continue
+
+                fields = {key: data[key] for key in Employee.EDITABLE_FIELDS if key in data}
+                validation_errors = self.validate_employee_data({**(current.to_dict() if current else {}), **fields})
+                if not employee_id or validation_errors:
+                    errors.append({'id': employee_id, 'errors': validation_errors or ["Identifiant requis"]})
+                    continue
+
+                if current:
+                    employee = current.copy()
+                    for key, value in fields.items():
+                        setattr(employee, key, value)
+                    employee.taux_horaire = float(employee.taux_horaire)
+                else:
+                    employee = Employee.from_dict({**fields, 'id': employee_id})
+                employees[employee_id] = employee
+                applied.append(employee_id)
+
+            for employee_id in deleted_ids:
+                if employee_id in employees:
+                    employee = employees[employee_id] = employees[employee_id].copy()
+                    employee.actif = False
+                    applied.append(employee_id)
+
+            if applied:
+                self._publish(employees, applied)
+
+            return {'applied': len(applied), 'conflicts': conflicts, 'errors': errors}
+
+    def get_availability_index(self) -> AvailabilityIndex:
+        """Retourne l'index des disponibilités, reconstruit paresseusement après chaque modification"""
+        employees = self._employees
+        cached = self._availability
+        if cached is None or cached[0] is not employees:
+            cached = self._availability = (employees, AvailabilityIndex(employees.values()))
+        return cached[1]
+
+    def get_available_employees(self, day: str, start_hour: int, duration: int, week: str = "",
+                                poste: str = None) -> List[Employee]:
+        """Employés actifs disponibles sur un intervalle (ex: Samedi 18h-23h)"""
+        employees = self.get_availability_index().find_available(day, start_hour, duration, week, poste)
+        return sorted(employees, key=lambda x: (x.nom, x.prenom))
+
     def get_employees_by_type(self, poste: str) -> List[Employee]:
         """Récupère les employés par type de poste"""
         return [emp for emp in self.get_all_employees() if emp.poste == poste]
@@ -311,7 +625,7 @@ class EmployeeManager:
             'photo_completion_rate': round((len(with_photos) / len(all_employees)) * 100, 1) if all_employees else 0
         }
 
-    def export_employee_photos(self, export_dir: str) -> bool:
+    def export_employee_photos(self, export_dir: str, progress: Progress = None) -> bool:
         """Exporte toutes les photos des employés vers un dossier"""
         try:
             if not os.path.exists(export_dir):
@@ -319,7 +633,9 @@ class EmployeeManager:
 
             employees_with_photos = self.get_employees_with_photos()
 
-            for employee in employees_with_photos:
+            for index, employee in enumerate(employees_with_photos):
+                if progress:
+                    progress(index, len(employees_with_photos))
                 if employee.photo_data:
                     # Décoder les données base64
                     image_data = base64.b64decode(employee.photo_data)
@@ -339,8 +655,11 @@ class EmployeeManager:
             print(f"Erreur lors de l'export des photos: {e}")
             return False
 
-    def import_employee_photos(self, import_dir: str) -> Dict:
-        """Importe les photos depuis un dossier"""
+    def import_employee_photos(self, import_dir: str, progress: Progress = None) -> Dict:
+        """
+        Importe les photos depuis un dossier. Les fichiers sont lus sans verrou ;
+        les photos lues sont ensuite publiées et enregistrées en une seule fois.
+        """
         results = {
             'success': 0,
             'errors': 0,
@@ -354,49 +673,60 @@ class EmployeeManager:
 
             # Parcourir tous les fichiers image du dossier
             image_extensions = ('.jpg', '.jpeg', '.png', '.gif', '.bmp')
-
-            for filename in os.listdir(import_dir):
-                if filename.lower().endswith(image_extensions):
-                    file_path = os.path.join(import_dir, filename)
-
-                    # Essayer de matcher le fichier avec un employé
-                    # Format attendu: prenom_nom_id.jpg ou prenom_nom.jpg
-                    base_name = os.path.splitext(filename)[0]
-
-                    # Chercher l'employé correspondant
-                    matched_employee = None
-
-                    # Méthode 1: si le nom contient l'ID
-                    if '_emp_' in base_name:
-                        try:
-                            employee_id = 'emp_' + base_name.split('_emp_')[1]
-                            matched_employee = self.get_employee(employee_id)
-                        except:
-                            pass
-
-                    # Méthode 2: chercher par nom/prénom
-                    if not matched_employee:
-                        parts = base_name.replace('_', ' ').lower()
-                        for employee in self.get_all_employees():
-                            full_name = f"{employee.prenom} {employee.nom}".lower()
-                            if parts in full_name or full_name in parts:
-                                matched_employee = employee
-                                break
-
-                    if matched_employee:
-                        if matched_employee.set_photo_from_file(file_path):
-                            results['success'] += 1
-                            results['messages'].append(f"Photo importée pour {matched_employee.nom_complet}")
-                        else:
-                            results['errors'] += 1
-                            results['messages'].append(f"Erreur lors de l'import pour {matched_employee.nom_complet}")
+            filenames = [filename for filename in sorted(os.listdir(import_dir))
+                         if filename.lower().endswith(image_extensions)]
+            # ID de l'employé -> photo lue (base64)
+            photos = {}
+
+            for index, filename in enumerate(filenames):
+                if progress:
+                    progress(index, len(filenames))
+                file_path = os.path.join(import_dir, filename)
+
+                # Essayer de matcher le fichier avec un employé
+                # Format attendu: prenom_nom_id.jpg ou prenom_nom.jpg
+                base_name = os.path.splitext(filename)[0]
+
+                # Chercher l'employé correspondant
+                matched_employee = None
+
+                # Méthode 1: si le nom contient l'ID
+                if '_emp_' in base_name:
+                    try:
+                        employee_id = 'emp_' + base_name.split('_emp_')[1]
+                        matched_employee = self.get_employee(employee_id)
+                    except:
+                        pass
+
+                # Méthode 2: chercher par nom/prénom
+                if not matched_employee:
+                    parts = base_name.replace('_', ' ').lower()
+                    for employee in self.get_all_employees():
+                        full_name = f"{employee.prenom} {employee.nom}".lower()
+                        if parts in full_name or full_name in parts:
+                            matched_employee = employee
+                            break
+
+                if matched_employee:
+                    # Lecture sur une copie : l'employé publié n'est pas modifié
+                    scratch = matched_employee.copy()
+                    if scratch.set_photo_from_file(file_path):
+                        photos[matched_employee.id] = scratch.photo_data
+                        results['success'] += 1
+                        results['messages'].append(f"Photo importée pour {matched_employee.nom_complet}")
                     else:
                         results['errors'] += 1
-                        results['messages'].append(f"Aucun employé trouvé pour {filename}")
-
-            # Sauvegarder les modifications
-            if results['success'] > 0:
-                self.save_employees()
+                        results['messages'].append(f"Erreur lors de l'import pour {matched_employee.nom_complet}")
+                else:
+                    results['errors'] += 1
+                    results['messages'].append(f"Aucun employé trouvé pour {filename}")
+
+            # Publier et sauvegarder les photos lues
+            if photos:
+                self.edit_employees({
+                    employee_id: lambda employee, photo_data=photo_data: setattr(employee, 'photo_data', photo_data)
+                    for employee_id, photo_data in photos.items()
+                })
 
         except Exception as e:
             results['errors'] += 1
@@ -404,7 +734,7 @@ class EmployeeManager:
 
         return results
 
-    def generate_employee_report(self, include_photos: bool = False) -> Dict:
+    def generate_employee_report(self, include_photos: bool = False, progress: Progress = None) -> Dict:
         """Génère un rapport détaillé des employés"""
         all_employees = self.get_all_employees(actif_only=False)
         active_employees = self.get_all_employees(actif_only=True)
@@ -412,7 +742,9 @@ class EmployeeManager:
 
         # Statistiques par poste
         stats_by_type = {}
-        for employee in active_employees:
+        for index, employee in enumerate(active_employees):
+            if progress:
+                progress(index, len(active_employees))
             poste = employee.poste
             if poste not in stats_by_type:
                 stats_by_type[poste] = {
@@ -0,0 +1,308 @@
+"""
+Import en masse du planning : lecture en flux (NDJSON, CSV), validation par lots
+et enregistrement en une seule fois
+"""
+
+import codecs
+import csv
+import json
+import time
+from datetime import date
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+from config import Config
+from app.models.employee import Employee, EmployeeManager
+from app.models.shift import Shift, ShiftManager
+from app.models.occupancy import OccupancyIndex
+from app.utils.helpers import generate_week_number, is_valid_week_number
+
+# Ligne lue : (numéro de ligne, enregistrement ou None, erreur de lecture)
+Row = Tuple[int, Optional[Dict], Optional[str]]
+
+
+def iter_ndjson(stream: Iterable[bytes]) -> Iterator[Row]:
+    """Lit un flux NDJSON ligne par ligne (lignes vides ignorées)"""
+    for row, line in enumerate(codecs.iterdecode(stream, 'utf-8-sig'), 1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError:
+            yield row, None, "JSON invalide"
+            continue
+        if isinstance(record, dict):
+            yield row, record, None
+        else:
+            yield row, None, "Objet JSON attendu"
+
+
+def iter_csv(stream: Iterable[bytes]) -> Iterator[Row]:
+    """
+    Lit un flux CSV (colonnes de l'export). La colonne type distingue les lignes
+    employé des lignes créneau ; sans elle, chaque ligne décrit un créneau.
+    Les cellules vides sont traitées comme des champs absents.
+    """
+    reader = csv.DictReader(codecs.iterdecode(stream, 'utf-8-sig'))
+    for record in reader:
+        # Cellules en trop (clé None) et cellules vides ignorées
+        record = {key: value for key, value in record.items() if key is not None and value not in ('', None)}
+        # Numéro de la ligne dans le fichier (l'en-tête compte pour la première)
+        yield reader.line_num, {**record, 'type': record.get('type') or 'shift'}, None
+
+
+def iter_export_data(data: Dict) -> Iterator[Row]:
+    """Parcourt un export JSON ({employees, shifts}) comme un flux d'enregistrements"""
+    row = 0
+    for kind, records in (('employee', data.get('employees') or []), ('shift', data.get('shifts') or [])):
+        for record in records:
+            row += 1
+            if isinstance(record, dict):
+                yield row, {**record, 'type': kind}, None
+            else:
+                yield row, None, "Objet JSON attendu"
+
+
+class PlanningImporter:
+    """
+    Pipeline d'import du planning.
+
+    Les enregistrements sont lus en flux et traités par lots : validation par
+    des contrôles préparés une fois pour toutes, détection des conflits sur un
+    index d'occupation (existant + lignes déjà acceptées), puis renumérotation
+    des employés importés vers les employés locaux. Rien n'est écrit avant la
+    fin de la lecture : employés et créneaux sont enregistrés en une seule
+    sauvegarde chacun. Avec atomic=True, une seule ligne en erreur annule tout.
+
+    La lecture ne bloque pas les autres écritures : au moment d'enregistrer, les
+    deux gestionnaires sont verrouillés et les conflits revérifiés sur les
+    données à jour. Les créneaux sont enregistrés d'abord ; les employés ne le
+    sont que si les créneaux l'ont été.
+    """
+
+    BATCH_SIZE = 1000
+    MAX_REPORTED_ERRORS = 1000
+
+    def __init__(self, employee_manager: EmployeeManager, shift_manager: ShiftManager):
+        self.employee_manager = employee_manager
+        self.shift_manager = shift_manager
+
+    def run(self, rows: Iterable[Row], dry_run: bool = False, atomic: bool = False) -> Dict:
+        """Importe les lignes et retourne le rapport (compteurs, erreurs par ligne, débit)"""
+        start = time.perf_counter()
+        self._prepare()
+
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= self.BATCH_SIZE:
+                self._process_batch(batch)
+                batch = []
+        if batch:
+            self._process_batch(batch)
+
+        committed = not dry_run and not (atomic and self._error_count)
+        imported_employees = imported_shifts = 0
+        if committed:
+            committed, imported_employees, imported_shifts = self._commit(atomic)
+
+        # Dans un lot, les créneaux sont traités après les employés : rétablir l'ordre du fichier
+        self._errors.sort(key=lambda error: error['row'])
+        elapsed = time.perf_counter() - start
+        return {
+            'dry_run': dry_run,
+            'atomic': atomic,
+            'committed': committed,
+            'rows': self._row_count,
+            'imported_employees': imported_employees,
+            'imported_shifts': imported_shifts,
+            'matched_employees': self._matched_employees,
+            'valid_employees': len(self._new_employees),
+            'valid_shifts': len(self._new_shifts),
+            'employee_ids': self._id_map,
+            'error_count': self._error_count,
+            'errors': self._errors,
+            'errors_truncated': self._error_count > len(self._errors),
+            'elapsed_ms': round(elapsed * 1000, 1),
+            'rows_per_second': round(self._row_count / elapsed) if elapsed > 0 else self._row_count
+        }
+
+    def _commit(self, atomic: bool) -> Tuple[bool, int, int]:
+        """
+        Enregistre l'import sous les verrous d'écriture des deux gestionnaires
+        (toujours employés puis créneaux). Retourne (enregistré, employés, créneaux).
+        """
+        with self.employee_manager._writing(), self.shift_manager._writing():
+            # Employés supprimés pendant la lecture : leurs créneaux sont refusés
+            existing = {employee.id for employee in
+                        self.employee_manager.get_all_employees(actif_only=False, include_photos=False)}
+            existing.update(employee.id for employee in self._new_employees)
+            shifts = []
+            for shift in self._new_shifts:
+                if shift.employee_id in existing:
+                    shifts.append(shift)
+                else:
+                    self._error(self._shift_rows[shift.id], f"Employé supprimé pendant l'import: {shift.employee_id}")
+            if atomic and len(shifts) != len(self._new_shifts):
+                return False, 0, 0
+
+            added, collisions = self.shift_manager.add_shifts_bulk(shifts, atomic=atomic)
+            for shift, conflicts in collisions:
+                self._error(self._shift_rows[shift.id],
+                            f"Créneau déjà existant: {shift.id}" if any(c.id == shift.id for c in conflicts)
+                            else "Conflit avec un créneau existant")
+            if atomic and collisions:
+                return False, 0, 0
+
+            imported_employees = self.employee_manager.add_employees_bulk(self._new_employees)
+        return True, imported_employees, len(added)
+
+    def _prepare(self):
+        """Prépare l'état de l'import et les contrôles utilisés pour chaque ligne"""
+        self._row_count = 0
+        self._error_count = 0
+        self._errors: List[Dict] = []
+        self._new_employees: List[Employee] = []
+        self._new_shifts: List[Shift] = []
+        self._shift_rows: Dict[str, int] = {}
+        self._matched_employees = 0
+
+        employees = self.employee_manager.get_all_employees(actif_only=False, include_photos=False)
+        self._known_employees = {employee.id for employee in employees}
+        self._employees_by_name = {(employee.nom.strip().lower(), employee.prenom.strip().lower()): employee.id
+                                   for employee in employees}
+        # ID de l'employé dans le fichier importé -> ID local
+        self._id_map: Dict[str, str] = {}
+
+        self._known_shift_ids = {shift.id for shift in self.shift_manager.get_all_shifts()}
+        self._occupancy = OccupancyIndex(self.shift_manager.get_all_shifts())
+
+        self._days = frozenset(Config.DAYS_OF_WEEK)
+        self._postes = frozenset(Config.EMPLOYEE_TYPES)
+        self._durations = range(Config.MIN_SHIFT_DURATION, Config.MAX_SHIFT_DURATION + 1)
+        self._valid_weeks: Dict[str, bool] = {'': True}
+
+    def _error(self, row: int, message: str):
+        self._error_count += 1
+        if len(self._errors) < self.MAX_REPORTED_ERRORS:
+            self._errors.append({'row': row, 'error': message})
+
+    def _process_batch(self, batch: List[Row]):
+        # Les employés d'un lot passent avant ses créneaux, qui peuvent y faire référence
+        shifts = []
+        for row, record, error in batch:
+            self._row_count += 1
+            kind = record.get('type', 'shift') if record else None
+            if error:
+                self._error(row, error)
+            elif kind == 'employee':
+                self._safe_import(self._import_employee, row, record)
+            elif kind == 'shift':
+                shifts.append((row, record))
+            else:
+                self._error(row, f"Type d'enregistrement inconnu: {kind}")
+
+        for row, record in shifts:
+            self._safe_import(self._import_shift, row, record)
+
+    def _safe_import(self, import_record, row: int, record: Dict):
+        # Une valeur de type inattendu (nombre au lieu de texte...) ne doit pas interrompre l'import
+        try:
+            import_record(row, record)
+        except (ValueError, TypeError, AttributeError) as e:
+            self._error(row, f"Enregistrement invalide: {e}")
+
+    def _import_employee(self, row: int, record: Dict):
+        errors = self.employee_manager.validate_employee_data(record)
+        if errors:
+            self._error(row, '; '.join(errors))
+            return
+
+        source_id = record.get('id')
+        key = (record['nom'].strip().lower(), record['prenom'].strip().lower())
+        local_id = self._employees_by_name.get(key)
+        if local_id:
+            # Employé déjà présent (même nom et prénom) : les créneaux lui sont rattachés
+            self._matched_employees += 1
+        else:
+            employee = Employee(
+                nom=record['nom'],
+                prenom=record['prenom'],
+                poste=record['poste'],
+                email=record.get('email') or '',
+                telephone=record.get('telephone') or '',
+                taux_horaire=float(record.get('taux_horaire') or 15.0),
+                actif=record.get('actif', True) not in (False, 'false', 'False', '0', 0)
+            )
+            self._new_employees.append(employee)
+            self._employees_by_name[key] = employee.id
+            self._known_employees.add(employee.id)
+            local_id = employee.id
+
+        if source_id:
+            self._id_map[source_id] = local_id
+
+    def _import_shift(self, row: int, record: Dict):
+        employee_id = record.get('employee_id') or ''
+        employee_id = self._id_map.get(employee_id, employee_id)
+        if employee_id not in self._known_employees:
+            self._error(row, f"Employé inconnu: {record.get('employee_id') or '(vide)'}")
+            return
+
+        day = record.get('day') or ''
+        week = record.get('week') or ''
+        shift_date = record.get('date')
+        if shift_date:
+            # Une date suffit : la semaine et le jour en sont déduits
+            try:
+                parsed = date.fromisoformat(shift_date)
+            except ValueError:
+                self._error(row, "Date invalide (format YYYY-MM-DD)")
+                return
+            week = week or generate_week_number(parsed)
+            day = day or Config.DAYS_OF_WEEK[parsed.weekday()]
+
+        if day not in self._days:
+            self._error(row, "Jour invalide")
+            return
+        if week not in self._valid_weeks:
+            self._valid_weeks[week] = is_valid_week_number(week)
+        if not self._valid_weeks[week]:
+            self._error(row, "Semaine invalide (format YYYY-WW)")
+            return
+
+        try:
+            start_hour = int(record.get('start_hour'))
+            duration = int(record.get('duration'))
+        except (ValueError, TypeError):
+            self._error(row, "Heure de début ou durée invalide")
+            return
+        if not 0 <= start_hour <= 23:
+            self._error(row, "Heure de début invalide (0-23)")
+            return
+        if duration not in self._durations:
+            self._error(row, f"Durée doit être entre {Config.MIN_SHIFT_DURATION}h "
+                             f"et {Config.MAX_SHIFT_DURATION}h")
+            return
+
+        poste = record.get('poste_specifique') or ''
+        if poste and poste not in self._postes:
+            self._error(row, "Type de poste invalide")
+            return
+
+        if not self._occupancy.is_free(employee_id, week, day, start_hour, duration):
+            self._error(row, f"Conflit: employé déjà occupé {day} {start_hour:02d}h ({week or 'planning type'})")
+            return
+
+        shift = Shift(
+            shift_id=record.get('id') if record.get('id') not in self._known_shift_ids else None,
+            employee_id=employee_id,
+            day=day,
+            start_hour=start_hour,
+            duration=duration,
+            poste_specifique=poste,
+            notes=record.get('notes') or '',
+            week=week
+        )
+        self._known_shift_ids.add(shift.id)
+        self._occupancy.add(shift)
+        self._new_shifts.append(shift)
+        self._shift_rows[shift.id] = row
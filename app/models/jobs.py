@@ -0,0 +1,174 @@
+"""
+File de tâches en arrière-plan pour les opérations de maintenance longues
+(import/export de photos, réparation, migration de granularité, rapports)
+"""
+
+import threading
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+# Progression : fonction appelée par une opération longue avec (faits, total)
+Progress = Callable[[int, int], None]
+
+
+class JobCancelled(BaseException):
+    """
+    Levée au point de progression suivant une demande d'annulation. Comme
+    KeyboardInterrupt, elle traverse les `except Exception` des opérations.
+    """
+
+
+class Job:
+    """
+    Tâche exécutée par la file : état, progression, résultat ou erreur.
+
+    L'annulation est coopérative : une tâche en attente n'est jamais lancée, une
+    tâche en cours s'arrête au prochain appel de report(). Ce qui a déjà été
+    enregistré par l'opération n'est pas annulé.
+    """
+
+    PENDING = 'pending'
+    RUNNING = 'running'
+    SUCCEEDED = 'succeeded'
+    FAILED = 'failed'
+    CANCELLED = 'cancelled'
+
+    def __init__(self, kind: str, params: Dict = None):
+        self.id = f"job_{uuid.uuid4().hex[:12]}"
+        self.kind = kind
+        self.params = params or {}
+        self.status = Job.PENDING
+        self.done = 0
+        self.total = 0
+        self.result = None
+        self.error: Optional[str] = None
+        self.created_at = datetime.now().isoformat()
+        self.started_at: Optional[str] = None
+        self.finished_at: Optional[str] = None
+        self._cancel = threading.Event()
+
+    @property
+    def finished(self) -> bool:
+        return self.status in (Job.SUCCEEDED, Job.FAILED, Job.CANCELLED)
+
+    @property
+    def cancel_requested(self) -> bool:
+        return self._cancel.is_set()
+
+    def report(self, done: int, total: int = None):
+        """Point de progression (et d'annulation) des opérations longues"""
+        if self._cancel.is_set():
+            raise JobCancelled()
+        self.done = done
+        if total is not None:
+            self.total = total
+
+    def to_dict(self) -> Dict:
+        """Convertit la tâche en dictionnaire (état interrogé par GET /api/jobs/<id>)"""
+        return {
+            'id': self.id,
+            'type': self.kind,
+            'params': self.params,
+            'status': self.status,
+            'progress': {
+                'done': self.done,
+                'total': self.total,
+                'percent': round(self.done * 100 / self.total, 1) if self.total else None
+            },
+            'cancel_requested': self.cancel_requested,
+            'result': self.result,
+            'error': self.error,
+            'created_at': self.created_at,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at
+        }
+
+
+class JobQueue:
+    """
+    File de tâches du processus, exécutées par un pool de threads.
+
+    Les tâches terminées restent consultables tant qu'elles font partie des
+    `retention` dernières ; les plus anciennes sont oubliées.
+    """
+
+    def __init__(self, max_workers: int = 2, retention: int = 100):
+        self.retention = retention
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='planning-job')
+        self._jobs: 'OrderedDict[str, Job]' = OrderedDict()
+        self._futures = {}
+        self._lock = threading.Lock()
+
+    def submit(self, kind: str, run: Callable[[Job], object], params: Dict = None) -> Job:
+        """Met en file une opération ; `run(job)` retourne le résultat et signale sa progression via job.report()"""
+        job = Job(kind, params)
+        with self._lock:
+            self._jobs[job.id] = job
+            self._prune()
+            self._futures[job.id] = self._executor.submit(self._execute, job, run)
+        return job
+
+    def _execute(self, job: Job, run: Callable[[Job], object]):
+        if job.cancel_requested:
+            self._finish(job, Job.CANCELLED)
+            return
+        job.status = Job.RUNNING
+        job.started_at = datetime.now().isoformat()
+        try:
+            job.result = run(job)
+        except JobCancelled:
+            self._finish(job, Job.CANCELLED)
+        except Exception as e:
+            job.error = str(e)
+            self._finish(job, Job.FAILED)
+        else:
+            job.done = max(job.done, job.total)
+            self._finish(job, Job.SUCCEEDED)
+
+    def _finish(self, job: Job, status: str):
+        job.finished_at = datetime.now().isoformat()
+        job.status = status
+        with self._lock:
+            self._futures.pop(job.id, None)
+
+    def _prune(self):
+        # Oublier les tâches terminées les plus anciennes au-delà de la rétention
+        excess = len(self._jobs) - self.retention
+        for job_id in [job_id for job_id, job in self._jobs.items() if job.finished][:max(0, excess)]:
+            del self._jobs[job_id]
+
+    def get(self, job_id: str) -> Optional[Job]:
+        """Récupère une tâche par son ID"""
+        return self._jobs.get(job_id)
+
+    def list_jobs(self) -> List[Job]:
+        """Tâches connues, de la plus récente à la plus ancienne"""
+        with self._lock:
+            return list(reversed(self._jobs.values()))
+
+    def cancel(self, job_id: str) -> bool:
+        """Demande l'annulation d'une tâche ; retourne False si elle est inconnue ou déjà terminée"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job.finished:
+                return False
+            job._cancel.set()
+            future = self._futures.get(job_id)
+        if future is not None and future.cancel():
+            # Jamais lancée : terminée immédiatement
+            self._finish(job, Job.CANCELLED)
+        return True
+
+    def wait(self, job_id: str, timeout: float = None) -> Optional[Job]:
+        """Attend la fin d'une tâche (tests, scripts)"""
+        with self._lock:
+            future = self._futures.get(job_id)
+        if future is not None:
+            try:
+                future.result(timeout)
+            except Exception:
+                pass
+        return self.get(job_id)
@@ -0,0 +1,223 @@
+"""
+Métriques des requêtes HTTP (latence, tailles, statuts, requêtes en cours),
+exposées au format texte Prometheus
+"""
+
+import bisect
+import logging
+import threading
+import time
+from typing import Dict, Iterable, List, Tuple
+
+from flask import g, request
+
+from app.models.persistence import PersistenceStats, save_stats
+
+logger = logging.getLogger(__name__)
+
+# Bornes des histogrammes de latence (secondes) et de taille (octets)
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+# Sauvegardes de fichiers de données par requête
+SAVES_BUCKETS = (0, 1, 2, 5, 10, 50, 100, 1000)
+
+# Requêtes sans route connue (404) : une seule série, quelle que soit l'URL
+UNMATCHED_ENDPOINT = '<unmatched>'
+
+
+class Histogram:
+    """Histogramme cumulatif à bornes fixes (compteurs par borne, somme, nombre)"""
+
+    __slots__ = ('bounds', 'counts', 'sum', 'count')
+
+    def __init__(self, bounds: Tuple[float, ...]):
+        self.bounds = bounds
+        self.counts = [0] * len(bounds)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        index = bisect.bisect_left(self.bounds, value)
+        if index < len(self.counts):
+            self.counts[index] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self) -> List[Tuple[str, int]]:
+        """(borne, nombre d'observations inférieures ou égales), jusqu'à +Inf"""
+        buckets = []
+        total = 0
+        for bound, count in zip(self.bounds, self.counts):
+            total += count
+            buckets.append((_format_number(bound), total))
+        buckets.append(('+Inf', self.count))
+        return buckets
+
+
+def _format_number(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(**labels) -> str:
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in labels.items()) + '}'
+
+
+class RequestMetrics:
+    """
+    Instrumentation des requêtes de l'application, par route (règle d'URL, pas
+    l'URL elle-même) et méthode : histogrammes de latence, de tailles et de
+    sauvegardes par requête, compteurs par statut, jauge des requêtes en cours.
+
+    Une requête qui sauvegarde plusieurs fois le même fichier, ou dont les
+    sauvegardes durent plus de SLOW_SAVE_MS au total, est journalisée avec sa
+    route.
+    """
+
+    def __init__(self, prefix: str = 'planning', persistence: PersistenceStats = save_stats):
+        self.prefix = prefix
+        self.persistence = persistence
+        self.slow_save_ms = 200.0
+        self._latency: Dict[Tuple[str, str], Histogram] = {}
+        self._request_size: Dict[Tuple[str, str], Histogram] = {}
+        self._response_size: Dict[Tuple[str, str], Histogram] = {}
+        self._saves: Dict[Tuple[str, str], Histogram] = {}
+        self._statuses: Dict[Tuple[str, str, int], int] = {}
+        self._in_flight: Dict[Tuple[str, str], int] = {}
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        """Installe les points d'instrumentation sur l'application"""
+        app.extensions['planning_metrics'] = self
+        self.slow_save_ms = app.config.get('SLOW_SAVE_MS', self.slow_save_ms)
+        self.persistence.init_app(app)
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+        app.teardown_request(self._teardown_request)
+
+    @staticmethod
+    def _key() -> Tuple[str, str]:
+        rule = request.url_rule
+        return (rule.rule if rule is not None else UNMATCHED_ENDPOINT), request.method
+
+    def _before_request(self):
+        key = self._key()
+        g._metrics = {'key': key, 'start': time.perf_counter(), 'status': None}
+        self.persistence.begin_request()
+        with self._lock:
+            self._in_flight[key] = self._in_flight.get(key, 0) + 1
+            if request.content_length:
+                self._histogram(self._request_size, key, SIZE_BUCKETS).observe(request.content_length)
+
+    def _after_request(self, response):
+        state = g.get('_metrics')
+        if state is not None:
+            state['status'] = response.status_code
+            # Réponses en flux : taille inconnue, non comptée
+            if not response.is_streamed:
+                with self._lock:
+                    self._histogram(self._response_size, state['key'], SIZE_BUCKETS).observe(
+                        response.calculate_content_length() or 0)
+        return response
+
+    def _teardown_request(self, exception=None):
+        state = g.pop('_metrics', None)
+        if state is None:
+            return
+        elapsed = time.perf_counter() - state['start']
+        key = state['key']
+        status = state['status'] or 500
+        saves = self.persistence.end_request()
+        with self._lock:
+            self._in_flight[key] -= 1
+            self._histogram(self._latency, key, LATENCY_BUCKETS).observe(elapsed)
+            self._histogram(self._saves, key, SAVES_BUCKETS).observe(len(saves))
+            status_key = (*key, status)
+            self._statuses[status_key] = self._statuses.get(status_key, 0) + 1
+        self._trace_saves(key, saves, elapsed)
+
+    def _trace_saves(self, key: Tuple[str, str], saves: List[Dict], elapsed: float):
+        """Journalise les requêtes aux sauvegardes multiples ou lentes"""
+        files = {}
+        for save in saves:
+            files[save['file']] = files.get(save['file'], 0) + 1
+        save_ms = sum(save['duration_ms'] for save in saves)
+        # Employés puis créneaux dans la même requête : normal ; le même fichier deux fois : non
+        if max(files.values(), default=0) <= 1 and save_ms <= self.slow_save_ms:
+            return
+        endpoint, method = key
+        logger.warning("%s %s : %d sauvegarde(s) (%s) en %.1f ms, requête en %.1f ms",
+                       method, endpoint, len(saves),
+                       ', '.join(f"{name} x{count}" for name, count in files.items()),
+                       save_ms, elapsed * 1000)
+
+    @staticmethod
+    def _histogram(histograms: Dict, key, bounds) -> Histogram:
+        histogram = histograms.get(key)
+        if histogram is None:
+            histogram = histograms[key] = Histogram(bounds)
+        return histogram
+
+    def render(self, gauges: Iterable[Tuple[str, str, float]] = ()) -> str:
+        """
+        Métriques au format texte Prometheus (version 0.0.4). `gauges` ajoute des
+        jauges applicatives : (nom, description, valeur).
+        """
+        lines = []
+        with self._lock:
+            self._render_histograms(lines, 'http_request_duration_seconds',
+                                    "Durée de traitement des requêtes HTTP", self._latency)
+            self._render_histograms(lines, 'http_request_size_bytes',
+                                    "Taille du corps des requêtes HTTP", self._request_size)
+            self._render_histograms(lines, 'http_response_size_bytes',
+                                    "Taille du corps des réponses HTTP (hors flux)", self._response_size)
+            self._render_histograms(lines, 'http_request_saves',
+                                    "Sauvegardes de fichiers de données par requête HTTP", self._saves)
+
+            name = f"{self.prefix}_http_requests_total"
+            lines += [f"# HELP {name} Requêtes HTTP traitées, par statut", f"# TYPE {name} counter"]
+            for (endpoint, method, status), count in sorted(self._statuses.items()):
+                lines.append(f"{name}{_labels(endpoint=endpoint, method=method, status=status)} {count}")
+
+            name = f"{self.prefix}_http_requests_in_flight"
+            lines += [f"# HELP {name} Requêtes HTTP en cours de traitement", f"# TYPE {name} gauge"]
+            for (endpoint, method), count in sorted(self._in_flight.items()):
+                lines.append(f"{name}{_labels(endpoint=endpoint, method=method)} {count}")
+
+        self._render_persistence(lines)
+
+        for gauge_name, description, value in gauges:
+            name = f"{self.prefix}_{gauge_name}"
+            lines += [f"# HELP {name} {description}", f"# TYPE {name} gauge", f"{name} {_format_number(value)}"]
+        return '\n'.join(lines) + '\n'
+
+    def _render_histograms(self, lines: List[str], metric: str, description: str, histograms: Dict):
+        name = f"{self.prefix}_{metric}"
+        lines += [f"# HELP {name} {description}", f"# TYPE {name} histogram"]
+        for (endpoint, method), histogram in sorted(histograms.items()):
+            for bound, count in histogram.cumulative():
+                lines.append(f"{name}_bucket{_labels(endpoint=endpoint, method=method, le=bound)} {count}")
+            labels = _labels(endpoint=endpoint, method=method)
+            lines.append(f"{name}_sum{labels} {_format_number(histogram.sum)}")
+            lines.append(f"{name}_count{labels} {histogram.count}")
+
+    def _render_persistence(self, lines: List[str]):
+        """Compteurs cumulés des sauvegardes, par fichier de données"""
+        files = self.persistence.snapshot()
+        counters = (
+            ('persistence_saves_total', "Sauvegardes de fichiers de données", 'saves', 1),
+            ('persistence_save_errors_total', "Sauvegardes en erreur", 'errors', 1),
+            ('persistence_bytes_written_total', "Octets écrits par les sauvegardes", 'bytes_written', 1),
+            ('persistence_serialize_seconds_total', "Temps de sérialisation JSON", 'serialize_ms', 0.001),
+            ('persistence_write_seconds_total', "Temps d'écriture des fichiers", 'write_ms', 0.001),
+            ('persistence_fsync_seconds_total', "Temps de fsync (FSYNC_SAVES)", 'fsync_ms', 0.001),
+        )
+        # Les durées sont cumulées en millisecondes, publiées en secondes
+        for metric, description, field, scale in counters:
+            name = f"{self.prefix}_{metric}"
+            lines += [f"# HELP {name} {description}", f"# TYPE {name} counter"]
+            for file_name, stats in files.items():
+                lines.append(f"{name}{_labels(file=file_name)} {_format_number(stats[field] * scale)}")
@@ -0,0 +1,142 @@
+"""
+Index d'occupation des employés (masques horaires et compteurs d'heures)
+"""
+
+from typing import Dict, List, Tuple, Iterable
+from config import Config
+
+
+class OccupancyIndex:
+    """
+    Index d'occupation par (employé, semaine).
+
+    Pour chaque couple, on conserve un masque de 24 bits par jour (bit h = heure h
+    occupée), les créneaux du jour pour le calcul des repos, et le total d'heures
+    de la semaine. Les questions « libre ? », « combien d'heures ? » et « repos
+    respecté ? » ne parcourent donc plus l'ensemble des créneaux.
+    """
+
+    def __init__(self, shifts: Iterable = ()):
+        self._masks: Dict[Tuple[str, str], List[int]] = {}
+        self._day_shifts: Dict[Tuple[str, str], List[List[Tuple[int, int]]]] = {}
+        self._hours: Dict[Tuple[str, str], float] = {}
+
+        for shift in shifts:
+            self.add(shift)
+
+    @staticmethod
+    def hours_mask(start_hour: int, duration: int) -> int:
+        """Masque des heures occupées (mêmes règles que Shift.get_occupied_hours)"""
+        mask = 0
+        for i in range(int(duration)):
+            mask |= 1 << ((start_hour + i) % 24)
+        return mask
+
+    def _entry(self, employee_id: str, week: str) -> Tuple[List[int], List[List[Tuple[int, int]]]]:
+        key = (employee_id, week or '')
+        if key not in self._masks:
+            self._masks[key] = [0] * len(Config.DAYS_OF_WEEK)
+            self._day_shifts[key] = [[] for _ in Config.DAYS_OF_WEEK]
+            self._hours[key] = 0
+        return self._masks[key], self._day_shifts[key]
+
+    def add(self, shift):
+        """Ajoute un créneau à l'index"""
+        if shift.day not in Config.DAYS_OF_WEEK:
+            return
+        day_index = Config.DAYS_OF_WEEK.index(shift.day)
+        masks, day_shifts = self._entry(shift.employee_id, shift.week)
+        masks[day_index] |= self.hours_mask(shift.start_hour, shift.duration)
+        day_shifts[day_index].append((shift.start_hour, shift.duration))
+        self._hours[(shift.employee_id, shift.week or '')] += shift.duration
+
+    def remove(self, shift):
+        """Retire un créneau de l'index"""
+        if shift.day not in Config.DAYS_OF_WEEK:
+            return
+        key = (shift.employee_id, shift.week or '')
+        if key not in self._masks:
+            return
+        day_index = Config.DAYS_OF_WEEK.index(shift.day)
+        day_shifts = self._day_shifts[key][day_index]
+        if (shift.start_hour, shift.duration) not in day_shifts:
+            return
+        day_shifts.remove((shift.start_hour, shift.duration))
+
+        # Recalculer le masque du jour à partir des créneaux restants
+        mask = 0
+        for start_hour, duration in day_shifts:
+            mask |= self.hours_mask(start_hour, duration)
+        self._masks[key][day_index] = mask
+        self._hours[key] -= shift.duration
+
+    def _is_excluded(self, exclude, employee_id: str, week: str) -> bool:
+        """Vérifie que le créneau exclu appartient à l'index pour cet employé et cette semaine"""
+        if exclude is None or exclude.employee_id != employee_id or (exclude.week or '') != (week or ''):
+            return False
+        day_shifts = self._day_shifts.get((employee_id, week or ''))
+        if not day_shifts or exclude.day not in Config.DAYS_OF_WEEK:
+            return False
+        return (exclude.start_hour, exclude.duration) in day_shifts[Config.DAYS_OF_WEEK.index(exclude.day)]
+
+    def _intervals(self, employee_id: str, week: str, day_index: int, exclude=None) -> List[Tuple[int, int]]:
+        """Créneaux (début, durée) d'un jour, sans le créneau exclu (celui que l'on déplace)"""
+        day_shifts = self._day_shifts.get((employee_id, week or ''))
+        if not day_shifts:
+            return []
+        intervals = day_shifts[day_index]
+        if self._is_excluded(exclude, employee_id, week) and Config.DAYS_OF_WEEK.index(exclude.day) == day_index:
+            intervals = list(intervals)
+            intervals.remove((exclude.start_hour, exclude.duration))
+        return intervals
+
+    def day_mask(self, employee_id: str, week: str, day: str, exclude=None) -> int:
+        """Masque des heures occupées d'un employé pour un jour (hors créneau exclu)"""
+        masks = self._masks.get((employee_id, week or ''))
+        if not masks:
+            return 0
+        day_index = Config.DAYS_OF_WEEK.index(day)
+        if self._is_excluded(exclude, employee_id, week) and exclude.day == day:
+            mask = 0
+            for start_hour, duration in self._intervals(employee_id, week, day_index, exclude):
+                mask |= self.hours_mask(start_hour, duration)
+            return mask
+        return masks[day_index]
+
+    def is_free(self, employee_id: str, week: str, day: str, start_hour: int, duration: int,
+                exclude=None) -> bool:
+        """Vérifie qu'un employé est libre sur l'intervalle (exclude : créneau déplacé, ignoré)"""
+        return not (self.day_mask(employee_id, week, day, exclude) & self.hours_mask(start_hour, duration))
+
+    def week_hours(self, employee_id: str, week: str, exclude=None) -> float:
+        """Total d'heures planifiées pour un employé sur une semaine (hors créneau exclu)"""
+        hours = self._hours.get((employee_id, week or ''), 0)
+        if self._is_excluded(exclude, employee_id, week):
+            hours -= exclude.duration
+        return hours
+
+    def has_rest_period(self, employee_id: str, week: str, day: str, start_hour: int,
+                        duration: int, min_rest: int = None, exclude=None) -> bool:
+        """
+        Vérifie le repos minimum avec les créneaux de la veille et du lendemain.
+
+        Les heures sont absolues (fin après minuit : 24 et plus), le repos est
+        donc l'écart réel entre la fin d'un service et le début du suivant.
+        """
+        min_rest = Config.MIN_REST_PERIOD if min_rest is None else min_rest
+        if (employee_id, week or '') not in self._day_shifts:
+            return True
+
+        day_index = Config.DAYS_OF_WEEK.index(day)
+
+        if day_index > 0:
+            for prev_start, prev_duration in self._intervals(employee_id, week, day_index - 1, exclude):
+                if 24 + start_hour - (prev_start + prev_duration) < min_rest:
+                    return False
+
+        if day_index < len(Config.DAYS_OF_WEEK) - 1:
+            for next_start, _ in self._intervals(employee_id, week, day_index + 1, exclude):
+                if 24 + next_start - (start_hour + duration) < min_rest:
+                    return False
+
+        return True
@@ -0,0 +1,129 @@
+"""
+Écriture instrumentée des fichiers de données : durée de sérialisation,
+d'écriture et de fsync, octets écrits, et sauvegardes déclenchées par chaque
+requête
+"""
+
+import json
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Dict, List, Optional
+
+
+class SaveCounters:
+    """Compteurs cumulés des sauvegardes d'un fichier de données"""
+
+    __slots__ = ('saves', 'errors', 'bytes_written', 'serialize_seconds', 'write_seconds',
+                 'fsync_seconds', 'max_seconds', 'last')
+
+    def __init__(self):
+        self.saves = 0
+        self.errors = 0
+        self.bytes_written = 0
+        self.serialize_seconds = 0.0
+        self.write_seconds = 0.0
+        self.fsync_seconds = 0.0
+        self.max_seconds = 0.0
+        # Dernière sauvegarde : durées en millisecondes, taille et date
+        self.last: Optional[Dict] = None
+
+    def to_dict(self) -> Dict:
+        return {
+            'saves': self.saves,
+            'errors': self.errors,
+            'bytes_written': self.bytes_written,
+            'serialize_ms': round(self.serialize_seconds * 1000, 2),
+            'write_ms': round(self.write_seconds * 1000, 2),
+            'fsync_ms': round(self.fsync_seconds * 1000, 2),
+            'max_ms': round(self.max_seconds * 1000, 2),
+            'last': self.last
+        }
+
+
+class PersistenceStats:
+    """
+    Sauvegardes des gestionnaires, par fichier (`employees`, `shifts`,
+    `templates`), et trace des sauvegardes de la requête en cours.
+
+    Une requête est délimitée par begin_request() / end_request() (voir
+    RequestMetrics) ; les sauvegardes faites hors requête (tâches de fond,
+    scripts) sont comptées sans être rattachées à une requête.
+    """
+
+    def __init__(self):
+        self.fsync = False
+        self._files: Dict[str, SaveCounters] = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def init_app(self, app):
+        """FSYNC_SAVES : fsync après chaque sauvegarde (durabilité en cas de coupure)"""
+        self.fsync = bool(app.config.get('FSYNC_SAVES'))
+
+    def write_json(self, name: str, file_path: str, data) -> Dict:
+        """
+        Sérialise `data` et l'écrit dans `file_path` (même format que
+        json.dump(indent=2)), en mesurant chaque étape. Retourne les mesures.
+        """
+        start = time.perf_counter()
+        try:
+            payload = json.dumps(data, indent=2, ensure_ascii=False).encode('utf-8')
+            serialized = time.perf_counter()
+            with open(file_path, 'wb') as f:
+                f.write(payload)
+                f.flush()
+                written = time.perf_counter()
+                if self.fsync:
+                    os.fsync(f.fileno())
+            synced = time.perf_counter()
+        except Exception:
+            self._record(name, None, time.perf_counter() - start)
+            raise
+        save = {
+            'bytes': len(payload),
+            'serialize_ms': round((serialized - start) * 1000, 2),
+            'write_ms': round((written - serialized) * 1000, 2),
+            'fsync_ms': round((synced - written) * 1000, 2),
+            'duration_ms': round((synced - start) * 1000, 2),
+            'at': datetime.now().isoformat()
+        }
+        self._record(name, save, synced - start)
+        return save
+
+    def _record(self, name: str, save: Optional[Dict], elapsed: float):
+        with self._lock:
+            counters = self._files.get(name)
+            if counters is None:
+                counters = self._files[name] = SaveCounters()
+            counters.saves += 1
+            counters.max_seconds = max(counters.max_seconds, elapsed)
+            if save is None:
+                counters.errors += 1
+            else:
+                counters.bytes_written += save['bytes']
+                counters.serialize_seconds += save['serialize_ms'] / 1000
+                counters.write_seconds += save['write_ms'] / 1000
+                counters.fsync_seconds += save['fsync_ms'] / 1000
+                counters.last = save
+        saves = getattr(self._local, 'saves', None)
+        if saves is not None:
+            saves.append({'file': name, 'duration_ms': round(elapsed * 1000, 2)})
+
+    def begin_request(self):
+        self._local.saves = []
+
+    def end_request(self) -> List[Dict]:
+        """Sauvegardes faites par la requête du thread courant : [{file, duration_ms}]"""
+        saves = getattr(self._local, 'saves', None) or []
+        self._local.saves = None
+        return saves
+
+    def snapshot(self) -> Dict[str, Dict]:
+        with self._lock:
+            return {name: counters.to_dict() for name, counters in sorted(self._files.items())}
+
+
+# Instance partagée par les gestionnaires, configurée par create_app
+save_stats = PersistenceStats()
@@ -2,22 +2,27 @@
 Logique métier pour le planning
 """
 
-from typing import Dict, List, Tuple, Optional
-from datetime import datetime, timedelta
+from typing import Dict, List, Tuple, Optional, Iterable, Iterator
+from datetime import datetime, date, timedelta
+import math
+import time
+from contextlib import nullcontext
 from app.models.employee import EmployeeManager
-from app.models.shift import ShiftManager
+from app.models.shift import Shift, ShiftManager
+from app.models.occupancy import OccupancyIndex
 from config import Config
 
 
 class PlanningManager:
     """Gestionnaire principal du planning"""
 
-    def __init__(self):
-        self.employee_manager = EmployeeManager()
-        self.shift_manager = ShiftManager()
+    def __init__(self, employee_manager: EmployeeManager = None, shift_manager: ShiftManager = None):
+        # Les routes partagent leurs gestionnaires pour ne pas travailler sur une copie des données
+        self.employee_manager = employee_manager or EmployeeManager()
+        self.shift_manager = shift_manager or ShiftManager()
 
     def get_week_planning(self, week_offset: int = 0) -> Dict:
-        """Récupère le planning d'une semaine spécifique"""
+        """Récupère le planning type (créneaux non datés) d'une semaine spécifique"""
         week_days = self._get_week_days(week_offset)
         week_shifts = {}
 
@@ -35,6 +40,55 @@ class PlanningManager:
             'stats': self._calculate_week_stats(week_shifts)
         }
 
+    def get_week_view(self, week: str) -> Dict:
+        """
+        Modèle de vue d'une semaine datée (YYYY-WW), prêt à afficher : employés sans
+        photo, créneaux regroupés par jour puis par employé, heures et coût par employé.
+        Les employés inactifs n'apparaissent que s'ils ont un créneau dans la semaine.
+        """
+        year, week_number = map(int, week.split('-'))
+        monday = date.fromisocalendar(year, week_number, 1)
+        shifts, _ = self.shift_manager.query_shifts(week=week)
+
+        shifts_by_day = {day: {} for day in Config.DAYS_OF_WEEK}
+        employee_stats = {}
+        for shift in shifts:
+            shifts_by_day[shift.day].setdefault(shift.employee_id, []).append(shift.to_dict())
+            stats = employee_stats.setdefault(shift.employee_id, {'hours': 0, 'cost': 0.0, 'shifts': 0})
+            stats['hours'] += shift.duration
+            stats['shifts'] += 1
+
+        employees = []
+        for employee in self.employee_manager.get_all_employees(actif_only=False, include_photos=False):
+            if employee.actif or employee.id in employee_stats:
+                employees.append(employee.to_dict_without_photo())
+                if employee.id in employee_stats:
+                    stats = employee_stats[employee.id]
+                    stats['cost'] = round(stats['hours'] * employee.taux_horaire, 2)
+
+        for day_shifts in shifts_by_day.values():
+            for employee_shifts in day_shifts.values():
+                employee_shifts.sort(key=lambda shift: shift['start_hour'])
+
+        return {
+            'week': week,
+            'week_info': {
+                'start_date': monday.isoformat(),
+                'end_date': (monday + timedelta(days=6)).isoformat(),
+                'dates': {day: (monday + timedelta(days=i)).isoformat()
+                          for i, day in enumerate(Config.DAYS_OF_WEEK)}
+            },
+            'employees': employees,
+            'shifts_by_day': shifts_by_day,
+            'employee_stats': employee_stats,
+            'stats': {
+                'total_hours': sum(stats['hours'] for stats in employee_stats.values()),
+                'total_cost': round(sum(stats['cost'] for stats in employee_stats.values()), 2),
+                'total_shifts': len(shifts),
+                'active_employees': len(employee_stats)
+            }
+        }
+
     def _get_week_days(self, offset: int = 0) -> List[datetime]:
         """Calcule les jours d'une semaine avec offset"""
         today = datetime.now()
@@ -82,7 +136,11 @@ class PlanningManager:
         }
 
     def validate_shift_placement(self, shift_data: Dict) -> Tuple[bool, str]:
-        """Valide le placement d'un créneau"""
+        """
+        Valide le placement d'un créneau (mêmes règles que probe_placements, sur
+        l'index d'occupation de la semaine du créneau). `id` désigne le créneau
+        déplacé, ignoré lors des vérifications.
+        """
         # Vérifier que l'employé existe
         employee = self.employee_manager.get_employee(shift_data['employee_id'])
         if not employee:
@@ -92,84 +150,146 @@ class PlanningManager:
         if not employee.actif:
             return False, "Employé inactif"
 
-        # Vérifier les heures de travail
-        if shift_data['duration'] > 12:
-            return False, "Durée maximale de 12 heures dépassée"
-
-        # Vérifier les heures légales (exemple: pas plus de 35h/semaine)
-        week_hours = self._get_employee_week_hours(shift_data['employee_id'], shift_data['day'])
-        if week_hours + shift_data['duration'] > 35:
-            return False, f"Limite hebdomadaire dépassée ({week_hours + shift_data['duration']}h > 35h)"
+        # Vérifier la durée du créneau
+        if shift_data['duration'] > Config.MAX_SHIFT_DURATION:
+            return False, f"Durée maximale de {Config.MAX_SHIFT_DURATION} heures dépassée"
 
-        # Vérifier les repos obligatoires (exemple: 11h entre deux services)
-        if not self._check_rest_period(shift_data):
-            return False, "Période de repos insuffisante (11h minimum requis)"
+        existing = self.shift_manager.get_shift(shift_data['id']) if shift_data.get('id') else None
+        placement = {**shift_data, 'week': shift_data.get('week') or ''}
+        errors, _, _ = self._check_placement(self.shift_manager.get_occupancy_index(), employee,
+                                             placement, existing)
+        if errors:
+            return False, errors[0]
 
         return True, "Créneau valide"
 
-    def _get_employee_week_hours(self, employee_id: str, current_day: str) -> int:
-        """Calcule les heures déjà travaillées dans la semaine"""
-        total_hours = 0
-
-        for day in Config.DAYS_OF_WEEK:
-            if day == current_day:
-                continue
-
-            day_shifts = self.shift_manager.get_shifts_by_day(day)
-            for shift in day_shifts:
-                if shift.employee_id == employee_id:
-                    total_hours += shift.duration
-
-        return total_hours
+    @staticmethod
+    def _check_placement(occupancy: OccupancyIndex, employee, placement: Dict,
+                         exclude: Shift = None) -> Tuple[List[str], bool, float]:
+        """
+        Règles de placement d'un créneau : conflit, disponibilité, limite
+        hebdomadaire et repos minimum. Retourne (erreurs, conflit, heures de la
+        semaine après ajout).
+        """
+        day, week = placement['day'], placement['week']
+        start_hour, duration = int(placement['start_hour']), int(placement['duration'])
+        errors = []
+
+        conflict = not occupancy.is_free(employee.id, week, day, start_hour, duration, exclude=exclude)
+        if conflict:
+            errors.append("Conflit avec un autre créneau")
+        if not employee.is_available(day, start_hour, duration, week):
+            errors.append("Employé indisponible sur ce créneau")
+
+        hours_after = occupancy.week_hours(employee.id, week, exclude=exclude) + duration
+        if hours_after > Config.MAX_WEEKLY_HOURS:
+            errors.append(f"Limite hebdomadaire dépassée ({hours_after}h > {Config.MAX_WEEKLY_HOURS}h)")
+        if not occupancy.has_rest_period(employee.id, week, day, start_hour, duration, exclude=exclude):
+            errors.append(f"Période de repos insuffisante ({Config.MIN_REST_PERIOD}h minimum requis)")
+
+        return errors, conflict, hours_after
+
+    def find_replacements(self, shift_id: str, limit: int = 10) -> Optional[Dict]:
+        """
+        Cherche les remplaçants possibles pour un créneau (absence, échange).
+
+        Candidats: employés actifs du même poste, disponibles et libres sur l'intervalle, sous la
+        limite hebdomadaire après ajout et respectant le repos minimum. Le classement
+        privilégie le coût du créneau puis les heures déjà planifiées.
+        """
+        shift = self.shift_manager.get_shift(shift_id)
+        if not shift:
+            return None
 
-    def _check_rest_period(self, shift_data: Dict) -> bool:
-        """Vérifie les périodes de repos entre services"""
-        employee_id = shift_data['employee_id']
-        new_start = shift_data['start_hour']
-        new_end = (new_start + shift_data['duration']) % 24
-        current_day = shift_data['day']
+        absent = self.employee_manager.get_employee(shift.employee_id)
+        poste = absent.poste if absent else shift.poste_specifique
+        occupancy = self.shift_manager.get_occupancy_index()
 
-        # Vérifier avec le jour précédent
-        day_index = Config.DAYS_OF_WEEK.index(current_day)
-        if day_index > 0:
-            prev_day = Config.DAYS_OF_WEEK[day_index - 1]
-            prev_shifts = self.shift_manager.get_shifts_by_day(prev_day)
+        candidates = []
+        for employee in self.employee_manager.get_employees_by_type(poste):
+            if employee.id == shift.employee_id:
+                continue
+            if not occupancy.is_free(employee.id, shift.week, shift.day, shift.start_hour, shift.duration):
+                continue
+            if not employee.is_available(shift.day, shift.start_hour, shift.duration, shift.week):
+                continue
 
-            for shift in prev_shifts:
-                if shift.employee_id == employee_id:
-                    shift_end = (shift.start_hour + shift.duration) % 24
+            current_hours = occupancy.week_hours(employee.id, shift.week)
+            if current_hours + shift.duration > Config.MAX_WEEKLY_HOURS:
+                continue
+            if not occupancy.has_rest_period(employee.id, shift.week, shift.day,
+                                             shift.start_hour, shift.duration):
+                continue
 
-                    # Calculer la différence en heures
-                    if shift_end <= new_start:
-                        rest_hours = new_start - shift_end
-                    else:
-                        rest_hours = (24 - shift_end) + new_start
+            candidates.append({
+                'employee': employee.to_dict_without_photo(),
+                'cost': round(shift.duration * employee.taux_horaire, 2),
+                'current_hours': current_hours,
+                'hours_after': current_hours + shift.duration
+            })
 
-                    if rest_hours < 11:
-                        return False
+        candidates.sort(key=lambda c: (c['cost'], c['current_hours'], c['employee']['nom']))
 
-        # Vérifier avec le jour suivant
-        if day_index < len(Config.DAYS_OF_WEEK) - 1:
-            next_day = Config.DAYS_OF_WEEK[day_index + 1]
-            next_shifts = self.shift_manager.get_shifts_by_day(next_day)
+        return {
+            'shift': shift.to_dict(),
+            'poste': poste,
+            'candidates': candidates[:limit],
+            'total_candidates': len(candidates)
+        }
 
-            for shift in next_shifts:
-                if shift.employee_id == employee_id:
-                    next_start = shift.start_hour
+    def probe_placements(self, shift_data: Dict, candidates: List[Dict]) -> Dict:
+        """
+        Évalue en une passe des placements candidats pour un créneau (aperçu de glisser-déposer).
+
+        shift_data décrit le créneau déplacé : soit un créneau existant (id), ignoré
+        lors des vérifications, soit un nouveau créneau. Chaque candidat peut changer
+        le jour, l'heure, la durée, l'employé ou la semaine ; les champs absents sont
+        repris du créneau. Les contrôles portent sur l'index d'occupation : conflit,
+        disponibilité, limite hebdomadaire et repos minimum.
+        """
+        existing = self.shift_manager.get_shift(shift_data['id']) if shift_data.get('id') else None
+        base = {**existing.to_dict(), **shift_data} if existing else shift_data
+        occupancy = self.shift_manager.get_occupancy_index()
+        employees = {}
+
+        results = []
+        for candidate in candidates:
+            placement = {
+                'employee_id': candidate.get('employee_id', base.get('employee_id')),
+                'day': candidate.get('day', base.get('day')),
+                'start_hour': candidate.get('start_hour', base.get('start_hour')),
+                'duration': candidate.get('duration', base.get('duration')),
+                'week': candidate.get('week', base.get('week')) or ''
+            }
+            errors = self.shift_manager.validate_shift_data(placement)
+            result = {**placement, 'valid': False, 'conflict': False, 'errors': errors}
+            results.append(result)
+            if errors:
+                continue
 
-                    # Calculer la différence en heures
-                    if new_end <= next_start:
-                        rest_hours = next_start - new_end
-                    else:
-                        rest_hours = (24 - new_end) + next_start
+            employee_id = placement['employee_id']
+            if employee_id not in employees:
+                employees[employee_id] = self.employee_manager.get_employee(employee_id)
+            employee = employees[employee_id]
+            if not employee:
+                errors.append("Employé introuvable")
+                continue
+            if not employee.actif:
+                errors.append("Employé inactif")
 
-                    if rest_hours < 11:
-                        return False
+            placement_errors, result['conflict'], result['hours_after'] = self._check_placement(
+                occupancy, employee, placement, existing)
+            errors.extend(placement_errors)
+            result['valid'] = not errors
 
-        return True
+        return {
+            'shift': existing.to_dict() if existing else shift_data,
+            'results': results,
+            'valid_count': sum(1 for result in results if result['valid'])
+        }
 
     def get_employee_planning(self, employee_id: str, week_offset: int = 0) -> Dict:
-        """Récupère le planning d'un employé pour une semaine"""
+        """Récupère le planning type (créneaux non datés) d'un employé pour une semaine"""
         employee = self.employee_manager.get_employee(employee_id)
         if not employee:
             return None
@@ -226,9 +346,11 @@ class PlanningManager:
             needed_cooks = lunch_requirements.get('cuisiniers', 1)
             needed_servers = lunch_requirements.get('serveurs', 2)
 
-            # Assigner les cuisiniers
+            # Assigner les cuisiniers disponibles
             if 'cuisinier' in employees_by_type:
-                for i, cook in enumerate(employees_by_type['cuisinier'][:needed_cooks]):
+                available_cooks = [cook for cook in employees_by_type['cuisinier']
+                                   if cook.is_available('Lundi', 11, 4)]
+                for i, cook in enumerate(available_cooks[:needed_cooks]):
                     suggestions.append({
                         'employee_id': cook.id,
                         'day': 'Lundi',  # Exemple
@@ -237,9 +359,11 @@ class PlanningManager:
                         'reason': 'Service de midi - cuisinier principal'
                     })
 
-            # Assigner les serveurs
+            # Assigner les serveurs disponibles
             if 'serveur' in employees_by_type:
-                for i, server in enumerate(employees_by_type['serveur'][:needed_servers]):
+                available_servers = [server for server in employees_by_type['serveur']
+                                     if server.is_available('Lundi', 12, 3)]
+                for i, server in enumerate(available_servers[:needed_servers]):
                     suggestions.append({
                         'employee_id': server.id,
                         'day': 'Lundi',  # Exemple
@@ -285,6 +409,186 @@ class PlanningManager:
 
         return round(equity_score, 2)
 
+    def validate_coverage_requirements(self, requirements: List[Dict]) -> List[str]:
+        """Valide les besoins de couverture ({poste, day, start_hour, end_hour, count})"""
+        errors = []
+        for index, requirement in enumerate(requirements):
+            label = f"Besoin {index + 1}"
+            if requirement.get('poste') not in Config.EMPLOYEE_TYPES:
+                errors.append(f"{label}: poste invalide")
+            if requirement.get('day') not in Config.DAYS_OF_WEEK:
+                errors.append(f"{label}: jour invalide")
+            try:
+                start_hour = int(requirement.get('start_hour'))
+                end_hour = int(requirement.get('end_hour'))
+                count = int(requirement.get('count', 1))
+                if not 0 <= start_hour < end_hour <= 24:
+                    errors.append(f"{label}: plage horaire invalide (0 <= début < fin <= 24)")
+                if count < 0:
+                    errors.append(f"{label}: effectif négatif")
+            except (ValueError, TypeError):
+                errors.append(f"{label}: heures ou effectif invalides")
+        return errors
+
+    def get_coverage_deficit(self, requirements: List[Dict], week: str = '') -> Dict[str, Dict[str, List[int]]]:
+        """
+        Courbe de sous-effectif par poste, jour et heure : besoin moins effectif planifié.
+        Les besoins qui se recouvrent sur une même heure gardent le plus élevé.
+        """
+        required: Dict[str, Dict[str, List[int]]] = {}
+        for requirement in requirements:
+            curve = required.setdefault(requirement['poste'], {}).setdefault(requirement['day'], [0] * 24)
+            for hour in range(int(requirement['start_hour']), int(requirement['end_hour'])):
+                curve[hour] = max(curve[hour], int(requirement.get('count', 1)))
+
+        for shift in self.shift_manager.get_shifts_by_week_number(week):
+            employee = self.employee_manager.get_employee(shift.employee_id)
+            if not employee:
+                continue
+            curve = required.get(shift.poste_specifique or employee.poste, {}).get(shift.day)
+            if curve is None:
+                continue
+            for hour in shift.get_occupied_hours():
+                curve[hour] -= 1
+
+        return {
+            poste: {day: [max(0, needed) for needed in curve] for day, curve in days.items()}
+            for poste, days in required.items()
+        }
+
+    @staticmethod
+    def _deficit_blocks(curve: List[int]) -> List[Tuple[int, int]]:
+        """Découpe une courbe de déficit en blocs contigus [début, fin), couche par couche"""
+        remaining = list(curve)
+        blocks = []
+        while any(remaining):
+            hour = 0
+            while hour < 24:
+                if remaining[hour] > 0:
+                    start = hour
+                    while hour < 24 and remaining[hour] > 0:
+                        remaining[hour] -= 1
+                        hour += 1
+                    blocks.append((start, hour))
+                else:
+                    hour += 1
+        return blocks
+
+    @staticmethod
+    def _split_block(start: int, end: int) -> List[Tuple[int, int]]:
+        """Découpe un bloc en créneaux (début, durée) respectant les durées min et max"""
+        length = end - start
+        if length < Config.MIN_SHIFT_DURATION:
+            # Étendre le bloc jusqu'à la durée minimale sans dépasser minuit
+            start = min(start, 24 - Config.MIN_SHIFT_DURATION)
+            return [(start, Config.MIN_SHIFT_DURATION)]
+
+        parts = math.ceil(length / Config.MAX_SHIFT_DURATION)
+        chunks = []
+        for index in range(parts):
+            chunk_start = start + (length * index) // parts
+            chunk_end = start + (length * (index + 1)) // parts
+            chunks.append((chunk_start, chunk_end - chunk_start))
+        return chunks
+
+    def fill_coverage_gaps(self, requirements: List[Dict], week: str = '', dry_run: bool = True) -> Dict:
+        """
+        Propose les créneaux à ajouter pour combler le sous-effectif, en limitant le coût.
+
+        Opération incrémentale : le planning existant est conservé, seuls les déficits
+        sont couverts. Chaque bloc contigu de déficit est confié à l'employé le moins
+        cher du poste qui est disponible, libre, sous la limite hebdomadaire et dont
+        le repos est respecté (heuristique gloutonne, blocs les plus longs d'abord).
+
+        Ce n'est pas une optimisation exacte : un employé bon marché retenu pour un bloc
+        peut manquer à un bloc suivant. Le coût étant la somme des créneaux, le total est
+        minimal quand chaque créneau revient au taux le plus bas parmi les employés
+        disponibles sur sa plage, occupés ou non : `minimum_cost` l'indique (faux dès
+        qu'un bloc reste sans candidat ou qu'un créneau est écarté).
+
+        Hors dry_run, le calcul et l'ajout se font sous le verrou d'écriture des
+        créneaux : `proposals` et les totaux ne portent que sur les créneaux ajoutés,
+        un créneau écarté à l'enregistrement est renvoyé dans `rejected`.
+        """
+        started = time.perf_counter()
+        rejected = []
+        with nullcontext() if dry_run else self.shift_manager._writing():
+            deficit, proposals, unfilled, minimum_cost = self._propose_coverage(requirements, week)
+            created = 0
+            if not dry_run:
+                added, collisions = self.shift_manager.add_shifts_bulk(proposals)
+                created = len(added)
+                proposals = added
+                rejected = [(shift, {'reason': "Conflit avec un créneau existant",
+                                     'conflicts_with': [conflict.id for conflict in conflicts]})
+                            for shift, conflicts in collisions]
+
+        def cost(shift: Shift) -> float:
+            return shift.duration * self.employee_manager.get_employee(shift.employee_id).taux_horaire
+
+        costs = {shift.id: cost(shift) for shift in proposals}
+        return {
+            'week': week,
+            'dry_run': dry_run,
+            'deficit': deficit,
+            'proposals': [{**shift.to_dict(), 'cost': round(costs[shift.id], 2)} for shift in proposals],
+            'rejected': [{**shift.to_dict(), 'cost': round(cost(shift), 2), **reason} for shift, reason in rejected],
+            'unfilled': unfilled,
+            'total_hours': sum(shift.duration for shift in proposals),
+            'total_cost': round(sum(costs.values()), 2),
+            'minimum_cost': minimum_cost and not rejected,
+            'created': created,
+            'elapsed_ms': round((time.perf_counter() - started) * 1000, 2)
+        }
+
+    def _propose_coverage(self, requirements: List[Dict],
+                          week: str) -> Tuple[Dict[str, Dict[str, List[int]]], List[Shift], List[Dict], bool]:
+        """
+        Déficit, créneaux proposés pour le combler, blocs restés sans candidat et
+        coût minimal atteint (voir fill_coverage_gaps)
+        """
+        deficit = self.get_coverage_deficit(requirements, week)
+
+        # Index local : les propositions y sont ajoutées au fil de l'eau
+        occupancy = OccupancyIndex(self.shift_manager.get_shifts_by_week_number(week))
+        availability = self.employee_manager.get_availability_index()
+        proposals: List[Shift] = []
+        unfilled = []
+        # Chaque créneau au taux le plus bas de sa plage : borne inférieure du coût atteinte
+        minimum_cost = True
+
+        for poste, days in deficit.items():
+            for day, curve in days.items():
+                blocks = sorted(self._deficit_blocks(curve), key=lambda b: b[0] - b[1])
+                for block_start, block_end in blocks:
+                    for start_hour, duration in self._split_block(block_start, block_end):
+                        candidates = sorted(
+                            availability.find_available(day, start_hour, duration, week, poste),
+                            key=lambda e: (e.taux_horaire, occupancy.week_hours(e.id, week))
+                        )
+                        chosen = None
+                        for employee in candidates:
+                            if (occupancy.is_free(employee.id, week, day, start_hour, duration)
+                                    and occupancy.week_hours(employee.id, week) + duration <= Config.MAX_WEEKLY_HOURS
+                                    and occupancy.has_rest_period(employee.id, week, day, start_hour, duration)):
+                                chosen = employee
+                                break
+
+                        if not chosen:
+                            unfilled.append({'poste': poste, 'day': day, 'start_hour': start_hour,
+                                             'duration': duration})
+                            minimum_cost = False
+                            continue
+                        if chosen.taux_horaire > candidates[0].taux_horaire:
+                            minimum_cost = False
+
+                        shift = Shift(employee_id=chosen.id, day=day, start_hour=start_hour, duration=duration,
+                                      poste_specifique=poste, notes="Couverture automatique", week=week)
+                        occupancy.add(shift)
+                        proposals.append(shift)
+
+        return deficit, proposals, unfilled, minimum_cost
+
     def export_planning_data(self, format_type: str = 'json', week_offset: int = 0) -> Dict:
         """Exporte les données du planning dans différents formats"""
         planning_data = self.get_week_planning(week_offset)
@@ -325,10 +629,58 @@ class PlanningManager:
             # Format JSON par défaut
             return {'format': 'json', 'data': planning_data}
 
-    def get_planning_conflicts(self) -> List[Dict]:
-        """Récupère tous les conflits du planning"""
+    # Colonnes de l'export CSV, une ligne par créneau : tous les champs relus par l'import
+    # (poste_specifique), plus des colonnes de lecture (employé, poste effectif, fin)
+    EXPORT_COLUMNS = ('id', 'week', 'date', 'day', 'employee_id', 'employee', 'poste', 'poste_specifique',
+                      'start_hour', 'end_hour', 'duration', 'notes')
+    # Colonnes propres aux lignes employé de l'export CSV (id et poste sont partagés)
+    EXPORT_EMPLOYEE_COLUMNS = ('nom', 'prenom', 'email', 'telephone', 'taux_horaire', 'actif')
+
+    def iter_export_shifts(self, weeks: Iterable[str] = None, start_date: date = None,
+                           end_date: date = None) -> Iterator[Dict]:
+        """
+        Parcourt les créneaux à exporter, semaine par semaine puis par jour et heure.
+        Seuls les créneaux de la semaine en cours sont matérialisés : la mémoire
+        reste constante quelle que soit la profondeur de l'historique exporté.
+        Un filtre par dates écarte le planning type (créneaux sans semaine).
+        """
+        wanted = set(weeks) if weeks is not None else None
+
+        for week in self.shift_manager.get_weeks():
+            if wanted is not None and week not in wanted:
+                continue
+            if start_date or end_date:
+                if not week:
+                    continue
+                year, week_number = map(int, week.split('-'))
+                monday = date.fromisocalendar(year, week_number, 1)
+                if (end_date and monday > end_date) or (start_date and monday + timedelta(days=6) < start_date):
+                    continue
+
+            shifts, _ = self.shift_manager.query_shifts(week=week)
+            shifts.sort(key=lambda s: (Config.DAYS_OF_WEEK.index(s.day) if s.day in Config.DAYS_OF_WEEK else 7,
+                                       s.start_hour, s.employee_id))
+
+            for shift in shifts:
+                shift_date = None
+                if week and shift.day in Config.DAYS_OF_WEEK:
+                    year, week_number = map(int, week.split('-'))
+                    shift_date = date.fromisocalendar(year, week_number, Config.DAYS_OF_WEEK.index(shift.day) + 1)
+                    if (start_date and shift_date < start_date) or (end_date and shift_date > end_date):
+                        continue
+
+                employee = self.employee_manager.get_employee(shift.employee_id)
+                yield {
+                    **shift.to_dict(),
+                    'date': shift_date.isoformat() if shift_date else '',
+                    'employee': employee.nom_complet if employee else 'Inconnu',
+                    'poste': shift.poste_specifique or (employee.poste if employee else '')
+                }
+
+    def get_planning_conflicts(self, week: str = '') -> List[Dict]:
+        """Récupère les conflits du planning type, ou d'une semaine datée (YYYY-WW)"""
         conflicts = []
-        all_shifts = self.shift_manager.get_all_shifts()
+        all_shifts, _ = self.shift_manager.query_shifts(week=week)
 
         for i, shift1 in enumerate(all_shifts):
             for shift2 in all_shifts[i + 1:]:
@@ -0,0 +1,95 @@
+"""
+Gestionnaires construits à la première utilisation : importer les routes ne lit
+ni n'écrit aucun fichier de données
+"""
+
+import threading
+from typing import Callable, Dict, List
+
+
+class ManagerRegistry:
+    """
+    Fabriques des gestionnaires partagés et instances déjà construites.
+
+    Chaque gestionnaire est construit une seule fois, au premier accès (ou par
+    load_all() si l'application demande un préchargement).
+    """
+
+    def __init__(self):
+        self._factories: Dict[str, Callable[[], object]] = {}
+        self._instances: Dict[str, object] = {}
+        self._proxies: List['LazyManager'] = []
+        self._lock = threading.RLock()
+
+    def register(self, name: str, factory: Callable[[], object]) -> 'LazyManager':
+        """Déclare un gestionnaire et retourne le mandataire qui le construira au besoin"""
+        self._factories[name] = factory
+        proxy = LazyManager(self, name)
+        self._proxies.append(proxy)
+        return proxy
+
+    def get(self, name: str):
+        """Instance du gestionnaire, construite au premier appel"""
+        instance = self._instances.get(name)
+        if instance is None:
+            with self._lock:
+                instance = self._instances.get(name)
+                if instance is None:
+                    instance = self._instances[name] = self._factories[name]()
+        return instance
+
+    def is_loaded(self, name: str) -> bool:
+        return name in self._instances
+
+    def loaded(self) -> List[str]:
+        """Noms des gestionnaires déjà construits"""
+        return list(self._instances)
+
+    def load_all(self):
+        """Construit tous les gestionnaires (préchargement avant de servir)"""
+        for name in self._factories:
+            self.get(name)
+
+    def reset(self):
+        """Oublie les instances construites : le prochain accès relit les fichiers (tests)"""
+        with self._lock:
+            self._instances = {}
+            for proxy in self._proxies:
+                object.__setattr__(proxy, '_target', None)
+
+    def init_app(self, app):
+        """Rattache le registre à l'application ; PRELOAD_MANAGERS construit tout immédiatement"""
+        app.extensions['planning_managers'] = self
+        if app.config.get('PRELOAD_MANAGERS'):
+            self.load_all()
+
+
+class LazyManager:
+    """
+    Mandataire d'un gestionnaire : le premier accès à un attribut construit le
+    gestionnaire, les suivants lui sont transmis directement.
+    """
+
+    __slots__ = ('_registry', '_name', '_target')
+
+    def __init__(self, registry: ManagerRegistry, name: str):
+        object.__setattr__(self, '_registry', registry)
+        object.__setattr__(self, '_name', name)
+        object.__setattr__(self, '_target', None)
+
+    def _resolve(self):
+        target = self._target
+        if target is None:
+            target = self._registry.get(self._name)
+            object.__setattr__(self, '_target', target)
+        return target
+
+    def __getattr__(self, attr):
+        return getattr(self._resolve(), attr)
+
+    def __setattr__(self, attr, value):
+        setattr(self._resolve(), attr, value)
+
+    def __repr__(self):
+        state = 'chargé' if self._registry.is_loaded(self._name) else 'non chargé'
+        return f"<LazyManager {self._name} ({state})>"
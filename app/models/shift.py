@@ -2,11 +2,21 @@
 Modèle Shift (Créneau)
 """
 
+import bisect
 import json
 import os
-from typing import List, Dict, Optional, Tuple
+import threading
+import uuid
+from contextlib import contextmanager, nullcontext
+from typing import List, Dict, Optional, Tuple, Iterable
 from datetime import datetime, timedelta
-from config import Config
+from config import Config, TimeGrid
+from app.models.occupancy import OccupancyIndex
+from app.models.changelog import ChangeLog, TRACKING_FIELDS
+from app.models.persistence import save_stats
+from app.models.storage import SharedFile
+from app.models.jobs import Progress
+from app.utils.helpers import is_valid_week_number
 
 
 class Shift:
@@ -14,7 +24,7 @@ class Shift:
 
     def __init__(self, shift_id: str = None, employee_id: str = "",
                  day: str = "", start_hour: int = 8, duration: int = 1,
-                 poste_specifique: str = "", notes: str = ""):
+                 poste_specifique: str = "", notes: str = "", week: str = ""):
         self.id = shift_id or self._generate_id()
         self.employee_id = employee_id
         self.day = day
@@ -22,11 +32,15 @@ class Shift:
         self.duration = duration
         self.poste_specifique = poste_specifique
         self.notes = notes
+        self.week = week  # Semaine ISO (YYYY-WW), vide pour le planning type
         self.date_creation = datetime.now().isoformat()
+        self.version = 0  # Incrémentée à chaque modification enregistrée
+        self.seq = 0  # Séquence de la dernière modification (voir ChangeLog)
 
     def _generate_id(self) -> str:
-        """Génère un ID unique basé sur le timestamp"""
-        return f"shift_{int(datetime.now().timestamp() * 1000)}"
+        """Génère un ID unique : timestamp et suffixe aléatoire (aucune collision entre workers)"""
+        timestamp_ms = int(datetime.now().timestamp() * 1000)
+        return f"shift_{timestamp_ms}_{uuid.uuid4().hex[:12]}"
 
     @property
     def end_hour(self) -> int:
@@ -47,7 +61,8 @@ class Shift:
 
     def conflicts_with(self, other_shift: 'Shift') -> bool:
         """Vérifie s'il y a conflit avec un autre créneau"""
-        if self.day != other_shift.day or self.employee_id != other_shift.employee_id:
+        if (self.day != other_shift.day or self.employee_id != other_shift.employee_id
+                or self.week != other_shift.week):
             return False
 
         # Créer les listes d'heures occupées
@@ -65,6 +80,17 @@ class Shift:
             hours.append(hour)
         return hours
 
+    def get_slot_keys(self, grid: TimeGrid) -> List[str]:
+        """Clés des créneaux de la grille couverts par ce créneau (heures hors ouverture ignorées)"""
+        slot_index = grid.slot_index()
+        keys = [f"{hour}_{minutes}" for hour in self.get_occupied_hours()
+                for minutes in grid.time_slots_for_hour(hour)]
+        return [key for key in keys if key in slot_index]
+
+    def is_valid_for_grid(self, grid: TimeGrid) -> bool:
+        """Vérifie que le début du créneau tombe sur la grille (heures pleines : toujours le cas)"""
+        return (self.start_hour * 60) % grid.granularity == 0
+
     def to_dict(self) -> Dict:
         """Convertit le créneau en dictionnaire"""
         return {
@@ -75,7 +101,10 @@ class Shift:
             'duration': self.duration,
             'poste_specifique': self.poste_specifique,
             'notes': self.notes,
+            'week': self.week,
             'date_creation': self.date_creation,
+            'version': self.version,
+            'seq': self.seq,
             'end_hour': self.end_hour,
             'formatted_hours': self.formatted_hours,
             'crosses_midnight': self.crosses_midnight
@@ -92,28 +121,99 @@ class Shift:
         shift.duration = int(data.get('duration', 1))
         shift.poste_specifique = data.get('poste_specifique', '')
         shift.notes = data.get('notes', '')
+        shift.week = data.get('week') or ''
         shift.date_creation = data.get('date_creation', datetime.now().isoformat())
+        shift.version = int(data.get('version', 0))
+        shift.seq = int(data.get('seq', 0))
         return shift
 
 
 class ShiftManager:
-    """Gestionnaire pour les créneaux"""
+    """
+    Gestionnaire pour les créneaux.
+
+    Accès concurrents par copie sur écriture : le dictionnaire des créneaux publié
+    n'est jamais modifié. Les lectures le parcourent sans verrou ; les écritures,
+    sérialisées par `_write_lock`, en publient un nouveau puis l'enregistrent.
+    Les index paresseux sont rattachés à l'instantané à partir duquel ils ont été construits.
+
+    En mode multi-processus (Config.MULTI_WORKER), les écritures prennent en plus
+    un verrou de fichier et repartent des données enregistrées par les autres
+    processus ; refresh() les prend en compte avant une lecture.
+    """
 
-    def __init__(self):
+    def __init__(self, change_log: ChangeLog = None):
         self.file_path = Config.SHIFTS_FILE
+        self.change_log = change_log or ChangeLog()
+        self._write_lock = threading.RLock()
+        self._storage = SharedFile(self.file_path) if Config.MULTI_WORKER else None
+        if Config.MULTI_WORKER:
+            # Séquence commune aux employés et aux créneaux, dans le dossier de données
+            self.change_log.share(os.path.join(os.path.dirname(self.file_path), 'sequence'))
         self._shifts: Dict[str, Shift] = {}
+        # (instantané des créneaux, index construit à partir de cet instantané)
+        self._occupancy: Optional[Tuple[Dict[str, Shift], OccupancyIndex]] = None
+        self._indexes: Optional[Tuple[Dict[str, Shift], Dict[str, Dict[str, List[str]]]]] = None
+        # Versions du jeu de données et des sous-ensembles (par semaine, par employé)
+        self.data_version = 0
+        self._week_versions: Dict[str, int] = {}
+        self._employee_versions: Dict[str, int] = {}
+        self._scopes: Dict[str, Tuple[str, str]] = {}
+        self._version_floor = 0
+        # Mesures de la dernière sauvegarde (/api/health)
+        self.last_save: Optional[Dict] = None
         self.load_shifts()
 
     def load_shifts(self):
         """Charge les créneaux depuis le fichier JSON"""
+        with self.change_log.writing(), self._write_lock, self._process_lock():
+            if self._storage:
+                self._storage.sync()
+            self._load_shifts()
+
+    def _process_lock(self):
+        return self._storage.locked() if self._storage else nullcontext()
+
+    @contextmanager
+    def _writing(self):
+        """Écriture : threads sérialisés et, entre processus, verrou de fichier sur des données à jour"""
+        with self.change_log.writing(), self._write_lock, self._process_lock():
+            self._sync_storage()
+            yield
+
+    def _sync_storage(self):
+        if self._storage is None:
+            return
+        sequence = self._storage.sync()
+        if sequence is not None:
+            # Un autre processus a enregistré : ses séquences priment, toutes les versions changent
+            self.change_log.observe(sequence)
+            self._load_shifts()
+            self._version_floor = self.data_version = self.change_log.sequence
+
+    def refresh(self) -> bool:
+        """
+        Mode multi-processus : recharge les créneaux si un autre processus a
+        enregistré depuis (un simple stat sinon). Retourne True en cas de rechargement.
+        """
+        if self._storage is None or not self._storage.changed():
+            return False
+        with self._writing():
+            pass
+        return True
+
+    def _load_shifts(self):
         try:
             if os.path.exists(self.file_path):
                 with open(self.file_path, 'r', encoding='utf-8') as f:
                     data = json.load(f)
-                    self._shifts = {
+                    shifts = {
                         shift_id: Shift.from_dict(shift_data)
                         for shift_id, shift_data in data.items()
                     }
+                    self._shifts = shifts
+                    self.change_log.observe(max((shift.seq for shift in shifts.values()), default=0))
+                    self._rebuild_versions()
             else:
                 # Créer des créneaux par défaut
                 self._create_default_shifts()
@@ -136,38 +236,371 @@ class ShiftManager:
             Shift(employee_id="emp_6", day="Samedi", start_hour=18, duration=6)
         ]
 
-        for shift in default_shifts:
-            self._shifts[shift.id] = shift
-
-        self.save_shifts()
+        # Appelé au chargement, sous les verrous d'écriture
+        self._publish({shift.id: shift for shift in default_shifts}, [shift.id for shift in default_shifts])
 
     def save_shifts(self):
         """Sauvegarde les créneaux dans le fichier JSON"""
-        try:
-            data = {
-                shift_id: shift.to_dict()
-                for shift_id, shift in self._shifts.items()
-            }
-            with open(self.file_path, 'w', encoding='utf-8') as f:
-                json.dump(data, f, indent=2, ensure_ascii=False)
-        except Exception as e:
-            print(f"Erreur lors de la sauvegarde des créneaux: {e}")
+        with self._writing():
+            # Les index suivent leur instantané ; la remise à zéro couvre les modifications faites en place
+            self._occupancy = None
+            self._indexes = None
+            try:
+                data = {shift_id: shift.to_dict() for shift_id, shift in self._shifts.items()}
+                self.last_save = save_stats.write_json('shifts', self.file_path, data)
+                if self._storage:
+                    self._storage.commit(self.change_log.sequence)
+            except Exception as e:
+                print(f"Erreur lors de la sauvegarde des créneaux: {e}")
+            finally:
+                self.change_log.publish()
+
+    def _publish(self, shifts: Dict[str, Shift], shift_ids: Iterable[str]):
+        """
+        Journalise les créneaux `shift_ids` modifiés dans la copie de travail `shifts`
+        (version et séquence attribuées sur les nouvelles copies), la publie puis
+        l'enregistre. Appelé sous `_writing()`.
+        """
+        sequence = self.change_log.sequence
+        recorded = self.change_log.stamp('shifts', shifts, shift_ids, self._shifts)
+        self._shifts = shifts
+        if recorded:
+            self._bump_versions(sequence)
+        self.save_shifts()
+
+    def _rebuild_versions(self):
+        """Recalcule les versions par semaine et par employé à partir des créneaux"""
+        self._week_versions = {}
+        self._employee_versions = {}
+        self._scopes = {}
+        for shift in self._shifts.values():
+            self._scopes[shift.id] = (shift.employee_id, shift.week)
+            self._week_versions[shift.week] = max(self._week_versions.get(shift.week, 0), shift.seq)
+            self._employee_versions[shift.employee_id] = max(
+                self._employee_versions.get(shift.employee_id, 0), shift.seq)
+        self.data_version = max(self._week_versions.values(), default=0)
+
+    def _bump_versions(self, since: int):
+        """
+        Avance la version des semaines et employés touchés par les modifications
+        postérieures à `since` (ancienne et nouvelle place d'un créneau déplacé).
+        """
+        sequence = self.change_log.sequence
+        self.data_version = sequence
+        changes = self.change_log.changes_since(since, 'shifts')
+        if changes is None:
+            # Historique insuffisant pour savoir quoi invalider : tout l'est
+            self._rebuild_versions()
+            self._version_floor = self.data_version = sequence
+            return
+
+        for _, _, shift_id, _ in changes:
+            scopes = [self._scopes.pop(shift_id, None)]
+            shift = self._shifts.get(shift_id)
+            if shift:
+                self._scopes[shift_id] = (shift.employee_id, shift.week)
+                scopes.append(self._scopes[shift_id])
+            for scope in scopes:
+                if scope:
+                    self._employee_versions[scope[0]] = sequence
+                    self._week_versions[scope[1]] = sequence
+
+    def get_week_version(self, week: str) -> int:
+        """Version des créneaux d'une semaine (change uniquement si cette semaine change)"""
+        return max(self._week_versions.get(week or '', 0), self._version_floor)
+
+    def get_employee_version(self, employee_id: str) -> int:
+        """Version des créneaux d'un employé"""
+        return max(self._employee_versions.get(employee_id, 0), self._version_floor)
 
     def add_shift(self, shift: Shift) -> Tuple[bool, str]:
         """Ajoute un créneau avec validation"""
         try:
-            # Vérifier les conflits
-            conflicts = self.get_conflicts(shift)
-            if conflicts:
-                conflict_names = [f"{c.day} {c.formatted_hours}" for c in conflicts]
-                return False, f"Conflit avec: {', '.join(conflict_names)}"
-
-            self._shifts[shift.id] = shift
-            self.save_shifts()
+            with self._writing():
+                # Un ID existant n'est jamais écrasé (ajout concurrent, ID fourni par un import)
+                if shift.id in self._shifts:
+                    return False, f"Créneau déjà existant: {shift.id}"
+
+                # Vérifier les conflits
+                conflicts = self.get_conflicts(shift)
+                if conflicts:
+                    conflict_names = [f"{c.day} {c.formatted_hours}" for c in conflicts]
+                    return False, f"Conflit avec: {', '.join(conflict_names)}"
+
+                self._publish({**self._shifts, shift.id: shift}, [shift.id])
             return True, "Créneau ajouté avec succès"
         except Exception as e:
             return False, f"Erreur lors de l'ajout: {e}"
 
+    def add_shifts_bulk(self, shifts: List[Shift],
+                        atomic: bool = False) -> Tuple[List[Shift], List[Tuple[Shift, List[Shift]]]]:
+        """
+        Ajoute plusieurs créneaux en une seule passe de conflits et une seule sauvegarde.
+        Les créneaux en conflit (avec l'existant ou entre eux) sont écartés et renvoyés ;
+        avec atomic=True, un seul conflit annule tout (aucun créneau ajouté). Un créneau
+        dont l'ID existe déjà est une collision avec le créneau de même ID.
+        """
+        with self._writing():
+            # Regrouper l'existant par (employé, semaine, jour) : seuls ces couples peuvent se chevaucher
+            occupancy: Dict[Tuple[str, str, str], List[Shift]] = {}
+            for existing in self._shifts.values():
+                occupancy.setdefault((existing.employee_id, existing.week, existing.day), []).append(existing)
+
+            added = []
+            collisions = []
+            taken = {}
+            for shift in shifts:
+                same_id = self._shifts.get(shift.id) or taken.get(shift.id)
+                if same_id:
+                    collisions.append((shift, [same_id]))
+                    continue
+                bucket = occupancy.setdefault((shift.employee_id, shift.week, shift.day), [])
+                conflicts = [other for other in bucket if shift.conflicts_with(other)]
+                if conflicts:
+                    collisions.append((shift, conflicts))
+                    continue
+                bucket.append(shift)
+                added.append(shift)
+                taken[shift.id] = shift
+
+            if atomic and collisions:
+                return [], collisions
+            if added:
+                self._publish({**self._shifts, **{shift.id: shift for shift in added}},
+                              [shift.id for shift in added])
+
+        return added, collisions
+
+    def validate_shift_data(self, data: Dict, shift_id: str = None) -> List[str]:
+        """
+        Valide les champs d'un créneau. Pour une modification (shift_id fourni),
+        seuls les champs présents sont vérifiés.
+        """
+        errors = []
+        partial = shift_id is not None
+
+        if not partial:
+            for field in ('employee_id', 'day', 'start_hour', 'duration'):
+                if data.get(field) in (None, ''):
+                    errors.append(f"Le champ '{field}' est requis")
+            if errors:
+                return errors
+
+        if 'day' in data and data['day'] not in Config.DAYS_OF_WEEK:
+            errors.append("Jour invalide")
+
+        try:
+            if 'start_hour' in data and not 0 <= int(data['start_hour']) <= 23:
+                errors.append("Heure de début invalide (0-23)")
+            if 'duration' in data:
+                duration = int(data['duration'])
+                if duration < Config.MIN_SHIFT_DURATION or duration > Config.MAX_SHIFT_DURATION:
+                    errors.append(f"Durée doit être entre {Config.MIN_SHIFT_DURATION}h "
+                                  f"et {Config.MAX_SHIFT_DURATION}h")
+        except (ValueError, TypeError):
+            errors.append("Heure de début ou durée invalide")
+
+        if data.get('week') and not is_valid_week_number(data['week']):
+            errors.append("Semaine invalide (format YYYY-WW)")
+
+        return errors
+
+    def apply_batch(self, operations: List[Dict], employee_ids: Iterable[str] = None,
+                    atomic: bool = True) -> Tuple[bool, List[Dict]]:
+        """
+        Applique une liste ordonnée d'opérations ({op: create|update|delete, id, data})
+        en tout ou rien.
+
+        Chaque opération est validée sur une copie de travail qui intègre les
+        opérations précédentes : déplacer un créneau sur la place libérée par un
+        autre dans le même lot est donc accepté. Si une seule opération échoue,
+        rien n'est appliqué et les opérations valides sont marquées annulées
+        (success False) ; sinon l'ensemble est enregistré en une sauvegarde.
+        Avec atomic=False, les opérations valides sont appliquées et les autres ignorées.
+        """
+        with self._writing():
+            return self._apply_batch(operations, employee_ids, atomic)
+
+    def _apply_batch(self, operations: List[Dict], employee_ids: Iterable[str] = None,
+                     atomic: bool = True) -> Tuple[bool, List[Dict]]:
+        known_employees = set(employee_ids) if employee_ids is not None else None
+        working = dict(self._shifts)
+        # Créneaux touchés, dans l'ordre : seuls ceux-là sont journalisés à la publication
+        touched = []
+
+        # Créneaux de la copie de travail regroupés par (employé, semaine, jour)
+        buckets: Dict[Tuple[str, str, str], Dict[str, Shift]] = {}
+        for shift in working.values():
+            buckets.setdefault((shift.employee_id, shift.week, shift.day), {})[shift.id] = shift
+
+        def detach(shift: Shift):
+            buckets.get((shift.employee_id, shift.week, shift.day), {}).pop(shift.id, None)
+
+        def attach(shift: Shift) -> List[str]:
+            bucket = buckets.setdefault((shift.employee_id, shift.week, shift.day), {})
+            conflicts = [other.id for other in bucket.values() if shift.conflicts_with(other)]
+            if not conflicts:
+                bucket[shift.id] = shift
+            return conflicts
+
+        results = []
+        for index, operation in enumerate(operations):
+            op = operation.get('op')
+            shift_id = operation.get('id')
+            # Version et séquence sont attribuées par le serveur
+            data = {key: value for key, value in (operation.get('data') or {}).items()
+                    if key not in TRACKING_FIELDS}
+            result = {'index': index, 'op': op, 'id': shift_id, 'success': False}
+            results.append(result)
+
+            if op not in ('create', 'update', 'delete'):
+                result['errors'] = ["Opération inconnue (create, update ou delete)"]
+                continue
+            if op != 'create' and shift_id not in working:
+                result['errors'] = ["Créneau introuvable"]
+                continue
+            if op == 'create' and data.get('id') in working:
+                result['errors'] = ["Un créneau avec cet identifiant existe déjà"]
+                continue
+
+            if op == 'delete':
+                detach(working.pop(shift_id))
+                touched.append(shift_id)
+                result['success'] = True
+                continue
+
+            errors = self.validate_shift_data(data, shift_id if op == 'update' else None)
+            employee_id = data.get('employee_id')
+            if known_employees is not None and employee_id and employee_id not in known_employees:
+                errors.append(f"Employé {employee_id} introuvable")
+            if errors:
+                result['errors'] = errors
+                continue
+
+            if op == 'create':
+                # Un identifiant fourni par le client (créé hors ligne) est conservé
+                shift = Shift.from_dict(data)
+                shift.id = data.get('id') or shift._generate_id()
+            else:
+                current = working[shift_id]
+                shift = Shift.from_dict({**current.to_dict(), **data, 'id': shift_id})
+                detach(current)
+
+            conflicts = attach(shift)
+            if conflicts:
+                if op == 'update':
+                    attach(working[shift_id])
+                result['errors'] = [f"Conflit avec: {', '.join(conflicts)}"]
+                continue
+
+            working[shift.id] = shift
+            touched.append(shift.id)
+            result['id'] = shift.id
+            result['shift'] = shift.to_dict()
+            result['success'] = True
+
+        applied = all(result['success'] for result in results)
+        if atomic and not applied:
+            # Rien n'est enregistré : aucune opération ne doit sembler appliquée
+            for result, operation in zip(results, operations):
+                if result['success']:
+                    result.update(success=False, id=operation.get('id'), errors=["Annulé : lot refusé"])
+                    result.pop('shift', None)
+        elif any(result['success'] for result in results):
+            self._publish(working, touched)
+
+        return applied, results
+
+    def merge_records(self, records: List[Dict], deleted_ids: Iterable[str] = (),
+                      employee_ids: Iterable[str] = None) -> Dict:
+        """
+        Fusionne les créneaux modifiés par un client depuis sa dernière synchronisation.
+        Un enregistrement dont la version de base est dépassée côté serveur est
+        refusé (conflit) ; les autres sont appliqués en une seule sauvegarde.
+        """
+        # Lecture des versions et application sous le même verrou : pas de modification intercalée
+        with self._writing():
+            conflicts = []
+            operations = []
+            for data in records:
+                shift_id = data.get('id')
+                current = self._shifts.get(shift_id)
+                if current and data.get('version') is not None and int(data['version']) < current.version:
+                    conflicts.append({'id': shift_id, 'client_version': int(data['version']),
+                                      'server_version': current.version})
+                    continue
+                operations.append({'op': 'update' if current else 'create', 'id': shift_id, 'data': data})
+
+            for shift_id in deleted_ids:
+                if shift_id in self._shifts:
+                    operations.append({'op': 'delete', 'id': shift_id})
+
+            _, results = self.apply_batch(operations, employee_ids, atomic=False)
+        return {
+            'applied': sum(1 for result in results if result['success']),
+            'conflicts': conflicts,
+            'errors': [{'id': result['id'], 'errors': result['errors']}
+                       for result in results if not result['success']]
+        }
+
+    def get_occupancy_index(self) -> OccupancyIndex:
+        """Retourne l'index d'occupation, reconstruit paresseusement après chaque modification"""
+        shifts = self._shifts
+        cached = self._occupancy
+        if cached is None or cached[0] is not shifts:
+            cached = self._occupancy = (shifts, OccupancyIndex(shifts.values()))
+        return cached[1]
+
+    # Champs indexés pour query_shifts
+    INDEXED_FIELDS = ('day', 'employee_id', 'week')
+
+    def _get_indexes(self) -> Tuple[Dict[str, Shift], Dict[str, Dict[str, List[str]]]]:
+        """
+        Index secondaires (jour, employé, semaine) vers des listes d'IDs triées,
+        avec l'instantané des créneaux qu'ils décrivent
+        """
+        shifts = self._shifts
+        cached = self._indexes
+        if cached is None or cached[0] is not shifts:
+            indexes = {field: {} for field in self.INDEXED_FIELDS}
+            ordered_ids = sorted(shifts)
+            for shift_id in ordered_ids:
+                shift = shifts[shift_id]
+                for field in self.INDEXED_FIELDS:
+                    indexes[field].setdefault(getattr(shift, field), []).append(shift_id)
+            indexes[''] = {'': ordered_ids}
+            cached = self._indexes = (shifts, indexes)
+        return cached
+
+    def query_shifts(self, day: str = None, employee_id: str = None, week: str = None,
+                     after: str = None, limit: int = None) -> Tuple[List[Shift], Optional[str]]:
+        """
+        Recherche paginée des créneaux, triés par ID (ordre stable).
+        Le filtre le plus sélectif passe par son index, les autres sont vérifiés
+        sur les seuls candidats. Retourne la page et le curseur de la suivante.
+        """
+        shifts, indexes = self._get_indexes()
+        filters = {field: value for field, value in
+                   (('day', day), ('employee_id', employee_id), ('week', week)) if value is not None}
+
+        if filters:
+            candidates = min((indexes[field].get(value, []) for field, value in filters.items()), key=len)
+        else:
+            candidates = indexes['']['']
+
+        start = bisect.bisect_right(candidates, after) if after else 0
+        page = []
+        next_cursor = None
+        for shift_id in candidates[start:]:
+            shift = shifts[shift_id]
+            if all(getattr(shift, field) == value for field, value in filters.items()):
+                if limit is not None and len(page) == limit:
+                    next_cursor = page[-1].id
+                    break
+                page.append(shift)
+
+        return page, next_cursor
+
     def get_shift(self, shift_id: str) -> Optional[Shift]:
         """Récupère un créneau par son ID"""
         return self._shifts.get(shift_id)
@@ -176,40 +609,49 @@ class ShiftManager:
         """Récupère tous les créneaux"""
         return list(self._shifts.values())
 
-    def get_shifts_by_day(self, day: str) -> List[Shift]:
-        """Récupère les créneaux d'un jour"""
-        return [shift for shift in self._shifts.values() if shift.day == day]
+    def get_shifts_by_day(self, day: str, week: str = '') -> List[Shift]:
+        """Récupère les créneaux d'un jour, du planning type par défaut ou d'une semaine datée"""
+        return [shift for shift in self._shifts.values() if shift.day == day and shift.week == week]
 
     def get_shifts_by_employee(self, employee_id: str) -> List[Shift]:
         """Récupère les créneaux d'un employé"""
         return [shift for shift in self._shifts.values() if shift.employee_id == employee_id]
 
-    def get_shifts_by_week(self, week_days: List[str]) -> Dict[str, List[Shift]]:
-        """Récupère les créneaux d'une semaine"""
+    def get_shifts_by_week_number(self, week: str) -> List[Shift]:
+        """Récupère les créneaux datés d'une semaine (YYYY-WW)"""
+        return [shift for shift in self._shifts.values() if shift.week == week]
+
+    def get_weeks(self) -> List[str]:
+        """Semaines (YYYY-WW) ayant au moins un créneau, triées ("" = planning type)"""
+        return sorted(self._get_indexes()[1]['week'])
+
+    def get_shifts_by_week(self, week_days: List[str], week: str = '') -> Dict[str, List[Shift]]:
+        """Récupère les créneaux d'une semaine (planning type par défaut)"""
         week_shifts = {}
         for day in week_days:
-            week_shifts[day] = self.get_shifts_by_day(day)
+            week_shifts[day] = self.get_shifts_by_day(day, week)
         return week_shifts
 
     def update_shift(self, shift_id: str, data: Dict) -> Tuple[bool, str]:
         """Met à jour un créneau"""
         try:
-            if shift_id not in self._shifts:
-                return False, "Créneau introuvable"
-
-            # Créer une copie pour validation
-            updated_shift = Shift.from_dict({**self._shifts[shift_id].to_dict(), **data})
-            updated_shift.id = shift_id
-
-            # Vérifier les conflits (excluant le créneau actuel)
-            conflicts = self.get_conflicts(updated_shift, exclude_id=shift_id)
-            if conflicts:
-                conflict_names = [f"{c.day} {c.formatted_hours}" for c in conflicts]
-                return False, f"Conflit avec: {', '.join(conflict_names)}"
-
-            # Appliquer les modifications
-            self._shifts[shift_id] = updated_shift
-            self.save_shifts()
+            with self._writing():
+                if shift_id not in self._shifts:
+                    return False, "Créneau introuvable"
+
+                # Créer une copie pour validation (version et séquence restent celles du serveur)
+                data = {key: value for key, value in data.items() if key not in TRACKING_FIELDS}
+                updated_shift = Shift.from_dict({**self._shifts[shift_id].to_dict(), **data})
+                updated_shift.id = shift_id
+
+                # Vérifier les conflits (excluant le créneau actuel)
+                conflicts = self.get_conflicts(updated_shift, exclude_id=shift_id)
+                if conflicts:
+                    conflict_names = [f"{c.day} {c.formatted_hours}" for c in conflicts]
+                    return False, f"Conflit avec: {', '.join(conflict_names)}"
+
+                # Publier les modifications
+                self._publish({**self._shifts, shift_id: updated_shift}, [shift_id])
             return True, "Créneau modifié avec succès"
         except Exception as e:
             return False, f"Erreur lors de la modification: {e}"
@@ -217,10 +659,12 @@ class ShiftManager:
     def delete_shift(self, shift_id: str) -> bool:
         """Supprime un créneau"""
         try:
-            if shift_id in self._shifts:
-                del self._shifts[shift_id]
-                self.save_shifts()
-                return True
+            with self._writing():
+                if shift_id in self._shifts:
+                    shifts = dict(self._shifts)
+                    del shifts[shift_id]
+                    self._publish(shifts, [shift_id])
+                    return True
         except Exception as e:
             print(f"Erreur lors de la suppression du créneau: {e}")
         return False
@@ -235,9 +679,9 @@ class ShiftManager:
                 conflicts.append(other_shift)
         return conflicts
 
-    def get_weekly_stats(self, week_days: List[str]) -> Dict:
-        """Calcule les statistiques de la semaine"""
-        week_shifts = self.get_shifts_by_week(week_days)
+    def get_weekly_stats(self, week_days: List[str], week: str = None) -> Dict:
+        """Calcule les statistiques de la semaine (planning type si week est vide)"""
+        week_shifts = self.get_shifts_by_week(week_days, week or '')
 
         total_hours = 0
         employee_hours = {}
@@ -254,4 +698,108 @@ class ShiftManager:
             'employee_hours': employee_hours,
             'average_hours': total_hours / len(employee_hours) if employee_hours else 0,
             'active_employees': len(employee_hours)
-        }
\ No newline at end of file
+        }
+
+    def get_slot_usage_stats(self, grid: TimeGrid = None) -> Dict:
+        """Statistiques d'utilisation des créneaux de la grille (grille par défaut si absente)"""
+        grid = grid or Config.get_time_grid()
+        slot_usage = {slot['key']: {
+            'display': slot['display'],
+            'hour': slot['hour'],
+            'minutes': slot['minutes'],
+            'is_main_hour': slot['is_main_hour'],
+            'count': 0,
+            'total_hours': 0,
+            'employees': set()
+        } for slot in grid.all_time_slots()}
+
+        for shift in self._shifts.values():
+            slot_keys = shift.get_slot_keys(grid)
+            for key in slot_keys:
+                usage = slot_usage[key]
+                usage['count'] += 1
+                usage['total_hours'] += shift.duration / len(slot_keys)
+                usage['employees'].add(shift.employee_id)
+
+        for usage in slot_usage.values():
+            usage['employees'] = len(usage['employees'])
+            usage['total_hours'] = round(usage['total_hours'], 2)
+
+        return {
+            'granularity': grid.granularity,
+            'total_slots': len(slot_usage),
+            'used_slots': sum(1 for usage in slot_usage.values() if usage['count'] > 0),
+            'slot_usage': slot_usage
+        }
+
+    def validate_all_shifts_granularity(self, grid: TimeGrid = None) -> Dict:
+        """Vérifie que tous les créneaux tombent sur la grille (grille par défaut si absente)"""
+        grid = grid or Config.get_time_grid()
+        shifts = self._shifts
+        invalid_shifts = [{
+            'id': shift.id,
+            'employee_id': shift.employee_id,
+            'day': shift.day,
+            'formatted_time': shift.formatted_hours
+        } for shift in shifts.values() if not shift.is_valid_for_grid(grid)]
+
+        return {
+            'valid': not invalid_shifts,
+            'total_shifts': len(shifts),
+            'invalid_shifts': invalid_shifts,
+            'invalid_count': len(invalid_shifts),
+            'granularity': grid.granularity
+        }
+
+    # Fréquence des points de progression lors des parcours de tous les créneaux
+    PROGRESS_STEP = 500
+
+    def migrate_shifts_to_granularity(self, grid: TimeGrid, progress: Progress = None) -> Tuple[bool, str]:
+        """
+        Vérifie que les créneaux sont compatibles avec une nouvelle grille. La grille
+        par défaut n'est pas modifiée : c'est à l'appelant de l'adopter en cas de succès.
+        """
+        shifts = list(self._shifts.values())
+        invalid_count = 0
+        for index, shift in enumerate(shifts):
+            if progress and index % self.PROGRESS_STEP == 0:
+                progress(index, len(shifts))
+            if not shift.is_valid_for_grid(grid):
+                invalid_count += 1
+        if invalid_count:
+            return False, f"{invalid_count} créneaux incompatibles avec la granularité {grid.granularity} min"
+        return True, f"Migration réussie: {len(shifts)} créneaux compatibles"
+
+    def fix_invalid_shifts(self, grid: TimeGrid = None, progress: Progress = None) -> Tuple[bool, str]:
+        """
+        Aligne sur la grille (grille par défaut si absente) le début des créneaux
+        qui n'y tombent pas. Chaque correction est une modification courte : le
+        verrou d'écriture n'est pas gardé pendant tout le parcours.
+        """
+        grid = grid or Config.get_time_grid()
+        invalid = [shift.id for shift in self._shifts.values() if not shift.is_valid_for_grid(grid)]
+        if not invalid:
+            return True, "Aucun créneau à corriger"
+
+        fixed = 0
+        errors = []
+        for index, shift_id in enumerate(invalid):
+            if progress:
+                progress(index, len(invalid))
+            shift = self.get_shift(shift_id)
+            if shift is None or shift.is_valid_for_grid(grid):
+                continue
+            # Début ramené au pas de grille précédent
+            start_minutes = shift.start_hour * 60 // grid.granularity * grid.granularity
+            success, message = self.update_shift(shift_id, {'start_hour': start_minutes // 60})
+            if success:
+                fixed += 1
+            else:
+                errors.append(f"{shift.day} {shift.formatted_hours}: {message}")
+
+        if errors and not fixed:
+            return False, f"Aucun créneau corrigé: {'; '.join(errors)}"
+        message = f"{fixed} créneaux corrigés"
+        if errors:
+            message += f", {len(errors)} en échec: {'; '.join(errors)}"
+        return True, message
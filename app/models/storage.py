@@ -0,0 +1,132 @@
+"""
+Coordination entre processus (plusieurs workers gunicorn) : verrou de fichier
+autour des écritures et compteur de génération dans un fichier annexe
+"""
+
+import json
+import os
+import threading
+from contextlib import contextmanager
+from typing import Dict, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows : pas de verrou entre processus, un seul worker possible
+    fcntl = None
+
+
+class _FileLock:
+    """
+    Verrou exclusif sur un fichier `.lock`, unique par chemin dans le processus :
+    flock est attaché au descripteur, deux descripteurs du même processus se
+    bloqueraient mutuellement. Réentrant pour un thread, exclusif entre threads.
+    """
+
+    _instances: Dict[str, '_FileLock'] = {}
+    _instances_lock = threading.Lock()
+
+    @classmethod
+    def for_path(cls, lock_path: str) -> '_FileLock':
+        with cls._instances_lock:
+            lock = cls._instances.get(lock_path)
+            if lock is None:
+                lock = cls._instances[lock_path] = cls(lock_path)
+            return lock
+
+    def __init__(self, lock_path: str):
+        self.lock_path = lock_path
+        self._thread_lock = threading.RLock()
+        self._file = None
+        self._depth = 0
+
+    @contextmanager
+    def held(self):
+        with self._thread_lock:
+            if self._depth == 0 and fcntl is not None:
+                self._file = open(self.lock_path, 'a')
+                fcntl.flock(self._file, fcntl.LOCK_EX)
+            self._depth += 1
+            try:
+                yield
+            finally:
+                self._depth -= 1
+                if self._depth == 0 and self._file is not None:
+                    fcntl.flock(self._file, fcntl.LOCK_UN)
+                    self._file.close()
+                    self._file = None
+
+
+class SharedFile:
+    """
+    Fichier de données partagé entre processus.
+
+    Chaque enregistrement se fait sous un verrou exclusif (`<fichier>.lock`) et
+    incrémente la génération écrite dans `<fichier>.gen`, avec la dernière
+    séquence de modification. Un processus détecte les écritures des autres par
+    un simple stat de ce fichier annexe (mtime, taille, inode) : il ne relit la
+    génération, puis les données, que si le stat a changé.
+
+    Le verrou est réentrant, et partagé par toutes les instances du processus
+    sur le même fichier (voir _FileLock).
+    """
+
+    def __init__(self, file_path: str):
+        self.file_path = file_path
+        self.lock_path = f"{file_path}.lock"
+        self.generation_path = f"{file_path}.gen"
+        # Dernière génération prise en compte par ce processus
+        self.generation = 0
+        # Identifiant facultatif conservé d'une écriture à l'autre (voir ChangeLog.share)
+        self.epoch: Optional[str] = None
+        self._stat: Optional[Tuple[int, int, int]] = None
+        self._lock = _FileLock.for_path(self.lock_path)
+
+    def locked(self):
+        """Verrou exclusif entre processus"""
+        return self._lock.held()
+
+    def _stat_key(self) -> Optional[Tuple[int, int, int]]:
+        try:
+            stat = os.stat(self.generation_path)
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_size, stat.st_ino
+
+    def _read(self) -> Tuple[int, int, Optional[str]]:
+        """(génération, séquence, epoch) enregistrées dans le fichier annexe"""
+        try:
+            with open(self.generation_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            return int(data.get('generation', 0)), int(data.get('sequence', 0)), data.get('epoch')
+        except (FileNotFoundError, ValueError, TypeError, AttributeError):
+            return 0, 0, None
+
+    def changed(self) -> bool:
+        """Vérification sans verrou (un stat) : le fichier annexe a-t-il changé depuis la dernière lecture ?"""
+        return self._stat_key() != self._stat
+
+    def sync(self) -> Optional[int]:
+        """
+        Relit la génération, sous le verrou. Retourne la séquence enregistrée si
+        un autre processus a écrit depuis la dernière lecture, None sinon.
+        """
+        self._stat = self._stat_key()
+        generation, sequence, epoch = self._read()
+        if generation == self.generation:
+            return None
+        self.generation = generation
+        self.epoch = epoch
+        return sequence
+
+    def commit(self, sequence: int):
+        """Publie un enregistrement (sous le verrou) : nouvelle génération et dernière séquence"""
+        self.generation += 1
+        temp_path = f"{self.generation_path}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            data = {'generation': self.generation, 'sequence': sequence}
+            if self.epoch:
+                data['epoch'] = self.epoch
+            json.dump(data, f)
+        # Remplacement atomique : un lecteur voit l'ancienne ou la nouvelle génération, jamais un fichier partiel
+        os.replace(temp_path, self.generation_path)
+        self._stat = self._stat_key()
@@ -0,0 +1,264 @@
+"""
+Modèle WeekTemplate (semaine type) et rotation des équipes
+"""
+
+import json
+import os
+import threading
+import uuid
+from contextlib import contextmanager, nullcontext
+from typing import List, Dict, Optional
+from datetime import datetime
+from config import Config
+from app.models.shift import Shift
+from app.models.persistence import save_stats
+from app.models.storage import SharedFile
+
+
+class WeekTemplate:
+    """
+    Semaine type : ensemble nommé de créneaux sans date.
+
+    Chaque entrée porte soit un `employee_id` fixe, soit un `rotation_slot`
+    (ex: 'A', 'B', 'C') résolu au moment de l'expansion grâce à la rotation.
+    """
+
+    ENTRY_FIELDS = ('employee_id', 'rotation_slot', 'day', 'start_hour', 'duration',
+                    'poste_specifique', 'notes')
+
+    def __init__(self, template_id: str = None, nom: str = "", description: str = "",
+                 entries: List[Dict] = None):
+        self.id = template_id or self._generate_id()
+        self.nom = nom
+        self.description = description
+        self.entries = entries or []
+        self.date_creation = datetime.now().isoformat()
+
+    def _generate_id(self) -> str:
+        """Génère un ID unique : timestamp et suffixe aléatoire (aucune collision entre workers)"""
+        timestamp_ms = int(datetime.now().timestamp() * 1000)
+        return f"tpl_{timestamp_ms}_{uuid.uuid4().hex[:12]}"
+
+    @property
+    def rotation_slots(self) -> List[str]:
+        """Retourne les lettres de rotation utilisées, triées (A, B, C...)"""
+        return sorted({entry['rotation_slot'] for entry in self.entries if entry.get('rotation_slot')})
+
+    @property
+    def total_hours(self) -> int:
+        """Nombre d'heures couvertes par la semaine type"""
+        return sum(entry['duration'] for entry in self.entries)
+
+    @classmethod
+    def from_shifts(cls, nom: str, shifts: List[Shift], description: str = "") -> 'WeekTemplate':
+        """Crée une semaine type à partir de créneaux existants (la date est retirée)"""
+        entries = [{
+            'employee_id': shift.employee_id,
+            'day': shift.day,
+            'start_hour': shift.start_hour,
+            'duration': shift.duration,
+            'poste_specifique': shift.poste_specifique,
+            'notes': shift.notes
+        } for shift in shifts]
+        return cls(nom=nom, description=description, entries=entries)
+
+    def resolve_rotation(self, rotation: Dict[str, str], week_index: int) -> Dict[str, str]:
+        """
+        Associe chaque lettre de rotation à un employé pour la n-ième semaine.
+        La semaine 0 applique la rotation telle quelle, puis chaque semaine décale
+        les employés d'un rang (A→B→C→A).
+        """
+        slots = sorted(rotation.keys())
+        if not slots:
+            return {}
+        return {
+            slot: rotation[slots[(index + week_index) % len(slots)]]
+            for index, slot in enumerate(slots)
+        }
+
+    def validate_rotation(self, rotation: Dict[str, str]) -> List[str]:
+        """Vérifie que toutes les lettres utilisées par la semaine type sont attribuées"""
+        errors = []
+        for slot in self.rotation_slots:
+            if not rotation.get(slot):
+                errors.append(f"Aucun employé pour la rotation '{slot}'")
+        return errors
+
+    def expand(self, weeks: List[str], rotation: Dict[str, str] = None) -> Dict[str, List[Shift]]:
+        """Génère les créneaux datés de chaque semaine cible"""
+        rotation = rotation or {}
+        shifts_by_week = {}
+
+        for week_index, week in enumerate(weeks):
+            assignment = self.resolve_rotation(rotation, week_index)
+            week_shifts = []
+            for entry in self.entries:
+                employee_id = entry.get('employee_id')
+                if entry.get('rotation_slot'):
+                    employee_id = assignment.get(entry['rotation_slot'])
+                week_shifts.append(Shift(
+                    employee_id=employee_id,
+                    day=entry['day'],
+                    start_hour=entry['start_hour'],
+                    duration=entry['duration'],
+                    poste_specifique=entry.get('poste_specifique', ''),
+                    notes=entry.get('notes', ''),
+                    week=week
+                ))
+            shifts_by_week[week] = week_shifts
+
+        return shifts_by_week
+
+    def to_dict(self) -> Dict:
+        """Convertit la semaine type en dictionnaire"""
+        return {
+            'id': self.id,
+            'nom': self.nom,
+            'description': self.description,
+            'entries': self.entries,
+            'date_creation': self.date_creation,
+            'rotation_slots': self.rotation_slots,
+            'total_hours': self.total_hours
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'WeekTemplate':
+        """Crée une semaine type à partir d'un dictionnaire"""
+        template = cls()
+        template.id = data.get('id') or template.id
+        template.nom = data.get('nom', '')
+        template.description = data.get('description', '')
+        template.entries = [
+            {key: entry[key] for key in cls.ENTRY_FIELDS if key in entry}
+            for entry in data.get('entries', [])
+        ]
+        for entry in template.entries:
+            entry['start_hour'] = int(entry.get('start_hour', 8))
+            entry['duration'] = int(entry.get('duration', 1))
+        template.date_creation = data.get('date_creation', datetime.now().isoformat())
+        return template
+
+
+class TemplateManager:
+    """Gestionnaire des semaines types (copie sur écriture, comme les créneaux)"""
+
+    def __init__(self):
+        self.file_path = Config.TEMPLATES_FILE
+        self._write_lock = threading.RLock()
+        self._storage = SharedFile(self.file_path) if Config.MULTI_WORKER else None
+        self._templates: Dict[str, WeekTemplate] = {}
+        # Mesures de la dernière sauvegarde (/api/health)
+        self.last_save: Optional[Dict] = None
+        self.load_templates()
+
+    def load_templates(self):
+        """Charge les semaines types depuis le fichier JSON"""
+        with self._write_lock, self._process_lock():
+            if self._storage:
+                self._storage.sync()
+            self._load_templates()
+
+    def _process_lock(self):
+        return self._storage.locked() if self._storage else nullcontext()
+
+    @contextmanager
+    def _writing(self):
+        """Écriture : threads sérialisés et, entre processus, verrou de fichier sur des données à jour"""
+        with self._write_lock, self._process_lock():
+            if self._storage and self._storage.sync() is not None:
+                self._load_templates()
+            yield
+
+    def refresh(self) -> bool:
+        """Mode multi-processus : recharge les semaines types si un autre processus a enregistré depuis"""
+        if self._storage is None or not self._storage.changed():
+            return False
+        with self._writing():
+            pass
+        return True
+
+    def _load_templates(self):
+        try:
+            if os.path.exists(self.file_path):
+                with open(self.file_path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                    self._templates = {
+                        template_id: WeekTemplate.from_dict(template_data)
+                        for template_id, template_data in data.items()
+                    }
+        except Exception as e:
+            print(f"Erreur lors du chargement des semaines types: {e}")
+            self._templates = {}
+
+    def save_templates(self):
+        """Sauvegarde les semaines types dans le fichier JSON"""
+        try:
+            with self._writing():
+                data = {
+                    template_id: template.to_dict()
+                    for template_id, template in self._templates.items()
+                }
+                self.last_save = save_stats.write_json('templates', self.file_path, data)
+                if self._storage:
+                    # Pas de journal pour les semaines types : seule la génération compte
+                    self._storage.commit(0)
+        except Exception as e:
+            print(f"Erreur lors de la sauvegarde des semaines types: {e}")
+
+    def add_template(self, template: WeekTemplate) -> bool:
+        """Ajoute une semaine type (refusée si l'ID existe déjà : rien n'est écrasé)"""
+        try:
+            with self._writing():
+                if template.id in self._templates:
+                    return False
+                self._templates = {**self._templates, template.id: template}
+                self.save_templates()
+            return True
+        except Exception as e:
+            print(f"Erreur lors de l'ajout de la semaine type: {e}")
+            return False
+
+    def get_template(self, template_id: str) -> Optional[WeekTemplate]:
+        """Récupère une semaine type par son ID"""
+        return self._templates.get(template_id)
+
+    def get_all_templates(self) -> List[WeekTemplate]:
+        """Récupère toutes les semaines types"""
+        return sorted(self._templates.values(), key=lambda t: t.nom)
+
+    def delete_template(self, template_id: str) -> bool:
+        """Supprime une semaine type"""
+        with self._writing():
+            if template_id in self._templates:
+                templates = dict(self._templates)
+                del templates[template_id]
+                self._templates = templates
+                self.save_templates()
+                return True
+        return False
+
+    def validate_template_data(self, template_data: Dict) -> List[str]:
+        """Valide les données d'une semaine type"""
+        errors = []
+
+        if not template_data.get('nom'):
+            errors.append("Le champ 'nom' est requis")
+
+        for index, entry in enumerate(template_data.get('entries', [])):
+            label = f"Entrée {index + 1}"
+            if not entry.get('employee_id') and not entry.get('rotation_slot'):
+                errors.append(f"{label}: 'employee_id' ou 'rotation_slot' requis")
+            if entry.get('day') not in Config.DAYS_OF_WEEK:
+                errors.append(f"{label}: jour invalide")
+            try:
+                start_hour = int(entry.get('start_hour'))
+                duration = int(entry.get('duration', 1))
+                if start_hour < 0 or start_hour > 23:
+                    errors.append(f"{label}: heure de début invalide (0-23)")
+                if duration < Config.MIN_SHIFT_DURATION or duration > Config.MAX_SHIFT_DURATION:
+                    errors.append(f"{label}: durée doit être entre {Config.MIN_SHIFT_DURATION}h "
+                                  f"et {Config.MAX_SHIFT_DURATION}h")
+            except (ValueError, TypeError):
+                errors.append(f"{label}: heures invalides")
+
+        return errors
@@ -2,22 +2,171 @@
 API REST complète pour le planning restaurant avec gestion de la granularité
 """
 
-from flask import Blueprint, request, jsonify, send_file
+from flask import Blueprint, request, jsonify, send_file, make_response, Response, stream_with_context
 from app.models.employee import EmployeeManager, Employee
 from app.models.shift import ShiftManager, Shift
+from app.models.template import TemplateManager, WeekTemplate
+from app.models.planning import PlanningManager
+from app.models.availability import mask_to_ranges
+from app.models.changelog import ChangeLog
+from app.models.importer import PlanningImporter, iter_ndjson, iter_csv, iter_export_data
+from app.models.jobs import JobQueue, Progress
+from app.models.metrics import RequestMetrics
+from app.models.persistence import save_stats
+from app.models.registry import ManagerRegistry
+from app.utils.helpers import generate_week_number, get_following_weeks, is_valid_week_number
 from config import Config
 import base64
+import csv
 import io
 import os
 import imghdr
-from datetime import datetime
+import threading
+import time
+import zlib
+from datetime import datetime, date, timedelta
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
 import json
 
 api_bp = Blueprint('api', __name__)
 
-# Instances globales des gestionnaires
-employee_manager = EmployeeManager()
-shift_manager = ShiftManager()
+# Instances globales des gestionnaires (séquence de modifications commune), construites
+# au premier accès : l'import du module ne charge aucune donnée (voir create_app)
+change_log = ChangeLog()
+managers = ManagerRegistry()
+employee_manager = managers.register('employees', lambda: EmployeeManager(change_log))
+shift_manager = managers.register('shifts', lambda: ShiftManager(change_log))
+template_manager = managers.register('templates', TemplateManager)
+planning_manager = managers.register('planning', lambda: PlanningManager(managers.get('employees'),
+                                                                         managers.get('shifts')))
+
+# Tâches de maintenance exécutées en arrière-plan (/api/jobs)
+job_queue = JobQueue(Config.JOB_WORKERS)
+
+# Métriques des requêtes HTTP (/api/metrics), installées par create_app
+request_metrics = RequestMetrics()
+
+
+def refresh_managers():
+    """Mode multi-processus : prend en compte les enregistrements des autres workers (un stat par fichier)"""
+    for name in ('employees', 'shifts', 'templates'):
+        # Un gestionnaire pas encore construit lira les données à jour de toute façon
+        if managers.is_loaded(name):
+            managers.get(name).refresh()
+
+
+@api_bp.before_app_request
+def _refresh_shared_data():
+    if Config.MULTI_WORKER:
+        refresh_managers()
+
+# Nombre maximum de semaines générées en une seule expansion
+MAX_TEMPLATE_WEEKS = 104
+
+# Nombre maximum d'opérations dans un lot /shifts/batch
+MAX_BATCH_OPERATIONS = 500
+
+# Nombre maximum de placements évalués par un appel à /shifts/probe
+MAX_PROBE_CANDIDATES = 1000
+
+# Taille maximale d'une page (paramètre limit des listes)
+MAX_PAGE_SIZE = 1000
+
+# Modèles de vue hebdomadaires déjà sérialisés : semaine -> (versions, corps JSON)
+WEEK_VIEW_CACHE_SIZE = 64
+_week_view_cache: 'OrderedDict[str, Tuple[Tuple, str]]' = OrderedDict()
+_week_view_lock = threading.Lock()
+
+# Flux /events : commentaire de maintien toutes les N secondes, reconnexion du client après M secondes
+EVENTS_KEEPALIVE = 15
+# Mode multi-processus : intervalle de vérification des écritures des autres workers (secondes)
+EVENTS_POLL_INTERVAL = 1
+EVENTS_STREAM_TIMEOUT = 300
+
+# Exports en flux : formats servis et taille des blocs envoyés
+EXPORT_MIMETYPES = {
+    'json': 'application/json',
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv'
+}
+EXPORT_CHUNK_SIZE = 64 * 1024
+
+# Imports : format déduit du Content-Type lorsque le paramètre format est absent
+IMPORT_FORMATS = {
+    'application/x-ndjson': 'ndjson',
+    'application/ndjson': 'ndjson',
+    'text/csv': 'csv',
+    'application/json': 'json'
+}
+
+
+def _conditional_response(scope: str, build):
+    """
+    Réponse conditionnelle (ETag fort). L'ETag est dérivé de la version des données
+    concernées (scope) et des paramètres de la requête : si le client présente le
+    même dans If-None-Match, un 304 est renvoyé sans reconstruire la réponse.
+    """
+    etag = f"{change_log.epoch}-{scope}-{zlib.crc32(request.query_string):08x}"
+
+    if request.if_none_match.contains(etag):
+        response = make_response('', 304)
+    else:
+        response = make_response(build())
+        if response.status_code != 200:
+            return response
+
+    response.set_etag(etag)
+    # Le navigateur revalide à chaque fois, et reçoit un 304 tant que rien n'a changé
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+
+def _parse_list_args():
+    """
+    Paramètres communs des listes : projection (fields=id,day,...) et pagination
+    (limit, after). Lève ValueError si limit est invalide.
+    """
+    fields = [field.strip() for field in request.args.get('fields', '').split(',') if field.strip()]
+    limit = request.args.get('limit')
+    if limit is not None:
+        limit = int(limit)
+        if limit < 1 or limit > MAX_PAGE_SIZE:
+            raise ValueError(f'limit doit être entre 1 et {MAX_PAGE_SIZE}')
+    return fields or None, limit, request.args.get('after') or None
+
+
+def _parse_flag(value, default: bool) -> bool:
+    """
+    Option booléenne d'un paramètre d'URL ou d'un champ JSON : 1/true/yes/on ou
+    0/false/no/off, absente -> default. Lève ValueError pour toute autre valeur.
+    """
+    if value is None or value == '':
+        return default
+    text = str(value).strip().lower()
+    if text in ('1', 'true', 'yes', 'on'):
+        return True
+    if text in ('0', 'false', 'no', 'off'):
+        return False
+    raise ValueError(f"Valeur booléenne invalide : {value}")
+
+
+def _project(data: Dict, fields) -> Dict:
+    """Ne conserve que les champs demandés"""
+    if not fields:
+        return data
+    return {field: data[field] for field in fields if field in data}
+
+
+def _dumps_with_slots(data: Dict, grid, field: str = 'all_time_slots') -> str:
+    """JSON dans lequel les créneaux, déjà sérialisés par la grille, sont insérés tels quels"""
+    body = json.dumps(data, ensure_ascii=False)
+    return f'{body[:-1]}, "{field}": {grid.slots_json()}}}'
+
+
+def _json_with_slots(data: Dict, grid, field: str = 'all_time_slots') -> Response:
+    """Réponse JSON avec les créneaux pré-sérialisés de la grille"""
+    return Response(_dumps_with_slots(data, grid, field), mimetype='application/json')
 
 
 # ==================== CONFIGURATION GRANULARITÉ ====================
@@ -35,20 +184,17 @@ def set_granularity():
                 'error': f'Granularité {new_granularity} non supportée'
             }), 400
 
-        # Mettre à jour la configuration
-        Config.set_granularity(new_granularity)
+        # Remplacer la grille par défaut (les requêtes en cours gardent la leur)
+        grid = Config.set_time_grid(Config.get_time_grid().with_granularity(new_granularity))
 
-        # Générer les nouveaux créneaux
-        all_time_slots = Config.get_all_time_slots()
-        granularity_info = Config.get_granularity_info()
+        granularity_info = grid.granularity_info()
 
-        return jsonify({
+        return _json_with_slots({
             'success': True,
             'granularity': new_granularity,
-            'all_time_slots': all_time_slots,
             'granularity_info': granularity_info,
             'message': f'Granularité changée à {granularity_info["granularity_label"]}'
-        })
+        }, grid)
 
     except (ValueError, TypeError) as e:
         return jsonify({
@@ -65,16 +211,14 @@ def set_granularity():
 def get_granularity():
     """Retourne la configuration de granularité actuelle"""
     try:
-        granularity_info = Config.get_granularity_info()
-        all_time_slots = Config.get_all_time_slots()
+        grid = Config.get_time_grid()
 
-        return jsonify({
+        return _json_with_slots({
             'success': True,
-            'granularity': Config.TIME_SLOT_GRANULARITY,
-            'granularity_info': granularity_info,
-            'all_time_slots': all_time_slots,
+            'granularity': grid.granularity,
+            'granularity_info': grid.granularity_info(),
             'available_granularities': Config.AVAILABLE_GRANULARITIES
-        })
+        }, grid)
 
     except Exception as e:
         return jsonify({
@@ -87,22 +231,43 @@ def get_granularity():
 
 @api_bp.route('/employees', methods=['GET'])
 def get_employees():
-    """Récupère tous les employés"""
+    """
+    Récupère les employés (ETag : 304 si rien n'a changé).
+    Paramètres : poste, fields (projection), limit et after (pagination).
+    """
     try:
         actif_only = request.args.get('actif_only', 'true').lower() == 'true'
         include_photos = request.args.get('include_photos', 'false').lower() == 'true'
 
-        employees_data = employee_manager.get_all_employees_dict(
-            actif_only=actif_only,
-            include_photos=include_photos
-        )
+        try:
+            fields, limit, after = _parse_list_args()
+        except ValueError as e:
+            return jsonify({'success': False, 'error': f'Paramètres invalides: {e}'}), 400
+
+        # La photo n'est sérialisée que si elle est demandée
+        include_photos = include_photos or bool(fields and 'photo_data' in fields)
+
+        def build():
+            employees, next_cursor = employee_manager.query_employees(
+                actif_only=actif_only,
+                poste=request.args.get('poste'),
+                after=after,
+                limit=limit
+            )
+            employees_data = [
+                _project(emp.to_dict() if include_photos else emp.to_dict_without_photo(), fields)
+                for emp in employees
+            ]
 
-        return jsonify({
-            'success': True,
-            'employees': employees_data,
-            'count': len(employees_data),
-            'photos_included': include_photos
-        })
+            return jsonify({
+                'success': True,
+                'employees': employees_data,
+                'count': len(employees_data),
+                'photos_included': include_photos,
+                'next_cursor': next_cursor
+            })
+
+        return _conditional_response(f"employees-{employee_manager.data_version}", build)
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
@@ -141,7 +306,7 @@ def create_employee():
         if employee_manager.add_employee(employee):
             return jsonify({
                 'success': True,
-                'employee': employee.to_dict(),
+                'employee': employee.to_dict_without_photo(),
                 'message': f'Employé {employee.prenom} {employee.nom} créé avec succès'
             }), 201
         else:
@@ -162,7 +327,7 @@ def get_employee(employee_id):
         if employee:
             return jsonify({
                 'success': True,
-                'employee': employee.to_dict()
+                'employee': employee.to_dict_without_photo()
             })
         else:
             return jsonify({
@@ -191,7 +356,7 @@ def update_employee(employee_id):
             employee = employee_manager.get_employee_by_id(employee_id)
             return jsonify({
                 'success': True,
-                'employee': employee.to_dict() if employee else None,
+                'employee': employee.to_dict_without_photo() if employee else None,
                 'message': 'Employé mis à jour avec succès'
             })
         else:
@@ -222,6 +387,39 @@ def delete_employee(employee_id):
         return jsonify({'success': False, 'error': str(e)}), 500
 
 
+@api_bp.route('/employees/<employee_id>/photo', methods=['GET'])
+def get_employee_photo(employee_id):
+    """
+    Sert la photo d'un employé en binaire. L'URL versionnée par l'empreinte du
+    contenu (photo_url, ?v=) peut être mise en cache sans limite ; sans version ou
+    avec une version périmée, le client revalide à chaque fois (ETag).
+    """
+    try:
+        employee = employee_manager.get_employee(employee_id)
+        if not employee or not employee.has_photo:
+            return jsonify({
+                'success': False,
+                'error': 'Photo non trouvée'
+            }), 404
+
+        etag = employee.photo_hash
+        if request.if_none_match.contains(etag):
+            response = make_response('', 304)
+        else:
+            response = make_response(employee.get_photo_bytes())
+            response.mimetype = employee.photo_mimetype
+
+        response.set_etag(etag)
+        if request.args.get('v') == etag[:12]:
+            response.headers['Cache-Control'] = 'public, max-age=31536000, immutable'
+        else:
+            response.headers['Cache-Control'] = 'no-cache'
+        return response
+
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+
 @api_bp.route('/employees/<employee_id>/photo', methods=['POST'])
 def upload_employee_photo(employee_id):
     """Upload une photo pour un employé"""
@@ -235,25 +433,19 @@ def upload_employee_photo(employee_id):
                 'error': 'Données photo manquantes'
             }), 400
 
-        employee = employee_manager.get_employee_by_id(employee_id)
+        employee = employee_manager.get_employee(employee_id)
         if not employee:
             return jsonify({
                 'success': False,
                 'error': 'Employé non trouvé'
             }), 404
 
-        if employee.set_photo_from_base64(photo_data):
-            if employee_manager.save_employees():
-                return jsonify({
-                    'success': True,
-                    'message': 'Photo mise à jour avec succès',
-                    'photo_url': employee.photo
-                })
-            else:
-                return jsonify({
-                    'success': False,
-                    'error': 'Erreur lors de la sauvegarde'
-                }), 500
+        if employee_manager.update_employee_photo(employee_id, photo_data):
+            return jsonify({
+                'success': True,
+                'message': 'Photo mise à jour avec succès',
+                'photo_url': employee_manager.get_employee(employee_id).photo_url
+            })
         else:
             return jsonify({
                 'success': False,
@@ -268,39 +460,176 @@ def upload_employee_photo(employee_id):
 def delete_employee_photo(employee_id):
     """Supprime la photo d'un employé"""
     try:
-        employee = employee_manager.get_employee_by_id(employee_id)
+        employee = employee_manager.get_employee(employee_id)
         if not employee:
             return jsonify({
                 'success': False,
                 'error': 'Employé non trouvé'
             }), 404
 
-        if employee.delete_photo():
-            if employee_manager.save_employees():
-                return jsonify({
-                    'success': True,
-                    'message': 'Photo supprimée avec succès'
-                })
-            else:
-                return jsonify({
-                    'success': False,
-                    'error': 'Erreur lors de la sauvegarde'
-                }), 500
-        else:
+        if not employee.has_photo:
             return jsonify({
                 'success': False,
                 'error': 'Aucune photo à supprimer'
             }), 400
 
+        if employee_manager.remove_employee_photo(employee_id):
+            return jsonify({
+                'success': True,
+                'message': 'Photo supprimée avec succès'
+            })
+        else:
+            return jsonify({
+                'success': False,
+                'error': 'Erreur lors de la sauvegarde'
+            }), 500
+
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
 
+# ==================== DISPONIBILITÉS ====================
+
+@api_bp.route('/employees/available', methods=['GET'])
+def get_available_employees():
+    """Employés disponibles sur un intervalle (ex: ?day=Samedi&start_hour=18&end_hour=23)"""
+    try:
+        day = request.args.get('day')
+        if day not in Config.DAYS_OF_WEEK:
+            return jsonify({'success': False, 'error': 'Jour invalide'}), 400
+
+        start_hour = int(request.args.get('start_hour'))
+        if 'end_hour' in request.args:
+            end_hour = int(request.args['end_hour'])
+            duration = end_hour - start_hour if end_hour > start_hour else end_hour + 24 - start_hour
+        else:
+            duration = int(request.args.get('duration', 1))
+
+        employees = employee_manager.get_available_employees(
+            day, start_hour, duration,
+            week=request.args.get('week', ''),
+            poste=request.args.get('poste')
+        )
+
+        return jsonify({
+            'success': True,
+            'employees': [emp.to_dict_without_photo() for emp in employees],
+            'count': len(employees)
+        })
+
+    except (ValueError, TypeError):
+        return jsonify({'success': False, 'error': 'Heures invalides'}), 400
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+
+@api_bp.route('/employees/<employee_id>/availability', methods=['GET'])
+def get_employee_availability(employee_id):
+    """Disponibilités récurrentes et absences d'un employé"""
+    employee = employee_manager.get_employee(employee_id)
+    if not employee:
+        return jsonify({'success': False, 'error': 'Employé non trouvé'}), 404
+
+    return jsonify({
+        'success': True,
+        'disponibilites': {
+            day: mask_to_ranges(employee.disponibilites[index])
+            for index, day in enumerate(Config.DAYS_OF_WEEK)
+        },
+        'indisponibilites': [
+            {'date': exception_date, 'plages': mask_to_ranges(mask), 'motif': motif}
+            for exception_date, mask, motif in employee.indisponibilites
+        ]
+    })
+
+
+@api_bp.route('/employees/<employee_id>/availability', methods=['PUT'])
+def update_employee_availability(employee_id):
+    """Définit les plages récurrentes, ex: {"disponibilites": {"Lundi": [[8, 14], [18, 23]]}}"""
+    try:
+        data = request.get_json() or {}
+        if not employee_manager.get_employee(employee_id):
+            return jsonify({'success': False, 'error': 'Employé non trouvé'}), 404
+
+        availability = data.get('disponibilites', {})
+        invalid_days = [day for day in availability if day not in Config.DAYS_OF_WEEK]
+        if invalid_days:
+            return jsonify({
+                'success': False,
+                'error': f'Jours invalides: {", ".join(invalid_days)}'
+            }), 400
+
+        def apply(employee):
+            for day, ranges in availability.items():
+                employee.set_availability(day, ranges)
+
+        if not employee_manager.edit_employee(employee_id, apply):
+            return jsonify({'success': False, 'error': 'Employé non trouvé'}), 404
+
+        return get_employee_availability(employee_id)
+
+    except (ValueError, TypeError):
+        return jsonify({'success': False, 'error': 'Plages horaires invalides'}), 400
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+
+@api_bp.route('/employees/<employee_id>/unavailability', methods=['POST'])
+def add_employee_unavailability(employee_id):
+    """Ajoute une absence ponctuelle, sur une date ou une période (date → end_date)"""
+    try:
+        data = request.get_json() or {}
+        if not employee_manager.get_employee(employee_id):
+            return jsonify({'success': False, 'error': 'Employé non trouvé'}), 404
+
+        start_date = date.fromisoformat(data['date'])
+        end_date = date.fromisoformat(data.get('end_date') or data['date'])
+        if end_date < start_date:
+            return jsonify({'success': False, 'error': 'La date de fin précède la date de début'}), 400
+
+        start_hour = int(data.get('start_hour', 0))
+        end_hour = int(data.get('end_hour', 24))
+
+        def apply(employee):
+            current = start_date
+            while current <= end_date:
+                employee.add_unavailability(current.isoformat(), start_hour, end_hour, data.get('motif', ''))
+                current += timedelta(days=1)
+
+        if not employee_manager.edit_employee(employee_id, apply):
+            return jsonify({'success': False, 'error': 'Employé non trouvé'}), 404
+
+        return get_employee_availability(employee_id)
+
+    except (KeyError, ValueError, TypeError):
+        return jsonify({'success': False, 'error': 'Date ou heures invalides'}), 400
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+
+@api_bp.route('/employees/<employee_id>/unavailability/<exception_date>', methods=['DELETE'])
+def delete_employee_unavailability(employee_id, exception_date):
+    """Supprime les absences d'une date"""
+    if not employee_manager.get_employee(employee_id):
+        return jsonify({'success': False, 'error': 'Employé non trouvé'}), 404
+
+    if not employee_manager.edit_employee(employee_id,
+                                          lambda employee: employee.remove_unavailability(exception_date) > 0):
+        return jsonify({'success': False, 'error': 'Aucune absence à cette date'}), 404
+
+    return jsonify({'success': True, 'message': 'Absence supprimée avec succès'})
+
+
 # ==================== CRÉNEAUX ====================
 
 @api_bp.route('/shifts', methods=['GET'])
 def get_shifts():
-    """Récupère tous les créneaux avec gestion d'erreur robuste"""
+    """
+    Récupère les créneaux, filtrés par semaine (week), jour (day) ou employé
+    (employee_id), avec projection (fields) et pagination (limit, after).
+    Chaque semaine et chaque employé a son propre ETag : modifier une semaine
+    n'invalide pas les autres.
+    """
     try:
         # Vérifier que le manager est initialisé
         if not hasattr(shift_manager, 'get_all_shifts'):
@@ -309,10 +638,47 @@ def get_shifts():
                 'error': 'Gestionnaire de créneaux non initialisé'
             }), 500
 
+        week = request.args.get('week')
+        employee_id = request.args.get('employee_id')
+
+        try:
+            fields, limit, after = _parse_list_args()
+        except ValueError as e:
+            return jsonify({'success': False, 'error': f'Paramètres invalides: {e}'}), 400
+
+        if week is not None:
+            scope = f"shifts-week-{week}-{shift_manager.get_week_version(week)}"
+        elif employee_id:
+            scope = f"shifts-employee-{employee_id}-{shift_manager.get_employee_version(employee_id)}"
+        else:
+            scope = f"shifts-{shift_manager.data_version}"
+
+        return _conditional_response(scope, lambda: _build_shifts_response(
+            week, employee_id, request.args.get('day'), fields, limit, after))
+
+    except Exception as e:
+        error_msg = str(e)
+        print(f"❌ Erreur critique dans get_shifts: {error_msg}")
+
+        return jsonify({
+            'success': False,
+            'error': f'Erreur lors de la récupération des créneaux: {error_msg}',
+            'shifts': [],
+            'count': 0
+        }), 500
+
+
+def _build_shifts_response(week: str = None, employee_id: str = None, day: str = None,
+                           fields=None, limit: int = None, after: str = None):
+    """Construit la page de créneaux filtrés"""
+    try:
         # Récupérer les créneaux avec gestion d'exception
         shifts = []
+        next_cursor = None
         try:
-            shifts = shift_manager.get_all_shifts()
+            shifts, next_cursor = shift_manager.query_shifts(
+                day=day, employee_id=employee_id or None, week=week, after=after, limit=limit
+            )
         except AttributeError as e:
             print(f"Erreur AttributeError dans get_all_shifts: {e}")
             shifts = []
@@ -339,7 +705,7 @@ def get_shifts():
 
                 # Validation des données essentielles
                 if shift_dict.get('id') and shift_dict.get('employee_id'):
-                    shifts_data.append(shift_dict)
+                    shifts_data.append(_project(shift_dict, fields))
 
             except Exception as e:
                 print(f"Erreur lors de la conversion du créneau {getattr(shift, 'id', 'unknown')}: {e}")
@@ -350,7 +716,8 @@ def get_shifts():
         return jsonify({
             'success': True,
             'shifts': shifts_data,
-            'count': len(shifts_data)
+            'count': len(shifts_data),
+            'next_cursor': next_cursor
         })
 
     except Exception as e:
@@ -594,6 +961,55 @@ def delete_shift(shift_id):
         return jsonify({'success': False, 'error': str(e)}), 500
 
 
+@api_bp.route('/shifts/batch', methods=['POST'])
+def batch_shifts():
+    """
+    Applique un lot ordonné d'opérations sur les créneaux en tout ou rien
+    (ex: {"operations": [{"op": "update", "id": "shift_1", "data": {"day": "Mardi"}}]}).
+    Une seule validation sur copie de travail et une seule sauvegarde.
+    """
+    try:
+        data = request.get_json() or {}
+        operations = data.get('operations')
+
+        if not isinstance(operations, list) or not operations:
+            return jsonify({
+                'success': False,
+                'error': "Liste 'operations' requise"
+            }), 400
+
+        if len(operations) > MAX_BATCH_OPERATIONS:
+            return jsonify({
+                'success': False,
+                'error': f'Maximum {MAX_BATCH_OPERATIONS} opérations par lot'
+            }), 400
+
+        if not all(isinstance(operation, dict) for operation in operations):
+            return jsonify({
+                'success': False,
+                'error': 'Chaque opération doit être un objet'
+            }), 400
+
+        employee_ids = [employee.id for employee in employee_manager.get_all_employees(actif_only=False)]
+        applied, results = shift_manager.apply_batch(operations, employee_ids)
+
+        if not applied:
+            return jsonify({
+                'success': False,
+                'error': 'Lot refusé : aucune opération appliquée',
+                'results': results
+            }), 400
+
+        return jsonify({
+            'success': True,
+            'results': results,
+            'message': f'{len(results)} opérations appliquées'
+        })
+
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+
 @api_bp.route('/shifts/conflicts/<employee_id>', methods=['GET'])
 def check_shift_conflicts(employee_id):
     """Vérifie les conflits pour un employé avec granularité"""
@@ -618,6 +1034,72 @@ def check_shift_conflicts(employee_id):
         return jsonify({'success': False, 'error': str(e)}), 500
 
 
+@api_bp.route('/shifts/<shift_id>/replacements', methods=['GET'])
+def get_shift_replacements(shift_id):
+    """Remplaçants possibles pour un créneau, classés par coût puis heures déjà planifiées"""
+    try:
+        limit = int(request.args.get('limit', 10))
+        result = planning_manager.find_replacements(shift_id, limit=limit)
+
+        if result is None:
+            return jsonify({
+                'success': False,
+                'error': 'Créneau non trouvé'
+            }), 404
+
+        return jsonify({
+            'success': True,
+            **result
+        })
+
+    except ValueError:
+        return jsonify({'success': False, 'error': 'Paramètre limit invalide'}), 400
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+
+@api_bp.route('/shifts/probe', methods=['POST'])
+def probe_shift_placements():
+    """
+    Évalue plusieurs placements candidats d'un créneau en un seul appel
+    ({shift: {id | employee_id, day, start_hour, duration, week}, candidates: [...]})
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        shift_data = data.get('shift') or {}
+        candidates = data.get('candidates')
+
+        valid_format = (isinstance(shift_data, dict) and isinstance(candidates, list)
+                        and all(isinstance(candidate, dict) for candidate in candidates))
+        if not valid_format:
+            return jsonify({
+                'success': False,
+                'error': 'Format attendu: {shift: {...}, candidates: [...]}'
+            }), 400
+
+        if len(candidates) > MAX_PROBE_CANDIDATES:
+            return jsonify({
+                'success': False,
+                'error': f'Trop de candidats (maximum {MAX_PROBE_CANDIDATES})'
+            }), 400
+
+        if shift_data.get('id') and not shift_manager.get_shift(shift_data['id']):
+            return jsonify({
+                'success': False,
+                'error': 'Créneau non trouvé'
+            }), 404
+
+        result = planning_manager.probe_placements(shift_data, candidates)
+
+        return jsonify({
+            'success': True,
+            **result
+        })
+
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+
 # ==================== STATISTIQUES ====================
 
 @api_bp.route('/stats/weekly', methods=['GET'])
@@ -654,8 +1136,9 @@ def get_employee_stats(employee_id):
 def get_granularity_stats():
     """Statistiques sur l'utilisation de la granularité"""
     try:
-        granularity_info = Config.get_granularity_info()
-        all_time_slots = Config.get_all_time_slots()
+        grid = Config.get_time_grid()
+        granularity_info = grid.granularity_info()
+        all_time_slots = grid.all_time_slots()
 
         # Calculer l'utilisation des créneaux
         shifts = shift_manager.get_all_shifts()
@@ -690,105 +1173,446 @@ def get_granularity_stats():
         return jsonify({'success': False, 'error': str(e)}), 500
 
 
-# ==================== EXPORT/IMPORT ====================
+# ==================== SEMAINES TYPES ====================
 
-@api_bp.route('/export/planning', methods=['GET'])
-def export_planning():
-    """Exporte le planning en JSON"""
+@api_bp.route('/templates', methods=['GET'])
+def get_templates():
+    """Liste les semaines types"""
     try:
-        week = request.args.get('week')
-        format_type = request.args.get('format', 'json')  # json, csv
+        templates = template_manager.get_all_templates()
+        return jsonify({
+            'success': True,
+            'templates': [template.to_dict() for template in templates],
+            'count': len(templates)
+        })
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
 
-        employees = employee_manager.get_all_employees()
-        shifts = shift_manager.get_all_shifts()
 
-        export_data = {
-            'export_date': datetime.now().isoformat(),
-            'week': week,
-            'granularity': Config.TIME_SLOT_GRANULARITY,
-            'config': Config.get_config_data_for_template(),
-            'employees': [emp.to_dict() for emp in employees],
-            'shifts': [shift.to_dict() for shift in shifts]
-        }
+@api_bp.route('/templates', methods=['POST'])
+def create_template():
+    """
+    Crée une semaine type, soit à partir d'entrées explicites,
+    soit en capturant les créneaux d'une semaine existante (source_week)
+    """
+    try:
+        data = request.get_json() or {}
+
+        if 'source_week' in data:
+            source_shifts = shift_manager.get_shifts_by_week_number(data['source_week'] or '')
+            data['entries'] = WeekTemplate.from_shifts(data.get('nom', ''), source_shifts).entries
 
-        if format_type == 'json':
+        errors = template_manager.validate_template_data(data)
+        if errors:
+            return jsonify({
+                'success': False,
+                'errors': errors
+            }), 400
+
+        data.pop('id', None)
+        template = WeekTemplate.from_dict(data)
+
+        if template_manager.add_template(template):
             return jsonify({
                 'success': True,
-                'data': export_data
+                'template': template.to_dict(),
+                'message': f'Semaine type {template.nom} créée avec succès'
+            }), 201
+        else:
+            return jsonify({
+                'success': False,
+                'error': 'Erreur lors de la création de la semaine type'
+            }), 500
+
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+
+@api_bp.route('/templates/<template_id>', methods=['DELETE'])
+def delete_template(template_id):
+    """Supprime une semaine type"""
+    try:
+        if template_manager.delete_template(template_id):
+            return jsonify({
+                'success': True,
+                'message': 'Semaine type supprimée avec succès'
             })
         else:
+            return jsonify({
+                'success': False,
+                'error': 'Semaine type non trouvée'
+            }), 404
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+
+@api_bp.route('/templates/<template_id>/apply', methods=['POST'])
+def apply_template(template_id):
+    """
+    Déploie une semaine type sur N semaines consécutives, avec rotation optionnelle
+    des équipes (ex: {"A": "emp_1", "B": "emp_2"}). Une seule passe de conflits
+    et une seule sauvegarde pour l'ensemble des semaines.
+    """
+    try:
+        data = request.get_json() or {}
+
+        template = template_manager.get_template(template_id)
+        if not template:
+            return jsonify({
+                'success': False,
+                'error': 'Semaine type non trouvée'
+            }), 404
+
+        try:
+            weeks_count = int(data.get('weeks', 1))
+            target_weeks = get_following_weeks(data.get('start_week') or generate_week_number(), weeks_count)
+        except (ValueError, TypeError):
+            return jsonify({
+                'success': False,
+                'error': 'Semaine de départ ou nombre de semaines invalide'
+            }), 400
+
+        if weeks_count < 1 or weeks_count > MAX_TEMPLATE_WEEKS:
+            return jsonify({
+                'success': False,
+                'error': f'Nombre de semaines doit être entre 1 et {MAX_TEMPLATE_WEEKS}'
+            }), 400
+
+        rotation = data.get('rotation') or {}
+        errors = template.validate_rotation(rotation)
+
+        employee_ids = {entry['employee_id'] for entry in template.entries if entry.get('employee_id')
+                        and not entry.get('rotation_slot')}
+        employee_ids.update(rotation.values())
+        for employee_id in sorted(employee_ids):
+            if not employee_manager.get_employee(employee_id):
+                errors.append(f'Employé {employee_id} introuvable')
+
+        if errors:
+            return jsonify({
+                'success': False,
+                'errors': errors
+            }), 400
+
+        shifts_by_week = template.expand(target_weeks, rotation)
+        added, collisions = shift_manager.add_shifts_bulk(
+            [shift for week in target_weeks for shift in shifts_by_week[week]]
+        )
+
+        report = {week: {'created': 0, 'collisions': []} for week in target_weeks}
+        for shift in added:
+            report[shift.week]['created'] += 1
+        for shift, conflicts in collisions:
+            report[shift.week]['collisions'].append({
+                'shift': shift.to_dict(),
+                'conflicts_with': [conflict.id for conflict in conflicts]
+            })
+
+        return jsonify({
+            'success': True,
+            'template_id': template.id,
+            'created': len(added),
+            'collisions': len(collisions),
+            'weeks': report,
+            'message': f'{len(added)} créneaux créés sur {len(target_weeks)} semaines'
+        })
+
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+
+# ==================== PLANNING ====================
+
+@api_bp.route('/planning/week/<week>', methods=['GET'])
+def get_week_view(week):
+    """
+    Modèle de vue d'une semaine (YYYY-WW) en un seul appel : employés sans photo,
+    créneaux par jour et par employé, heures et coûts, grille horaire. La réponse
+    est mise en cache par version de la semaine, des employés et de la grille.
+    """
+    try:
+        if not is_valid_week_number(week):
+            return jsonify({
+                'success': False,
+                'error': 'Semaine invalide (format YYYY-WW)'
+            }), 400
+
+        grid = Config.get_time_grid()
+        versions = (shift_manager.get_week_version(week), employee_manager.data_version, grid.key)
+        scope = f"week-view-{week}-{versions[0]}-{versions[1]}-{'-'.join(map(str, grid.key))}"
+
+        return _conditional_response(scope, lambda: Response(
+            _build_week_view(week, versions, grid), mimetype='application/json'))
+
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+
+def _build_week_view(week: str, versions: Tuple, grid) -> str:
+    """Corps JSON du modèle de vue, reconstruit uniquement si l'une des versions a changé"""
+    with _week_view_lock:
+        cached = _week_view_cache.get(week)
+        if cached and cached[0] == versions:
+            _week_view_cache.move_to_end(week)
+            return cached[1]
+
+    view = planning_manager.get_week_view(week)
+    body = _dumps_with_slots({
+        'success': True,
+        **view,
+        'granularity': grid.granularity,
+        'granularity_info': grid.granularity_info()
+    }, grid, 'time_slots')
+
+    with _week_view_lock:
+        _week_view_cache[week] = (versions, body)
+        _week_view_cache.move_to_end(week)
+        while len(_week_view_cache) > WEEK_VIEW_CACHE_SIZE:
+            _week_view_cache.popitem(last=False)
+    return body
+
+
+@api_bp.route('/planning/fill-gaps', methods=['POST'])
+def fill_planning_gaps():
+    """
+    Comble le sous-effectif à partir des besoins par poste et par plage horaire
+    (ex: [{"poste": "serveur", "day": "Samedi", "start_hour": 19, "end_hour": 23, "count": 3}]).
+    Par défaut en simulation (dry_run) : les créneaux proposés ne sont pas enregistrés.
+    """
+    try:
+        data = request.get_json() or {}
+        requirements = data.get('requirements') or []
+        week = data.get('week') or ''
+
+        errors = planning_manager.validate_coverage_requirements(requirements)
+        if week and not is_valid_week_number(week):
+            errors.append('Semaine invalide (format YYYY-WW)')
+        if errors:
+            return jsonify({
+                'success': False,
+                'errors': errors
+            }), 400
+
+        try:
+            dry_run = _parse_flag(data.get('dry_run'), True)
+        except ValueError as e:
+            return jsonify({
+                'success': False,
+                'error': f'dry_run : {e}'
+            }), 400
+
+        result = planning_manager.fill_coverage_gaps(requirements, week, dry_run)
+
+        return jsonify({
+            'success': True,
+            **result,
+            'message': (f"{len(result['proposals'])} créneaux proposés" if dry_run
+                        else f"{result['created']} créneaux créés")
+        })
+
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+
+# ==================== EXPORT/IMPORT ====================
+
+def _export_chunks(format_type: str, shifts, week: str = None):
+    """Sérialise l'export ligne par ligne (les employés sont exportés sans photo)"""
+    employees = employee_manager.get_all_employees(actif_only=False)
+
+    if format_type == 'csv':
+        # Colonne type : les lignes employé précèdent les créneaux, comme en NDJSON, pour
+        # que le fichier puisse être réimporté sur une autre instance
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, extrasaction='ignore', fieldnames=(
+            'type', *PlanningManager.EXPORT_COLUMNS, *PlanningManager.EXPORT_EMPLOYEE_COLUMNS))
+        writer.writeheader()
+        for employee in employees:
+            writer.writerow({'type': 'employee', **employee.to_dict_without_photo()})
+        for shift in shifts:
+            writer.writerow({'type': 'shift', **shift})
+            if buffer.tell() >= EXPORT_CHUNK_SIZE:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+        yield buffer.getvalue()
+
+    elif format_type == 'ndjson':
+        for employee in employees:
+            yield json.dumps({'type': 'employee', **employee.to_dict_without_photo()}, ensure_ascii=False) + '\n'
+        for shift in shifts:
+            yield json.dumps({'type': 'shift', **shift}, ensure_ascii=False) + '\n'
+
+    else:
+        header = {
+            'export_date': datetime.now().isoformat(),
+            'week': week,
+            'granularity': Config.get_time_grid().granularity,
+            'config': Config.get_config_data_for_template()
+        }
+        yield '{"success": true, "data": ' + json.dumps(header, ensure_ascii=False)[:-1] + ', "employees": ['
+        yield ', '.join(json.dumps(employee.to_dict_without_photo(), ensure_ascii=False) for employee in employees)
+        yield '], "shifts": ['
+        separator = ''
+        for shift in shifts:
+            yield separator + json.dumps(shift, ensure_ascii=False)
+            separator = ', '
+        yield ']}}'
+
+
+def _encode_chunks(chunks, compress: bool = False):
+    """Regroupe les fragments en blocs d'environ EXPORT_CHUNK_SIZE octets, compressés en gzip si demandé"""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31) if compress else None
+    pending = []
+    size = 0
+    for chunk in chunks:
+        data = chunk.encode('utf-8')
+        pending.append(data)
+        size += len(data)
+        if size >= EXPORT_CHUNK_SIZE:
+            block = b''.join(pending)
+            pending, size = [], 0
+            block = compressor.compress(block) if compressor else block
+            if block:
+                yield block
+    block = b''.join(pending)
+    if compressor:
+        block = compressor.compress(block) + compressor.flush()
+    if block:
+        yield block
+
+
+@api_bp.route('/export/planning', methods=['GET'])
+def export_planning():
+    """
+    Exporte le planning en flux (format=json, ndjson ou csv).
+    Filtres : week (une ou plusieurs semaines séparées par des virgules),
+    start_date et end_date (YYYY-MM-DD). Réponse compressée en gzip si le
+    client l'accepte.
+    """
+    try:
+        week = request.args.get('week')
+        format_type = request.args.get('format', 'json')
+
+        if format_type not in EXPORT_MIMETYPES:
             return jsonify({
                 'success': False,
                 'error': 'Format non supporté'
             }), 400
 
+        weeks = None
+        if week:
+            weeks = [value.strip() for value in week.split(',')]
+            if not all(is_valid_week_number(value) for value in weeks):
+                return jsonify({
+                    'success': False,
+                    'error': 'Format de semaine invalide (attendu YYYY-WW)'
+                }), 400
+
+        try:
+            start_date = date.fromisoformat(request.args['start_date']) if request.args.get('start_date') else None
+            end_date = date.fromisoformat(request.args['end_date']) if request.args.get('end_date') else None
+        except ValueError:
+            return jsonify({
+                'success': False,
+                'error': 'Format de date invalide (attendu YYYY-MM-DD)'
+            }), 400
+
+        if start_date and end_date and start_date > end_date:
+            return jsonify({
+                'success': False,
+                'error': 'La date de début doit précéder la date de fin'
+            }), 400
+
+        compress = 'gzip' in request.accept_encodings
+        shifts = planning_manager.iter_export_shifts(weeks, start_date, end_date)
+        chunks = _encode_chunks(_export_chunks(format_type, shifts, week), compress)
+
+        response = Response(stream_with_context(chunks), mimetype=EXPORT_MIMETYPES[format_type])
+        filename = f"planning_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{format_type}"
+        response.headers['Content-Disposition'] = f'attachment; filename="{filename}"'
+        response.headers['Vary'] = 'Accept-Encoding'
+        if compress:
+            response.headers['Content-Encoding'] = 'gzip'
+        return response
+
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
 
 @api_bp.route('/import/planning', methods=['POST'])
 def import_planning():
-    """Importe un planning depuis JSON"""
+    """
+    Importe un planning : flux NDJSON ou CSV (lu au fil de l'eau), ou export JSON
+    ({data: {employees, shifts}}). Le format suit le paramètre format ou le
+    Content-Type. Options : dry_run (valider sans enregistrer) et atomic (tout ou rien).
+    """
     try:
-        data = request.get_json()
-        import_data = data.get('data')
-
-        if not import_data:
+        format_type = request.args.get('format') or IMPORT_FORMATS.get(request.mimetype, 'json')
+        try:
+            dry_run = _parse_flag(request.args.get('dry_run'), False)
+            atomic = _parse_flag(request.args.get('atomic'), False)
+        except ValueError as e:
             return jsonify({
                 'success': False,
-                'error': 'Données d\'import manquantes'
+                'error': str(e)
             }), 400
 
-        # Validation de base
-        required_fields = ['employees', 'shifts']
-        for field in required_fields:
-            if field not in import_data:
+        # Lecture tamponnée : lu ligne à ligne, le flux brut de la requête avance octet par octet
+        if format_type == 'ndjson':
+            rows = iter_ndjson(io.BufferedReader(request.stream, EXPORT_CHUNK_SIZE))
+        elif format_type == 'csv':
+            rows = iter_csv(io.BufferedReader(request.stream, EXPORT_CHUNK_SIZE))
+        elif format_type == 'json':
+            data = request.get_json(silent=True) or {}
+            import_data = data.get('data')
+
+            if not import_data:
                 return jsonify({
                     'success': False,
-                    'error': f'Champ requis manquant: {field}'
+                    'error': 'Données d\'import manquantes'
                 }), 400
 
-        # Import des employés
-        imported_employees = 0
-        for emp_data in import_data['employees']:
-            try:
-                employee = Employee(
-                    nom=emp_data['nom'],
-                    prenom=emp_data['prenom'],
-                    poste=emp_data['poste'],
-                    email=emp_data.get('email', ''),
-                    telephone=emp_data.get('telephone', ''),
-                    taux_horaire=float(emp_data.get('taux_horaire', 15.0))
-                )
-                if employee_manager.add_employee(employee):
-                    imported_employees += 1
-            except Exception as e:
-                continue  # Ignorer les erreurs d'employés individuels
+            # Validation de base
+            required_fields = ['employees', 'shifts']
+            for field in required_fields:
+                if field not in import_data:
+                    return jsonify({
+                        'success': False,
+                        'error': f'Champ requis manquant: {field}'
+                    }), 400
 
-        # Import des créneaux
-        imported_shifts = 0
-        for shift_data in import_data['shifts']:
-            try:
-                shift = Shift(
-                    employee_id=shift_data['employee_id'],
-                    day=shift_data['day'],
-                    start_hour=int(shift_data['start_hour']),
-                    start_minutes=int(shift_data.get('start_minutes', 0)),
-                    duration=float(shift_data.get('duration', 1)),
-                    notes=shift_data.get('notes', '')
-                )
-                if shift_manager.add_shift(shift):
-                    imported_shifts += 1
-            except Exception as e:
-                continue  # Ignorer les erreurs de créneaux individuels
+            rows = iter_export_data(import_data)
+        else:
+            return jsonify({
+                'success': False,
+                'error': 'Format non supporté'
+            }), 400
+
+        report = PlanningImporter(employee_manager, shift_manager).run(rows, dry_run=dry_run, atomic=atomic)
+
+        if atomic and report['error_count']:
+            return jsonify({
+                'success': False,
+                'error': f"Import annulé: {report['error_count']} ligne(s) en erreur",
+                **report
+            }), 400
+
+        if dry_run:
+            message = (f"Validation terminée: {report['valid_employees']} employés, "
+                       f"{report['valid_shifts']} créneaux valides")
+        else:
+            message = (f"Import terminé: {report['imported_employees']} employés, "
+                       f"{report['imported_shifts']} créneaux")
 
         return jsonify({
             'success': True,
-            'message': f'Import terminé: {imported_employees} employés, {imported_shifts} créneaux',
-            'imported_employees': imported_employees,
-            'imported_shifts': imported_shifts
+            'message': f"{message}, {report['error_count']} erreur(s)",
+            **report
         })
 
+    except UnicodeDecodeError:
+        return jsonify({'success': False, 'error': 'Encodage invalide (UTF-8 attendu)'}), 400
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
@@ -803,8 +1627,10 @@ def validate_time_slot():
         hour = int(data.get('hour', 0))
         minutes = int(data.get('minutes', 0))
 
+        grid = Config.get_time_grid()
+
         # Vérifier que l'heure est dans la plage
-        if hour not in Config.get_hours_range():
+        if hour not in grid.hours_range():
             return jsonify({
                 'success': False,
                 'valid': False,
@@ -812,7 +1638,7 @@ def validate_time_slot():
             })
 
         # Vérifier que les minutes correspondent à la granularité
-        granularity = Config.TIME_SLOT_GRANULARITY
+        granularity = grid.granularity
         if minutes % granularity != 0:
             return jsonify({
                 'success': False,
@@ -828,10 +1654,8 @@ def validate_time_slot():
             })
 
         # Vérifier que le créneau existe
-        all_slots = Config.get_all_time_slots()
         slot_key = f"{hour}_{minutes}"
-
-        valid_slot = any(slot['key'] == slot_key for slot in all_slots)
+        valid_slot = grid.has_slot(slot_key)
 
         return jsonify({
             'success': True,
@@ -851,16 +1675,14 @@ def validate_time_slot():
 def generate_time_slots():
     """Génère tous les créneaux temporels selon la granularité actuelle"""
     try:
-        all_slots = Config.get_all_time_slots()
-        granularity_info = Config.get_granularity_info()
+        grid = Config.get_time_grid()
 
-        return jsonify({
+        return _json_with_slots({
             'success': True,
-            'granularity': Config.TIME_SLOT_GRANULARITY,
-            'granularity_info': granularity_info,
-            'time_slots': all_slots,
-            'total_slots': len(all_slots)
-        })
+            'granularity': grid.granularity,
+            'granularity_info': grid.granularity_info(),
+            'total_slots': len(grid.slot_index())
+        }, grid, 'time_slots')
 
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
@@ -944,7 +1766,19 @@ def health_check():
             'timestamp': datetime.now().isoformat(),
             'employees_count': employees_count,
             'shifts_count': shifts_count,
-            'granularity': Config.TIME_SLOT_GRANULARITY
+            'granularity': Config.TIME_SLOT_GRANULARITY,
+            'managers': {
+                'employees': {
+                    'size': len(employee_manager.get_all_employees(actif_only=False)),
+                    'last_save': employee_manager.last_save
+                },
+                'shifts': {'size': shifts_count, 'last_save': shift_manager.last_save},
+                'templates': {
+                    'size': len(template_manager.get_all_templates()),
+                    'last_save': template_manager.last_save
+                }
+            },
+            'persistence': save_stats.snapshot()
         })
 
     except Exception as e:
@@ -955,12 +1789,88 @@ def health_check():
         }), 500
 
 
-# À ajouter dans app/routes/api.py
-# Route de synchronisation manquante qui cause l'erreur 404
+@api_bp.route('/metrics', methods=['GET'])
+def metrics():
+    """Métriques au format texte Prometheus (requêtes HTTP et taille des données chargées)"""
+    gauges = []
+    # Ne construit aucun gestionnaire : une collecte ne doit pas charger les données
+    if managers.is_loaded('employees'):
+        gauges.append(('employees', "Employés enregistrés",
+                       len(employee_manager.get_all_employees(actif_only=False))))
+    if managers.is_loaded('shifts'):
+        gauges.append(('shifts', "Créneaux enregistrés", len(shift_manager.get_all_shifts())))
+    if managers.is_loaded('templates'):
+        gauges.append(('templates', "Semaines types enregistrées", len(template_manager.get_all_templates())))
+    for name in ('employees', 'shifts', 'templates'):
+        last_save = managers.get(name).last_save if managers.is_loaded(name) else None
+        if last_save:
+            gauges.append((f'{name}_last_save_seconds', "Durée de la dernière sauvegarde",
+                           last_save['duration_ms'] / 1000))
+    return Response(request_metrics.render(gauges), mimetype='text/plain; version=0.0.4')
+
+
+# ==================== SYNCHRONISATION ====================
+
+def _collect_changes(cursor: int) -> Dict:
+    """
+    Modifications enregistrées postérieures au curseur, regroupées par type, et le
+    curseur à renvoyer au client. Un curseur nul ou antérieur à l'historique
+    conservé donne un état complet (full).
+
+    Le nouveau curseur ne dépasse ni la dernière séquence enregistrée (committed),
+    ni une modification journalisée dont l'enregistrement n'est pas encore publié :
+    elle sera renvoyée à la synchronisation suivante plutôt que perdue.
+    """
+    committed = change_log.committed
+    entries = change_log.changes_since(cursor) if cursor > 0 else None
+
+    if entries is None:
+        return {
+            'cursor': committed,
+            'full': True,
+            'employees': [employee.to_dict_without_photo()
+                          for employee in employee_manager.get_all_employees(actif_only=False)],
+            'shifts': [shift.to_dict() for shift in shift_manager.get_all_shifts()],
+            'deleted': {'employees': [], 'shifts': []}
+        }
+
+    # Seule la dernière action de chaque enregistrement compte
+    latest = {}
+    for seq, kind, record_id, action in entries:
+        if seq > committed:
+            break
+        latest[(kind, record_id)] = (seq, action)
+
+    new_cursor = max(cursor, committed)
+    changes = {'full': False, 'employees': [], 'shifts': [], 'deleted': {'employees': [], 'shifts': []}}
+    for (kind, record_id), (seq, action) in latest.items():
+        if action == 'delete':
+            changes['deleted'][kind].append(record_id)
+            continue
+        record = (employee_manager.get_employee(record_id) if kind == 'employees'
+                  else shift_manager.get_shift(record_id))
+        if record is None or record.seq < seq:
+            # Journalisé mais pas encore publié (écriture en cours) : curseur laissé avant
+            new_cursor = min(new_cursor, seq - 1)
+            if record is None:
+                continue
+        if kind == 'employees':
+            changes['employees'].append(record.to_dict_without_photo())
+        else:
+            changes['shifts'].append(record.to_dict())
+    return {'cursor': new_cursor, **changes}
+
 
 @api_bp.route('/sync', methods=['POST'])
 def sync_data():
-    """Synchronise les données entre le client et le serveur"""
+    """
+    Synchronisation différentielle entre le client et le serveur.
+
+    Le client envoie son dernier curseur et uniquement les enregistrements modifiés
+    depuis ({cursor, employees, shifts, deleted: {employees, shifts}}), chacun avec
+    la version sur laquelle il a été modifié. Le serveur renvoie les modifications
+    postérieures au curseur et le nouveau curseur à conserver.
+    """
     try:
         data = request.get_json()
 
@@ -970,96 +1880,37 @@ def sync_data():
                 'error': 'Données de synchronisation manquantes'
             }), 400
 
-        # Extraire les données
-        employees_data = data.get('employees', [])
-        shifts_data = data.get('shifts', [])
+        try:
+            cursor = int(data.get('cursor') or 0)
+        except (ValueError, TypeError):
+            return jsonify({
+                'success': False,
+                'error': 'Curseur de synchronisation invalide'
+            }), 400
+
+        deleted = data.get('deleted') or {}
+
+        employees_result = employee_manager.merge_records(data.get('employees') or [],
+                                                          deleted.get('employees') or [])
+        employee_ids = [employee.id for employee in employee_manager.get_all_employees(actif_only=False)]
+        shifts_result = shift_manager.merge_records(data.get('shifts') or [],
+                                                    deleted.get('shifts') or [], employee_ids)
 
         sync_results = {
-            'employees': {'created': 0, 'updated': 0, 'errors': []},
-            'shifts': {'created': 0, 'updated': 0, 'errors': []},
+            'employees': employees_result,
+            'shifts': shifts_result,
             'timestamp': datetime.now().isoformat()
         }
 
-        # Synchroniser les employés
-        for emp_data in employees_data:
-            try:
-                employee_id = emp_data.get('id')
-
-                if employee_id:
-                    # Vérifier si l'employé existe
-                    existing_employee = employee_manager.get_employee_by_id(employee_id)
-
-                    if existing_employee:
-                        # Mettre à jour
-                        if employee_manager.update_employee(employee_id, emp_data):
-                            sync_results['employees']['updated'] += 1
-                        else:
-                            sync_results['employees']['errors'].append(f"Erreur mise à jour employé {employee_id}")
-                    else:
-                        # Créer nouveau
-                        from app.models.employee import Employee
-                        new_employee = Employee(
-                            id=employee_id,
-                            prenom=emp_data.get('prenom', ''),
-                            nom=emp_data.get('nom', ''),
-                            poste=emp_data.get('poste', ''),
-                            taux_horaire=float(emp_data.get('taux_horaire', 15.0)),
-                            email=emp_data.get('email', ''),
-                            telephone=emp_data.get('telephone', '')
-                        )
-
-                        if employee_manager.add_employee(new_employee):
-                            sync_results['employees']['created'] += 1
-                        else:
-                            sync_results['employees']['errors'].append(f"Erreur création employé {employee_id}")
-
-            except Exception as e:
-                sync_results['employees']['errors'].append(f"Erreur employé: {str(e)}")
-
-        # Synchroniser les créneaux
-        for shift_data in shifts_data:
-            try:
-                shift_id = shift_data.get('id')
-
-                if shift_id:
-                    # Vérifier si le créneau existe
-                    existing_shift = shift_manager.get_shift_by_id(shift_id)
-
-                    if existing_shift:
-                        # Mettre à jour
-                        if shift_manager.update_shift(shift_id, shift_data):
-                            sync_results['shifts']['updated'] += 1
-                        else:
-                            sync_results['shifts']['errors'].append(f"Erreur mise à jour créneau {shift_id}")
-                    else:
-                        # Créer nouveau
-                        from app.models.shift import Shift
-                        new_shift = Shift(
-                            id=shift_id,
-                            employee_id=shift_data.get('employee_id', ''),
-                            day=shift_data.get('day', ''),
-                            start_hour=int(shift_data.get('start_hour', 9)),
-                            start_minutes=int(shift_data.get('start_minutes', 0)),
-                            duration=float(shift_data.get('duration', 1)),
-                            notes=shift_data.get('notes', '')
-                        )
-
-                        if shift_manager.add_shift(new_shift):
-                            sync_results['shifts']['created'] += 1
-                        else:
-                            sync_results['shifts']['errors'].append(f"Erreur création créneau {shift_id}")
-
-            except Exception as e:
-                sync_results['shifts']['errors'].append(f"Erreur créneau: {str(e)}")
-
-        # Calculer le statut global
-        total_errors = len(sync_results['employees']['errors']) + len(sync_results['shifts']['errors'])
+        # Calculer le statut global (en cas de conflit, la version serveur est renvoyée)
+        total_errors = len(employees_result['errors']) + len(shifts_result['errors'])
         success = total_errors == 0
 
         return jsonify({
             'success': success,
             'message': 'Synchronisation terminée' if success else f'Synchronisation avec {total_errors} erreurs',
-            'results': sync_results
+            'results': sync_results,
+            **_collect_changes(cursor)
         })
 
     except Exception as e:
@@ -1069,6 +1920,84 @@ def sync_data():
         }), 500
 
 
+def _format_event(seq: int, kind: str, record_id: str, action: str) -> Optional[str]:
+    """
+    Formate une modification en événement SSE (l'ID sert de point de reprise), ou
+    None si l'enregistrement journalisé n'est pas encore publié
+    """
+    record = None
+    if action != 'delete':
+        current = (employee_manager.get_employee(record_id) if kind == 'employees'
+                   else shift_manager.get_shift(record_id))
+        if current is None or current.seq < seq:
+            return None
+        record = current.to_dict_without_photo() if kind == 'employees' else current.to_dict()
+    payload = {'seq': seq, 'type': kind, 'action': action, 'id': record_id, 'record': record}
+    return f"id: {seq}\nevent: {kind}\ndata: {json.dumps(payload, ensure_ascii=False)}\n\n"
+
+
+@api_bp.route('/events', methods=['GET'])
+def stream_events():
+    """
+    Flux Server-Sent Events des modifications d'employés et de créneaux, diffusées
+    dès leur enregistrement. Le client reprend là où il s'était arrêté grâce à
+    Last-Event-ID (ou ?since=) ; sans curseur, seules les nouvelles modifications
+    sont envoyées. Un événement 'resync' signale un historique incomplet : le
+    client doit alors recharger ses données.
+    """
+    try:
+        cursor = int(request.headers.get('Last-Event-ID') or request.args.get('since') or change_log.committed)
+    except ValueError:
+        return jsonify({'success': False, 'error': 'Curseur invalide'}), 400
+
+    def generate(cursor):
+        deadline = time.monotonic() + EVENTS_STREAM_TIMEOUT
+        last_sent = time.monotonic()
+        yield "retry: 3000\n\n"
+
+        while time.monotonic() < deadline:
+            if Config.MULTI_WORKER:
+                # Les écritures des autres workers n'apparaissent qu'après rechargement
+                refresh_managers()
+            committed = change_log.committed
+            changes = change_log.changes_since(cursor)
+
+            if changes is None:
+                cursor = committed
+                last_sent = time.monotonic()
+                yield f"id: {cursor}\nevent: resync\ndata: {json.dumps({'seq': cursor})}\n\n"
+                continue
+
+            changes = [change for change in changes if change[0] <= committed]
+            deleted_later = {(kind, record_id) for _, kind, record_id, action in changes if action == 'delete'}
+            pending = False
+            for seq, kind, record_id, action in changes:
+                event = _format_event(seq, kind, record_id, action)
+                if event is None:
+                    if (kind, record_id) in deleted_later:
+                        continue
+                    # Pas encore publié : repris au prochain tour, dans l'ordre
+                    pending = True
+                    break
+                cursor = seq
+                last_sent = time.monotonic()
+                yield event
+            if not pending:
+                cursor = max(cursor, committed)
+
+            timeout = EVENTS_POLL_INTERVAL if pending or Config.MULTI_WORKER else EVENTS_KEEPALIVE
+            if not change_log.wait_for_commit(max(cursor, committed),
+                                              min(timeout, max(0, deadline - time.monotonic()))):
+                if time.monotonic() - last_sent >= EVENTS_KEEPALIVE:
+                    last_sent = time.monotonic()
+                    yield ": keepalive\n\n"
+
+    return Response(stream_with_context(generate(cursor)), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+
+
 @api_bp.route('/sync/status', methods=['GET'])
 def sync_status():
     """Retourne le statut de synchronisation"""
@@ -1091,6 +2020,7 @@ def sync_status():
                 'shifts': shifts_count,
                 'orphaned_shifts': len(orphaned_shifts),
                 'orphaned_shift_ids': orphaned_shifts,
+                'cursor': change_log.committed,
                 'last_sync': datetime.now().isoformat(),
                 'data_consistent': len(orphaned_shifts) == 0
             }
@@ -1103,58 +2033,213 @@ def sync_status():
         }), 500
 
 
-@api_bp.route('/sync/repair', methods=['POST'])
-def repair_data():
-    """Répare les incohérences de données"""
-    try:
-        repair_results = {
-            'employees_repaired': 0,
-            'shifts_repaired': 0,
-            'shifts_removed': 0,
-            'errors': []
-        }
+def _repair_data(progress: Progress = None) -> Dict:
+    """
+    Répare les créneaux orphelins : rattachés à l'employé correspondant s'il est
+    retrouvé, supprimés sinon. Chaque correction est une modification courte.
+    """
+    repair_results = {
+        'employees_repaired': 0,
+        'shifts_repaired': 0,
+        'shifts_removed': 0,
+        'errors': []
+    }
 
-        # Réparer les créneaux orphelins
-        all_shifts = shift_manager.get_all_shifts()
-        all_employees = employee_manager.get_all_employees()
+    all_shifts = shift_manager.get_all_shifts()
+    all_employees = employee_manager.get_all_employees()
 
-        for shift in all_shifts:
-            # Vérifier si l'employé existe
-            employee = employee_manager.get_employee_by_id(shift.employee_id)
+    for index, shift in enumerate(all_shifts):
+        if progress:
+            progress(index, len(all_shifts))
+        # Vérifier si l'employé existe
+        employee = employee_manager.get_employee(shift.employee_id)
 
-            if not employee:
-                # Essayer de trouver un employé correspondant
-                found_employee = None
-
-                # Recherche par pattern d'ID
-                for emp in all_employees:
-                    if (emp.id.replace('emp_', '') == shift.employee_id.replace('emp_', '') or
-                            emp.id.replace('employee_', '') == shift.employee_id.replace('emp_', '')):
-                        found_employee = emp
-                        break
-
-                if found_employee:
-                    # Réparer l'ID du créneau
-                    shift.employee_id = found_employee.id
-                    if shift_manager.update_shift(shift.id, {'employee_id': found_employee.id}):
-                        repair_results['shifts_repaired'] += 1
-                    else:
-                        repair_results['errors'].append(f"Impossible de réparer le créneau {shift.id}")
+        if not employee:
+            # Essayer de trouver un employé correspondant
+            found_employee = None
+
+            # Recherche par pattern d'ID
+            for emp in all_employees:
+                if (emp.id.replace('emp_', '') == shift.employee_id.replace('emp_', '') or
+                        emp.id.replace('employee_', '') == shift.employee_id.replace('emp_', '')):
+                    found_employee = emp
+                    break
+
+            if found_employee:
+                # Réparer l'ID du créneau (nouvelle version publiée, le créneau lu n'est pas modifié)
+                repaired, _ = shift_manager.update_shift(shift.id, {'employee_id': found_employee.id})
+                if repaired:
+                    repair_results['shifts_repaired'] += 1
                 else:
-                    # Supprimer le créneau orphelin
-                    if shift_manager.delete_shift(shift.id):
-                        repair_results['shifts_removed'] += 1
-                    else:
-                        repair_results['errors'].append(f"Impossible de supprimer le créneau orphelin {shift.id}")
+                    repair_results['errors'].append(f"Impossible de réparer le créneau {shift.id}")
+            else:
+                # Supprimer le créneau orphelin
+                if shift_manager.delete_shift(shift.id):
+                    repair_results['shifts_removed'] += 1
+                else:
+                    repair_results['errors'].append(f"Impossible de supprimer le créneau orphelin {shift.id}")
+
+    return repair_results
 
-        return jsonify({
-            'success': True,
-            'message': 'Réparation terminée',
-            'results': repair_results
-        })
+
+@api_bp.route('/sync/repair', methods=['POST'])
+def repair_data():
+    """
+    Répare les incohérences de données en arrière-plan (tâche sync_repair) :
+    réponse 202, résultats sur GET /api/jobs/<id>
+    """
+    try:
+        return enqueue_job('sync_repair')
 
     except Exception as e:
         return jsonify({
             'success': False,
             'error': f'Erreur lors de la réparation: {str(e)}'
-        }), 500
\ No newline at end of file
+        }), 500
+
+
+# ==================== TÂCHES EN ARRIÈRE-PLAN ====================
+
+def _job_directory(params: Dict, default: str = None) -> str:
+    """Dossier d'une tâche photos : chemin relatif au dossier de données, sans en sortir"""
+    directory = params.get('directory') or default
+    if not directory or not isinstance(directory, str):
+        raise ValueError("Paramètre 'directory' requis")
+    data_folder = os.path.realpath(Config.DATA_FOLDER)
+    path = os.path.realpath(os.path.join(data_folder, directory))
+    if os.path.commonpath([data_folder, path]) != data_folder or path == data_folder:
+        raise ValueError("Le dossier doit se trouver dans le dossier de données")
+    return path
+
+
+def _prepare_photos_export(params: Dict):
+    export_dir = _job_directory(params, os.path.join('exports', f"photos_{datetime.now():%Y%m%d_%H%M%S}"))
+
+    def run(job):
+        if not employee_manager.export_employee_photos(export_dir, job.report):
+            raise RuntimeError("Erreur lors de l'export des photos")
+        return {'directory': export_dir, 'exported': job.total}
+    return run
+
+
+def _prepare_photos_import(params: Dict):
+    import_dir = _job_directory(params)
+    return lambda job: employee_manager.import_employee_photos(import_dir, job.report)
+
+
+def _prepare_sync_repair(params: Dict):
+    return lambda job: _repair_data(job.report)
+
+
+def _prepare_migrate_granularity(params: Dict):
+    try:
+        grid = Config.get_time_grid().with_granularity(int(params.get('granularity')))
+    except (TypeError, ValueError):
+        raise ValueError(f"Granularité {params.get('granularity')} non supportée")
+
+    def run(job):
+        success, message = shift_manager.migrate_shifts_to_granularity(grid, job.report)
+        if not success:
+            raise ValueError(message)
+        # La nouvelle grille ne devient la grille par défaut qu'une fois la migration réussie
+        Config.set_time_grid(grid)
+        return {'message': message, 'new_granularity': grid.granularity}
+    return run
+
+
+def _prepare_fix_invalid_shifts(params: Dict):
+    def run(job):
+        success, message = shift_manager.fix_invalid_shifts(progress=job.report)
+        if not success:
+            raise RuntimeError(message)
+        return {'message': message}
+    return run
+
+
+def _prepare_employee_report(params: Dict):
+    include_photos = _parse_flag(params.get('include_photos'), False)
+    return lambda job: employee_manager.generate_employee_report(include_photos, job.report)
+
+
+# Type de tâche -> préparation : valide les paramètres et retourne la fonction exécutée, run(job)
+JOB_TYPES = {
+    'photos_export': _prepare_photos_export,
+    'photos_import': _prepare_photos_import,
+    'sync_repair': _prepare_sync_repair,
+    'migrate_granularity': _prepare_migrate_granularity,
+    'fix_invalid_shifts': _prepare_fix_invalid_shifts,
+    'employee_report': _prepare_employee_report
+}
+
+
+def enqueue_job(job_type: str, params: Dict = None):
+    """
+    Met en file une tâche de JOB_TYPES et retourne la réponse 202 (Location :
+    GET /api/jobs/<id>), ou 400 si ses paramètres sont invalides
+    """
+    try:
+        run = JOB_TYPES[job_type](params or {})
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+
+    job = job_queue.submit(job_type, run, params)
+    response = jsonify({'success': True, 'job': job.to_dict()})
+    response.status_code = 202
+    response.headers['Location'] = f"{request.script_root}/api/jobs/{job.id}"
+    return response
+
+
+@api_bp.route('/jobs', methods=['POST'])
+def create_job():
+    """
+    Met en file une opération de maintenance ({type, params}) et répond
+    immédiatement (202) ; l'avancement se suit sur GET /api/jobs/<id>.
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        job_type = data.get('type')
+        if job_type not in JOB_TYPES:
+            return jsonify({
+                'success': False,
+                'error': f"Type de tâche inconnu: {job_type}",
+                'types': sorted(JOB_TYPES)
+            }), 400
+
+        params = data.get('params') or {}
+        if not isinstance(params, dict):
+            return jsonify({'success': False, 'error': "'params' doit être un objet"}), 400
+        return enqueue_job(job_type, params)
+
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+
+@api_bp.route('/jobs', methods=['GET'])
+def list_jobs():
+    """Liste les tâches récentes (sans leurs résultats)"""
+    jobs = []
+    for job in job_queue.list_jobs():
+        job_data = job.to_dict()
+        del job_data['result']
+        jobs.append(job_data)
+    return jsonify({'success': True, 'jobs': jobs})
+
+
+@api_bp.route('/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    """Avancement, résultat ou erreur d'une tâche"""
+    job = job_queue.get(job_id)
+    if not job:
+        return jsonify({'success': False, 'error': 'Tâche non trouvée'}), 404
+    return jsonify({'success': True, 'job': job.to_dict()})
+
+
+@api_bp.route('/jobs/<job_id>/cancel', methods=['POST'])
+def cancel_job(job_id):
+    """Annule une tâche en attente, ou l'arrête à son prochain point de progression"""
+    job = job_queue.get(job_id)
+    if not job:
+        return jsonify({'success': False, 'error': 'Tâche non trouvée'}), 404
+    if not job_queue.cancel(job_id):
+        return jsonify({'success': False, 'error': 'Tâche déjà terminée', 'job': job.to_dict()}), 409
+    return jsonify({'success': True, 'job': job.to_dict()})
@@ -2,115 +2,123 @@
 Routes principales de l'application avec support de la granularité
 """
 
+from collections import OrderedDict
+from typing import Callable, Dict, Tuple
+import threading
 from flask import Blueprint, render_template, request, jsonify
-from app.models.employee import EmployeeManager
-from app.models.shift import ShiftManager
+from jinja2.utils import htmlsafe_json_dumps
+from markupsafe import Markup
+from app.routes.api import employee_manager, shift_manager, enqueue_job
 from config import Config
 
 main_bp = Blueprint('main', __name__)
 
-# Instances globales des gestionnaires
-employee_manager = EmployeeManager()
-shift_manager = ShiftManager()
+# Les pages partagent les gestionnaires de l'API : leurs versions reflètent toutes les modifications
+
+# Pages rendues : (page, semaine, grille) -> (versions des données, HTML)
+PAGE_CACHE_SIZE = 32
+_page_cache: 'OrderedDict[Tuple, Tuple[Tuple, str]]' = OrderedDict()
+_page_cache_lock = threading.Lock()
+
+# Fragment de configuration de la grille (bloc flask-config de base.html), par grille
+_grid_fragments: Dict[Tuple, Markup] = {}
+
+
+def _grid_fragment(grid) -> Markup:
+    """Configuration de la grille sérialisée une seule fois par grille (ouverture, fermeture, granularité)"""
+    fragment = _grid_fragments.get(grid.key)
+    if fragment is None:
+        fragment = htmlsafe_json_dumps({
+            'API_BASE': '/api',
+            'TIME_SLOT_GRANULARITY': grid.granularity,
+            'HOURS_RANGE': grid.hours_range(),
+            'DAYS_OF_WEEK': Config.DAYS_OF_WEEK,
+            'EMPLOYEE_TYPES': Config.EMPLOYEE_TYPES
+        }, ensure_ascii=False)
+        _grid_fragments[grid.key] = fragment
+    return fragment
+
+
+def _render_cached(page: str, week: str, grid, render: Callable[[], str]) -> str:
+    """
+    Rend une page ou la sert depuis le cache. L'entrée d'une page (semaine, grille)
+    est remplacée dès que la version des employés ou des créneaux concernés change.
+    """
+    key = (page, week, grid.key)
+    shift_version = shift_manager.get_week_version(week) if week else shift_manager.data_version
+    versions = (employee_manager.data_version, shift_version)
+
+    with _page_cache_lock:
+        cached = _page_cache.get(key)
+        if cached and cached[0] == versions:
+            _page_cache.move_to_end(key)
+            return cached[1]
+
+    html = render()
+
+    with _page_cache_lock:
+        _page_cache[key] = (versions, html)
+        _page_cache.move_to_end(key)
+        while len(_page_cache) > PAGE_CACHE_SIZE:
+            _page_cache.popitem(last=False)
+    return html
+
+
+def _page_summary(week: str = '') -> Dict:
+    """Chiffres affichés au premier rendu (le détail est chargé ensuite par l'API)"""
+    # Planning type (créneaux non datés) si aucune semaine : les semaines datées ne s'y cumulent pas
+    shifts, _ = shift_manager.query_shifts(week=week)
+    return {
+        'employees': len(employee_manager.get_all_employees(include_photos=False)),
+        'hours': sum(shift.duration for shift in shifts),
+        'shifts': len(shifts)
+    }
+
 
 @main_bp.route('/')
 def index():
     """Page d'accueil avec le planning et support granularité"""
     try:
-        # Charger les données
-        employees = employee_manager.get_all_employees()
-        shifts = shift_manager.get_all_shifts()
-
-        # Préparer les données pour le template
-        employees_data = [emp.to_dict() for emp in employees]
-        shifts_data = [shift.to_dict() for shift in shifts]
-
-        # Statistiques de la semaine
-        week_stats = shift_manager.get_weekly_stats(Config.DAYS_OF_WEEK)
-
-        # Données de configuration complètes pour le template
-        config_data = Config.get_config_data_for_template()
+        # Grille horaire lue une fois : la page reste cohérente même si elle change entre-temps
+        grid = Config.get_time_grid()
 
-        return render_template('index.html',
-                             employees=employees_data,
-                             shifts=shifts_data,
-                             employee_types=Config.EMPLOYEE_TYPES,
-                             days=Config.DAYS_OF_WEEK,
-                             hours=Config.get_hours_range(),
-                             stats=week_stats,
-                             config_data=config_data,
-                             time_slot_granularity=Config.TIME_SLOT_GRANULARITY,
-                             available_granularities=Config.AVAILABLE_GRANULARITIES)
+        return _render_cached('index', '', grid, lambda: render_template(
+            'index.html',
+            summary=_page_summary()))
 
     except Exception as e:
         print(f"Erreur dans la route index: {e}")
         # Retourner une page avec des données par défaut en cas d'erreur
         return render_template('index.html',
-                             employees=[],
-                             shifts=[],
-                             employee_types=Config.EMPLOYEE_TYPES,
-                             days=Config.DAYS_OF_WEEK,
-                             hours=Config.get_hours_range(),
-                             stats={'total_hours': 0, 'active_employees': 0, 'average_hours': 0},
-                             config_data=Config.get_config_data_for_template(),
-                             time_slot_granularity=Config.TIME_SLOT_GRANULARITY,
-                             available_granularities=Config.AVAILABLE_GRANULARITIES)
+                             summary={'employees': 0, 'hours': 0, 'shifts': 0})
 
 
 @main_bp.route('/planning')
 def planning():
     """Page du planning détaillé avec granularité"""
+    week = request.args.get('week', '')  # Format: YYYY-WW
     try:
-        week = request.args.get('week', '')  # Format: YYYY-WW
         granularity = request.args.get('granularity')  # Granularité spécifique
 
-        # Changer temporairement la granularité si demandée
-        original_granularity = Config.TIME_SLOT_GRANULARITY
+        # Granularité propre à la requête : la grille par défaut n'est pas modifiée
+        grid = Config.get_time_grid()
         if granularity and int(granularity) in Config.AVAILABLE_GRANULARITIES:
-            Config.set_granularity(int(granularity))
-
-        employees = employee_manager.get_all_employees()
-        shifts = shift_manager.get_all_shifts()
-
-        employees_data = [emp.to_dict() for emp in employees]
-        shifts_data = [shift.to_dict() for shift in shifts]
-
-        # Statistiques avec la granularité actuelle
-        week_stats = shift_manager.get_weekly_stats(Config.DAYS_OF_WEEK, week)
-        slot_stats = shift_manager.get_slot_usage_stats()
+            grid = grid.with_granularity(int(granularity))
 
-        # Données de configuration
-        config_data = Config.get_config_data_for_template()
-
-        # Restaurer la granularité originale si elle a été changée
-        if granularity and original_granularity != Config.TIME_SLOT_GRANULARITY:
-            Config.set_granularity(original_granularity)
-
-        return render_template('planning.html',
-                             employees=employees_data,
-                             shifts=shifts_data,
-                             employee_types=Config.EMPLOYEE_TYPES,
-                             days=Config.DAYS_OF_WEEK,
-                             hours=Config.get_hours_range(),
-                             current_week=week,
-                             week_stats=week_stats,
-                             slot_stats=slot_stats,
-                             config_data=config_data,
-                             time_slot_granularity=Config.TIME_SLOT_GRANULARITY,
-                             available_granularities=Config.AVAILABLE_GRANULARITIES)
+        # Seuls la grille et les chiffres du premier rendu sont intégrés à la page :
+        # employés et créneaux sont chargés par /api/planning/week/<semaine>
+        return _render_cached('planning', week, grid, lambda: render_template(
+            'planning.html',
+            current_week=week,
+            summary=_page_summary(week),
+            flask_config=_grid_fragment(grid),
+            time_slot_granularity=grid.granularity))
 
     except Exception as e:
         print(f"Erreur dans la route planning: {e}")
         return render_template('planning.html',
-                             employees=[],
-                             shifts=[],
-                             employee_types=Config.EMPLOYEE_TYPES,
-                             days=Config.DAYS_OF_WEEK,
-                             hours=Config.get_hours_range(),
                              current_week=week,
-                             config_data=Config.get_config_data_for_template(),
-                             time_slot_granularity=Config.TIME_SLOT_GRANULARITY,
-                             available_granularities=Config.AVAILABLE_GRANULARITIES)
+                             summary={'employees': 0, 'hours': 0, 'shifts': 0})
 
 
 @main_bp.route('/employees')
@@ -118,7 +126,7 @@ def employees():
     """Page de gestion des employés"""
     try:
         employees = employee_manager.get_all_employees(actif_only=False)
-        employees_data = [emp.to_dict() for emp in employees]
+        employees_data = [emp.to_dict_without_photo() for emp in employees]
 
         # Statistiques des employés
         employee_stats = {}
@@ -147,14 +155,15 @@ def analytics():
     """Page d'analyse et statistiques avancées"""
     try:
         # Statistiques globales
+        grid = Config.get_time_grid()
         week_stats = shift_manager.get_weekly_stats(Config.DAYS_OF_WEEK)
-        slot_stats = shift_manager.get_slot_usage_stats()
+        slot_stats = shift_manager.get_slot_usage_stats(grid)
 
         # Analyse de la granularité
         granularity_analysis = shift_manager.optimize_granularity_for_shifts()
 
         # Validation des créneaux
-        validation_result = shift_manager.validate_all_shifts_granularity()
+        validation_result = shift_manager.validate_all_shifts_granularity(grid)
 
         # Statistiques par employé
         employees = employee_manager.get_all_employees()
@@ -164,7 +173,7 @@ def analytics():
             if emp.actif:
                 emp_stats = shift_manager.get_employee_stats(emp.id)
                 employee_analytics.append({
-                    'employee': emp.to_dict(),
+                    'employee': emp.to_dict_without_photo(),
                     'stats': emp_stats
                 })
 
@@ -194,17 +203,18 @@ def settings():
     """Page de configuration avec gestion granularité"""
     try:
         # Informations sur la configuration actuelle
+        grid = Config.get_time_grid()
         hours_info = Config.get_formatted_hours_info()
-        granularity_info = Config.get_granularity_info()
+        granularity_info = grid.granularity_info()
 
         # Statistiques d'utilisation
-        slot_stats = shift_manager.get_slot_usage_stats()
+        slot_stats = shift_manager.get_slot_usage_stats(grid)
 
         # Analyse des créneaux pour recommandations
         granularity_analysis = shift_manager.optimize_granularity_for_shifts()
 
         # Validation des créneaux
-        validation_result = shift_manager.validate_all_shifts_granularity()
+        validation_result = shift_manager.validate_all_shifts_granularity(grid)
 
         return render_template('settings.html',
                              hours_info=hours_info,
@@ -235,23 +245,20 @@ def demo():
         demo_granularities = [15, 30, 60]
         demo_data = {}
 
-        original_granularity = Config.TIME_SLOT_GRANULARITY
+        current_grid = Config.get_time_grid()
 
         for granularity in demo_granularities:
-            Config.set_granularity(granularity)
+            grid = current_grid.with_granularity(granularity)
 
             demo_data[granularity] = {
-                'granularity_info': Config.get_granularity_info(),
-                'time_slots': Config.get_all_time_slots()[:24],  # Limiter pour la démo
-                'config_data': Config.get_config_data_for_template()
+                'granularity_info': grid.granularity_info(),
+                'time_slots': grid.all_time_slots()[:24],  # Limiter pour la démo
+                'config_data': grid.config_data()
             }
 
-        # Restaurer la granularité originale
-        Config.set_granularity(original_granularity)
-
         return render_template('demo.html',
                              demo_data=demo_data,
-                             current_granularity=Config.TIME_SLOT_GRANULARITY,
+                             current_granularity=current_grid.granularity,
                              available_granularities=Config.AVAILABLE_GRANULARITIES)
 
     except Exception as e:
@@ -271,27 +278,21 @@ def test_granularity(granularity):
         if granularity not in Config.AVAILABLE_GRANULARITIES:
             return f"Granularité {granularity} non supportée", 400
 
-        # Sauvegarder la granularité actuelle
-        original_granularity = Config.TIME_SLOT_GRANULARITY
-
-        # Changer temporairement
-        Config.set_granularity(granularity)
+        current_grid = Config.get_time_grid()
+        grid = current_grid.with_granularity(granularity)
 
-        # Générer les données de test
+        # Générer les données de test sur une grille dédiée
         test_data = {
             'granularity': granularity,
-            'granularity_info': Config.get_granularity_info(),
-            'time_slots': Config.get_all_time_slots(),
-            'config_data': Config.get_config_data_for_template()
+            'granularity_info': grid.granularity_info(),
+            'time_slots': grid.all_time_slots(),
+            'config_data': grid.config_data()
         }
 
-        # Restaurer la granularité
-        Config.set_granularity(original_granularity)
-
         return jsonify({
             'success': True,
             'test_data': test_data,
-            'original_granularity': original_granularity
+            'original_granularity': current_grid.granularity
         })
 
     except Exception as e:
@@ -303,25 +304,22 @@ def test_granularity(granularity):
 
 @main_bp.route('/migrate-granularity', methods=['POST'])
 def migrate_granularity():
-    """Route pour migrer les créneaux vers une nouvelle granularité"""
+    """
+    Route pour migrer les créneaux vers une nouvelle granularité, en arrière-plan
+    (tâche migrate_granularity : réponse 202, suivi sur GET /api/jobs/<id>)
+    """
     try:
         data = request.get_json()
         new_granularity = int(data.get('granularity'))
 
-        success, message = shift_manager.migrate_shifts_to_granularity(new_granularity)
-
-        if success:
-            return jsonify({
-                'success': True,
-                'message': message,
-                'new_granularity': Config.TIME_SLOT_GRANULARITY
-            })
-        else:
+        if new_granularity not in Config.AVAILABLE_GRANULARITIES:
             return jsonify({
                 'success': False,
-                'error': message
+                'error': f'Granularité {new_granularity} non supportée'
             }), 400
 
+        return enqueue_job('migrate_granularity', {'granularity': new_granularity})
+
     except Exception as e:
         return jsonify({
             'success': False,
@@ -331,20 +329,9 @@ def migrate_granularity():
 
 @main_bp.route('/fix-invalid-shifts', methods=['POST'])
 def fix_invalid_shifts():
-    """Route pour corriger les créneaux invalides"""
+    """Route pour corriger les créneaux invalides, en arrière-plan (tâche fix_invalid_shifts, réponse 202)"""
     try:
-        success, message = shift_manager.fix_invalid_shifts()
-
-        if success:
-            return jsonify({
-                'success': True,
-                'message': message
-            })
-        else:
-            return jsonify({
-                'success': False,
-                'error': message
-            }), 500
+        return enqueue_job('fix_invalid_shifts')
 
     except Exception as e:
         return jsonify({
@@ -375,20 +362,24 @@ def get_restaurant_configs_info():
 def inject_config():
     """Injecte la configuration dans tous les templates"""
     try:
+        grid = Config.get_time_grid()
+        config_data = grid.config_data()
         return {
-            'config': Config,
+            # base.html lit config.get(...) : on lui fournit les données de la grille courante
+            'config': config_data,
             'employee_types': Config.EMPLOYEE_TYPES,
             'days_of_week': Config.DAYS_OF_WEEK,
-            'hours_range': Config.get_hours_range(),
-            'time_slot_granularity': Config.TIME_SLOT_GRANULARITY,
+            'hours_range': grid.hours_range(),
+            'time_slot_granularity': grid.granularity,
             'available_granularities': Config.AVAILABLE_GRANULARITIES,
-            'granularity_info': Config.get_granularity_info(),
-            'config_data': Config.get_config_data_for_template()
+            'granularity_info': grid.granularity_info(),
+            'config_data': config_data,
+            'flask_config': _grid_fragment(grid)
         }
     except Exception as e:
         print(f"Erreur lors de l'injection de la configuration: {e}")
         return {
-            'config': Config,
+            'config': {},
             'employee_types': Config.EMPLOYEE_TYPES,
             'days_of_week': Config.DAYS_OF_WEEK,
             'hours_range': [],
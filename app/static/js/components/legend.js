@@ -180,9 +180,10 @@ class LegendManager {
      * Configure la mise à jour automatique
      */
     setupAutoUpdate() {
-        // Mise à jour des statistiques toutes les 30 secondes
+        // Mise à jour des statistiques toutes les 30 secondes, sauf si le flux
+        // des modifications serveur est connecté (les événements suffisent)
         this.updateInterval = setInterval(() => {
-            if (this.isVisible) {
+            if (this.isVisible && !window.APIManager?.isStreaming?.()) {
                 this.refreshStats();
             }
         }, 30000);
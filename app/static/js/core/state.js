@@ -10,6 +10,12 @@ class StateManager {
         this.isDirty = false;
         this.lastSave = null;
 
+        // Synchronisation différentielle : curseur serveur et enregistrements modifiés localement
+        this.syncCursor = 0;
+        this.dirtyEmployees = new Set();
+        this.dirtyShifts = new Set();
+        this.deletedShifts = new Set();
+
         this.initializeState();
         this.setupAutoSave();
 
@@ -117,7 +123,7 @@ class StateManager {
 
     // ==================== EMPLOYÉS ====================
 
-    setEmployee(employee) {
+    setEmployee(employee, options = {}) {
         if (!this.validateEmployee(employee)) {
             console.error('❌ Employé invalide:', employee);
             return false;
@@ -131,12 +137,17 @@ class StateManager {
             poste: employee.poste,
             email: employee.email || '',
             telephone: employee.telephone || '',
-            taux_horaire: parseFloat(employee.taux_horaire) || 15.0
+            taux_horaire: parseFloat(employee.taux_horaire) || 15.0,
+            actif: employee.actif !== false,
+            version: employee.version || 0
         };
 
         this.state.get('employees').set(cleanEmployee.id, cleanEmployee);
         this.updateMeta();
-        this.markDirty();
+        if (!options.fromServer) {
+            this.dirtyEmployees.add(cleanEmployee.id);
+            this.markDirty();
+        }
 
         console.log(`👤 Employé ${cleanEmployee.nom} ${cleanEmployee.prenom} mis à jour`);
         return true;
@@ -152,7 +163,7 @@ class StateManager {
 
     // ==================== CRÉNEAUX ====================
 
-    setShift(shift) {
+    setShift(shift, options = {}) {
         if (!this.validateShift(shift)) {
             console.error('❌ Créneau invalide:', shift);
             return false;
@@ -172,17 +183,37 @@ class StateManager {
             start_hour: parseInt(shift.start_hour),
             start_minutes: parseInt(shift.start_minutes) || 0,
             duration: parseFloat(shift.duration) || 1.0,
-            notes: shift.notes || ''
+            notes: shift.notes || '',
+            week: shift.week || '',
+            version: shift.version || 0
         };
 
         this.state.get('shifts').set(cleanShift.id, cleanShift);
         this.updateMeta();
-        this.markDirty();
+        if (!options.fromServer) {
+            this.dirtyShifts.add(cleanShift.id);
+            this.deletedShifts.delete(cleanShift.id);
+            this.markDirty();
+        }
 
         console.log(`⏰ Créneau ${cleanShift.id} mis à jour`);
         return true;
     }
 
+    removeShift(shiftId, options = {}) {
+        if (!this.state.get('shifts').delete(shiftId)) {
+            return false;
+        }
+
+        this.updateMeta();
+        this.dirtyShifts.delete(shiftId);
+        if (!options.fromServer) {
+            this.deletedShifts.add(shiftId);
+            this.markDirty();
+        }
+        return true;
+    }
+
     validateShift(shift) {
         const validDays = ['Lundi', 'Mardi', 'Mercredi', 'Jeudi', 'Vendredi', 'Samedi', 'Dimanche'];
 
@@ -195,6 +226,60 @@ class StateManager {
                shift.start_hour <= 23;
     }
 
+    // ==================== SYNCHRONISATION ====================
+
+    /**
+     * Modifications locales à envoyer depuis le dernier curseur acquitté
+     */
+    getPendingChanges() {
+        const employees = this.state.get('employees');
+        const shifts = this.state.get('shifts');
+
+        return {
+            cursor: this.syncCursor,
+            employees: [...this.dirtyEmployees].map(id => employees.get(id)).filter(Boolean),
+            shifts: [...this.dirtyShifts].map(id => shifts.get(id)).filter(Boolean),
+            deleted: { employees: [], shifts: [...this.deletedShifts] }
+        };
+    }
+
+    /**
+     * Applique la réponse de /api/sync : les enregistrements envoyés sont acquittés
+     * (sauf ceux refusés par le serveur, renvoyés à la prochaine synchronisation),
+     * les modifications serveur remplacent l'état local, puis le curseur avance
+     */
+    applyServerChanges(response, sent) {
+        const rejected = kind => new Set((response.results?.[kind]?.errors || []).map(error => error.id));
+        const rejectedEmployees = rejected('employees');
+        const rejectedShifts = rejected('shifts');
+
+        sent.employees.forEach(emp => {
+            if (!rejectedEmployees.has(emp.id)) this.dirtyEmployees.delete(emp.id);
+        });
+        sent.shifts.forEach(shift => {
+            if (!rejectedShifts.has(shift.id)) this.dirtyShifts.delete(shift.id);
+        });
+        sent.deleted.shifts.forEach(id => {
+            if (!rejectedShifts.has(id)) this.deletedShifts.delete(id);
+        });
+
+        if (response.full) {
+            this.state.get('shifts').clear();
+        }
+
+        (response.employees || []).forEach(emp => this.setEmployee(emp, { fromServer: true }));
+        (response.shifts || []).forEach(shift => this.setShift(shift, { fromServer: true }));
+        (response.deleted?.shifts || []).forEach(id => this.removeShift(id, { fromServer: true }));
+
+        this.syncCursor = response.cursor;
+        this.updateMeta();
+
+        // Des modifications ont pu être faites pendant l'aller-retour
+        if (!this.dirtyEmployees.size && !this.dirtyShifts.size && !this.deletedShifts.size) {
+            this.markClean();
+        }
+    }
+
     // ==================== DONNÉES ====================
 
     exportData() {
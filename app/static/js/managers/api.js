@@ -10,6 +10,7 @@ class APIManager {
         this.timeout = 10000;
         this.retryAttempts = 3;
         this.retryDelay = 1000;
+        this.eventSource = null;
 
         console.log('🌐 APIManager initialisé');
     }
@@ -56,7 +57,7 @@ class APIManager {
                 // Synchronisation avec le state
                 response.employees.forEach(emp => {
                     if (window.State.setEmployee) {
-                        window.State.setEmployee(emp);
+                        window.State.setEmployee(emp, { fromServer: true });
                     }
                 });
             }
@@ -79,7 +80,7 @@ class APIManager {
                 // Synchronisation avec le state
                 response.shifts.forEach(shift => {
                     if (window.State.setShift) {
-                        window.State.setShift(shift);
+                        window.State.setShift(shift, { fromServer: true });
                     }
                 });
             }
@@ -91,6 +92,36 @@ class APIManager {
         }
     }
 
+    /**
+     * Récupère le modèle de vue d'une semaine (YYYY-WW) : employés, créneaux
+     * regroupés par jour et par employé, heures et coûts, grille horaire
+     */
+    async getWeekView(week) {
+        try {
+            const response = await this.request(`/planning/week/${week}`);
+
+            if (window.State) {
+                (response.employees || []).forEach(emp => {
+                    if (window.State.setEmployee) {
+                        window.State.setEmployee(emp, { fromServer: true });
+                    }
+                });
+                Object.values(response.shifts_by_day || {}).forEach(dayShifts => {
+                    Object.values(dayShifts).flat().forEach(shift => {
+                        if (window.State.setShift) {
+                            window.State.setShift(shift, { fromServer: true });
+                        }
+                    });
+                });
+            }
+
+            return response;
+        } catch (error) {
+            console.error('❌ Erreur getWeekView:', error);
+            throw error;
+        }
+    }
+
     /**
      * Crée un employé
      */
@@ -102,7 +133,7 @@ class APIManager {
             });
 
             if (response.employee && window.State && window.State.setEmployee) {
-                window.State.setEmployee(response.employee);
+                window.State.setEmployee(response.employee, { fromServer: true });
             }
 
             return response;
@@ -123,7 +154,7 @@ class APIManager {
             });
 
             if (response.shift && window.State && window.State.setShift) {
-                window.State.setShift(response.shift);
+                window.State.setShift(response.shift, { fromServer: true });
             }
 
             return response;
@@ -150,7 +181,7 @@ class APIManager {
             });
 
             if (response.shift && window.State && window.State.setShift) {
-                window.State.setShift(response.shift);
+                window.State.setShift(response.shift, { fromServer: true });
             }
 
             return response;
@@ -160,6 +191,24 @@ class APIManager {
         }
     }
 
+    /**
+     * Évalue plusieurs placements d'un créneau en une requête (aperçu glisser-déposer)
+     */
+    async probeShift(shiftId, candidates) {
+        try {
+            return await this.request('/shifts/probe', {
+                method: 'POST',
+                body: JSON.stringify({
+                    shift: { id: shiftId },
+                    candidates: candidates
+                })
+            });
+        } catch (error) {
+            console.error('❌ Erreur probeShift:', error);
+            throw error;
+        }
+    }
+
     /**
      * Supprime un créneau
      */
@@ -169,6 +218,10 @@ class APIManager {
                 method: 'DELETE'
             });
 
+            if (response.success && window.State && window.State.removeShift) {
+                window.State.removeShift(shiftId, { fromServer: true });
+            }
+
             return response;
         } catch (error) {
             console.error('❌ Erreur deleteShift:', error);
@@ -177,7 +230,8 @@ class APIManager {
     }
 
     /**
-     * Sauvegarde automatique basique
+     * Sauvegarde automatique différentielle : seules les modifications depuis le
+     * dernier curseur sont envoyées, seules celles du serveur sont reçues
      */
     async autoSave() {
         try {
@@ -185,27 +239,15 @@ class APIManager {
                 return { success: true, message: 'Aucune modification' };
             }
 
-            // Export simple des données
-            const data = {
-                employees: [],
-                shifts: [],
-                meta: { exportDate: new Date().toISOString() }
-            };
-
-            // Récupération via getState si disponible
-            if (window.State.getState) {
-                const state = window.State.getState();
-                if (state.employees) data.employees = Array.isArray(state.employees) ? state.employees : [];
-                if (state.shifts) data.shifts = Array.isArray(state.shifts) ? state.shifts : [];
-            }
+            const data = window.State.getPendingChanges();
 
             const response = await this.request('/sync', {
                 method: 'POST',
                 body: JSON.stringify(data)
             });
 
-            if (response.success && window.State.markClean) {
-                window.State.markClean();
+            if (response.cursor !== undefined) {
+                window.State.applyServerChanges(response, data);
             }
 
             console.log('💾 Sauvegarde automatique réussie');
@@ -217,13 +259,73 @@ class APIManager {
         }
     }
 
+    /**
+     * S'abonne au flux des modifications serveur (remplace le rafraîchissement périodique).
+     * EventSource se reconnecte seul et reprend au dernier ID reçu (Last-Event-ID).
+     */
+    subscribeToChanges() {
+        if (this.eventSource || typeof EventSource === 'undefined') {
+            return;
+        }
+
+        const events = window.Config?.EVENTS || {};
+        this.eventSource = new EventSource(`${this.baseURL}/events`);
+
+        this.eventSource.addEventListener('employees', (e) => {
+            const change = JSON.parse(e.data);
+            if (change.record && window.State?.setEmployee) {
+                window.State.setEmployee(change.record, { fromServer: true });
+                window.EventBus?.emit(change.action === 'create' ? events.EMPLOYEE_ADDED : events.EMPLOYEE_UPDATED,
+                    change.record);
+            }
+        });
+
+        this.eventSource.addEventListener('shifts', (e) => {
+            const change = JSON.parse(e.data);
+            if (change.action === 'delete') {
+                window.State?.removeShift?.(change.id, { fromServer: true });
+                window.EventBus?.emit(events.SHIFT_DELETED, { id: change.id });
+            } else if (change.record && window.State?.setShift) {
+                window.State.setShift(change.record, { fromServer: true });
+                window.EventBus?.emit(change.action === 'create' ? events.SHIFT_ADDED : events.SHIFT_UPDATED,
+                    change.record);
+            }
+        });
+
+        // Historique incomplet côté serveur : recharger l'état
+        this.eventSource.addEventListener('resync', () => {
+            this.loadInitialData().catch(error => console.error('❌ Erreur resynchronisation:', error));
+        });
+
+        console.log('📡 Abonné au flux des modifications');
+    }
+
+    /**
+     * Indique si le flux des modifications est connecté
+     */
+    isStreaming() {
+        return !!this.eventSource && this.eventSource.readyState === EventSource.OPEN;
+    }
+
     /**
      * Charge les données initiales
      */
-    async loadInitialData() {
+    async loadInitialData(week = null) {
         try {
             console.log('📥 Chargement des données initiales...');
 
+            if (week) {
+                // Semaine datée : un seul appel, servi depuis le cache du serveur
+                const view = await this.getWeekView(week);
+                this.subscribeToChanges();
+
+                return {
+                    success: true,
+                    totalEmployees: view.employees?.length || 0,
+                    totalShifts: view.stats?.total_shifts || 0
+                };
+            }
+
             const [employeesResponse, shiftsResponse] = await Promise.all([
                 this.getEmployees().catch(() => ({ employees: [] })),
                 this.getShifts().catch(() => ({ shifts: [] }))
@@ -231,6 +333,8 @@ class APIManager {
 
             console.log(`📊 Données chargées: ${employeesResponse.employees?.length || 0} employés, ${shiftsResponse.shifts?.length || 0} créneaux`);
 
+            this.subscribeToChanges();
+
             return {
                 success: true,
                 totalEmployees: employeesResponse.employees?.length || 0,
@@ -290,6 +290,9 @@ class DragDropManager {
                 y: e.clientY - rect.top
             };
 
+            // Pré-calcul côté serveur de la validité de toutes les cellules
+            this.probeDropZones(shiftData);
+
             console.log('🎯 Début drag créneau:', shiftData.id);
 
         } catch (error) {
@@ -298,6 +301,43 @@ class DragDropManager {
         }
     }
 
+    /**
+     * Interroge l'API une seule fois pour toutes les zones de drop du créneau glissé
+     */
+    async probeDropZones(shiftData) {
+        this.probeResults = null;
+        if (!window.APIManager || !window.APIManager.probeShift || String(shiftData.id).startsWith('temp_')) return;
+
+        const candidates = [];
+        this.dropZones.forEach(cell => {
+            const hour = parseInt(cell.dataset.hour);
+            if (cell.dataset.day && !isNaN(hour)) {
+                candidates.push({ day: cell.dataset.day, start_hour: hour });
+            }
+        });
+        if (candidates.length === 0) return;
+
+        try {
+            const response = await window.APIManager.probeShift(shiftData.id, candidates);
+            // Le drag a pu se terminer ou changer de créneau pendant la requête
+            if (!this.isDragging || this.draggedShift !== shiftData || !response.results) return;
+
+            this.probeResults = new Map();
+            response.results.forEach(result => {
+                this.probeResults.set(`${result.day}-${result.start_hour}`, result.valid);
+            });
+            this.dropZones.forEach(cell => {
+                const valid = this.probeResults.get(`${cell.dataset.day}-${parseInt(cell.dataset.hour)}`);
+                if (valid !== undefined) {
+                    cell.classList.toggle('drop-preview-invalid', !valid);
+                }
+            });
+        } catch (error) {
+            // Sans aperçu, la validation locale reste appliquée
+            this.probeResults = null;
+        }
+    }
+
     /**
      * Extraction sécurisée des données de créneau
      */
@@ -574,6 +614,10 @@ class DragDropManager {
 
             if (!targetDay || isNaN(targetHour)) return false;
 
+            // Résultat de l'aperçu serveur (conflits, disponibilités, heures, repos)
+            const probed = this.probeResults?.get(`${targetDay}-${targetHour}`);
+            if (probed === false) return false;
+
             // Vérification des conflits
             const wouldConflict = this.checkConflictAtPosition(
                 this.draggedShift.employee_id,
@@ -682,6 +726,8 @@ class DragDropManager {
         this.draggedShift = null;
         this.isDragging = false;
         this.dragOffset = { x: 0, y: 0 };
+        this.probeResults = null;
+        this.dropZones.forEach(cell => cell.classList.remove('drop-preview-invalid'));
     }
 
     /**
@@ -58,6 +58,23 @@ def generate_week_number(date: datetime = None) -> str:
     return f"{year}-{week:02d}"
 
 
+def get_following_weeks(start_week: str, count: int) -> List[str]:
+    """Retourne `count` numéros de semaine ISO consécutifs (YYYY-WW) à partir de start_week"""
+    year, week = map(int, start_week.split('-'))
+    monday = datetime.fromisocalendar(year, week, 1)
+    return [generate_week_number(monday + timedelta(weeks=i)) for i in range(count)]
+
+
+def is_valid_week_number(week_str: str) -> bool:
+    """Vérifie qu'une chaîne est un numéro de semaine ISO valide (YYYY-WW)"""
+    try:
+        year, week = map(int, week_str.split('-'))
+        datetime.fromisocalendar(year, week, 1)
+        return True
+    except (ValueError, TypeError, AttributeError):
+        return False
+
+
 def parse_week_number(week_str: str) -> datetime:
     """Parse un numéro de semaine YYYY-WW vers la date du lundi"""
     try:
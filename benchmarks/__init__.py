@@ -0,0 +1,3 @@
+"""
+Mesures de performance du Planning Restaurant (hors tests unitaires)
+"""
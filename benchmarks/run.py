@@ -0,0 +1,374 @@
+"""
+Suite de benchmarks : modèles, statistiques et principales routes de l'API,
+mesurés sur des restaurants synthétiques de plusieurs tailles.
+
+Chaque taille est mesurée dans un processus séparé (données, gestionnaires et
+caches neufs). Les résultats (percentiles par cas, en millisecondes) sont
+écrits en JSON ; --compare les confronte à une référence enregistrée et signale
+les régressions au-delà du seuil. Un cas doté d'un budget de latence (p90) fait
+échouer la suite s'il le dépasse.
+
+Usage :
+    python -m benchmarks.run --scales small,medium --output bench.json
+    python -m benchmarks.run --scales small --compare bench.json --threshold 0.2
+    python -m benchmarks.run --scales small --startup --output bench.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Tailles : (employés, semaines de créneaux)
+SCALES = {
+    'small': (20, 4),
+    'medium': (200, 12),
+    'large': (1000, 26),
+    'xlarge': (5000, 52)
+}
+SEED = 42
+
+# Mesures d'un cas : au moins MIN_ROUNDS, au plus MAX_ROUNDS, dans la limite de CASE_TIME_BUDGET secondes
+MIN_ROUNDS = 3
+MAX_ROUNDS = 200
+CASE_TIME_BUDGET = 2.0
+
+# Budget de latence du comblement du sous-effectif sur une semaine (usage interactif)
+FILL_GAPS_BUDGET_MS = 200
+
+# Comparaison : écart relatif toléré sur la médiane, et écart absolu en deçà duquel on ignore (bruit)
+DEFAULT_THRESHOLD = 0.2
+NOISE_FLOOR_MS = 0.05
+
+
+class Case:
+    """
+    Cas mesuré : `run()` est chronométré ; `cleanup(result)`, hors chronométrage,
+    remet les données en état après une écriture. `max_shifts` écarte les cas
+    trop coûteux (algorithmes quadratiques) sur les grands jeux de données.
+    `budget_ms` est la latence à ne pas dépasser (p90).
+    """
+
+    def __init__(self, name: str, run: Callable[[], object], cleanup: Callable[[object], None] = None,
+                 max_shifts: int = None, budget_ms: float = None):
+        self.name = name
+        self.run = run
+        self.cleanup = cleanup
+        self.max_shifts = max_shifts
+        self.budget_ms = budget_ms
+
+
+def percentiles(samples_ms: List[float]) -> Dict:
+    """Résumé d'une série de mesures (ms)"""
+    ordered = sorted(samples_ms)
+    if len(ordered) > 1:
+        cuts = statistics.quantiles(ordered, n=100, method='inclusive')
+        p50, p90, p99 = cuts[49], cuts[89], cuts[98]
+    else:
+        p50 = p90 = p99 = ordered[0]
+    return {
+        'rounds': len(ordered),
+        'min': round(ordered[0], 4),
+        'p50': round(p50, 4),
+        'p90': round(p90, 4),
+        'p99': round(p99, 4),
+        'max': round(ordered[-1], 4),
+        'mean': round(statistics.fmean(ordered), 4)
+    }
+
+
+def measure(case: Case) -> Dict:
+    """Chronomètre un cas (un tour d'échauffement non compté)"""
+    result = case.run()
+    if case.cleanup:
+        case.cleanup(result)
+
+    samples = []
+    deadline = time.perf_counter() + CASE_TIME_BUDGET
+    while len(samples) < MIN_ROUNDS or (len(samples) < MAX_ROUNDS and time.perf_counter() < deadline):
+        start = time.perf_counter()
+        result = case.run()
+        samples.append((time.perf_counter() - start) * 1000)
+        if case.cleanup:
+            case.cleanup(result)
+    return percentiles(samples)
+
+
+def _build_cases(dataset) -> List[Case]:
+    """Cas mesurés sur le jeu de données chargé (fichiers de Config) : modèles puis API"""
+    from config import Config
+    from app import create_app
+    from app.models.changelog import ChangeLog
+    from app.models.employee import EmployeeManager
+    from app.models.shift import Shift, ShiftManager
+    from app.models.planning import PlanningManager
+
+    change_log = ChangeLog()
+    employee_manager = EmployeeManager(change_log)
+    shift_manager = ShiftManager(change_log)
+    planning_manager = PlanningManager(employee_manager, shift_manager)
+    grid = dataset.grid
+
+    week = dataset.meta['start_week']
+    sample = dataset.shifts[len(dataset.shifts) // 2]
+    # Semaine sans créneau : les ajouts mesurés n'entrent pas en conflit avec le jeu de données
+    free_week = '2099-01'
+
+    def add_shift():
+        shift = Shift(employee_id=sample.employee_id, day='Lundi', start_hour=10, duration=4, week=free_week)
+        success, message = shift_manager.add_shift(shift)
+        if not success:
+            raise RuntimeError(message)
+        return shift.id
+
+    def add_conflicting_shift():
+        conflicting = Shift(employee_id=sample.employee_id, day=sample.day, start_hour=sample.start_hour,
+                            duration=sample.duration, week=sample.week)
+        success, _ = shift_manager.add_shift(conflicting)
+        if success:
+            raise RuntimeError("Conflit non détecté")
+
+    placement = {'employee_id': sample.employee_id, 'day': sample.day, 'start_hour': 9, 'duration': 3,
+                 'week': sample.week}
+
+    # Besoins de toute la semaine, proportionnels à l'effectif : des déficits sur chaque service
+    staffing = max(2, len(dataset.employees) // 10)
+    requirements = [{'poste': poste, 'day': day, 'start_hour': start, 'end_hour': end, 'count': staffing}
+                    for poste in Config.EMPLOYEE_TYPES for day in Config.DAYS_OF_WEEK
+                    for start, end in ((11, 15), (18, 23))]
+
+    app = create_app('default')
+    client = app.test_client()
+
+    def get(url):
+        def run():
+            response = client.get(url)
+            response.get_data()
+            if response.status_code != 200:
+                raise RuntimeError(f"{url}: {response.status_code}")
+        return run
+
+    def batch(operations):
+        response = client.post('/api/shifts/batch', json={'operations': operations})
+        if response.status_code != 200:
+            raise RuntimeError(f"POST /api/shifts/batch: {response.status_code}")
+        return response.get_json()['results']
+
+    def create_shift():
+        return batch([{'op': 'create', 'data': {'employee_id': sample.employee_id, 'day': 'Mardi',
+                                                'start_hour': 10, 'duration': 4, 'week': free_week}}])[0]['id']
+
+    return [
+        Case('shifts.load', shift_manager.load_shifts),
+        Case('shifts.save', shift_manager.save_shifts),
+        Case('shifts.add', add_shift, cleanup=shift_manager.delete_shift),
+        Case('shifts.add_conflict', add_conflicting_shift),
+        Case('employees.load', employee_manager.load_employees),
+        Case('stats.weekly', lambda: shift_manager.get_weekly_stats(Config.DAYS_OF_WEEK, week)),
+        Case('stats.weekly_template', lambda: shift_manager.get_weekly_stats(Config.DAYS_OF_WEEK)),
+        Case('stats.slot_usage', lambda: shift_manager.get_slot_usage_stats(grid)),
+        Case('planning.conflicts', planning_manager.get_planning_conflicts, max_shifts=5000),
+        Case('planning.validate_placement', lambda: planning_manager.validate_shift_placement(placement)),
+        Case('planning.week_view', lambda: planning_manager.get_week_view(week)),
+        Case('planning.fill_gaps', lambda: planning_manager.fill_coverage_gaps(requirements, week),
+             budget_ms=FILL_GAPS_BUDGET_MS),
+        Case('api.employees', get('/api/employees')),
+        Case('api.shifts_week', get(f'/api/shifts?week={week}')),
+        Case('api.shifts_all', get('/api/shifts')),
+        Case('api.week_view', get(f'/api/planning/week/{week}')),
+        Case('api.stats_weekly', get(f'/api/stats/weekly?week={week}')),
+        Case('api.export_ndjson', get('/api/export/planning?format=ndjson')),
+        Case('api.create_shift', create_shift, cleanup=lambda shift_id: batch([{'op': 'delete', 'id': shift_id}])),
+        Case('page.planning', get(f'/planning?week={week}'))
+    ]
+
+
+def run_scale(scale: str, cases: Optional[List[str]] = None) -> Dict:
+    """Génère le jeu de données d'une taille dans un dossier temporaire et mesure chaque cas"""
+    from config import Config
+    from benchmarks.synthetic import generate_restaurant, write_data_folder
+
+    employees, weeks = SCALES[scale]
+    dataset = generate_restaurant(employees=employees, weeks=weeks, seed=SEED)
+    with tempfile.TemporaryDirectory() as data_folder:
+        paths = write_data_folder(dataset, data_folder)
+        # Avant tout accès aux gestionnaires : ils liront ces fichiers
+        Config.DATA_FOLDER = data_folder
+        Config.EMPLOYEES_FILE = paths['employees']
+        Config.SHIFTS_FILE = paths['shifts']
+        Config.TEMPLATES_FILE = paths['templates']
+
+        results = {}
+        for case in _build_cases(dataset):
+            if cases and case.name not in cases:
+                continue
+            if case.max_shifts and len(dataset.shifts) > case.max_shifts:
+                results[case.name] = {'skipped': f"plus de {case.max_shifts} créneaux"}
+                continue
+            results[case.name] = measure(case)
+            if case.budget_ms is not None:
+                results[case.name]['budget_ms'] = case.budget_ms
+                results[case.name]['within_budget'] = results[case.name]['p90'] <= case.budget_ms
+    return {'dataset': dataset.summary(), 'cases': results}
+
+
+def _run_scale_process(scale: str, cases: Optional[List[str]]) -> Dict:
+    """Mesure une taille dans un processus neuf"""
+    args = [sys.executable, '-m', 'benchmarks.run', '--worker', scale]
+    if cases:
+        args += ['--cases', ','.join(cases)]
+    env = {**os.environ, 'PYTHONPATH': ROOT}
+    process = subprocess.run(args, cwd=ROOT, env=env, capture_output=True, text=True)
+    if process.returncode != 0:
+        raise RuntimeError(f"Échec des mesures '{scale}':\n{process.stderr}")
+    output = process.stdout
+    # Dernière ligne : résultats JSON (les lignes précédentes sont des traces de l'application)
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def compare(current: Dict, baseline: Dict, threshold: float = DEFAULT_THRESHOLD) -> List[Dict]:
+    """
+    Cas communs aux deux rapports dont la médiane a augmenté de plus de
+    `threshold` (relatif) et de plus de NOISE_FLOOR_MS (absolu).
+    """
+    regressions = []
+    for scale, scale_results in current.get('results', {}).items():
+        baseline_cases = baseline.get('results', {}).get(scale, {}).get('cases', {})
+        for name, stats in scale_results.get('cases', {}).items():
+            reference = baseline_cases.get(name)
+            if not reference or 'p50' not in stats or 'p50' not in reference:
+                continue
+            delta = stats['p50'] - reference['p50']
+            if delta > NOISE_FLOOR_MS and stats['p50'] > reference['p50'] * (1 + threshold):
+                regressions.append({
+                    'scale': scale,
+                    'case': name,
+                    'baseline_p50': reference['p50'],
+                    'p50': stats['p50'],
+                    'ratio': round(stats['p50'] / reference['p50'], 2) if reference['p50'] else None
+                })
+    return regressions
+
+
+def _startup_results(repeat: int) -> Dict:
+    """Budget de démarrage (benchmarks.startup) au format des cas mesurés"""
+    from benchmarks.startup import run_startup
+
+    report = run_startup(repeat)
+    return {
+        'dataset': {'budget': {name: metric['budget'] for name, metric in report['metrics'].items()}},
+        'cases': {name: {'rounds': repeat, 'min': metric['min'], 'p50': metric['median'], 'max': metric['max'],
+                         'within_budget': metric['within_budget']}
+                  for name, metric in report['metrics'].items()}
+    }
+
+
+def _git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmarks des modèles et de l'API")
+    parser.add_argument('--scales', default='small,medium',
+                        help=f"tailles mesurées parmi {', '.join(SCALES)}")
+    parser.add_argument('--cases', help="cas à mesurer (noms séparés par des virgules), tous par défaut")
+    parser.add_argument('--startup', action='store_true', help="mesurer aussi le budget de démarrage")
+    parser.add_argument('--output', help="fichier JSON des résultats")
+    parser.add_argument('--compare', help="rapport JSON de référence")
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help="régression signalée au-delà de cet écart relatif de médiane (0.2 = +20 %%)")
+    parser.add_argument('--worker', help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+    cases = args.cases.split(',') if args.cases else None
+
+    if args.worker:
+        print(json.dumps(run_scale(args.worker, cases)))
+        return 0
+
+    scales = args.scales.split(',')
+    unknown = [scale for scale in scales if scale not in SCALES]
+    if unknown:
+        parser.error(f"Tailles inconnues: {', '.join(unknown)}")
+
+    report = {
+        'meta': {
+            'date': datetime.now().isoformat(),
+            'revision': _git_revision(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'seed': SEED
+        },
+        'results': {}
+    }
+    for scale in scales:
+        report['results'][scale] = _run_scale_process(scale, cases)
+        dataset = report['results'][scale]['dataset']
+        print(f"\n[{scale}] {dataset['employees_count']} employés, {dataset['shifts_count']} créneaux")
+        for name, stats in report['results'][scale]['cases'].items():
+            if 'skipped' in stats:
+                print(f"  {name:28s} ignoré ({stats['skipped']})")
+            else:
+                budget = ''
+                if 'budget_ms' in stats:
+                    budget = f"  budget {stats['budget_ms']} ms{'' if stats['within_budget'] else ' DÉPASSÉ'}"
+                print(f"  {name:28s} p50 {stats['p50']:10.3f} ms  p90 {stats['p90']:10.3f} ms  "
+                      f"p99 {stats['p99']:10.3f} ms  ({stats['rounds']} tours){budget}")
+    if args.startup:
+        report['results']['startup'] = _startup_results(5)
+        print("\n[startup]")
+        for name, stats in report['results']['startup']['cases'].items():
+            budget = report['results']['startup']['dataset']['budget'][name]
+            print(f"  {name:28s} p50 {stats['p50']:10.3f} ms  (budget {budget} ms)")
+
+    exit_code = 0
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.threshold)
+        report['comparison'] = {
+            'baseline': args.compare,
+            'baseline_revision': baseline.get('meta', {}).get('revision'),
+            'threshold': args.threshold,
+            'regressions': regressions
+        }
+        print(f"\nComparaison avec {args.compare} (seuil +{args.threshold:.0%}) : "
+              f"{len(regressions)} régression(s)")
+        for regression in regressions:
+            print(f"  [{regression['scale']}] {regression['case']}: {regression['baseline_p50']} ms -> "
+                  f"{regression['p50']} ms (x{regression['ratio']})")
+        if regressions:
+            exit_code = 1
+
+    if args.startup and not all(stats['within_budget']
+                                for stats in report['results']['startup']['cases'].values()):
+        print("\nBudget de démarrage dépassé")
+        exit_code = 1
+
+    over_budget = [f"[{scale}] {name}" for scale in scales
+                   for name, stats in report['results'][scale]['cases'].items()
+                   if stats.get('within_budget') is False]
+    if over_budget:
+        print(f"\nBudget de latence dépassé : {', '.join(over_budget)}")
+        exit_code = 1
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+    return exit_code
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,127 @@
+"""
+Budget de démarrage : temps d'import (python -X importtime) et temps jusqu'à
+la première réponse, mesurés à froid dans des processus séparés.
+
+Usage :
+    python -m benchmarks.startup [--repeat 5] [--output startup.json]
+
+Le code de sortie vaut 1 si une médiane dépasse son budget.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from typing import Dict, List
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Budgets en millisecondes (médianes). L'essentiel de l'import revient à Flask :
+# nos modules ne doivent lire aucune donnée à l'import.
+STARTUP_BUDGET = {
+    'import_ms': 400,
+    'create_app_ms': 100,
+    'first_request_ms': 250,
+    'time_to_first_request_ms': 600
+}
+
+# Mesuré dans un processus neuf : import, création de l'application, première requête
+FIRST_REQUEST_SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+from app import create_app
+imported = time.perf_counter()
+app = create_app('default')
+created = time.perf_counter()
+response = app.test_client().get(sys.argv[1])
+answered = time.perf_counter()
+print(json.dumps({
+    'status': response.status_code,
+    'create_app_ms': (created - imported) * 1000,
+    'first_request_ms': (answered - created) * 1000,
+    'time_to_first_request_ms': (answered - start) * 1000
+}))
+"""
+
+
+def _run(args: List[str]) -> subprocess.CompletedProcess:
+    env = {**os.environ, 'PYTHONPATH': ROOT, 'PYTHONDONTWRITEBYTECODE': '1'}
+    return subprocess.run([sys.executable, *args], cwd=ROOT, env=env, capture_output=True, text=True, check=True)
+
+
+def measure_import(module: str = 'app.routes.api', top: int = 10) -> Dict:
+    """Temps d'import cumulé du module et modules les plus coûteux (python -X importtime)"""
+    result = _run(['-X', 'importtime', '-c', f'import {module}'])
+    modules = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        modules.append((name.strip(), int(self_us), int(cumulative_us), len(name) - len(name.lstrip())))
+    # Les modules importés au premier niveau sont les moins indentés
+    depth = min(indent for _, _, _, indent in modules)
+    total_us = sum(cumulative for _, _, cumulative, indent in modules if indent == depth)
+    slowest = sorted(modules, key=lambda module_time: module_time[1], reverse=True)[:top]
+    return {
+        'import_ms': total_us / 1000,
+        'slowest_modules': [{'module': name, 'self_ms': self_us / 1000} for name, self_us, _, _ in slowest]
+    }
+
+
+def measure_first_request(path: str = '/api/health') -> Dict:
+    """Création de l'application et première requête, dans un processus neuf"""
+    return json.loads(_run(['-c', FIRST_REQUEST_SCRIPT, path]).stdout)
+
+
+def run_startup(repeat: int = 5, path: str = '/api/health') -> Dict:
+    """Médianes sur `repeat` démarrages à froid, comparées au budget"""
+    samples: Dict[str, List[float]] = {name: [] for name in STARTUP_BUDGET}
+    slowest_modules = []
+    for _ in range(repeat):
+        imports = measure_import()
+        slowest_modules = imports['slowest_modules']
+        samples['import_ms'].append(imports['import_ms'])
+        for name, value in measure_first_request(path).items():
+            if name in samples:
+                samples[name].append(value)
+
+    metrics = {}
+    for name, values in samples.items():
+        median = statistics.median(values)
+        metrics[name] = {
+            'median': round(median, 2),
+            'min': round(min(values), 2),
+            'max': round(max(values), 2),
+            'budget': STARTUP_BUDGET[name],
+            'within_budget': median <= STARTUP_BUDGET[name]
+        }
+    return {
+        'repeat': repeat,
+        'path': path,
+        'metrics': metrics,
+        'slowest_modules': slowest_modules,
+        'within_budget': all(metric['within_budget'] for metric in metrics.values())
+    }
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="Budget de démarrage de l'application")
+    parser.add_argument('--repeat', type=int, default=5, help="nombre de démarrages mesurés")
+    parser.add_argument('--path', default='/api/health', help="URL de la première requête")
+    parser.add_argument('--output', help="fichier JSON des résultats")
+    args = parser.parse_args(argv)
+
+    report = run_startup(args.repeat, args.path)
+    for name, metric in report['metrics'].items():
+        status = 'OK' if metric['within_budget'] else 'DÉPASSÉ'
+        print(f"{name:26s} {metric['median']:8.1f} ms  (budget {metric['budget']} ms)  {status}")
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+    return 0 if report['within_budget'] else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
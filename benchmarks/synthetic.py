@@ -0,0 +1,311 @@
+"""
+Générateur de restaurants synthétiques (10 à 5 000 employés, semaines à années
+de créneaux) pour mesurer les performances sur des volumes réalistes.
+
+Le jeu de données est déterministe pour une graine donnée : mêmes IDs, mêmes
+créneaux, mêmes photos. Il s'écrit au format du dossier de données (fichiers
+lus par les gestionnaires) ou se charge directement dans des gestionnaires.
+
+Usage :
+    python -m benchmarks.synthetic --employees 500 --weeks 52 --seed 42 --output /tmp/planning_500
+    python -m benchmarks.synthetic --profile BAR_NUIT --employees 40 --weeks 8 --output /tmp/bar
+"""
+
+import argparse
+import base64
+import json
+import os
+import random
+import sys
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from config import Config, RestaurantConfigs, TimeGrid
+from app.models.employee import Employee, EmployeeManager
+from app.models.shift import Shift, ShiftManager
+from app.utils.helpers import generate_week_number, get_following_weeks
+
+MIN_EMPLOYEES = 10
+MAX_EMPLOYEES = 5000
+
+# Répartition des postes dans une brigade
+POSTE_WEIGHTS = {
+    'serveur': 35,
+    'cuisinier': 22,
+    'aide': 14,
+    'commis': 12,
+    'barman': 11,
+    'manager': 6
+}
+
+# Taux horaire de base par poste (variation de ±15 %)
+POSTE_RATES = {
+    'serveur': 13.5,
+    'cuisinier': 16.0,
+    'aide': 12.0,
+    'commis': 12.5,
+    'barman': 14.5,
+    'manager': 21.0
+}
+
+# Affluence relative des jours (week-end chargé)
+DAY_WEIGHTS = {
+    'Lundi': 0.7,
+    'Mardi': 0.8,
+    'Mercredi': 0.9,
+    'Jeudi': 1.0,
+    'Vendredi': 1.4,
+    'Samedi': 1.6,
+    'Dimanche': 1.1
+}
+
+PRENOMS = ('Marie', 'Pierre', 'Julie', 'Thomas', 'Sophie', 'Lucas', 'Emma', 'Antoine', 'Camille', 'Hugo',
+           'Léa', 'Louis', 'Chloé', 'Gabriel', 'Manon', 'Arthur', 'Inès', 'Jules', 'Sarah', 'Nathan',
+           'Zoé', 'Théo', 'Lina', 'Raphaël', 'Jade', 'Adam', 'Alice', 'Mathis', 'Lola', 'Paul')
+NOMS = ('Dupont', 'Martin', 'Lemaire', 'Durand', 'Blanc', 'Noir', 'Roux', 'Vert', 'Bernard', 'Petit',
+        'Robert', 'Richard', 'Moreau', 'Simon', 'Laurent', 'Michel', 'Garcia', 'David', 'Bertrand', 'Fontaine',
+        'Morel', 'Girard', 'André', 'Mercier', 'Bonnet', 'Lambert', 'Faure', 'Rousseau', 'Vincent', 'Muller')
+
+# Date de création commune : le jeu de données ne dépend pas de l'heure de génération
+CREATION_DATE = datetime(2024, 1, 1).isoformat()
+
+# Photo factice : en-tête JPEG suivi d'octets pseudo-aléatoires
+JPEG_HEADER = b'\xff\xd8\xff\xe0\x00\x10JFIF\x00'
+
+
+class Dataset:
+    """Restaurant généré : employés, créneaux et paramètres de génération"""
+
+    def __init__(self, meta: Dict, employees: List[Employee], shifts: List[Shift]):
+        self.meta = meta
+        self.employees = employees
+        self.shifts = shifts
+
+    @property
+    def grid(self) -> TimeGrid:
+        """Grille horaire du profil (ouverture, fermeture, granularité)"""
+        return TimeGrid(self.meta['opening'], self.meta['closing'], self.meta['granularity'])
+
+    def summary(self) -> Dict:
+        return {
+            **self.meta,
+            'employees_count': len(self.employees),
+            'shifts_count': len(self.shifts),
+            'photos_count': sum(1 for employee in self.employees if employee.photo_data),
+            'overnight_shifts': sum(1 for shift in self.shifts if shift.crosses_midnight)
+        }
+
+
+def _services(opening: int, closing: int) -> List[Tuple[str, List[int], Tuple[int, int], float]]:
+    """
+    Services du restaurant d'après ses horaires : (nom, heures de début possibles,
+    durées min/max, poids). Les débuts suivent les pics du midi et du soir.
+    """
+    services = []
+    if opening <= 9:
+        services.append(('ouverture', [opening, opening + 1], (4, 7), 0.5))
+    if opening <= 11 and closing >= 15:
+        services.append(('midi', [10, 11, 11, 12], (3, 5), 1.0))
+    if closing >= 22 and opening <= 19:
+        services.append(('soir', [17, 18, 18, 19], (4, 6), 1.0))
+    if closing > 24:
+        # Service de nuit jusqu'à la fermeture (après minuit)
+        services.append(('nuit', [max(opening, closing - 7), max(opening, closing - 6)], (5, 7), 0.8))
+    # Journée continue, pour les profils sans pic marqué
+    services.append(('continu', list(range(opening, max(opening + 1, min(closing, 24) - 4))), (4, 8), 0.3))
+
+    bounded = []
+    for name, starts, (shortest, longest), weight in services:
+        starts = [start for start in starts if start <= 23 and start + shortest <= closing]
+        if starts:
+            bounded.append((name, starts, (shortest, min(longest, Config.MAX_SHIFT_DURATION)), weight))
+    return bounded
+
+
+def _photo(rng: random.Random, size: int) -> str:
+    return base64.b64encode(JPEG_HEADER + rng.randbytes(max(0, size - len(JPEG_HEADER)))).decode('ascii')
+
+
+def _generate_employees(rng: random.Random, count: int, photo_rate: float, photo_size: int) -> List[Employee]:
+    postes = list(POSTE_WEIGHTS)
+    weights = list(POSTE_WEIGHTS.values())
+    employees = []
+    for index in range(count):
+        poste = rng.choices(postes, weights)[0]
+        prenom = rng.choice(PRENOMS)
+        nom = rng.choice(NOMS)
+        employee = Employee(
+            employee_id=f"emp_g{index + 1:05d}",
+            nom=nom,
+            prenom=prenom,
+            poste=poste,
+            email=f"{prenom}.{nom}.{index + 1}@restaurant.test".lower(),
+            telephone=f"06.{rng.randrange(100):02d}.{rng.randrange(100):02d}."
+                      f"{rng.randrange(100):02d}.{rng.randrange(100):02d}",
+            taux_horaire=round(POSTE_RATES[poste] * rng.uniform(0.85, 1.15), 2),
+            actif=rng.random() > 0.05,
+            photo_data=_photo(rng, photo_size) if rng.random() < photo_rate else None
+        )
+        # Un tiers des équipiers a un jour de repos fixe (indisponible toute la journée)
+        if rng.random() < 0.33:
+            employee.disponibilites[rng.randrange(len(Config.DAYS_OF_WEEK))] = 0
+        employee.date_creation = CREATION_DATE
+        employees.append(employee)
+    return employees
+
+
+def _week_shifts(rng: random.Random, employee: Employee, week: str, services, closing: int,
+                 full_time: bool, next_id) -> List[Shift]:
+    """Créneaux d'un employé pour une semaine, sans conflit et sous la limite hebdomadaire"""
+    days = [day for index, day in enumerate(Config.DAYS_OF_WEEK) if employee.disponibilites[index]]
+    wanted = min(len(days), rng.choice((4, 5, 5, 6)) if full_time else rng.choice((2, 3, 3, 4)))
+    # Tirage pondéré sans remise : les jours chargés sortent plus souvent
+    chosen = sorted(days, key=lambda day: rng.random() ** (1 / DAY_WEIGHTS[day]), reverse=True)[:wanted]
+
+    weights = [service[3] for service in services]
+    hours = 0
+    shifts = []
+    for day in Config.DAYS_OF_WEEK:
+        if day not in chosen:
+            continue
+        # Coupure midi + soir pour une partie des journées
+        day_services = [rng.choices(services, weights)[0]]
+        split = [service for service in services if service[0] in ('midi', 'soir')]
+        if len(split) == 2 and rng.random() < 0.2:
+            day_services = split
+
+        occupied = set()
+        for _, starts, (shortest, longest), _ in day_services:
+            start = rng.choice(starts)
+            duration = rng.randint(shortest, min(longest, closing - start))
+            span = {(start + offset) % 24 for offset in range(duration)}
+            if span & occupied or hours + duration > Config.MAX_WEEKLY_HOURS:
+                continue
+            occupied |= span
+            hours += duration
+            shift = Shift(shift_id=next_id(), employee_id=employee.id, day=day, start_hour=start,
+                          duration=duration, week=week)
+            shift.date_creation = CREATION_DATE
+            shifts.append(shift)
+    return shifts
+
+
+def generate_restaurant(employees: int = 50, weeks: int = 4, seed: int = 0,
+                        profile: str = 'RESTAURANT_CLASSIQUE', start_week: str = '2025-01',
+                        granularity: Optional[int] = None, photo_rate: float = 0.3,
+                        photo_size: int = 4096) -> Dataset:
+    """
+    Génère un restaurant : `employees` équipiers (tous postes) et `weeks` semaines
+    de créneaux à partir de `start_week`, selon les horaires d'un profil de
+    RestaurantConfigs (BAR_NUIT : services après minuit). La granularité du
+    profil peut être remplacée (15, 30 ou 60 min).
+    """
+    if not MIN_EMPLOYEES <= employees <= MAX_EMPLOYEES:
+        raise ValueError(f"Nombre d'employés entre {MIN_EMPLOYEES} et {MAX_EMPLOYEES}")
+    if weeks < 1:
+        raise ValueError("Au moins une semaine")
+    settings = getattr(RestaurantConfigs, profile, None)
+    if not isinstance(settings, dict):
+        raise ValueError(f"Profil inconnu: {profile}")
+    granularity = granularity or settings['TIME_SLOT_GRANULARITY']
+    if granularity not in Config.AVAILABLE_GRANULARITIES:
+        raise ValueError(f"Granularité {granularity} non supportée")
+
+    rng = random.Random(seed)
+    opening, closing = settings['RESTAURANT_OPENING_HOUR'], settings['RESTAURANT_CLOSING_HOUR']
+    services = _services(opening, closing)
+    staff = _generate_employees(rng, employees, photo_rate, photo_size)
+    full_time = {employee.id: rng.random() < 0.6 for employee in staff}
+
+    counter = iter(range(1, 1 << 62))
+
+    def next_id():
+        return f"shift_g{next(counter):09d}"
+
+    shifts = []
+    for week in get_following_weeks(start_week, weeks):
+        for employee in staff:
+            if employee.actif:
+                shifts.extend(_week_shifts(rng, employee, week, services, closing, full_time[employee.id],
+                                          next_id))
+
+    # Séquences de modification dans l'ordre de création (reprises par le ChangeLog au chargement)
+    for seq, record in enumerate([*staff, *shifts], 1):
+        record.seq = seq
+        record.version = 1
+
+    meta = {
+        'seed': seed,
+        'profile': profile,
+        'opening': opening,
+        'closing': closing,
+        'granularity': granularity,
+        'start_week': start_week,
+        'weeks': weeks
+    }
+    return Dataset(meta, staff, shifts)
+
+
+def write_data_folder(dataset: Dataset, folder: str) -> Dict[str, str]:
+    """
+    Écrit le jeu de données au format du dossier de données (employees.json,
+    shifts.json, templates.json) ; à faire application arrêtée.
+    """
+    os.makedirs(folder, exist_ok=True)
+    paths = {
+        'employees': os.path.join(folder, os.path.basename(Config.EMPLOYEES_FILE)),
+        'shifts': os.path.join(folder, os.path.basename(Config.SHIFTS_FILE)),
+        'templates': os.path.join(folder, os.path.basename(Config.TEMPLATES_FILE)),
+        'meta': os.path.join(folder, 'synthetic.json')
+    }
+    contents = {
+        'employees': {employee.id: employee.to_dict() for employee in dataset.employees},
+        'shifts': {shift.id: shift.to_dict() for shift in dataset.shifts},
+        'templates': {},
+        'meta': dataset.summary()
+    }
+    for kind, path in paths.items():
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(contents[kind], f, ensure_ascii=False)
+    return paths
+
+
+def load_into_managers(dataset: Dataset, employee_manager: EmployeeManager, shift_manager: ShiftManager):
+    """Remplace les données des gestionnaires par le jeu de données (une sauvegarde chacun)"""
+    # Anciens et nouveaux identifiants : suppressions et créations sont journalisées
+    with employee_manager._writing():
+        employees = {employee.id: employee for employee in dataset.employees}
+        employee_manager._publish(employees, [*employee_manager._employees, *employees])
+    with shift_manager._writing():
+        shifts = {shift.id: shift for shift in dataset.shifts}
+        shift_manager._publish(shifts, [*shift_manager._shifts, *shifts])
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="Génère un restaurant synthétique")
+    parser.add_argument('--employees', type=int, default=50)
+    parser.add_argument('--weeks', type=int, default=4)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--profile', default='RESTAURANT_CLASSIQUE',
+                        choices=[name for name in vars(RestaurantConfigs) if not name.startswith('_')])
+    parser.add_argument('--start-week', default=generate_week_number(datetime(2025, 1, 6)))
+    parser.add_argument('--granularity', type=int, choices=sorted(Config.AVAILABLE_GRANULARITIES))
+    parser.add_argument('--photo-rate', type=float, default=0.3, help="part des employés avec photo")
+    parser.add_argument('--photo-size', type=int, default=4096, help="taille des photos (octets)")
+    parser.add_argument('--output', required=True, help="dossier de données à écrire")
+    args = parser.parse_args(argv)
+
+    try:
+        dataset = generate_restaurant(args.employees, args.weeks, args.seed, args.profile, args.start_week,
+                                      args.granularity, args.photo_rate, args.photo_size)
+    except ValueError as e:
+        parser.error(str(e))
+    write_data_folder(dataset, args.output)
+    summary = dataset.summary()
+    print(f"{summary['employees_count']} employés, {summary['shifts_count']} créneaux "
+          f"({summary['overnight_shifts']} de nuit), {summary['photos_count']} photos -> {args.output}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,9 +1,127 @@
 """
 Configuration de l'application
 """
+import json
 import os
+import threading
 from datetime import datetime
 
+# Grilles de créneaux déjà générées, par (ouverture, fermeture, granularité)
+_slot_grids = {}
+
+
+class TimeGrid:
+    """
+    Grille horaire immuable : heure d'ouverture, heure de fermeture (au-delà de 24
+    pour le service de nuit) et granularité des créneaux en minutes.
+
+    La grille est transmise explicitement à la génération des créneaux, aux
+    validations et aux statistiques. Une requête qui veut une autre granularité
+    dérive sa propre grille (with_granularity) au lieu de modifier Config ; la
+    grille par défaut du processus est remplacée d'un bloc (Config.set_time_grid).
+    """
+
+    __slots__ = ('opening', 'closing', 'granularity')
+
+    def __init__(self, opening: int, closing: int, granularity: int):
+        if granularity not in Config.AVAILABLE_GRANULARITIES:
+            raise ValueError(f"Granularité {granularity} non supportée")
+        if not 0 <= opening < closing <= opening + 24:
+            raise ValueError(f"Horaires invalides: {opening}h - {closing}h")
+        object.__setattr__(self, 'opening', opening)
+        object.__setattr__(self, 'closing', closing)
+        object.__setattr__(self, 'granularity', granularity)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("TimeGrid est immuable")
+
+    @property
+    def key(self):
+        return self.opening, self.closing, self.granularity
+
+    def __eq__(self, other):
+        return isinstance(other, TimeGrid) and self.key == other.key
+
+    def __hash__(self):
+        return hash(self.key)
+
+    def __repr__(self):
+        return f"TimeGrid(opening={self.opening}, closing={self.closing}, granularity={self.granularity})"
+
+    def with_granularity(self, granularity: int) -> 'TimeGrid':
+        """Même plage horaire avec une autre granularité"""
+        return TimeGrid(self.opening, self.closing, granularity)
+
+    def hours_range(self):
+        """Heures d'ouverture, dans l'ordre (après minuit : 0, 1, ...)"""
+        return [hour % 24 for hour in range(self.opening, self.closing)]
+
+    def time_slots_for_hour(self, hour):
+        """Créneaux d'une heure (en minutes depuis le début de l'heure)"""
+        return list(range(0, 60, self.granularity))
+
+    def _slot_grid(self):
+        """
+        Créneaux de la grille, index clé -> position et forme JSON, générés une
+        seule fois par (ouverture, fermeture, granularité) puis partagés.
+        """
+        slot_grid = _slot_grids.get(self.key)
+        if slot_grid is None:
+            slots = [{
+                'hour': hour,
+                'minutes': minutes,
+                'key': f"{hour}_{minutes}",
+                'display': f"{hour:02d}:{minutes:02d}",
+                'is_main_hour': minutes == 0
+            } for hour in self.hours_range() for minutes in self.time_slots_for_hour(hour)]
+            index = {slot['key']: position for position, slot in enumerate(slots)}
+            # Un accès concurrent peut générer la grille deux fois : le résultat est identique
+            slot_grid = _slot_grids.setdefault(self.key, (slots, index, json.dumps(slots)))
+        return slot_grid
+
+    def all_time_slots(self):
+        """Tous les créneaux de la grille (liste partagée : ne pas la modifier)"""
+        return self._slot_grid()[0]
+
+    def slot_index(self):
+        """Position de chaque créneau dans la grille, par clé ("heure_minutes")"""
+        return self._slot_grid()[1]
+
+    def has_slot(self, key: str) -> bool:
+        """Vérifie qu'une clé de créneau appartient à la grille"""
+        return key in self._slot_grid()[1]
+
+    def slots_json(self) -> str:
+        """Créneaux de la grille déjà sérialisés en JSON, à insérer tels quels dans une réponse"""
+        return self._slot_grid()[2]
+
+    def granularity_info(self):
+        """Informations sur la granularité de la grille"""
+        slots_per_hour = 60 // self.granularity
+        total_hours = self.closing - self.opening
+
+        return {
+            'granularity': self.granularity,
+            'granularity_label': Config.AVAILABLE_GRANULARITIES[self.granularity],
+            'slots_per_hour': slots_per_hour,
+            'total_slots': total_hours * slots_per_hour,
+            'total_hours': total_hours,
+            # Hauteur de cellule : une ligne de 60px par heure
+            'cell_height': self.granularity
+        }
+
+    def config_data(self):
+        """Données de configuration pour les templates"""
+        return {
+            'HOURS_RANGE': self.hours_range(),
+            'DAYS_OF_WEEK': Config.DAYS_OF_WEEK,
+            'EMPLOYEE_TYPES': Config.EMPLOYEE_TYPES,
+            'TIME_SLOT_GRANULARITY': self.granularity,
+            'AVAILABLE_GRANULARITIES': Config.AVAILABLE_GRANULARITIES,
+            'ALL_TIME_SLOTS': self.all_time_slots(),
+            'GRANULARITY_INFO': self.granularity_info()
+        }
+
 
 class Config:
     """Configuration de base"""
@@ -13,6 +131,23 @@ class Config:
     DATA_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data')
     EMPLOYEES_FILE = os.path.join(DATA_FOLDER, 'employees.json')
     SHIFTS_FILE = os.path.join(DATA_FOLDER, 'shifts.json')
+    TEMPLATES_FILE = os.path.join(DATA_FOLDER, 'templates.json')
+
+    # Plusieurs processus (workers gunicorn) sur les mêmes fichiers : verrou de fichier
+    # autour des écritures et rechargement lorsqu'un autre processus a enregistré
+    MULTI_WORKER = os.environ.get('PLANNING_MULTI_WORKER', '').lower() in ('1', 'true', 'yes')
+
+    # Threads dédiés aux tâches de maintenance en arrière-plan (/api/jobs)
+    JOB_WORKERS = int(os.environ.get('PLANNING_JOB_WORKERS', 2))
+
+    # Gestionnaires (lecture des fichiers JSON) construits au premier accès ; True : dès create_app
+    PRELOAD_MANAGERS = os.environ.get('PLANNING_PRELOAD', '').lower() in ('1', 'true', 'yes')
+
+    # fsync après chaque sauvegarde des fichiers JSON (durée mesurée dans /api/metrics)
+    FSYNC_SAVES = os.environ.get('PLANNING_FSYNC', '').lower() in ('1', 'true', 'yes')
+
+    # Requête journalisée si ses sauvegardes dépassent ce total (ms) ou si elle en fait plusieurs
+    SLOW_SAVE_MS = float(os.environ.get('PLANNING_SLOW_SAVE_MS', 200))
 
     # ==================== CONFIGURATION HORAIRES ====================
     # Paramètres horaires du restaurant - MODIFIABLES selon vos besoins
@@ -34,26 +169,43 @@ class Config:
         60: "1 heure"
     }
 
+    # Grille horaire par défaut du processus (voir TimeGrid), construite à la première lecture
+    _time_grid = None
+    _time_grid_lock = threading.RLock()
+
+    @classmethod
+    def get_time_grid(cls) -> TimeGrid:
+        """
+        Grille horaire par défaut. Une requête la lit une fois et s'y tient :
+        un changement concurrent remplace la grille sans modifier celle-ci.
+        """
+        # Toujours sur Config : une sous-classe (DevelopmentConfig...) partage la grille du processus
+        grid = Config._time_grid
+        if grid is None:
+            with Config._time_grid_lock:
+                if Config._time_grid is None:
+                    Config._time_grid = TimeGrid(Config.RESTAURANT_OPENING_HOUR, Config.RESTAURANT_CLOSING_HOUR,
+                                                 Config.TIME_SLOT_GRANULARITY)
+                grid = Config._time_grid
+        return grid
+
+    @classmethod
+    def set_time_grid(cls, grid: TimeGrid) -> TimeGrid:
+        """Remplace d'un bloc la grille horaire par défaut"""
+        with Config._time_grid_lock:
+            Config._time_grid = grid
+            # Attributs historiques, conservés en lecture pour le code existant
+            Config.RESTAURANT_OPENING_HOUR = grid.opening
+            Config.RESTAURANT_CLOSING_HOUR = grid.closing
+            Config.TIME_SLOT_GRANULARITY = grid.granularity
+            Config.HOURS_RANGE = grid.hours_range()
+        return grid
+
     # Génération automatique de la plage horaire
     @classmethod
     def get_hours_range(cls):
         """Génère la plage d'heures selon les paramètres du restaurant"""
-        hours = []
-
-        # Si fermeture après minuit
-        if cls.RESTAURANT_CLOSING_HOUR > 24:
-            # Heures avant minuit
-            for hour in range(cls.RESTAURANT_OPENING_HOUR, 24):
-                hours.append(hour)
-            # Heures après minuit
-            for hour in range(0, cls.RESTAURANT_CLOSING_HOUR - 24):
-                hours.append(hour)
-        else:
-            # Fermeture le même jour
-            for hour in range(cls.RESTAURANT_OPENING_HOUR, cls.RESTAURANT_CLOSING_HOUR):
-                hours.append(hour)
-
-        return hours
+        return cls.get_time_grid().hours_range()
 
     @classmethod
     def get_time_slots_for_hour(cls, hour):
@@ -61,29 +213,14 @@ class Config:
         Génère les créneaux temporels pour une heure donnée selon la granularité
         Retourne une liste des créneaux (en minutes depuis le début de l'heure)
         """
-        slots_per_hour = 60 // cls.TIME_SLOT_GRANULARITY
-        return [i * cls.TIME_SLOT_GRANULARITY for i in range(slots_per_hour)]
+        return cls.get_time_grid().time_slots_for_hour(hour)
 
     @classmethod
     def get_all_time_slots(cls):
         """
         Génère tous les créneaux temporels selon la granularité actuelle
         """
-        all_slots = []
-        hours_range = cls.get_hours_range()
-
-        for hour in hours_range:
-            time_slots = cls.get_time_slots_for_hour(hour)
-            for minutes in time_slots:
-                all_slots.append({
-                    'hour': hour,
-                    'minutes': minutes,
-                    'key': f"{hour}_{minutes}",
-                    'display': cls.format_time_slot(hour, minutes),
-                    'is_main_hour': minutes == 0
-                })
-
-        return all_slots
+        return cls.get_time_grid().all_time_slots()
 
     @classmethod
     def format_time_slot(cls, hour, minutes):
@@ -102,55 +239,27 @@ class Config:
     @classmethod
     def set_granularity(cls, granularity):
         """
-        Définit la granularité temporelle
+        Définit la granularité temporelle par défaut (remplacement atomique de la grille)
         """
-        if granularity in cls.AVAILABLE_GRANULARITIES:
-            cls.TIME_SLOT_GRANULARITY = granularity
-            return True
-        return False
+        if granularity not in cls.AVAILABLE_GRANULARITIES:
+            return False
+        with Config._time_grid_lock:
+            cls.set_time_grid(cls.get_time_grid().with_granularity(granularity))
+        return True
 
     @classmethod
     def get_granularity_info(cls):
         """
         Retourne des informations sur la granularité actuelle
         """
-        slots_per_hour = 60 // cls.TIME_SLOT_GRANULARITY
-        total_hours = len(cls.get_hours_range())
-        total_slots = total_hours * slots_per_hour
-
-        # Calculer la hauteur de cellule selon la granularité
-        if cls.TIME_SLOT_GRANULARITY == 60:
-            cell_height = 60
-        elif cls.TIME_SLOT_GRANULARITY == 30:
-            cell_height = 30
-        elif cls.TIME_SLOT_GRANULARITY == 15:
-            cell_height = 15
-        else:
-            cell_height = max(10, 60 // (60 // cls.TIME_SLOT_GRANULARITY))
-
-        return {
-            'granularity': cls.TIME_SLOT_GRANULARITY,
-            'granularity_label': cls.AVAILABLE_GRANULARITIES[cls.TIME_SLOT_GRANULARITY],
-            'slots_per_hour': slots_per_hour,
-            'total_slots': total_slots,
-            'total_hours': total_hours,
-            'cell_height': cell_height
-        }
+        return cls.get_time_grid().granularity_info()
 
     @classmethod
     def get_config_data_for_template(cls):
         """
         Retourne toutes les données de configuration pour les templates
         """
-        return {
-            'HOURS_RANGE': cls.get_hours_range(),
-            'DAYS_OF_WEEK': cls.DAYS_OF_WEEK,
-            'EMPLOYEE_TYPES': cls.EMPLOYEE_TYPES,
-            'TIME_SLOT_GRANULARITY': cls.TIME_SLOT_GRANULARITY,
-            'AVAILABLE_GRANULARITIES': cls.AVAILABLE_GRANULARITIES,
-            'ALL_TIME_SLOTS': cls.get_all_time_slots(),
-            'GRANULARITY_INFO': cls.get_granularity_info()
-        }
+        return cls.get_time_grid().config_data()
 
     # Utilisation de la méthode pour définir HOURS_RANGE
     HOURS_RANGE = None  # Sera initialisé dans init_app()
@@ -195,19 +304,18 @@ class Config:
     @classmethod
     def get_formatted_hours_info(cls):
         """Retourne des informations lisibles sur les horaires"""
-        if cls.RESTAURANT_CLOSING_HOUR > 24:
-            closing_display = f"{cls.RESTAURANT_CLOSING_HOUR - 24:02d}:00 (lendemain)"
+        grid = cls.get_time_grid()
+        if grid.closing > 24:
+            closing_display = f"{grid.closing - 24:02d}:00 (lendemain)"
         else:
-            closing_display = f"{cls.RESTAURANT_CLOSING_HOUR:02d}:00"
-
-        granularity_info = cls.get_granularity_info()
+            closing_display = f"{grid.closing:02d}:00"
 
         return {
-            'opening': f"{cls.RESTAURANT_OPENING_HOUR:02d}:00",
+            'opening': f"{grid.opening:02d}:00",
             'closing': closing_display,
-            'total_hours': len(cls.get_hours_range()),
-            'crosses_midnight': cls.RESTAURANT_CLOSING_HOUR > 24,
-            'granularity': granularity_info
+            'total_hours': len(grid.hours_range()),
+            'crosses_midnight': grid.closing > 24,
+            'granularity': grid.granularity_info()
         }
 
 
@@ -219,6 +327,10 @@ class DevelopmentConfig(Config):
 class ProductionConfig(Config):
     """Configuration pour la production"""
     DEBUG = False
+    # Données chargées au démarrage plutôt que pendant la première requête
+    PRELOAD_MANAGERS = True
+    # Sauvegardes sur disque avant de répondre, même en cas de coupure
+    FSYNC_SAVES = True
 
 
 # Configurations prédéfinies pour différents types de restaurants
@@ -278,11 +390,11 @@ def apply_restaurant_config(config_name):
     """
     if hasattr(RestaurantConfigs, config_name):
         restaurant_config = getattr(RestaurantConfigs, config_name)
-        Config.RESTAURANT_OPENING_HOUR = restaurant_config['RESTAURANT_OPENING_HOUR']
-        Config.RESTAURANT_CLOSING_HOUR = restaurant_config['RESTAURANT_CLOSING_HOUR']
-        if 'TIME_SLOT_GRANULARITY' in restaurant_config:
-            Config.TIME_SLOT_GRANULARITY = restaurant_config['TIME_SLOT_GRANULARITY']
-        Config.HOURS_RANGE = Config.get_hours_range()
+        Config.set_time_grid(TimeGrid(
+            restaurant_config['RESTAURANT_OPENING_HOUR'],
+            restaurant_config['RESTAURANT_CLOSING_HOUR'],
+            restaurant_config.get('TIME_SLOT_GRANULARITY', Config.get_time_grid().granularity)
+        ))
         print(f"Configuration appliquée: {restaurant_config['description']}")
 
         hours_info = Config.get_formatted_hours_info()
@@ -299,12 +411,10 @@ def set_custom_hours(opening_hour, closing_hour, granularity=None):
     Usage:
     set_custom_hours(9, 25, 30)  # 9h à 1h du matin, créneaux de 30min
     """
-    Config.RESTAURANT_OPENING_HOUR = opening_hour
-    Config.RESTAURANT_CLOSING_HOUR = closing_hour
-    if granularity and granularity in Config.AVAILABLE_GRANULARITIES:
-        Config.TIME_SLOT_GRANULARITY = granularity
+    if not granularity or granularity not in Config.AVAILABLE_GRANULARITIES:
+        granularity = Config.get_time_grid().granularity
+    Config.set_time_grid(TimeGrid(opening_hour, closing_hour, granularity))
 
-    Config.HOURS_RANGE = Config.get_hours_range()
     hours_info = Config.get_formatted_hours_info()
     print(f"Horaires personnalisés appliqués: {hours_info['opening']} - {hours_info['closing']}")
     print(f"Total: {hours_info['total_hours']} heures")
@@ -4,12 +4,59 @@ Tests unitaires pour les modèles
 
 import unittest
 import tempfile
+import base64
+import io
+import json
 import os
+import threading
 from datetime import datetime
+from unittest import mock
 
 from app.models.employee import Employee, EmployeeManager
 from app.models.shift import Shift, ShiftManager
 from app.models.planning import PlanningManager
+from config import Config, TimeGrid
+from app.models.template import WeekTemplate, TemplateManager
+from app.models.occupancy import OccupancyIndex
+from app.models.changelog import ChangeLog
+from app.models.importer import PlanningImporter, iter_ndjson, iter_csv
+from app.models.jobs import Job, JobQueue
+from app.models.registry import ManagerRegistry
+from app.models.persistence import PersistenceStats
+from benchmarks.synthetic import generate_restaurant, write_data_folder
+from benchmarks.run import compare, percentiles
+
+
+def use_temp_data(test: unittest.TestCase) -> str:
+    """
+    Dossier de données temporaire pour un test, avec des fichiers d'employés et de
+    créneaux vides : les gestionnaires créés ensuite partent de données vides, les
+    fichiers de data/ ne sont jamais lus ni modifiés
+    """
+    temp_dir = tempfile.TemporaryDirectory()
+    test.addCleanup(temp_dir.cleanup)
+    paths = {'DATA_FOLDER': temp_dir.name}
+    for name, file_name in (('EMPLOYEES_FILE', 'employees.json'), ('SHIFTS_FILE', 'shifts.json'),
+                            ('TEMPLATES_FILE', 'templates.json')):
+        paths[name] = os.path.join(temp_dir.name, file_name)
+    for name in ('EMPLOYEES_FILE', 'SHIFTS_FILE'):
+        with open(paths[name], 'w', encoding='utf-8') as f:
+            f.write('{}')
+    for name, path in paths.items():
+        patcher = mock.patch.object(Config, name, path)
+        patcher.start()
+        test.addCleanup(patcher.stop)
+    return temp_dir.name
+
+
+def create_planning_manager(test: unittest.TestCase, employees=(), shifts=()) -> PlanningManager:
+    """Gestionnaire de planning sur des données temporaires, alimentées par les méthodes d'ajout"""
+    use_temp_data(test)
+    planning_manager = PlanningManager()
+    planning_manager.employee_manager.add_employees_bulk(list(employees))
+    _, collisions = planning_manager.shift_manager.add_shifts_bulk(list(shifts))
+    test.assertEqual(collisions, [])
+    return planning_manager
 
 
 class TestEmployee(unittest.TestCase):
@@ -61,24 +108,52 @@ class TestEmployee(unittest.TestCase):
         self.assertEqual(employee.poste, 'cuisinier')
         self.assertEqual(employee.taux_horaire, 18.0)
 
+    def test_availability(self):
+        """Test des disponibilités récurrentes et des absences ponctuelles"""
+        self.employee.set_availability("Samedi", [[10, 14], [18, 23]])
+
+        self.assertTrue(self.employee.is_available("Samedi", 18, 5))
+        self.assertFalse(self.employee.is_available("Samedi", 14, 2))
+        self.assertTrue(self.employee.is_available("Lundi", 0, 24))
+
+        # Samedi de la semaine 2025-10 = 8 mars 2025
+        self.employee.add_unavailability("2025-03-08", 20, 24, "Rendez-vous")
+        self.assertFalse(self.employee.is_available("Samedi", 18, 5, week="2025-10"))
+        self.assertTrue(self.employee.is_available("Samedi", 18, 5, week="2025-11"))
+        self.assertTrue(self.employee.is_available("Samedi", 18, 2, week="2025-10"))
+
+        restored = Employee.from_dict(self.employee.to_dict())
+        self.assertEqual(restored.disponibilites, self.employee.disponibilites)
+        self.assertEqual(restored.indisponibilites, self.employee.indisponibilites)
+
+        self.assertEqual(self.employee.remove_unavailability("2025-03-08"), 1)
+        self.assertTrue(self.employee.is_available("Samedi", 18, 5, week="2025-10"))
+
+    def test_photo_url(self):
+        """Test de l'URL versionnée et du type MIME de la photo"""
+        self.assertIsNone(self.employee.photo_url)
+
+        png = b'\x89PNG\r\n\x1a\n' + b'\x00' * 16
+        self.assertTrue(self.employee.set_photo_from_base64(base64.b64encode(png).decode()))
+        self.assertEqual(self.employee.photo_mimetype, 'image/png')
+        self.assertEqual(self.employee.get_photo_bytes(), png)
+
+        url = self.employee.photo_url
+        self.assertTrue(url.startswith(f"/api/employees/{self.employee.id}/photo?v="))
+        self.assertEqual(self.employee.to_dict_without_photo()['photo_url'], url)
+
+        # Nouvelle photo, nouvelle URL
+        self.employee.set_photo_from_base64(base64.b64encode(png + b'\x01').decode())
+        self.assertNotEqual(self.employee.photo_url, url)
+
 
 class TestEmployeeManager(unittest.TestCase):
     """Tests pour EmployeeManager"""
 
     def setUp(self):
-        # Créer un fichier temporaire pour les tests
-        self.temp_file = tempfile.NamedTemporaryFile(mode='w', delete=False, suffix='.json')
-        self.temp_file.close()
-
-        # Créer le manager avec le fichier temporaire
+        # Gestionnaire sur des données temporaires vides
+        use_temp_data(self)
         self.manager = EmployeeManager()
-        self.manager.file_path = self.temp_file.name
-        self.manager._employees = {}
-
-    def tearDown(self):
-        # Nettoyer le fichier temporaire
-        if os.path.exists(self.temp_file.name):
-            os.unlink(self.temp_file.name)
 
     def test_add_employee(self):
         """Test d'ajout d'employé"""
@@ -86,13 +161,25 @@ class TestEmployeeManager(unittest.TestCase):
         result = self.manager.add_employee(employee)
 
         self.assertTrue(result)
-        self.assertIn(employee.id, self.manager._employees)
-        self.assertEqual(len(self.manager._employees), 1)
+        self.assertIsNotNone(self.manager.get_employee(employee.id))
+        self.assertEqual(len(self.manager.get_all_employees(actif_only=False)), 1)
+
+    def test_add_employee_never_overwrites(self):
+        """Test : un employé dont l'ID existe déjà n'en remplace pas un autre"""
+        employee = Employee(employee_id="emp_1", nom="Test", prenom="User", poste="serveur")
+        self.assertTrue(self.manager.add_employee(employee))
+
+        self.assertFalse(self.manager.add_employee(Employee(employee_id="emp_1", nom="Autre", prenom="X")))
+        added = self.manager.add_employees_bulk([Employee(employee_id="emp_1", nom="Autre", prenom="Y"),
+                                                 Employee(employee_id="emp_2", nom="Nouveau", prenom="Z")])
+        self.assertEqual(added, 1)
+        self.assertEqual(self.manager.get_employee("emp_1").nom, "Test")
+        self.assertEqual(self.manager.get_employee("emp_2").nom, "Nouveau")
 
     def test_get_employee(self):
         """Test de récupération d'employé"""
         employee = Employee(nom="Test", prenom="User", poste="serveur")
-        self.manager._employees[employee.id] = employee
+        self.manager.add_employee(employee)
 
         retrieved = self.manager.get_employee(employee.id)
         self.assertIsNotNone(retrieved)
@@ -108,9 +195,7 @@ class TestEmployeeManager(unittest.TestCase):
         emp2 = Employee(nom="Martin", prenom="Pierre", poste="cuisinier")
         emp3 = Employee(nom="Lemaire", prenom="Julie", poste="barman", actif=False)
 
-        self.manager._employees[emp1.id] = emp1
-        self.manager._employees[emp2.id] = emp2
-        self.manager._employees[emp3.id] = emp3
+        self.manager.add_employees_bulk([emp1, emp2, emp3])
 
         # Test avec actifs seulement
         active_employees = self.manager.get_all_employees(actif_only=True)
@@ -123,14 +208,63 @@ class TestEmployeeManager(unittest.TestCase):
     def test_update_employee(self):
         """Test de mise à jour d'employé"""
         employee = Employee(nom="Test", prenom="User", poste="serveur")
-        self.manager._employees[employee.id] = employee
+        self.manager.add_employee(employee)
 
         update_data = {"taux_horaire": 20.0, "email": "test@example.com"}
         result = self.manager.update_employee(employee.id, update_data)
 
         self.assertTrue(result)
-        self.assertEqual(employee.taux_horaire, 20.0)
-        self.assertEqual(employee.email, "test@example.com")
+        # Copie sur écriture : l'employé publié est une nouvelle version
+        updated = self.manager.get_employee(employee.id)
+        self.assertEqual(updated.taux_horaire, 20.0)
+        self.assertEqual(updated.email, "test@example.com")
+        self.assertEqual(employee.taux_horaire, 15.0)
+
+    def test_update_employee_ignores_tracking_fields(self):
+        """Test : version et seq envoyés par un client sont ignorés"""
+        employee = Employee(nom="Test", prenom="User", poste="serveur")
+        self.manager.add_employee(employee)
+        version = self.manager.get_employee(employee.id).version
+        self.manager.update_employee(employee.id, {"email": "a@example.com"})
+        self.manager.update_employee(employee.id, {"email": "b@example.com"})
+        updated = self.manager.get_employee(employee.id)
+        self.assertEqual(updated.version, version + 2)
+
+        self.manager.update_employee(employee.id, {"email": "c@example.com", "version": 0, "seq": 0,
+                                                   "id": "emp_autre"})
+        updated = self.manager.get_employee(employee.id)
+        self.assertEqual((updated.id, updated.version, updated.email), (employee.id, version + 3, "c@example.com"))
+        self.assertGreater(updated.seq, 0)
+
+    def test_query_employees(self):
+        """Test de la pagination stable des employés"""
+        self.manager.add_employees_bulk([Employee(employee_id=f"emp_{index}", nom=nom, prenom="A", poste="serveur")
+                                         for index, nom in enumerate(["Martin", "Dupont", "Blanc", "Dupont"])])
+
+        page, cursor = self.manager.query_employees(limit=3)
+        self.assertEqual([emp.id for emp in page], ["emp_2", "emp_1", "emp_3"])
+        self.assertEqual(cursor, "emp_3")
+
+        page, cursor = self.manager.query_employees(after=cursor, limit=3)
+        self.assertEqual([emp.id for emp in page], ["emp_0"])
+        self.assertIsNone(cursor)
+
+    def test_get_available_employees(self):
+        """Test de recherche des employés disponibles par ET bit à bit"""
+        emp1 = Employee(nom="Dupont", prenom="Marie", poste="serveur")
+        emp2 = Employee(nom="Martin", prenom="Pierre", poste="cuisinier")
+        emp3 = Employee(nom="Lemaire", prenom="Julie", poste="serveur")
+        emp4 = Employee(nom="Roux", prenom="Emma", poste="serveur", actif=False)
+        emp1.set_availability("Samedi", [[8, 16]])
+        emp3.add_unavailability("2025-03-08", motif="Congés")
+
+        self.manager.add_employees_bulk([emp1, emp2, emp3, emp4])
+
+        available = self.manager.get_available_employees("Samedi", 18, 5)
+        self.assertEqual([e.nom for e in available], ["Lemaire", "Martin"])
+
+        available = self.manager.get_available_employees("Samedi", 18, 5, week="2025-10", poste="serveur")
+        self.assertEqual(available, [])
 
 
 class TestShift(unittest.TestCase):
@@ -144,6 +278,14 @@ class TestShift(unittest.TestCase):
             duration=4
         )
 
+    def test_generated_ids_are_unique_within_a_millisecond(self):
+        """Test : IDs uniques même créés dans la même milliseconde, par plusieurs processus"""
+        with mock.patch('app.models.shift.datetime') as frozen:
+            frozen.now.return_value = datetime(2025, 3, 10, 12, 0, 0)
+            ids = {Shift(employee_id="emp_1", day="Lundi", start_hour=11, duration=4).id for _ in range(1000)}
+        self.assertEqual(len(ids), 1000)
+        self.assertTrue(all(shift_id.startswith("shift_1741") for shift_id in ids))
+
     def test_shift_creation(self):
         """Test de création d'un créneau"""
         self.assertEqual(self.shift.employee_id, "emp_1")
@@ -202,19 +344,9 @@ class TestShiftManager(unittest.TestCase):
     """Tests pour ShiftManager"""
 
     def setUp(self):
-        # Créer un fichier temporaire pour les tests
-        self.temp_file = tempfile.NamedTemporaryFile(mode='w', delete=False, suffix='.json')
-        self.temp_file.close()
-
-        # Créer le manager avec le fichier temporaire
+        # Gestionnaire sur des données temporaires vides
+        use_temp_data(self)
         self.manager = ShiftManager()
-        self.manager.file_path = self.temp_file.name
-        self.manager._shifts = {}
-
-    def tearDown(self):
-        # Nettoyer le fichier temporaire
-        if os.path.exists(self.temp_file.name):
-            os.unlink(self.temp_file.name)
 
     def test_add_shift_success(self):
         """Test d'ajout de créneau réussi"""
@@ -223,7 +355,7 @@ class TestShiftManager(unittest.TestCase):
 
         self.assertTrue(success)
         self.assertIn("succès", message)
-        self.assertIn(shift.id, self.manager._shifts)
+        self.assertIsNotNone(self.manager.get_shift(shift.id))
 
     def test_add_shift_conflict(self):
         """Test d'ajout de créneau en conflit"""
@@ -231,7 +363,7 @@ class TestShiftManager(unittest.TestCase):
         shift2 = Shift(employee_id="emp_1", day="Lundi", start_hour=13, duration=3)
 
         # Ajouter le premier créneau
-        self.manager._shifts[shift1.id] = shift1
+        self.assertTrue(self.manager.add_shift(shift1)[0])
 
         # Tenter d'ajouter le second (conflit)
         success, message = self.manager.add_shift(shift2)
@@ -245,9 +377,7 @@ class TestShiftManager(unittest.TestCase):
         shift2 = Shift(employee_id="emp_2", day="Lundi", start_hour=12, duration=3)
         shift3 = Shift(employee_id="emp_1", day="Mardi", start_hour=11, duration=4)
 
-        self.manager._shifts[shift1.id] = shift1
-        self.manager._shifts[shift2.id] = shift2
-        self.manager._shifts[shift3.id] = shift3
+        self.assertEqual(self.manager.add_shifts_bulk([shift1, shift2, shift3])[1], [])
 
         monday_shifts = self.manager.get_shifts_by_day("Lundi")
         self.assertEqual(len(monday_shifts), 2)
@@ -261,9 +391,7 @@ class TestShiftManager(unittest.TestCase):
         shift2 = Shift(employee_id="emp_1", day="Mardi", start_hour=12, duration=3)
         shift3 = Shift(employee_id="emp_2", day="Lundi", start_hour=11, duration=4)
 
-        self.manager._shifts[shift1.id] = shift1
-        self.manager._shifts[shift2.id] = shift2
-        self.manager._shifts[shift3.id] = shift3
+        self.assertEqual(self.manager.add_shifts_bulk([shift1, shift2, shift3])[1], [])
 
         emp1_shifts = self.manager.get_shifts_by_employee("emp_1")
         self.assertEqual(len(emp1_shifts), 2)
@@ -274,35 +402,578 @@ class TestShiftManager(unittest.TestCase):
     def test_delete_shift(self):
         """Test de suppression de créneau"""
         shift = Shift(employee_id="emp_1", day="Lundi", start_hour=11, duration=4)
-        self.manager._shifts[shift.id] = shift
+        self.manager.add_shift(shift)
 
         result = self.manager.delete_shift(shift.id)
         self.assertTrue(result)
-        self.assertNotIn(shift.id, self.manager._shifts)
+        self.assertIsNone(self.manager.get_shift(shift.id))
 
         # Test avec ID inexistant
         result = self.manager.delete_shift("inexistant")
         self.assertFalse(result)
 
+    def test_add_shifts_bulk(self):
+        """Test d'ajout groupé avec une seule passe de conflits"""
+        existing = Shift(employee_id="emp_1", day="Lundi", start_hour=11, duration=4, week="2025-10")
+        self.manager.add_shift(existing)
+
+        new_shifts = [
+            Shift(employee_id="emp_1", day="Lundi", start_hour=13, duration=2, week="2025-10"),  # conflit
+            Shift(employee_id="emp_1", day="Lundi", start_hour=13, duration=2, week="2025-11"),  # autre semaine
+            Shift(employee_id="emp_2", day="Lundi", start_hour=11, duration=4, week="2025-10"),
+            Shift(employee_id="emp_2", day="Lundi", start_hour=12, duration=2, week="2025-10")   # conflit interne
+        ]
+
+        added, collisions = self.manager.add_shifts_bulk(new_shifts)
+
+        self.assertEqual(len(added), 2)
+        self.assertEqual(len(collisions), 2)
+        self.assertEqual(collisions[0][1], [existing])
+        self.assertEqual(len(self.manager.get_all_shifts()), 3)
+        self.assertEqual(len({shift.id for shift in new_shifts}), 4)
+
+    def test_add_shifts_never_overwrite(self):
+        """Test : un créneau dont l'ID existe déjà est refusé, seul ou en lot"""
+        existing = Shift(shift_id="s1", employee_id="emp_1", day="Lundi", start_hour=11, duration=4)
+        self.assertTrue(self.manager.add_shift(existing)[0])
+
+        success, message = self.manager.add_shift(
+            Shift(shift_id="s1", employee_id="emp_2", day="Mardi", start_hour=8, duration=2))
+        self.assertFalse(success)
+        self.assertIn("s1", message)
+
+        duplicate = Shift(shift_id="s1", employee_id="emp_2", day="Mardi", start_hour=8, duration=2)
+        fresh = Shift(shift_id="s2", employee_id="emp_2", day="Mardi", start_hour=8, duration=2)
+        twin = Shift(shift_id="s2", employee_id="emp_3", day="Jeudi", start_hour=8, duration=2)
+        added, collisions = self.manager.add_shifts_bulk([duplicate, fresh, twin])
+        self.assertEqual(added, [fresh])
+        self.assertEqual(collisions, [(duplicate, [existing]), (twin, [fresh])])
+        self.assertEqual(self.manager.get_shift("s1").employee_id, "emp_1")
+
+    def test_query_shifts(self):
+        """Test de la recherche indexée et paginée"""
+        added, _ = self.manager.add_shifts_bulk([Shift(shift_id=f"s{index}", employee_id=f"emp_{index % 2}", day=day,
+                                                       start_hour=8 + 2 * index, duration=2, week="2025-10")
+                                                 for index, day in enumerate(["Lundi", "Lundi", "Mardi", "Lundi"])])
+        self.assertEqual(len(added), 4)
+
+        page, cursor = self.manager.query_shifts(day="Lundi", limit=2)
+        self.assertEqual([shift.id for shift in page], ["s0", "s1"])
+        self.assertEqual(cursor, "s1")
+
+        page, cursor = self.manager.query_shifts(day="Lundi", after=cursor, limit=2)
+        self.assertEqual([shift.id for shift in page], ["s3"])
+        self.assertIsNone(cursor)
+
+        page, _ = self.manager.query_shifts(day="Lundi", employee_id="emp_1", week="2025-10")
+        self.assertEqual([shift.id for shift in page], ["s1", "s3"])
+        self.assertEqual(self.manager.query_shifts(week="2025-11")[0], [])
+
+    def test_apply_batch(self):
+        """Test d'un lot d'opérations en tout ou rien"""
+        first = Shift(shift_id="s1", employee_id="emp_1", day="Lundi", start_hour=11, duration=4)
+        second = Shift(shift_id="s2", employee_id="emp_1", day="Mardi", start_hour=11, duration=4)
+        self.manager.add_shifts_bulk([first, second])
+
+        # Échanger les jours des deux créneaux : valide uniquement dans l'ordre du lot
+        operations = [
+            {'op': 'update', 'id': 's1', 'data': {'day': 'Mercredi'}},
+            {'op': 'update', 'id': 's2', 'data': {'day': 'Lundi'}},
+            {'op': 'update', 'id': 's1', 'data': {'day': 'Mardi'}},
+            {'op': 'create', 'data': {'employee_id': 'emp_2', 'day': 'Lundi', 'start_hour': 8, 'duration': 3}}
+        ]
+        applied, results = self.manager.apply_batch(operations, employee_ids=["emp_1", "emp_2"])
+
+        self.assertTrue(applied)
+        self.assertEqual(self.manager.get_shift("s1").day, "Mardi")
+        self.assertEqual(self.manager.get_shift("s2").day, "Lundi")
+        self.assertEqual(len(self.manager.get_all_shifts()), 3)
+        self.assertIsNotNone(self.manager.get_shift(results[3]['id']))
+
+        # Un conflit ou une erreur annule l'ensemble du lot
+        operations = [
+            {'op': 'delete', 'id': 's1'},
+            {'op': 'create', 'data': {'employee_id': 'emp_1', 'day': 'Lundi', 'start_hour': 12, 'duration': 2}},
+            {'op': 'create', 'data': {'employee_id': 'emp_9', 'day': 'Lundi', 'start_hour': 12, 'duration': 2}}
+        ]
+        applied, results = self.manager.apply_batch(operations, employee_ids=["emp_1", "emp_2"])
+
+        self.assertFalse(applied)
+        self.assertEqual([result['success'] for result in results], [False, False, False])
+        self.assertEqual(results[0]['errors'], ["Annulé : lot refusé"])
+        self.assertIn("s2", results[1]['errors'][0])
+        self.assertIsNotNone(self.manager.get_shift("s1"))
+        self.assertEqual(len(self.manager.get_all_shifts()), 3)
+
+        # Une création valide d'un lot refusé ne renvoie ni identifiant ni créneau
+        operations = [
+            {'op': 'create', 'data': {'employee_id': 'emp_2', 'day': 'Jeudi', 'start_hour': 8, 'duration': 3}},
+            {'op': 'delete', 'id': 'inexistant'}
+        ]
+        applied, results = self.manager.apply_batch(operations, employee_ids=["emp_1", "emp_2"])
+        self.assertFalse(applied)
+        self.assertEqual((results[0]['success'], results[0]['id']), (False, None))
+        self.assertNotIn('shift', results[0])
+
+
+    def test_multi_worker_refresh(self):
+        """Test du mode multi-processus : un gestionnaire voit les écritures d'un autre"""
+        with tempfile.TemporaryDirectory() as temp_dir, \
+                mock.patch.object(Config, 'MULTI_WORKER', True), \
+                mock.patch.object(Config, 'SHIFTS_FILE', os.path.join(temp_dir, 'shifts.json')):
+            writer = ShiftManager(ChangeLog())
+            reader = ShiftManager(ChangeLog())
+            self.assertFalse(reader.refresh())  # Rien de nouveau : un simple stat
+
+            version = reader.get_week_version("2025-10")
+            shift = Shift(employee_id="emp_1", day="Lundi", start_hour=11, duration=4, week="2025-10")
+            self.assertTrue(writer.add_shift(shift)[0])
+
+            self.assertTrue(reader.refresh())
+            self.assertIsNotNone(reader.get_shift(shift.id))
+            self.assertGreater(reader.get_week_version("2025-10"), version)
+            self.assertFalse(reader.refresh())
+
+            # Une écriture repart des données enregistrées par l'autre processus, même sans refresh()
+            other = Shift(employee_id="emp_1", day="Lundi", start_hour=12, duration=2, week="2025-10")
+            writer.delete_shift(shift.id)
+            self.assertTrue(reader.add_shift(other)[0])
+            writer.refresh()
+            self.assertIsNone(writer.get_shift(shift.id))
+            self.assertIsNotNone(writer.get_shift(other.id))
+
+
+class TestChangeLog(unittest.TestCase):
+    """Tests pour les versions et la séquence de modifications"""
 
-class TestPlanningManager(unittest.TestCase):
-    """Tests pour PlanningManager"""
+    def setUp(self):
+        use_temp_data(self)
+        self.change_log = ChangeLog()
+        self.manager = ShiftManager(self.change_log)
+
+    def test_versions_and_changes_since(self):
+        """Test des versions par enregistrement et des modifications depuis un curseur"""
+        cursor = self.change_log.sequence
+        shift = Shift(shift_id="s1", employee_id="emp_1", day="Lundi", start_hour=11, duration=4)
+        self.manager.add_shift(shift)
+        self.assertEqual(shift.version, 1)
+
+        # Une sauvegarde sans modification ne change ni version ni séquence
+        sequence = self.change_log.sequence
+        self.manager.save_shifts()
+        self.assertEqual(self.change_log.sequence, sequence)
+
+        self.manager.update_shift("s1", {'start_hour': 12})
+        self.manager.delete_shift("s1")
+
+        changes = self.change_log.changes_since(cursor)
+        self.assertEqual([(kind, action) for _, kind, _, action in changes],
+                         [("shifts", "create"), ("shifts", "update"), ("shifts", "delete")])
+        self.assertEqual(self.change_log.changes_since(self.change_log.sequence), [])
+
+        # Historique purgé : le curseur trop ancien impose un état complet
+        self.change_log.retention = 1
+        self.change_log.record("shifts", "s2", "create")
+        self.assertIsNone(self.change_log.changes_since(cursor))
+
+    def test_published_records_are_not_modified(self):
+        """Test : version et séquence sont attribuées aux nouvelles copies, jamais aux créneaux publiés"""
+        self.manager.add_shift(Shift(shift_id="s1", employee_id="emp_1", day="Lundi", start_hour=11, duration=4))
+        published = self.manager.get_shift("s1")
+
+        self.manager.update_shift("s1", {'start_hour': 12, 'version': 40})
+        self.assertEqual((published.version, published.start_hour), (1, 11))
+        updated = self.manager.get_shift("s1")
+        self.assertEqual(updated.version, 2)
+        self.assertEqual(updated.seq, self.change_log.sequence)
+
+        # Un lot qui crée puis supprime le même créneau ne laisse aucune trace
+        sequence = self.change_log.sequence
+        applied, _ = self.manager.apply_batch([
+            {'op': 'create', 'data': {'id': 'tmp', 'employee_id': 'emp_2', 'day': 'Mardi',
+                                      'start_hour': 9, 'duration': 2}},
+            {'op': 'delete', 'id': 'tmp'}
+        ])
+        self.assertTrue(applied)
+        self.assertEqual(self.change_log.sequence, sequence)
+
+    def test_week_versions(self):
+        """Test des versions par semaine : une modification n'invalide que sa semaine"""
+        self.manager.add_shift(Shift(shift_id="s1", employee_id="emp_1", day="Lundi",
+                                     start_hour=11, duration=4, week="2025-10"))
+        self.manager.add_shift(Shift(shift_id="s2", employee_id="emp_2", day="Lundi",
+                                     start_hour=11, duration=4, week="2025-11"))
+        week_10 = self.manager.get_week_version("2025-10")
+        week_11 = self.manager.get_week_version("2025-11")
+        data_version = self.manager.data_version
+
+        # Déplacer s1 vers la semaine 12 invalide la 10 et la 12, pas la 11
+        self.manager.update_shift("s1", {'week': '2025-12'})
+
+        self.assertGreater(self.manager.get_week_version("2025-10"), week_10)
+        self.assertGreater(self.manager.get_week_version("2025-12"), 0)
+        self.assertEqual(self.manager.get_week_version("2025-11"), week_11)
+        self.assertGreater(self.manager.get_employee_version("emp_1"), self.manager.get_employee_version("emp_2"))
+        self.assertGreater(self.manager.data_version, data_version)
+
+    def test_multi_worker_shared_sequence(self):
+        """Test : deux processus numérotent employés et créneaux dans une seule séquence"""
+        with tempfile.TemporaryDirectory() as temp_dir, \
+                mock.patch.object(Config, 'MULTI_WORKER', True), \
+                mock.patch.object(Config, 'DATA_FOLDER', temp_dir), \
+                mock.patch.object(Config, 'EMPLOYEES_FILE', os.path.join(temp_dir, 'employees.json')), \
+                mock.patch.object(Config, 'SHIFTS_FILE', os.path.join(temp_dir, 'shifts.json')):
+            workers = []
+            for _ in range(2):
+                change_log = ChangeLog()
+                workers.append((change_log, EmployeeManager(change_log), ShiftManager(change_log)))
+            (log_a, employees_a, _), (log_b, _, shifts_b) = workers
+
+            employee = employees_a.get_all_employees()[0]
+            cursor = log_b.sequence
+            self.assertTrue(employees_a.update_employee(employee.id, {'email': 'a@example.com'}))
+            seq_a = employees_a.get_employee(employee.id).seq
+
+            # Le worker B n'a pas relu les employés : sa séquence doit pourtant continuer celle de A
+            shift = Shift(employee_id=employee.id, day="Lundi", start_hour=8, duration=2)
+            self.assertTrue(shifts_b.add_shift(shift)[0])
+            seq_b = shifts_b.get_shift(shift.id).seq
+            self.assertGreater(seq_b, seq_a)
+            self.assertGreater(seq_a, cursor)
+
+            # Et inversement pour une écriture suivante de A
+            self.assertTrue(employees_a.update_employee(employee.id, {'email': 'b@example.com'}))
+            self.assertGreater(employees_a.get_employee(employee.id).seq, seq_b)
+            self.assertEqual(log_a.sequence, employees_a.get_employee(employee.id).seq)
+
+    def test_multi_worker_shared_history(self):
+        """Test : un worker reprend l'historique des autres au lieu de repartir d'un état complet"""
+        with tempfile.TemporaryDirectory() as temp_dir, \
+                mock.patch.object(Config, 'MULTI_WORKER', True), \
+                mock.patch.object(Config, 'DATA_FOLDER', temp_dir), \
+                mock.patch.object(Config, 'EMPLOYEES_FILE', os.path.join(temp_dir, 'employees.json')), \
+                mock.patch.object(Config, 'SHIFTS_FILE', os.path.join(temp_dir, 'shifts.json')):
+            log_a, log_b = ChangeLog(), ChangeLog()
+            employees_a, shifts_a = EmployeeManager(log_a), ShiftManager(log_a)
+            employees_b, shifts_b = EmployeeManager(log_b), ShiftManager(log_b)
+            employee = employees_b.get_all_employees()[0]
+            self.assertTrue(shifts_b.add_shift(Shift(shift_id="s_b", employee_id=employee.id, day="Mardi",
+                                                     start_hour=8, duration=2))[0])
+            cursor = log_b.committed
+
+            employees_a.update_employee(employee.id, {'email': 'a@example.com'})
+            shift = Shift(employee_id=employee.id, day="Lundi", start_hour=8, duration=2)
+            shifts_a.add_shift(shift)
+            shifts_a.delete_shift("s_b")
+
+            employees_b.refresh()
+            shifts_b.refresh()
+            changes = log_b.changes_since(cursor)
+            self.assertEqual([(kind, record_id, action) for _, kind, record_id, action in changes],
+                             [("employees", employee.id, "update"), ("shifts", shift.id, "create"),
+                              ("shifts", "s_b", "delete")])
+            self.assertEqual(log_b.committed, log_a.sequence)
+
+            # Entrées absentes du journal (réduit, supprimé) : l'historique manquant impose un état complet
+            shifts_a.delete_shift(shift.id)
+            os.unlink(os.path.join(temp_dir, 'sequence.log'))
+            employees_a.update_employee(employee.id, {'email': 'b@example.com'})
+            shifts_b.refresh()
+            self.assertIsNone(log_b.changes_since(cursor))
+            self.assertEqual(log_b.changes_since(log_b.committed), [])
+
+    def test_multi_worker_shared_epoch(self):
+        """Test : les workers partagent l'epoch de la séquence, donc les mêmes ETags"""
+        with tempfile.TemporaryDirectory() as temp_dir, \
+                mock.patch.object(Config, 'MULTI_WORKER', True), \
+                mock.patch.object(Config, 'DATA_FOLDER', temp_dir), \
+                mock.patch.object(Config, 'EMPLOYEES_FILE', os.path.join(temp_dir, 'employees.json')):
+            log_a, log_b = ChangeLog(), ChangeLog()
+            self.assertNotEqual(log_a.epoch, log_b.epoch)
+            employees_a = EmployeeManager(log_a)
+            employees_b = EmployeeManager(log_b)
+            self.assertEqual(log_a.epoch, log_b.epoch)
+
+            employee = employees_a.get_all_employees()[0]
+            employees_a.update_employee(employee.id, {'email': 'a@example.com'})
+            self.assertTrue(employees_b.refresh())
+            self.assertEqual((log_b.epoch, employees_b.data_version), (log_a.epoch, employees_a.data_version))
+
+    def test_merge_records(self):
+        """Test de fusion des modifications client avec détection des conflits"""
+        self.manager.add_shift(Shift(shift_id="s1", employee_id="emp_1", day="Lundi", start_hour=11, duration=4))
+        self.manager.update_shift("s1", {'duration': 3})
+        self.assertEqual(self.manager.get_shift("s1").version, 2)
+
+        result = self.manager.merge_records([
+            {'id': 's1', 'version': 1, 'start_hour': 8},  # modifié sur une version dépassée
+            {'id': 'local_1', 'employee_id': 'emp_1', 'day': 'Mardi', 'start_hour': 9, 'duration': 2}
+        ])
+
+        self.assertEqual(result['applied'], 1)
+        self.assertEqual(result['conflicts'][0]['server_version'], 2)
+        self.assertEqual(self.manager.get_shift("s1").start_hour, 11)
+        self.assertEqual(self.manager.get_shift("local_1").version, 1)
+
+        result = self.manager.merge_records([], deleted_ids=["local_1"])
+        self.assertEqual(result['applied'], 1)
+        self.assertIsNone(self.manager.get_shift("local_1"))
+
+
+class TestJobQueue(unittest.TestCase):
+    """Tests pour la file de tâches en arrière-plan"""
 
     def setUp(self):
-        self.planning_manager = PlanningManager()
+        self.queue = JobQueue(max_workers=1)
+
+    def test_job_progress_and_result(self):
+        """Test d'une tâche qui signale sa progression"""
+        def run(job):
+            for index in range(3):
+                job.report(index, 3)
+            return {'total': 3}
+
+        job = self.queue.wait(self.queue.submit('test', run).id, timeout=5)
+        self.assertEqual(job.status, Job.SUCCEEDED)
+        self.assertEqual(job.result, {'total': 3})
+        self.assertEqual(job.to_dict()['progress']['percent'], 100.0)
+
+        job = self.queue.wait(self.queue.submit('test', lambda job: 1 / 0).id, timeout=5)
+        self.assertEqual(job.status, Job.FAILED)
+        self.assertIn('division', job.error)
+
+    def test_job_cancellation(self):
+        """Test d'annulation : tâche en cours arrêtée au point de progression suivant, tâche en attente jamais lancée"""
+        started = threading.Event()
+        release = threading.Event()
+        steps = []
+
+        def run(job):
+            started.set()
+            release.wait(5)
+            for index in range(10):
+                job.report(index, 10)
+                steps.append(index)
+
+        running = self.queue.submit('test', run)
+        pending = self.queue.submit('test', lambda job: steps.append('pending'))
+        self.assertTrue(started.wait(5))
+
+        self.assertTrue(self.queue.cancel(pending.id))
+        self.assertTrue(self.queue.cancel(running.id))
+        release.set()
+
+        self.assertEqual(self.queue.wait(running.id, timeout=5).status, Job.CANCELLED)
+        self.assertEqual(self.queue.wait(pending.id, timeout=5).status, Job.CANCELLED)
+        self.assertEqual(steps, [])
+        self.assertFalse(self.queue.cancel(running.id))
+
+
+class TestManagerRegistry(unittest.TestCase):
+    """Tests pour la construction paresseuse des gestionnaires"""
+
+    def test_lazy_construction(self):
+        """Test : gestionnaire construit au premier accès, une seule fois"""
+        registry = ManagerRegistry()
+        built = []
+
+        def factory():
+            built.append(True)
+            return ChangeLog()
+
+        change_log = registry.register('log', factory)
+        self.assertEqual(built, [])
+        self.assertFalse(registry.is_loaded('log'))
+
+        self.assertEqual(change_log.sequence, 1)
+        change_log.retention = 5
+        self.assertIs(registry.get('log'), registry.get('log'))
+        self.assertEqual(registry.get('log').retention, 5)
+        self.assertEqual(len(built), 1)
+        self.assertEqual(registry.loaded(), ['log'])
+
+        # Après reset(), le mandataire reconstruit une instance neuve
+        registry.reset()
+        self.assertFalse(registry.is_loaded('log'))
+        self.assertNotEqual(change_log.retention, 5)
+        self.assertEqual(len(built), 2)
+
+
+class TestOccupancyIndex(unittest.TestCase):
+    """Tests pour l'index d'occupation"""
 
-        # Ajouter des données de test
-        emp1 = Employee(employee_id="emp_1", nom="Dupont", prenom="Marie", poste="serveur", taux_horaire=16.0)
-        emp2 = Employee(employee_id="emp_2", nom="Martin", prenom="Pierre", poste="cuisinier", taux_horaire=18.0)
+    def setUp(self):
+        self.shifts = [
+            Shift(employee_id="emp_1", day="Lundi", start_hour=22, duration=4),
+            Shift(employee_id="emp_1", day="Mardi", start_hour=11, duration=4)
+        ]
+        self.index = OccupancyIndex(self.shifts)
+
+    def test_is_free_and_hours(self):
+        """Test de disponibilité et du compteur d'heures"""
+        self.assertFalse(self.index.is_free("emp_1", "", "Lundi", 0, 1))  # 22h + 4h déborde sur 0h
+        self.assertTrue(self.index.is_free("emp_1", "", "Lundi", 10, 4))
+        self.assertTrue(self.index.is_free("emp_2", "", "Lundi", 22, 4))
+        self.assertEqual(self.index.week_hours("emp_1", ""), 8)
+
+        self.index.remove(self.shifts[0])
+        self.assertTrue(self.index.is_free("emp_1", "", "Lundi", 0, 1))
+        self.assertEqual(self.index.week_hours("emp_1", ""), 4)
+
+    def test_rest_period(self):
+        """Test du repos minimum entre deux jours"""
+        self.assertFalse(self.index.has_rest_period("emp_1", "", "Mardi", 8, 2))
+        self.assertTrue(self.index.has_rest_period("emp_1", "", "Mercredi", 8, 2))
+        # Lundi 8h-10h puis mardi 11h : 25h de repos
+        self.assertTrue(self.index.has_rest_period("emp_1", "", "Lundi", 8, 2))
+        # Lundi 20h-2h puis mardi 11h : 9h de repos
+        self.assertFalse(self.index.has_rest_period("emp_1", "", "Lundi", 20, 6))
+
+    def test_rest_period_afternoon_then_evening(self):
+        """Test : service de l'après-midi puis du soir le lendemain (28h de repos)"""
+        index = OccupancyIndex([Shift(employee_id="emp_1", day="Lundi", start_hour=11, duration=4)])
+        self.assertTrue(index.has_rest_period("emp_1", "", "Mardi", 19, 4))
+
+        index = OccupancyIndex([Shift(employee_id="emp_1", day="Mardi", start_hour=19, duration=4)])
+        self.assertTrue(index.has_rest_period("emp_1", "", "Lundi", 11, 4))
+        # Lundi 11h-15h puis mardi 1h : 10h de repos seulement
+        index = OccupancyIndex([Shift(employee_id="emp_1", day="Mardi", start_hour=1, duration=4)])
+        self.assertFalse(index.has_rest_period("emp_1", "", "Lundi", 11, 4))
+
+
+class TestWeekTemplate(unittest.TestCase):
+    """Tests pour les semaines types"""
 
-        self.planning_manager.employee_manager._employees["emp_1"] = emp1
-        self.planning_manager.employee_manager._employees["emp_2"] = emp2
+    def setUp(self):
+        self.template = WeekTemplate(nom="Semaine standard", entries=[
+            {'rotation_slot': 'A', 'day': 'Lundi', 'start_hour': 11, 'duration': 4},
+            {'rotation_slot': 'B', 'day': 'Lundi', 'start_hour': 18, 'duration': 5},
+            {'employee_id': 'emp_9', 'day': 'Samedi', 'start_hour': 10, 'duration': 6}
+        ])
+
+    def test_expand_with_rotation(self):
+        """Test d'expansion sur plusieurs semaines avec rotation A/B"""
+        weeks = ['2025-10', '2025-11', '2025-12']
+        shifts_by_week = self.template.expand(weeks, {'A': 'emp_1', 'B': 'emp_2'})
+
+        self.assertEqual(list(shifts_by_week.keys()), weeks)
+        self.assertEqual([s.employee_id for s in shifts_by_week['2025-10']], ['emp_1', 'emp_2', 'emp_9'])
+        self.assertEqual([s.employee_id for s in shifts_by_week['2025-11']], ['emp_2', 'emp_1', 'emp_9'])
+        self.assertEqual([s.employee_id for s in shifts_by_week['2025-12']], ['emp_1', 'emp_2', 'emp_9'])
+        self.assertTrue(all(s.week == '2025-11' for s in shifts_by_week['2025-11']))
+
+    def test_validate_rotation(self):
+        """Test de validation d'une rotation incomplète"""
+        self.assertEqual(self.template.rotation_slots, ['A', 'B'])
+        self.assertEqual(self.template.validate_rotation({'A': 'emp_1', 'B': 'emp_2'}), [])
+        self.assertEqual(len(self.template.validate_rotation({'A': 'emp_1'})), 1)
+
+    def test_round_trip(self):
+        """Test de sérialisation d'une semaine type"""
+        restored = WeekTemplate.from_dict(self.template.to_dict())
+        self.assertEqual(restored.id, self.template.id)
+        self.assertEqual(restored.entries, self.template.entries)
+        self.assertEqual(restored.total_hours, 15)
+
+    def test_applied_weeks_leave_template_planning_unchanged(self):
+        """Test : appliquer une semaine type sur 4 semaines ne change ni le planning type ni ses stats"""
+        with tempfile.TemporaryDirectory() as temp_dir, \
+                mock.patch.object(Config, 'DATA_FOLDER', temp_dir), \
+                mock.patch.object(Config, 'EMPLOYEES_FILE', os.path.join(temp_dir, 'employees.json')), \
+                mock.patch.object(Config, 'SHIFTS_FILE', os.path.join(temp_dir, 'shifts.json')):
+            planning_manager = PlanningManager()
+            employee = planning_manager.employee_manager.get_all_employees()[0]
+            shift_manager = planning_manager.shift_manager
+            shift_manager.add_shift(Shift(employee_id=employee.id, day="Lundi", start_hour=11, duration=4))
+
+            def snapshot():
+                planning = planning_manager.get_week_planning()
+                return (planning['stats'],
+                        planning_manager.get_employee_planning(employee.id)['stats'],
+                        shift_manager.get_weekly_stats(Config.DAYS_OF_WEEK),
+                        planning_manager.get_planning_conflicts())
+
+            before = snapshot()
+            weeks = ['2025-10', '2025-11', '2025-12', '2025-13']
+            template = WeekTemplate.from_shifts("Semaine standard", shift_manager.get_shifts_by_employee(employee.id))
+            added, collisions = shift_manager.add_shifts_bulk(
+                [shift for shifts in template.expand(weeks).values() for shift in shifts])
+            self.assertEqual(collisions, [])
+            self.assertGreater(len(added), 0)
+
+            self.assertEqual(snapshot(), before)
+            stats = shift_manager.get_weekly_stats(Config.DAYS_OF_WEEK, '2025-11')
+            self.assertEqual(stats['total_hours'], template.total_hours)
+
+    def test_unique_ids(self):
+        """Test : IDs uniques en rafale, un ID existant n'est jamais écrasé"""
+        templates = [WeekTemplate(nom=f"Semaine {index}") for index in range(50)]
+        self.assertEqual(len({template.id for template in templates}), 50)
+
+        with tempfile.TemporaryDirectory() as temp_dir, \
+                mock.patch.object(Config, 'TEMPLATES_FILE', os.path.join(temp_dir, 'templates.json')):
+            manager = TemplateManager()
+            self.assertTrue(all(manager.add_template(template) for template in templates))
+            self.assertFalse(manager.add_template(WeekTemplate(template_id=templates[0].id, nom="Doublon")))
+            self.assertEqual(len(manager.get_all_templates()), 50)
+            self.assertEqual(manager.get_template(templates[0].id).nom, "Semaine 0")
+
+
+class TestTimeGrid(unittest.TestCase):
+    """Tests pour la grille horaire"""
+
+    def test_time_grid(self):
+        """Test d'une grille immuable passant minuit"""
+        grid = TimeGrid(17, 26, 30)
+
+        self.assertEqual(grid.hours_range(), [17, 18, 19, 20, 21, 22, 23, 0, 1])
+        self.assertEqual(len(grid.all_time_slots()), 18)
+        self.assertEqual(grid.all_time_slots()[1]['key'], '17_30')
+        self.assertEqual(grid.granularity_info()['total_slots'], 18)
+
+        with self.assertRaises(AttributeError):
+            grid.granularity = 15
+        with self.assertRaises(ValueError):
+            grid.with_granularity(20)
+
+        finer = grid.with_granularity(15)
+        self.assertEqual(finer, TimeGrid(17, 26, 15))
+        self.assertEqual(grid.granularity, 30)
+
+    def test_slot_grid_memoised(self):
+        """Test de la grille de créneaux mémorisée (index et JSON)"""
+        grid = TimeGrid(8, 12, 15)
+
+        self.assertIs(grid.all_time_slots(), TimeGrid(8, 12, 15).all_time_slots())
+        self.assertEqual(grid.slot_index()['9_45'], 7)
+        self.assertTrue(grid.has_slot('11_0'))
+        self.assertFalse(grid.has_slot('12_0'))
+        self.assertEqual(json.loads(grid.slots_json()), grid.all_time_slots())
+
+    def test_slot_usage_stats(self):
+        """Test des statistiques de créneaux calculées sur une grille explicite"""
+        use_temp_data(self)
+        manager = ShiftManager()
+        manager.add_shift(Shift(shift_id="s1", employee_id="emp_1", day="Lundi", start_hour=23, duration=3))
+
+        stats = manager.get_slot_usage_stats(TimeGrid(17, 25, 30))
+        self.assertEqual(stats['total_slots'], 16)
+        self.assertEqual(stats['used_slots'], 4)  # 23h et 0h, hors 1h (fermé)
+        self.assertEqual(stats['slot_usage']['0_30']['count'], 1)
 
-        shift1 = Shift(shift_id="shift_1", employee_id="emp_1", day="Lundi", start_hour=11, duration=4)
-        shift2 = Shift(shift_id="shift_2", employee_id="emp_2", day="Lundi", start_hour=12, duration=3)
 
-        self.planning_manager.shift_manager._shifts["shift_1"] = shift1
-        self.planning_manager.shift_manager._shifts["shift_2"] = shift2
+class TestPlanningManager(unittest.TestCase):
+    """Tests pour PlanningManager"""
+
+    def setUp(self):
+        # Données de test, dans un dossier temporaire
+        self.planning_manager = create_planning_manager(self, [
+            Employee(employee_id="emp_1", nom="Dupont", prenom="Marie", poste="serveur", taux_horaire=16.0),
+            Employee(employee_id="emp_2", nom="Martin", prenom="Pierre", poste="cuisinier", taux_horaire=18.0)
+        ], [
+            Shift(shift_id="shift_1", employee_id="emp_1", day="Lundi", start_hour=11, duration=4),
+            Shift(shift_id="shift_2", employee_id="emp_2", day="Lundi", start_hour=12, duration=3)
+        ])
 
     def test_get_week_planning(self):
         """Test de récupération du planning hebdomadaire"""
@@ -357,6 +1028,148 @@ class TestPlanningManager(unittest.TestCase):
         self.assertFalse(is_valid)
         self.assertIn("12 heures", message)
 
+    def test_find_replacements(self):
+        """Test de recherche de remplaçants pour un créneau"""
+        self.planning_manager = create_planning_manager(self, [
+            Employee(employee_id="emp_1", nom="Absent", prenom="A", poste="serveur", taux_horaire=16.0),
+            Employee(employee_id="emp_3", nom="Cher", prenom="B", poste="serveur", taux_horaire=20.0),
+            Employee(employee_id="emp_4", nom="Eco", prenom="C", poste="serveur", taux_horaire=12.0),
+            Employee(employee_id="emp_5", nom="Occupe", prenom="D", poste="serveur", taux_horaire=10.0),
+            Employee(employee_id="emp_6", nom="Fatigue", prenom="E", poste="serveur", taux_horaire=10.0),
+            Employee(employee_id="emp_7", nom="Cuisine", prenom="F", poste="cuisinier", taux_horaire=9.0)
+        ], [
+            Shift(shift_id="target", employee_id="emp_1", day="Mardi", start_hour=11, duration=4),
+            Shift(shift_id="busy", employee_id="emp_5", day="Mardi", start_hour=14, duration=2),
+            Shift(shift_id="late", employee_id="emp_6", day="Lundi", start_hour=22, duration=4)
+        ])
+
+        result = self.planning_manager.find_replacements("target")
+
+        candidate_ids = [c['employee']['id'] for c in result['candidates']]
+        self.assertEqual(candidate_ids, ["emp_4", "emp_3"])
+        self.assertEqual(result['candidates'][0]['cost'], 48.0)
+        self.assertIsNone(self.planning_manager.find_replacements("inexistant"))
+
+    def test_probe_placements(self):
+        """Test de l'évaluation groupée des placements d'un créneau"""
+        result = self.planning_manager.probe_placements({'id': 'shift_1'}, [
+            {'start_hour': 12},                                # chevauche sa propre position : ignorée
+            {'employee_id': 'emp_2', 'start_hour': 13},        # conflit avec shift_2
+            {'day': 'Mardi', 'start_hour': 11, 'duration': 15},
+            {'day': 'Mercredi', 'employee_id': 'emp_inexistant'}
+        ])
+
+        self.assertEqual(result['valid_count'], 1)
+        valid, conflict, too_long, unknown = result['results']
+        self.assertTrue(valid['valid'])
+        self.assertEqual(valid['hours_after'], 4)
+        self.assertTrue(conflict['conflict'])
+        self.assertFalse(too_long['valid'])
+        self.assertFalse(too_long['conflict'])
+        self.assertIn("Employé introuvable", unknown['errors'])
+
+    def test_fill_coverage_gaps(self):
+        """Test du comblement du sous-effectif, le moins cher d'abord"""
+        self.planning_manager = create_planning_manager(self, [
+            Employee(employee_id="emp_1", nom="Cher", prenom="A", poste="serveur", taux_horaire=20.0),
+            Employee(employee_id="emp_2", nom="Eco", prenom="B", poste="serveur", taux_horaire=12.0),
+            Employee(employee_id="emp_3", nom="Cuisine", prenom="C", poste="cuisinier", taux_horaire=9.0)
+        ], [
+            Shift(shift_id="s1", employee_id="emp_1", day="Samedi", start_hour=19, duration=4)
+        ])
+
+        requirements = [
+            {'poste': 'serveur', 'day': 'Samedi', 'start_hour': 18, 'end_hour': 23, 'count': 2},
+            {'poste': 'serveur', 'day': 'Samedi', 'start_hour': 20, 'end_hour': 21, 'count': 3}
+        ]
+        self.assertEqual(self.planning_manager.validate_coverage_requirements(requirements), [])
+
+        deficit = self.planning_manager.get_coverage_deficit(requirements)
+        self.assertEqual(deficit['serveur']['Samedi'][18:23], [2, 1, 2, 1, 1])
+
+        result = self.planning_manager.fill_coverage_gaps(requirements)
+        self.assertTrue(result['dry_run'])
+        self.assertEqual(result['created'], 0)
+        self.assertEqual(len(self.planning_manager.shift_manager.get_all_shifts()), 1)
+
+        # Le bloc 18h-23h va au moins cher, le reste (18h et 20h) au seul encore libre
+        placed = sorted((p['employee_id'], p['start_hour'], p['duration']) for p in result['proposals'])
+        self.assertEqual(placed, [("emp_1", 18, 1), ("emp_2", 18, 5)])
+        self.assertEqual(len(result['unfilled']), 1)
+        self.assertEqual(result['unfilled'][0]['start_hour'], 20)
+        self.assertEqual(result['total_cost'], 80.0)
+        # emp_1 (20€) couvre 18h alors que emp_2 (12€) est disponible : coût minimal non garanti
+        self.assertFalse(result['minimum_cost'])
+
+        result = self.planning_manager.fill_coverage_gaps(
+            [{'poste': 'serveur', 'day': 'Dimanche', 'start_hour': 10, 'end_hour': 14}])
+        self.assertEqual([p['employee_id'] for p in result['proposals']], ["emp_2"])
+        self.assertTrue(result['minimum_cost'])
+
+        errors = self.planning_manager.validate_coverage_requirements(
+            [{'poste': 'pilote', 'day': 'Samedi', 'start_hour': 22, 'end_hour': 20}])
+        self.assertEqual(len(errors), 2)
+
+    def test_fill_coverage_gaps_reports_only_added_shifts(self):
+        """Test : hors dry_run, un créneau écarté à l'enregistrement n'est ni proposé ni compté"""
+        planning_manager = create_planning_manager(self, [
+            Employee(employee_id="emp_a", nom="A", prenom="A", poste="serveur", taux_horaire=10.0),
+            Employee(employee_id="emp_b", nom="B", prenom="B", poste="serveur", taux_horaire=12.0)
+        ])
+        shift_manager = planning_manager.shift_manager
+        requirements = [{'poste': 'serveur', 'day': 'Jeudi', 'start_hour': 18, 'end_hour': 22, 'count': 2}]
+
+        # Un créneau de emp_a enregistré juste avant l'ajout des propositions
+        add_shifts_bulk = shift_manager.add_shifts_bulk
+        intruder = Shift(employee_id="emp_a", day="Jeudi", start_hour=19, duration=1, week="2025-20")
+
+        def racing_add(shifts, atomic=False):
+            shift_manager.add_shift(intruder)
+            return add_shifts_bulk(shifts, atomic)
+
+        with mock.patch.object(shift_manager, 'add_shifts_bulk', side_effect=racing_add):
+            result = planning_manager.fill_coverage_gaps(requirements, '2025-20', dry_run=False)
+
+        self.assertEqual(result['created'], 1)
+        self.assertEqual([p['employee_id'] for p in result['proposals']], ["emp_b"])
+        self.assertEqual(result['total_hours'], 4)
+        self.assertEqual(result['total_cost'], 48.0)
+        self.assertEqual(len(result['rejected']), 1)
+        self.assertEqual(result['rejected'][0]['employee_id'], "emp_a")
+        self.assertEqual(result['rejected'][0]['conflicts_with'], [intruder.id])
+        self.assertFalse(result['minimum_cost'])
+        self.assertEqual(len(shift_manager.get_shifts_by_week_number('2025-20')), 2)
+
+    def test_validate_shift_placement_week_scope(self):
+        """Test : heures et repos comptés sur la semaine du créneau, limites de la configuration"""
+        added, _ = self.planning_manager.shift_manager.add_shifts_bulk([
+            Shift(shift_id=f"shift_w{index}", employee_id="emp_1", day=day, start_hour=9, duration=8, week="2025-10")
+            for index, day in enumerate(("Lundi", "Mardi", "Mercredi", "Jeudi"))
+        ])
+        self.assertEqual(len(added), 4)
+        validate = self.planning_manager.validate_shift_placement
+
+        placement = {'employee_id': 'emp_1', 'day': 'Vendredi', 'start_hour': 9, 'duration': 4}
+        self.assertTrue(validate({**placement, 'week': '2025-11'})[0])
+        is_valid, message = validate({**placement, 'week': '2025-10'})
+        self.assertFalse(is_valid)
+        self.assertIn(f"> {Config.MAX_WEEKLY_HOURS}h", message)
+
+        # Jeudi 9h-17h puis vendredi 2h : 9h de repos
+        is_valid, message = validate({**placement, 'start_hour': 2, 'duration': 1, 'week': '2025-10'})
+        self.assertFalse(is_valid)
+        self.assertIn("repos", message)
+
+    def test_validate_shift_placement_availability(self):
+        """Test du refus d'un créneau hors disponibilités"""
+        self.planning_manager.employee_manager.edit_employee(
+            "emp_1", lambda employee: employee.set_availability("Mardi", [[18, 23]]))
+
+        shift_data = {'employee_id': 'emp_1', 'day': 'Mardi', 'start_hour': 11, 'duration': 4}
+        is_valid, message = self.planning_manager.validate_shift_placement(shift_data)
+        self.assertFalse(is_valid)
+        self.assertIn("indisponible", message)
+
     def test_get_employee_planning(self):
         """Test de récupération du planning d'un employé"""
         planning = self.planning_manager.get_employee_planning("emp_1")
@@ -376,6 +1189,175 @@ class TestPlanningManager(unittest.TestCase):
         self.assertIsNone(planning)
 
 
+class TestPlanningImporter(unittest.TestCase):
+    """Tests pour le pipeline d'import"""
+
+    def setUp(self):
+        use_temp_data(self)
+        self.employee_manager = EmployeeManager()
+        self.shift_manager = ShiftManager()
+        self.employee_manager.add_employee(
+            Employee(employee_id="emp_1", nom="Dupont", prenom="Marie", poste="serveur"))
+        self.shift_manager.add_shift(
+            Shift(shift_id="s1", employee_id="emp_1", day="Lundi", start_hour=11, duration=4, week="2025-10"))
+        self.importer = PlanningImporter(self.employee_manager, self.shift_manager)
+
+    def test_ndjson_import(self):
+        """Test de l'import NDJSON : renumérotation, conflits, erreurs par ligne"""
+        lines = [
+            {'type': 'employee', 'id': 'old_1', 'nom': 'Dupont', 'prenom': 'Marie', 'poste': 'serveur'},
+            {'type': 'employee', 'id': 'old_2', 'nom': 'Martin', 'prenom': 'Paul', 'poste': 'cuisinier'},
+            {'type': 'shift', 'employee_id': 'old_1', 'day': 'Lundi', 'start_hour': 12, 'duration': 2, 'week': '2025-10'},
+            {'type': 'shift', 'employee_id': 'old_2', 'date': '2025-03-04', 'start_hour': 9, 'duration': 3},
+            {'type': 'shift', 'employee_id': 'old_2', 'date': '2025-03-04', 'start_hour': 10, 'duration': 3},
+            {'type': 'shift', 'employee_id': 'inconnu', 'day': 'Lundi', 'start_hour': 9, 'duration': 3}
+        ]
+        payload = '\n'.join(json.dumps(line) for line in lines).encode('utf-8') + b'\n{invalide'
+        report = self.importer.run(iter_ndjson(io.BytesIO(payload)))
+
+        self.assertTrue(report['committed'])
+        self.assertEqual(report['rows'], 7)
+        self.assertEqual(report['matched_employees'], 1)
+        self.assertEqual(report['imported_employees'], 1)
+        self.assertEqual(report['imported_shifts'], 1)
+        self.assertEqual([error['row'] for error in report['errors']], [3, 5, 6, 7])
+
+        new_id = report['employee_ids']['old_2']
+        self.assertEqual(report['employee_ids']['old_1'], 'emp_1')
+        imported = self.shift_manager.get_shifts_by_employee(new_id)
+        self.assertEqual([(shift.week, shift.day) for shift in imported], [('2025-10', 'Mardi')])
+
+    def test_import_never_overwrites_shift_added_during_read(self):
+        """Test : un créneau ajouté pendant la lecture avec le même ID n'est pas écrasé"""
+        def rows():
+            yield 1, {'type': 'shift', 'id': 'ext_1', 'employee_id': 'emp_1', 'day': 'Jeudi',
+                      'start_hour': 9, 'duration': 3, 'week': '2025-10'}, None
+            self.shift_manager.add_shift(Shift(shift_id="ext_1", employee_id="emp_1", day="Vendredi",
+                                               start_hour=10, duration=2, week="2025-10"))
+
+        report = self.importer.run(rows())
+        self.assertEqual(report['imported_shifts'], 0)
+        self.assertEqual(report['errors'], [{'row': 1, 'error': 'Créneau déjà existant: ext_1'}])
+        self.assertEqual(self.shift_manager.get_shift("ext_1").day, "Vendredi")
+
+    def test_csv_import_dry_run_and_atomic(self):
+        """Test de l'import CSV en validation seule puis en tout ou rien"""
+        payload = ("employee_id,week,day,start_hour,duration,notes\n"
+                   "emp_1,2025-11,Mardi,9,2,ok\n"
+                   "emp_1,2025-11,Jourdi,9,2,ko\n").encode('utf-8')
+
+        report = self.importer.run(iter_csv(io.BytesIO(payload)), dry_run=True)
+        self.assertFalse(report['committed'])
+        self.assertEqual(report['valid_shifts'], 1)
+        self.assertEqual(report['errors'], [{'row': 3, 'error': 'Jour invalide'}])
+
+        report = self.importer.run(iter_csv(io.BytesIO(payload)), atomic=True)
+        self.assertFalse(report['committed'])
+        self.assertEqual(len(self.shift_manager.get_all_shifts()), 1)
+
+        report = self.importer.run(iter_csv(io.BytesIO(payload)))
+        self.assertEqual(report['imported_shifts'], 1)
+        self.assertEqual(len(self.shift_manager.get_all_shifts()), 2)
+
+    def test_atomic_import_rechecks_conflicts_at_commit(self):
+        """Test : un créneau ajouté pendant la lecture annule un import atomique, employés compris"""
+        def rows():
+            yield 1, {'type': 'employee', 'id': 'old_2', 'nom': 'Martin', 'prenom': 'Paul', 'poste': 'serveur'}, None
+            yield 2, {'type': 'shift', 'employee_id': 'emp_1', 'day': 'Mardi', 'start_hour': 9,
+                      'duration': 3, 'week': '2025-10'}, None
+            # Écriture concurrente pendant que l'import lit encore son flux
+            self.shift_manager.add_shift(Shift(employee_id="emp_1", day="Mardi", start_hour=10,
+                                               duration=2, week="2025-10"))
+
+        report = self.importer.run(rows(), atomic=True)
+        self.assertFalse(report['committed'])
+        self.assertEqual((report['imported_employees'], report['imported_shifts']), (0, 0))
+        self.assertEqual(report['errors'], [{'row': 2, 'error': 'Conflit avec un créneau existant'}])
+        self.assertEqual(len(self.employee_manager.get_all_employees(actif_only=False)), 1)
+        self.assertEqual(len(self.shift_manager.get_all_shifts()), 2)
+
+
+class TestSyntheticData(unittest.TestCase):
+    """Tests pour le générateur de restaurants synthétiques"""
+
+    def test_generation_is_deterministic_and_loadable(self):
+        """Test : même graine, même jeu de données, sans conflit et relu par les gestionnaires"""
+        dataset = generate_restaurant(employees=20, weeks=2, seed=3, profile='BAR_NUIT')
+        again = generate_restaurant(employees=20, weeks=2, seed=3, profile='BAR_NUIT')
+        self.assertEqual([shift.to_dict() for shift in dataset.shifts], [shift.to_dict() for shift in again.shifts])
+        self.assertLessEqual({employee.poste for employee in dataset.employees}, set(Config.EMPLOYEE_TYPES))
+        self.assertGreater(dataset.summary()['overnight_shifts'], 0)
+
+        hours = {}
+        for shift in dataset.shifts:
+            key = (shift.employee_id, shift.week)
+            hours[key] = hours.get(key, 0) + shift.duration
+        self.assertLessEqual(max(hours.values()), Config.MAX_WEEKLY_HOURS)
+        occupancy = OccupancyIndex()
+        for shift in dataset.shifts:
+            self.assertTrue(occupancy.is_free(shift.employee_id, shift.week, shift.day, shift.start_hour, shift.duration))
+            occupancy.add(shift)
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            paths = write_data_folder(dataset, temp_dir)
+            with mock.patch.object(Config, 'SHIFTS_FILE', paths['shifts']):
+                manager = ShiftManager(ChangeLog())
+        self.assertEqual(len(manager.get_all_shifts()), len(dataset.shifts))
+        self.assertEqual(manager.change_log.sequence, len(dataset.employees) + len(dataset.shifts))
+
+
+class TestBenchmarkReport(unittest.TestCase):
+    """Tests pour les rapports de benchmarks (percentiles, comparaison à une référence)"""
+
+    def test_percentiles_and_compare(self):
+        """Test : percentiles d'une série et régressions au-delà du seuil"""
+        stats = percentiles([float(value) for value in range(1, 101)])
+        self.assertEqual((stats['min'], stats['p50'], stats['max'], stats['rounds']), (1.0, 50.5, 100.0, 100))
+        self.assertAlmostEqual(stats['p90'], 90.1)
+
+        def report(**cases):
+            return {'results': {'small': {'cases': {name: {'p50': p50} for name, p50 in cases.items()}}}}
+
+        baseline = report(load=10.0, stats=0.01, save=5.0)
+        current = report(load=13.0, stats=0.03, save=5.5, nouveau=1.0)
+        regressions = compare(current, baseline, threshold=0.2)
+        # stats triple mais reste sous le plancher de bruit ; save reste sous le seuil ; nouveau n'a pas de référence
+        self.assertEqual([(regression['case'], regression['ratio']) for regression in regressions], [('load', 1.3)])
+
+
+class TestPersistenceStats(unittest.TestCase):
+    """Tests pour l'instrumentation des sauvegardes"""
+
+    def test_write_json_and_request_trace(self):
+        """Test : même contenu que json.dump, mesures cumulées et sauvegardes de la requête"""
+        stats = PersistenceStats()
+        stats.fsync = True
+        data = {'emp_1': {'nom': 'Élodie', 'heures': [11, 12]}}
+        with tempfile.TemporaryDirectory() as folder:
+            file_path = os.path.join(folder, 'employees.json')
+            stats.begin_request()
+            save = stats.write_json('employees', file_path, data)
+            stats.write_json('employees', file_path, data)
+            saves = stats.end_request()
+
+            with open(file_path, 'r', encoding='utf-8') as f:
+                self.assertEqual(f.read(), json.dumps(data, indent=2, ensure_ascii=False))
+            self.assertEqual(save['bytes'], os.path.getsize(file_path))
+
+            # Hors requête : compté, mais rattaché à aucune requête
+            stats.write_json('shifts', file_path, data)
+            self.assertEqual(stats.end_request(), [])
+
+            with self.assertRaises(OSError):
+                stats.write_json('shifts', os.path.join(folder, 'absent', 'shifts.json'), data)
+
+        self.assertEqual([save['file'] for save in saves], ['employees', 'employees'])
+        snapshot = stats.snapshot()
+        self.assertEqual(snapshot['employees']['saves'], 2)
+        self.assertEqual(snapshot['employees']['bytes_written'], 2 * save['bytes'])
+        self.assertEqual((snapshot['shifts']['saves'], snapshot['shifts']['errors']), (2, 1))
+
+
 if __name__ == '__main__':
     # Créer une suite de tests
     loader = unittest.TestLoader()
@@ -386,7 +1368,17 @@ if __name__ == '__main__':
     suite.addTests(loader.loadTestsFromTestCase(TestEmployeeManager))
     suite.addTests(loader.loadTestsFromTestCase(TestShift))
     suite.addTests(loader.loadTestsFromTestCase(TestShiftManager))
+    suite.addTests(loader.loadTestsFromTestCase(TestChangeLog))
+    suite.addTests(loader.loadTestsFromTestCase(TestJobQueue))
+    suite.addTests(loader.loadTestsFromTestCase(TestManagerRegistry))
+    suite.addTests(loader.loadTestsFromTestCase(TestPersistenceStats))
+    suite.addTests(loader.loadTestsFromTestCase(TestOccupancyIndex))
+    suite.addTests(loader.loadTestsFromTestCase(TestWeekTemplate))
+    suite.addTests(loader.loadTestsFromTestCase(TestTimeGrid))
     suite.addTests(loader.loadTestsFromTestCase(TestPlanningManager))
+    suite.addTests(loader.loadTestsFromTestCase(TestPlanningImporter))
+    suite.addTests(loader.loadTestsFromTestCase(TestSyntheticData))
+    suite.addTests(loader.loadTestsFromTestCase(TestBenchmarkReport))
 
     # Exécuter les tests
     runner = unittest.TextTestRunner(verbosity=2)
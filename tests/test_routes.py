@@ -4,6 +4,9 @@ Tests unitaires pour les routes et API
 
 import unittest
 import json
+import base64
+import csv
+import gzip
 import tempfile
 import os
 from unittest.mock import patch, MagicMock
@@ -13,26 +16,51 @@ import sys
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
 
 from app import create_app
+from app.models.employee import Employee
 from config import Config
 
+
+def use_temp_data(test: unittest.TestCase) -> str:
+    """
+    Dossier de données temporaire pour un test : les gestionnaires partagés sont
+    reconstruits sur ce dossier, les fichiers de data/ ne sont jamais modifiés
+    """
+    from app.routes.api import managers
+
+    temp_dir = tempfile.TemporaryDirectory()
+    test.addCleanup(temp_dir.cleanup)
+    paths = {'DATA_FOLDER': temp_dir.name}
+    for name, file_name in (('EMPLOYEES_FILE', 'employees.json'), ('SHIFTS_FILE', 'shifts.json'),
+                            ('TEMPLATES_FILE', 'templates.json')):
+        paths[name] = os.path.join(temp_dir.name, file_name)
+    for name, path in paths.items():
+        patcher = patch.object(Config, name, path)
+        patcher.start()
+        test.addCleanup(patcher.stop)
+    managers.reset()
+    test.addCleanup(managers.reset)
+    return temp_dir.name
+
+
+def create_test_employee(**fields) -> str:
+    """Crée un employé dans les données du test et retourne son identifiant"""
+    from app.routes.api import employee_manager
+
+    employee = Employee(**{'nom': 'Test', 'prenom': 'User', 'poste': 'serveur', **fields})
+    employee_manager.add_employee(employee)
+    return employee.id
+
 class TestAPI(unittest.TestCase):
     """Tests pour l'API REST"""
 
     def setUp(self):
         """Configuration avant chaque test"""
-        # Créer des fichiers temporaires pour les tests
-        self.temp_employees_file = tempfile.NamedTemporaryFile(mode='w', delete=False, suffix='.json')
-        self.temp_shifts_file = tempfile.NamedTemporaryFile(mode='w', delete=False, suffix='.json')
-
-        # Fermer les fichiers pour permettre l'écriture
-        self.temp_employees_file.close()
-        self.temp_shifts_file.close()
+        # Données dans un dossier temporaire
+        use_temp_data(self)
 
         # Configurer l'application de test
         self.app = create_app('default')
         self.app.config['TESTING'] = True
-        self.app.config['EMPLOYEES_FILE'] = self.temp_employees_file.name
-        self.app.config['SHIFTS_FILE'] = self.temp_shifts_file.name
 
         # Créer le client de test
         self.client = self.app.test_client()
@@ -61,11 +89,17 @@ class TestAPI(unittest.TestCase):
         """Nettoyage après chaque test"""
         self.app_context.pop()
 
-        # Supprimer les fichiers temporaires
-        if os.path.exists(self.temp_employees_file.name):
-            os.unlink(self.temp_employees_file.name)
-        if os.path.exists(self.temp_shifts_file.name):
-            os.unlink(self.temp_shifts_file.name)
+    def test_get_granularity_config(self):
+        """Test de la configuration de granularité (créneaux pré-sérialisés)"""
+        response = self.client.get('/api/config/granularity')
+        data = json.loads(response.data)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(data['success'])
+        self.assertEqual(len(data['all_time_slots']), data['granularity_info']['total_slots'])
+
+        response = self.client.post('/api/validate/time-slot', json={'hour': 12, 'minutes': 0})
+        self.assertTrue(json.loads(response.data)['valid'])
 
     def test_get_employees_empty(self):
         """Test de récupération d'employés (liste vide)"""
@@ -77,6 +111,56 @@ class TestAPI(unittest.TestCase):
         self.assertIsInstance(data['employees'], list)
         self.assertEqual(data['count'], len(data['employees']))
 
+    def test_get_employees_not_modified(self):
+        """Test du GET conditionnel (ETag / If-None-Match)"""
+        response = self.client.get('/api/employees')
+        etag = response.headers.get('ETag')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNotNone(etag)
+
+        response = self.client.get('/api/employees', headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.data, b'')
+
+        # Autres paramètres, autre représentation
+        response = self.client.get('/api/employees?actif_only=false', headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 200)
+
+    def test_get_employee_photo(self):
+        """Test du service binaire de la photo (URL versionnée, ETag)"""
+        response = self.client.post('/api/employees',
+                                  data=json.dumps(self.test_employee),
+                                  content_type='application/json')
+        employee_id = json.loads(response.data)['employee']['id']
+
+        response = self.client.get(f'/api/employees/{employee_id}/photo')
+        self.assertEqual(response.status_code, 404)
+
+        png = b'\x89PNG\r\n\x1a\n' + b'\x00' * 16
+        response = self.client.post(f'/api/employees/{employee_id}/photo',
+                                  data=json.dumps({'photo_data': base64.b64encode(png).decode()}),
+                                  content_type='application/json')
+        photo_url = json.loads(response.data)['photo_url']
+
+        response = self.client.get(photo_url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data, png)
+        self.assertEqual(response.mimetype, 'image/png')
+        self.assertIn('immutable', response.headers['Cache-Control'])
+
+        response = self.client.get(photo_url, headers={'If-None-Match': response.headers['ETag']})
+        self.assertEqual(response.status_code, 304)
+
+        # Sans version, ou avec une version périmée : revalidation à chaque fois
+        for url in (f'/api/employees/{employee_id}/photo', f'/api/employees/{employee_id}/photo?v=0123456789ab'):
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.headers['Cache-Control'], 'no-cache')
+            self.assertIn('ETag', response.headers)
+
+        self.client.delete(f'/api/employees/{employee_id}')
+
     def test_create_employee_success(self):
         """Test de création d'employé réussie"""
         response = self.client.post('/api/employees',
@@ -320,6 +404,293 @@ class TestAPI(unittest.TestCase):
         self.assertTrue(data['success'])
         self.assertIn('supprimé', data['message'])
 
+    def test_sync_cursor_stops_before_unpublished_changes(self):
+        """Test : une modification journalisée mais pas encore publiée n'est ni supprimée ni sautée"""
+        from app.routes.api import change_log, employee_manager
+
+        employee_id = create_test_employee()
+        cursor = self.client.post('/api/sync', json={'cursor': 0}).get_json()['cursor']
+
+        # Créneau en cours d'écriture (journalisé), puis un employé modifié et enregistré
+        pending = change_log.record('shifts', 'shift_pending', 'create')
+        employee_manager.update_employee(employee_id, {'nom': 'Modifié'})
+        self.assertGreater(change_log.committed, pending)
+
+        result = self.client.post('/api/sync', json={'cursor': cursor}).get_json()
+        self.assertFalse(result['full'])
+        self.assertEqual(result['deleted']['shifts'], [])
+        self.assertEqual([employee['nom'] for employee in result['employees']], ['Modifié'])
+        self.assertEqual(result['cursor'], pending - 1)
+
+        # Le client repart de ce curseur : la modification en attente n'est pas perdue
+        result = self.client.post('/api/sync', json={'cursor': result['cursor']}).get_json()
+        self.assertEqual(result['cursor'], pending - 1)
+
+    def test_events_stream_resume(self):
+        """Test du flux SSE : reprise depuis Last-Event-ID"""
+        employee_id = create_test_employee()
+        from app.routes import api
+
+        cursor = api.change_log.committed
+        response = self.client.post('/api/shifts/batch', json={'operations': [
+            {'op': 'create', 'data': {'employee_id': employee_id, 'day': 'Dimanche', 'start_hour': 3, 'duration': 2}}
+        ]})
+        created_id = json.loads(response.data)['results'][0]['id']
+
+        with patch.object(api, 'EVENTS_STREAM_TIMEOUT', 0.2), patch.object(api, 'EVENTS_KEEPALIVE', 0.1):
+            response = self.client.get('/api/events', headers={'Last-Event-ID': str(cursor)})
+            body = response.get_data(as_text=True)
+
+        self.assertEqual(response.mimetype, 'text/event-stream')
+        self.assertIn('event: shifts', body)
+        self.assertIn(created_id, body)
+        self.assertIn(f'id: {cursor + 1}', body)
+
+        self.client.post('/api/shifts/batch', json={'operations': [{'op': 'delete', 'id': created_id}]})
+
+    def test_events_wait_for_unpublished_records(self):
+        """Test du flux SSE : une modification journalisée mais pas encore publiée n'est pas une suppression"""
+        from app.routes import api
+
+        employee_id = create_test_employee()
+        cursor = api.change_log.committed
+        api.change_log.record('shifts', 'shift_pending', 'create')
+        api.employee_manager.update_employee(employee_id, {'nom': 'Modifié'})
+
+        with patch.object(api, 'EVENTS_STREAM_TIMEOUT', 0.2), patch.object(api, 'EVENTS_POLL_INTERVAL', 0.05):
+            response = self.client.get('/api/events', headers={'Last-Event-ID': str(cursor)})
+            body = response.get_data(as_text=True)
+
+        # Rien n'est envoyé après la modification en attente, pour rester dans l'ordre
+        self.assertNotIn('shift_pending', body)
+        self.assertNotIn('Modifié', body)
+
+    def test_export_planning_stream(self):
+        """Test de l'export en flux (ndjson, csv, filtres, gzip)"""
+        employee_id = create_test_employee()
+        response = self.client.post('/api/shifts/batch', json={'operations': [
+            {'op': 'create', 'data': {'employee_id': employee_id, 'day': 'Mardi', 'start_hour': 9,
+                                      'duration': 2, 'week': '2025-10'}},
+            {'op': 'create', 'data': {'employee_id': employee_id, 'day': 'Mardi', 'start_hour': 9,
+                                      'duration': 2, 'week': '2025-11', 'poste_specifique': 'serveur'}}
+        ]})
+        created_ids = [result['id'] for result in json.loads(response.data)['results']]
+
+        response = self.client.get('/api/export/planning?format=ndjson&week=2025-10')
+        self.assertEqual(response.mimetype, 'application/x-ndjson')
+        records = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+        shifts = [record for record in records if record['type'] == 'shift']
+        self.assertEqual([shift['id'] for shift in shifts], created_ids[:1])
+        self.assertEqual(shifts[0]['date'], '2025-03-04')
+
+        # Mardi 2025-11 = 11 mars 2025
+        response = self.client.get('/api/export/planning?format=csv&start_date=2025-03-10&end_date=2025-03-16',
+                                   headers={'Accept-Encoding': 'gzip'})
+        self.assertEqual(response.headers['Content-Encoding'], 'gzip')
+        lines = gzip.decompress(response.data).decode('utf-8').splitlines()
+        self.assertTrue(lines[0].startswith('type,id,week,date,day'))
+        rows = [row for row in csv.DictReader(lines) if row['type'] == 'shift']
+        self.assertEqual(len(rows), 1)
+        row = rows[0]
+        self.assertEqual(row['id'], created_ids[1])
+        # Tous les champs relus par l'import sont exportés
+        self.assertEqual(row['poste_specifique'], 'serveur')
+
+        response = self.client.get('/api/export/planning?format=json&week=2025-11')
+        data = json.loads(response.data)
+        self.assertEqual([shift['id'] for shift in data['data']['shifts']], created_ids[1:])
+        self.assertIn('config', data['data'])
+
+        response = self.client.get('/api/export/planning?format=xml')
+        self.assertEqual(response.status_code, 400)
+
+        self.client.post('/api/shifts/batch', json={'operations': [
+            {'op': 'delete', 'id': shift_id} for shift_id in created_ids
+        ]})
+
+    def test_csv_export_imports_into_another_instance(self):
+        """Test d'un export CSV réimporté sur une instance sans ces employés"""
+        employee_id = create_test_employee(nom='Export', prenom='Csv', email='export@example.com')
+        self.client.post('/api/shifts/batch', json={'operations': [
+            {'op': 'create', 'data': {'employee_id': employee_id, 'day': 'Jeudi', 'start_hour': 14, 'duration': 3,
+                                      'week': '2025-12', 'poste_specifique': 'barman'}}
+        ]})
+        exported = self.client.get('/api/export/planning?format=csv&week=2025-12').data
+
+        # Autre instance : données vides
+        use_temp_data(self)
+        response = self.client.post('/api/import/planning', data=exported, content_type='text/csv')
+        data = json.loads(response.data)
+        self.assertEqual(data['error_count'], 0, data['errors'])
+        self.assertEqual(data['imported_shifts'], 1)
+
+        from app.routes.api import employee_manager
+        local_id = data['employee_ids'][employee_id]
+        employee = employee_manager.get_employee(local_id)
+        self.assertEqual((employee.nom, employee.email), ('Export', 'export@example.com'))
+        shifts = json.loads(self.client.get('/api/shifts?week=2025-12').data)['shifts']
+        self.assertEqual([(shift['employee_id'], shift['start_hour'], shift['poste_specifique']) for shift in shifts],
+                         [(local_id, 14, 'barman')])
+
+    def test_probe_shift_placements(self):
+        """Test de l'évaluation groupée des placements (aperçu glisser-déposer)"""
+        employee_id = create_test_employee()
+        response = self.client.post('/api/shifts/batch', json={'operations': [
+            {'op': 'create', 'data': {'employee_id': employee_id, 'day': 'Jeudi', 'start_hour': 9,
+                                      'duration': 2, 'week': '2025-20'}}
+        ]})
+        created_id = json.loads(response.data)['results'][0]['id']
+
+        response = self.client.post('/api/shifts/probe', json={
+            'shift': {'id': created_id},
+            'candidates': [{'start_hour': 10}, {'day': 'Vendredi', 'start_hour': 25}]
+        })
+        data = json.loads(response.data)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([result['valid'] for result in data['results']], [True, False])
+        self.assertEqual(data['valid_count'], 1)
+
+        response = self.client.post('/api/shifts/probe', json={'shift': {'id': 'inexistant'}, 'candidates': []})
+        self.assertEqual(response.status_code, 404)
+        response = self.client.post('/api/shifts/probe', json={'shift': {'id': created_id}})
+        self.assertEqual(response.status_code, 400)
+
+        self.client.post('/api/shifts/batch', json={'operations': [{'op': 'delete', 'id': created_id}]})
+
+    def test_get_week_view(self):
+        """Test du modèle de vue hebdomadaire (cache par version de la semaine)"""
+        employee_id = create_test_employee()
+        response = self.client.post('/api/shifts/batch', json={'operations': [
+            {'op': 'create', 'data': {'employee_id': employee_id, 'day': 'Mercredi', 'start_hour': 10,
+                                      'duration': 3, 'week': '2025-30'}}
+        ]})
+        created_id = json.loads(response.data)['results'][0]['id']
+
+        response = self.client.get('/api/planning/week/2025-30')
+        data = json.loads(response.data)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(data['shifts_by_day']['Mercredi'][employee_id][0]['id'], created_id)
+        self.assertEqual(data['employee_stats'][employee_id]['hours'], 3)
+        self.assertEqual(data['week_info']['dates']['Lundi'], '2025-07-21')
+        self.assertIn('time_slots', data)
+        self.assertTrue(all('photo_data' not in employee for employee in data['employees']))
+
+        etag = response.headers['ETag']
+        response = self.client.get('/api/planning/week/2025-30', headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 304)
+
+        self.client.post('/api/shifts/batch', json={'operations': [{'op': 'delete', 'id': created_id}]})
+        response = self.client.get('/api/planning/week/2025-30', headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(json.loads(response.data)['stats']['total_shifts'], 0)
+
+        response = self.client.get('/api/planning/week/2025-99')
+        self.assertEqual(response.status_code, 400)
+
+    def test_background_jobs(self):
+        """Test des tâches en arrière-plan : mise en file, suivi, résultat et annulation"""
+        from app.routes.api import job_queue
+
+        response = self.client.post('/api/jobs', json={'type': 'employee_report'})
+        data = json.loads(response.data)
+        self.assertEqual(response.status_code, 202)
+        job_id = data['job']['id']
+        self.assertTrue(response.headers['Location'].endswith(f'/api/jobs/{job_id}'))
+
+        job_queue.wait(job_id, timeout=10)
+        response = self.client.get(f'/api/jobs/{job_id}')
+        job = json.loads(response.data)['job']
+        self.assertEqual(job['status'], 'succeeded')
+        self.assertEqual(job['progress']['done'], job['progress']['total'])
+        self.assertIn('summary', job['result'])
+
+        # Une tâche terminée ne s'annule plus
+        response = self.client.post(f'/api/jobs/{job_id}/cancel')
+        self.assertEqual(response.status_code, 409)
+
+        response = self.client.post('/api/jobs', json={'type': 'inconnu'})
+        self.assertEqual(response.status_code, 400)
+        response = self.client.post('/api/jobs', json={'type': 'photos_import', 'params': {'directory': '../..'}})
+        self.assertEqual(response.status_code, 400)
+        response = self.client.post('/api/jobs', json={'type': 'migrate_granularity', 'params': {'granularity': 7}})
+        self.assertEqual(response.status_code, 400)
+        response = self.client.get('/api/jobs/job_inexistant')
+        self.assertEqual(response.status_code, 404)
+
+        # La réparation ne s'exécute plus dans la requête : tâche sync_repair
+        response = self.client.post('/api/sync/repair')
+        self.assertEqual(response.status_code, 202)
+        job_id = json.loads(response.data)['job']['id']
+        self.assertTrue(response.headers['Location'].endswith(f'/api/jobs/{job_id}'))
+        job = job_queue.wait(job_id, timeout=10)
+        self.assertEqual((job.kind, job.status), ('sync_repair', 'succeeded'))
+        self.assertIn('shifts_removed', job.result)
+
+    def test_metrics(self):
+        """Test des métriques Prometheus et de l'état des gestionnaires dans /api/health"""
+        self.client.get('/api/employees')
+        self.client.get('/api/page-inexistante')
+
+        response = self.client.get('/api/metrics')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.mimetype.startswith('text/plain'))
+        text = response.get_data(as_text=True)
+        self.assertIn('planning_http_request_duration_seconds_bucket{endpoint="/api/employees",method="GET",le="+Inf"}',
+                      text)
+        self.assertIn('planning_http_requests_total{endpoint="<unmatched>",method="GET",status="404"}', text)
+        self.assertIn('# TYPE planning_http_requests_in_flight gauge', text)
+        self.assertIn('planning_employees ', text)
+
+        response = self.client.get('/api/health')
+        managers = json.loads(response.data)['managers']
+        self.assertEqual(set(managers), {'employees', 'shifts', 'templates'})
+        self.assertIn('last_save', managers['shifts'])
+
+    def test_save_tracing(self):
+        """Test de la trace des sauvegardes : un lot = une sauvegarde, requête lente journalisée"""
+        employee_id = create_test_employee()
+        from app.routes.api import request_metrics, shift_manager
+
+        # Premier accès (création des données par défaut) hors de la requête mesurée
+        shift_manager.get_all_shifts()
+        operations = [{'op': 'create', 'data': {'employee_id': employee_id, 'day': 'Dimanche',
+                                                 'start_hour': hour, 'duration': 1}} for hour in (1, 3, 5)]
+        with self.assertNoLogs('app.models.metrics'):
+            response = self.client.post('/api/shifts/batch', json={'operations': operations})
+        created_ids = [result['id'] for result in json.loads(response.data)['results']]
+
+        with patch.object(request_metrics, 'slow_save_ms', -1), self.assertLogs('app.models.metrics') as logs:
+            self.client.post('/api/shifts/batch', json={'operations': [{'op': 'delete', 'id': shift_id}
+                                                                       for shift_id in created_ids]})
+        self.assertIn('POST /api/shifts/batch : 1 sauvegarde(s) (shifts x1)', logs.output[0])
+
+        text = self.client.get('/api/metrics').get_data(as_text=True)
+        self.assertIn('planning_persistence_bytes_written_total{file="shifts"}', text)
+        self.assertIn('planning_http_request_saves_bucket{endpoint="/api/shifts/batch",method="POST",le="1"}', text)
+        persistence = json.loads(self.client.get('/api/health').data)['persistence']
+        self.assertGreater(persistence['shifts']['saves'], 0)
+
+    def test_import_planning_flags(self):
+        """Test des options d'import : dry_run=1 n'enregistre rien, valeur inconnue refusée"""
+        payload = {'data': {'employees': [{'nom': 'Import', 'prenom': 'Flag', 'poste': 'serveur'}],
+                            'shifts': []}}
+        employees_before = len(json.loads(self.client.get('/api/employees?actif_only=false').data)['employees'])
+
+        response = self.client.post('/api/import/planning?dry_run=1', json=payload)
+        data = json.loads(response.data)
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(data['committed'])
+        self.assertEqual(data['valid_employees'], 1)
+        employees = json.loads(self.client.get('/api/employees?actif_only=false').data)['employees']
+        self.assertEqual(len(employees), employees_before)
+
+        response = self.client.post('/api/import/planning?dry_run=peut-etre', json=payload)
+        self.assertEqual(response.status_code, 400)
+        response = self.client.post('/api/import/planning?atomic=oui', json=payload)
+        self.assertEqual(response.status_code, 400)
+        response = self.client.post('/api/planning/fill-gaps', json={'requirements': [], 'dry_run': 'peut-etre'})
+        self.assertEqual(response.status_code, 400)
+
     def test_get_weekly_stats(self):
         """Test de récupération des statistiques hebdomadaires"""
         response = self.client.get('/api/stats/weekly')
@@ -340,6 +711,7 @@ class TestMainRoutes(unittest.TestCase):
 
     def setUp(self):
         """Configuration avant chaque test"""
+        use_temp_data(self)
         self.app = create_app('default')
         self.app.config['TESTING'] = True
 
@@ -366,6 +738,18 @@ class TestMainRoutes(unittest.TestCase):
         self.assertEqual(response.status_code, 200)
         self.assertIn(b'Planning', response.data)
 
+    def test_maintenance_routes_run_as_jobs(self):
+        """Test des routes de maintenance : tâche en file (202), granularité validée avant"""
+        from app.routes.api import job_queue
+
+        response = self.client.post('/fix-invalid-shifts')
+        self.assertEqual(response.status_code, 202)
+        job = job_queue.wait(json.loads(response.data)['job']['id'], timeout=10)
+        self.assertEqual((job.kind, job.status), ('fix_invalid_shifts', 'succeeded'))
+
+        response = self.client.post('/migrate-granularity', json={'granularity': 7})
+        self.assertEqual(response.status_code, 400)
+
     def test_planning_route_with_week(self):
         """Test de la route du planning avec paramètre semaine"""
         response = self.client.get('/planning?week=2024-25')
@@ -373,11 +757,46 @@ class TestMainRoutes(unittest.TestCase):
         self.assertEqual(response.status_code, 200)
         self.assertIn(b'Planning', response.data)
 
+    def test_planning_route_granularity_is_per_request(self):
+        """Test : la granularité demandée par une page ne modifie pas la grille par défaut"""
+        default_grid = Config.get_time_grid()
+        other = 30 if default_grid.granularity != 30 else 60
+
+        response = self.client.get(f'/planning?granularity={other}')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(f'"TIME_SLOT_GRANULARITY": {other}'.encode(), response.data)
+        self.assertIs(Config.get_time_grid(), default_grid)
+
+    def test_planning_page_render_cache(self):
+        """Test du cache de rendu : page réutilisée tant que les données de la semaine ne changent pas"""
+        employee_id = create_test_employee()
+        from app.routes import main
+
+        first = self.client.get('/planning?week=2025-40')
+        with patch.object(main, 'render_template', wraps=main.render_template) as render:
+            second = self.client.get('/planning?week=2025-40')
+            self.assertEqual(render.call_count, 0)
+            self.assertEqual(first.data, second.data)
+
+            response = self.client.post('/api/shifts/batch', json={'operations': [
+                {'op': 'create', 'data': {'employee_id': employee_id, 'day': 'Lundi', 'start_hour': 9,
+                                          'duration': 4, 'week': '2025-40'}}
+            ]})
+            created_id = json.loads(response.data)['results'][0]['id']
+
+            response = self.client.get('/planning?week=2025-40')
+            self.assertEqual(render.call_count, 1)
+            self.assertIn(b'<span id="totalShifts">1</span>', response.data)
+
+        self.client.post('/api/shifts/batch', json={'operations': [{'op': 'delete', 'id': created_id}]})
+
 class TestErrorHandling(unittest.TestCase):
     """Tests pour la gestion des erreurs"""
 
     def setUp(self):
         """Configuration avant chaque test"""
+        use_temp_data(self)
         self.app = create_app('default')
         self.app.config['TESTING'] = True
 
@@ -416,17 +835,10 @@ class TestIntegration(unittest.TestCase):
 
     def setUp(self):
         """Configuration avant chaque test"""
-        # Créer des fichiers temporaires
-        self.temp_employees_file = tempfile.NamedTemporaryFile(mode='w', delete=False, suffix='.json')
-        self.temp_shifts_file = tempfile.NamedTemporaryFile(mode='w', delete=False, suffix='.json')
-
-        self.temp_employees_file.close()
-        self.temp_shifts_file.close()
+        use_temp_data(self)
 
         self.app = create_app('default')
         self.app.config['TESTING'] = True
-        self.app.config['EMPLOYEES_FILE'] = self.temp_employees_file.name
-        self.app.config['SHIFTS_FILE'] = self.temp_shifts_file.name
 
         self.client = self.app.test_client()
         self.app_context = self.app.app_context()
@@ -436,11 +848,6 @@ class TestIntegration(unittest.TestCase):
         """Nettoyage après chaque test"""
         self.app_context.pop()
 
-        if os.path.exists(self.temp_employees_file.name):
-            os.unlink(self.temp_employees_file.name)
-        if os.path.exists(self.temp_shifts_file.name):
-            os.unlink(self.temp_shifts_file.name)
-
     def test_complete_workflow(self):
         """Test d'un workflow complet"""
         # 1. Créer un employé
@@ -504,6 +911,89 @@ class TestIntegration(unittest.TestCase):
         stats_data3 = json.loads(stats_response3.data)
         self.assertEqual(stats_data3['stats']['total_hours'], 11)  # 6+5
 
+class TestConcurrency(unittest.TestCase):
+    """Accès concurrents : lectures et écritures de nombreux threads sur les gestionnaires partagés"""
+
+    THREADS = 16
+    ROUNDS = 15
+
+    def setUp(self):
+        """Configuration avant chaque test"""
+        use_temp_data(self)
+        self.app = create_app('default')
+        self.app.config['TESTING'] = True
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+
+    def tearDown(self):
+        """Nettoyage après chaque test"""
+        self.app_context.pop()
+
+    def test_concurrent_api_stress(self):
+        """Test de charge : créations, lectures et suppressions simultanées sans erreur ni perte"""
+        employee_id = create_test_employee()
+        other_id = create_test_employee(nom='Autre')
+        from concurrent.futures import ThreadPoolExecutor
+        from app.routes import api
+
+        initial_ids = {shift.id for shift in api.shift_manager.get_all_shifts()}
+        availability = {'disponibilites': {'Dimanche': [[0, 24]]}}
+
+        def worker(index):
+            client = self.app.test_client()
+            week = f'2030-{index + 1:02d}'
+            failures = []
+            created = []
+            for round_number in range(self.ROUNDS):
+                day = Config.DAYS_OF_WEEK[round_number % len(Config.DAYS_OF_WEEK)]
+                hour = 6 + (round_number // len(Config.DAYS_OF_WEEK)) * 3
+                response = client.post('/api/shifts/batch', json={'operations': [
+                    {'op': 'create', 'data': {'employee_id': employee_id, 'day': day, 'start_hour': hour,
+                                              'duration': 2, 'week': week}}
+                ]})
+                if response.status_code != 200:
+                    failures.append(('create', response.status_code))
+                    continue
+                created.append(json.loads(response.data)['results'][0]['id'])
+
+                for url in ('/api/shifts', f'/api/shifts?week={week}', f'/api/planning/week/{week}',
+                            '/api/employees', '/api/export/planning?format=ndjson'):
+                    response = client.get(url)
+                    if response.status_code != 200:
+                        failures.append((url, response.status_code))
+                    response.close()
+
+                response = client.put(f'/api/employees/{other_id}/availability', json=availability)
+                if response.status_code != 200:
+                    failures.append(('availability', response.status_code))
+
+            data = json.loads(client.get(f'/api/shifts?week={week}').data)
+            if sorted(shift['id'] for shift in data['shifts']) != sorted(created):
+                failures.append(('lost_shifts', week))
+
+            response = client.post('/api/shifts/batch', json={'operations': [
+                {'op': 'delete', 'id': shift_id} for shift_id in created
+            ]})
+            if response.status_code != 200:
+                failures.append(('delete', response.status_code))
+            return failures
+
+        # Changements de thread très fréquents pour provoquer les entrelacements
+        switch_interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)
+        try:
+            with ThreadPoolExecutor(max_workers=self.THREADS) as executor:
+                failures = [failure for result in executor.map(worker, range(self.THREADS)) for failure in result]
+        finally:
+            sys.setswitchinterval(switch_interval)
+
+        self.assertEqual(failures, [])
+        self.assertEqual({shift.id for shift in api.shift_manager.get_all_shifts()}, initial_ids)
+        # Le fichier enregistré reflète le dernier état publié
+        with open(api.shift_manager.file_path, encoding='utf-8') as f:
+            self.assertEqual(set(json.load(f)), initial_ids)
+
+
 if __name__ == '__main__':
     # Créer une suite de tests
     loader = unittest.TestLoader()
@@ -514,6 +1004,7 @@ if __name__ == '__main__':
     suite.addTests(loader.loadTestsFromTestCase(TestMainRoutes))
     suite.addTests(loader.loadTestsFromTestCase(TestErrorHandling))
     suite.addTests(loader.loadTestsFromTestCase(TestIntegration))
+    suite.addTests(loader.loadTestsFromTestCase(TestConcurrency))
 
     # Exécuter les tests
     runner = unittest.TextTestRunner(verbosity=2)